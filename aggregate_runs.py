@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Agregacja wielu katalogów wyników (run_* z run_all.sh, run_matrix_* z run_matrix.sh)
+do długiego formatu rollupów per (run, implementation, suite, test, metric).
+
+Katalogi są przetwarzane strumieniowo: pula wątków parsuje CSV/JSON, w pamięci
+trzymanych jest co najwyżej ~2×workers runów naraz, a rollupy dopisywane są do
+pliku wyjściowego w kolejności runów.
+
+Użycie:
+    python aggregate_runs.py "results/run_*" "results/run_matrix_*"
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from bench_csv import iter_bench_csv
+
+DEFAULT_PATTERNS = ["results/run_*", "results/run_matrix_*"]
+DEFAULT_OUT = "results/aggregate/rollups.csv"
+
+SUITE_BY_PORT = {
+    4431: ("openssl", "x25519_aesgcm"),
+    4432: ("openssl", "chacha20"),
+    8443: ("openssl", "kyber_hybrid"),
+    4434: ("wolfssl", "x25519_aesgcm"),
+    4435: ("wolfssl", "chacha20"),
+    11112: ("wolfssl", "kyber_hybrid"),
+}
+
+# Klucz rollupu; aes/profile/cell (p<P>_c<C>, ed<E>) doprecyzowują runy run_matrix
+ROLLUP_KEYS = ["run", "implementation", "suite", "test", "metric"]
+ROLLUP_COLUMNS = [
+    "run",
+    "timestamp",
+    "kind",
+    "aes",
+    "profile",
+    "cell",
+    "implementation",
+    "suite",
+    "test",
+    "metric",
+    "n",
+    "mean",
+    "std",
+    "min",
+    "median",
+    "p95",
+    "max",
+]
+
+TS_RE = re.compile(r"(\d{8}_\d{6})")
+PORT_RE = re.compile(r"^[a-z]+_(\d+)")
+AES_RE = re.compile(r"AES-NI:\s*(on|off)", re.I)
+# Pola JSON, które nie są metrykami (identyfikatory / parametry przebiegu)
+NON_METRICS = {
+    "port",
+    "samples",
+    "requests",
+    "concurrency",
+    "payload_size_mb",
+    "count",
+    "early_data",
+    "timestamp",
+}
+# Klucze JSON -> nazwy metryk bench.csv (jak pairs() w run_all.sh), żeby rollupy
+# run_matrix i run_all dzieliły słownik metryk
+AVG_TIME_RE = re.compile(r"^avg_(request_)?time(_s)?$")
+
+
+def bench_metric(key: str) -> str:
+    if key == "requests_per_second":
+        return "rps"
+    if AVG_TIME_RE.match(key):
+        return "mean_time_s"
+    return key
+
+
+def run_timestamp(run_dir: Path) -> pd.Timestamp:
+    """Czas runu z nazwy katalogu (YYYYmmdd_HHMMSS), w ostateczności mtime"""
+    m = TS_RE.search(run_dir.name)
+    if m:
+        return pd.Timestamp(datetime.strptime(m.group(1), "%Y%m%d_%H%M%S"))
+    return pd.Timestamp(datetime.fromtimestamp(run_dir.stat().st_mtime))
+
+
+def expand_runs(patterns: Iterable[str]) -> List[Path]:
+    """Katalogi runów pasujące do wzorców, bez duplikatów i symlinków, posortowane po czasie"""
+    dirs = {}
+    for pat in patterns:
+        for p in glob.glob(pat):
+            path = Path(p)
+            if path.is_symlink() or not path.is_dir():
+                continue
+            if (path / "bench.csv").exists() or (path / "aes_on").is_dir() or (
+                path / "aes_off"
+            ).is_dir():
+                dirs[path.resolve()] = path
+    return sorted(dirs.values(), key=lambda p: (run_timestamp(p), p.name))
+
+
+class _Acc:
+    """Wartości (run_idx, value) per grupa, zbierane porcjami"""
+
+    def __init__(self):
+        self.runs: Dict[tuple, List[np.ndarray]] = defaultdict(list)
+        self.values: Dict[tuple, List[np.ndarray]] = defaultdict(list)
+
+    def add(self, key: tuple, runs: np.ndarray, values: np.ndarray):
+        self.runs[key].append(runs)
+        self.values[key].append(values)
+
+    def groups(self) -> Iterator[Tuple[tuple, np.ndarray, np.ndarray]]:
+        for key, vals in self.values.items():
+            yield key, np.concatenate(self.runs[key]), np.concatenate(vals)
+
+
+def _stats(values: np.ndarray) -> Dict[str, float]:
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return {}
+    return {
+        "n": len(values),
+        "mean": float(values.mean()),
+        "std": float(values.std(ddof=1)) if len(values) > 1 else 0.0,
+        "min": float(values.min()),
+        "median": float(np.median(values)),
+        "p95": float(np.percentile(values, 95)),
+        "max": float(values.max()),
+    }
+
+
+def read_aes(run_dir: Path) -> str:
+    """Tryb AES-NI runu (on/off) z config.txt; bez wpisu — z sufiksu _aesoff katalogu"""
+    txt = run_dir / "config.txt"
+    if txt.exists():
+        m = AES_RE.search(txt.read_text(errors="replace"))
+        if m:
+            return m.group(1).lower()
+    return "off" if run_dir.name.endswith("_aesoff") else "on"
+
+
+def rollup_bench_run(run_dir: Path, warmup_drop: int, chunksize: int) -> pd.DataFrame:
+    """Rollupy jednego runu run_all.sh z bench.csv (czytanego porcjami)"""
+    acc = _Acc()
+    keys = ["implementation", "suite", "test", "metric"]
+    for chunk in iter_bench_csv(run_dir / "bench.csv", chunksize=chunksize):
+        # Komórki tablicowe (raw_measurements) mają value=NaN po koercji — pomijane
+        chunk = chunk.dropna(subset=["value"])
+        for key, grp in chunk.groupby(keys, sort=False):
+            acc.add(
+                key,
+                grp["run"].to_numpy(dtype=float, na_value=np.nan),
+                grp["value"].to_numpy(dtype=float),
+            )
+
+    rows = []
+    for key, runs, values in acc.groups():
+        # Warm-up jak w analyze.prepare_data: pierwsze N runów per (impl, suite, test)
+        if warmup_drop > 0 and not np.isnan(runs).all():
+            values = values[runs > np.nanmin(runs) + warmup_drop - 1]
+        st = _stats(values)
+        if st:
+            rows.append(dict(zip(keys, key), cell="", **st))
+    df = pd.DataFrame(rows)
+    df["kind"] = "run_all"
+    df["aes"] = read_aes(run_dir)
+    df["profile"] = ""
+    return df
+
+
+def _read_json(path: Path) -> Optional[dict]:
+    try:
+        js = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    return js if isinstance(js, dict) else None
+
+
+def rollup_matrix_run(run_dir: Path) -> pd.DataFrame:
+    """Rollupy runu run_matrix.sh: aes_<on|off>/<P>/<test>[/<cell>]/<name>_<aes>.json"""
+    acc = _Acc()
+    for path in sorted(run_dir.glob("aes_*/P*/**/*.json")):
+        rel = path.relative_to(run_dir).parts
+        aes, profile, test = rel[0][len("aes_"):], rel[1], rel[2]
+        cell = rel[3] if len(rel) > 4 else ""
+        m = PORT_RE.match(path.name)
+        js = _read_json(path)
+        if not m or js is None:
+            continue
+        impl, suite = SUITE_BY_PORT.get(int(m.group(1)), ("unknown", m.group(1)))
+        for metric, value in js.items():
+            if metric in NON_METRICS or isinstance(value, bool):
+                continue
+            if isinstance(value, (int, float)):
+                acc.add(
+                    (aes, profile, cell, impl, suite, test, bench_metric(metric)),
+                    np.zeros(1),
+                    np.array([value], dtype=float),
+                )
+
+    rows = []
+    for key, _, values in acc.groups():
+        st = _stats(values)
+        if st:
+            aes, profile, cell, impl, suite, test, metric = key
+            rows.append(
+                {
+                    "aes": aes,
+                    "profile": profile,
+                    "cell": cell,
+                    "implementation": impl,
+                    "suite": suite,
+                    "test": test,
+                    "metric": metric,
+                    **st,
+                }
+            )
+    df = pd.DataFrame(rows)
+    df["kind"] = "run_matrix"
+    return df
+
+
+def rollup_run(run_dir: Path, warmup_drop: int = 3,
+               chunksize: int = 200_000) -> pd.DataFrame:
+    """Rollupy jednego katalogu (typ wykrywany po zawartości)"""
+    if (run_dir / "bench.csv").exists():
+        df = rollup_bench_run(run_dir, warmup_drop, chunksize)
+    else:
+        df = rollup_matrix_run(run_dir)
+    if df.empty:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    df["run"] = run_dir.name
+    df["timestamp"] = run_timestamp(run_dir)
+    df["n"] = df["n"].astype(int)
+    return df[ROLLUP_COLUMNS]
+
+
+def iter_rollups(run_dirs: List[Path], workers: int = 4, warmup_drop: int = 3,
+                 chunksize: int = 200_000) -> Iterator[pd.DataFrame]:
+    """Rollupy runów w kolejności wejścia; w locie najwyżej 2×workers zadań"""
+    window = max(1, 2 * workers)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = deque()
+        it = iter(run_dirs)
+        for d in it:
+            pending.append((d, pool.submit(rollup_run, d, warmup_drop, chunksize)))
+            if len(pending) >= window:
+                break
+        while pending:
+            d, fut = pending.popleft()
+            try:
+                yield fut.result()
+            except Exception as e:
+                print(f"❌ {d.name}: {e}")
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.append((nxt, pool.submit(rollup_run, nxt, warmup_drop, chunksize)))
+
+
+def aggregate_runs(patterns: Iterable[str], out: Path, workers: int = 4,
+                   warmup_drop: int = 3, chunksize: int = 200_000) -> pd.DataFrame:
+    """Zapisuje rollupy wszystkich runów do out (CSV, dopisywanie porcjami) i je zwraca"""
+    run_dirs = expand_runs(patterns)
+    if not run_dirs:
+        print(f"❌ Brak katalogów runów dla: {' '.join(patterns)}")
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(".tmp")
+    t0 = time.perf_counter()
+    n_rows = 0
+    with open(tmp, "w", newline="") as f:
+        f.write(",".join(ROLLUP_COLUMNS) + "\n")
+        for df in iter_rollups(run_dirs, workers, warmup_drop, chunksize):
+            df.to_csv(f, header=False, index=False)
+            n_rows += len(df)
+    os.replace(tmp, out)
+    print(
+        f"📊 {len(run_dirs)} runów -> {n_rows} rollupów w {out} "
+        f"({time.perf_counter() - t0:.1f} s)"
+    )
+    return read_rollups(out)
+
+
+def read_rollups(path) -> pd.DataFrame:
+    """Wczytuje plik rollupów z poprawnymi typami"""
+    df = pd.read_csv(
+        path,
+        parse_dates=["timestamp"],
+        dtype={"aes": str, "profile": str, "cell": str, "suite": str},
+        keep_default_na=False,
+        na_values={c: [""] for c in ROLLUP_COLUMNS[10:]},
+    )
+    return df
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Agregacja wielu runów do rollupów (CSV)")
+    p.add_argument(
+        "patterns",
+        nargs="*",
+        default=DEFAULT_PATTERNS,
+        help="wzorce glob katalogów runów (domyślnie results/run_* i results/run_matrix_*)",
+    )
+    p.add_argument("-o", "--out", default=DEFAULT_OUT, help="plik wyjściowy CSV")
+    p.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=min(8, os.cpu_count() or 1),
+        help="liczba wątków parsujących",
+    )
+    p.add_argument(
+        "--chunksize", type=int, default=200_000, help="wierszy bench.csv na porcję"
+    )
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    warmup_drop = int(os.environ.get("WARMUP_DROP", "3"))
+    aggregate_runs(args.patterns, Path(args.out), args.workers, warmup_drop, args.chunksize)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse
+import json
 import sys
 import re
 import pandas as pd
@@ -8,7 +9,26 @@ import seaborn as sns
 import numpy as np
 import os
 from pathlib import Path
-from scipy.stats import spearmanr
+
+from bench_csv import read_bench_csv
+from bootstrap_ci import (
+    DEFAULT_N_BOOT,
+    DEFAULT_SEED,
+    bootstrap_arrays,
+    bootstrap_frame,
+    format_ci,
+)
+from figure_cache import FigureCache, FigureSpec, default_jobs, print_report
+from aggregate_runs import DEFAULT_OUT, ROLLUP_KEYS, aggregate_runs, read_aes
+from microbench import (
+    fit_micro_macro,
+    latest_micro,
+    load_micro,
+    micro_macro_table,
+    plot_micro_macro,
+)
+from raw_samples import iter_raw
+from sentinel import exclude_drift
 
 
 def parse_args():
@@ -19,52 +39,41 @@ def parse_args():
         default="results/latest",
         help="katalog run_... (domyślnie results/latest)",
     )
+    p.add_argument(
+        "--runs",
+        nargs="+",
+        metavar="GLOB",
+        help="tryb wielu runów: wzorce katalogów run_*/run_matrix_* -> rollupy i trendy",
+    )
     p.add_argument(
         "-s",
         "--separate",
         action="store_true",
         help="generuj każdy wykres osobno",
     )
+    p.add_argument(
+        "--force",
+        action="store_true",
+        help="przerysuj wszystkie wykresy, ignoruj cache",
+    )
+    p.add_argument(
+        "--exclude-drift",
+        action="store_true",
+        help="pomiń komórki oznaczone przez sentinel (sentinel_flag w bench.csv)",
+    )
+    p.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=default_jobs(),
+        help="liczba procesów renderujących (domyślnie liczba rdzeni)",
+    )
     return p.parse_args()
 
 
 def read_csv_robust(path):
-    try:
-        return pd.read_csv(path)
-    except pd.errors.ParserError:
-        rows = []
-        with open(path) as f:
-            hdr = f.readline().strip().split(",")
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                if "[" in line:
-                    parts, cur = [], ""
-                    inarr = False
-                    for ch in line:
-                        if ch == "[":
-                            inarr = True
-                            cur += ch
-                        elif ch == "]":
-                            inarr = False
-                            cur += ch
-                        elif ch == "," and not inarr:
-                            parts.append(cur)
-                            cur = ""
-                        else:
-                            cur += ch
-                    parts.append(cur)
-                else:
-                    parts = line.split(",")
-                while len(parts) < len(hdr):
-                    parts.append("")
-                rows.append({hdr[i]: parts[i] for i in range(len(hdr))})
-        df = pd.DataFrame(rows)
-        for c in ["run", "value"]:
-            if c in df:
-                df[c] = pd.to_numeric(df[c], errors="coerce")
-        return df
+    # Tablice [a,b,...] obsługuje bench_csv (jedno przejście, typy zachowane)
+    return read_bench_csv(path)
 
 
 def load_data(run_dir: Path):
@@ -161,13 +170,61 @@ def annotate_bars(ax, fmt="{:.0f}", offset=0.02):
             )
 
 
-def create_visualizations(df: pd.DataFrame, run_dir: Path, separate: bool):
-    run_name = run_dir.name
-    figs = Path("figures") / run_name / "analyze"
-    figs.mkdir(exist_ok=True, parents=True)
-    sns.set_palette("husl")
+# Maks. punktów na violin (podpróbka z równym krokiem)
+VIOLIN_MAX_POINTS = 20_000
+
+
+def _load_raw_latencies(run_dir: Path):
+    """Czasy żądań bulk per komórka (port, payload_mb, concurrency) z {run}/bulk_*.raw"""
+    cells = {}
+    for raw in sorted(iter_raw(run_dir, "bulk_*.raw"), key=lambda r: r.path.stat().st_mtime):
+        if len(raw):
+            # Duplikaty tej samej komórki (bulk_<port>.raw / pełna nazwa): wygrywa nowszy
+            cells[(raw.port, raw.payload_mb, raw.concurrency)] = raw.latency_s()
+    if cells:
+        return cells
+    # Starsze runy: results/raw/bulk_<port>.txt (nadpisywane — komórka nieznana)
+    for p in sorted((Path("results") / "raw").glob("bulk_*.txt")):
+        m = re.search(r"bulk_(\d+)\.txt", p.name)
+        vals = np.array(
+            [float(x) for x in p.read_text().splitlines() if x.strip()], dtype=float
+        )
+        if m and len(vals):
+            cells[(int(m.group(1)), None, None)] = vals
+    if cells:
+        print("⚠️  Brak bulk_*.raw w runie — używam results/raw/bulk_*.txt (ostatnia komórka)")
+    return cells
+
+
+def _cell_label(key) -> str:
+    port, payload, conc = key
+    return str(port) if payload is None else f"{port}\n{payload:g}MB c{conc}"
+
+
+def _load_bulk_rows(run_dir: Path):
+    """Wiersze z bulk_*.json w katalogu runu (port, throughput, payload, concurrency)"""
+    bulk_rows = []
+    for j in run_dir.glob("bulk_*.json"):
+        try:
+            js = pd.read_json(j, typ="series")
+            port = int(re.search(r"bulk_(\d+)\.json", j.name).group(1))
+            bulk_rows.append(
+                {
+                    "port": port,
+                    "throughput_mb_s": float(js.get("throughput_mb_s", np.nan)),
+                    "throughput_rps": float(js.get("requests_per_second", np.nan)),
+                    "avg_request_time_s": float(js.get("avg_request_time_s", np.nan)),
+                    "payload_size_mb": float(js.get("payload_size_mb", np.nan)),
+                    "concurrency": int(js.get("concurrency", 1)),
+                }
+            )
+        except Exception:
+            continue
+    return bulk_rows
+
 
-    # === 0) Optional: bytes-on-the-wire table snapshot ===
+def table_bytes_on_wire_csv(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """Kopia tabeli bytes-on-the-wire do katalogu wykresów"""
     bow_csv = Path("results") / "bytes_on_wire.csv"
     if bow_csv.exists():
         try:
@@ -176,7 +233,9 @@ def create_visualizations(df: pd.DataFrame, run_dir: Path, separate: bool):
         except Exception:
             pass
 
-    # === 1) TLS Overview (4-in-1) ===
+
+def fig_tls_overview(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """TLS Overview (4-in-1)"""
     fig, axes = plt.subplots(2, 2, figsize=(16, 12))
     fig.suptitle("TLS Performance: Post-Quantum vs Traditional", fontsize=16)
 
@@ -217,73 +276,76 @@ def create_visualizations(df: pd.DataFrame, run_dir: Path, separate: bool):
     fig.savefig(figs / "tls_overview.png", dpi=300)
     plt.close(fig)
 
-    # === 2) Separate plots ===
-    if separate:
-        # 2a) Handshake latency by implementation
-        if "handshake_ms" in df:
-            fig = plt.figure(figsize=(8, 5))
-            ax = sns.barplot(data=df, x="implementation", y="handshake_ms", hue="suite")
-            ax.set_title("Handshake Latency (ms) by Implementation")
-            ax.tick_params(axis="x", rotation=45)
-            annotate_bars(ax, fmt="{:.0f}")
-            plt.tight_layout()
-            fig.savefig(figs / "handshake_latency.png", dpi=300)
-            plt.close(fig)
 
-        # 2b) Throughput by implementation
-        if "throughput_rps" in df:
-            fig = plt.figure(figsize=(8, 5))
-            ax = sns.barplot(
-                data=df, x="implementation", y="throughput_rps", hue="suite"
-            )
-            ax.set_title("Throughput (RPS) by Implementation")
-            ax.tick_params(axis="x", rotation=45)
-            annotate_bars(ax, fmt="{:.1f}")
-            plt.tight_layout()
-            fig.savefig(figs / "throughput.png", dpi=300)
-            plt.close(fig)
+def fig_separate_plots(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """Osobne wykresy (--separate)"""
+    # 2a) Handshake latency by implementation
+    if "handshake_ms" in df:
+        fig = plt.figure(figsize=(8, 5))
+        ax = sns.barplot(data=df, x="implementation", y="handshake_ms", hue="suite")
+        ax.set_title("Handshake Latency (ms) by Implementation")
+        ax.tick_params(axis="x", rotation=45)
+        annotate_bars(ax, fmt="{:.0f}")
+        plt.tight_layout()
+        fig.savefig(figs / "handshake_latency.png", dpi=300)
+        plt.close(fig)
 
-        # 2c) Handshake latency by algorithm
-        if "handshake_ms" in df:
-            fig = plt.figure(figsize=(8, 5))
-            ax = sns.boxplot(data=df, x="algorithm", y="handshake_ms")
-            ax.set_title("Handshake Latency (ms) by Algorithm")
-            ax.tick_params(axis="x", rotation=45)
-            plt.tight_layout()
-            fig.savefig(figs / "handshake_by_algo.png", dpi=300)
-            plt.close(fig)
+    # 2b) Throughput by implementation
+    if "throughput_rps" in df:
+        fig = plt.figure(figsize=(8, 5))
+        ax = sns.barplot(
+            data=df, x="implementation", y="throughput_rps", hue="suite"
+        )
+        ax.set_title("Throughput (RPS) by Implementation")
+        ax.tick_params(axis="x", rotation=45)
+        annotate_bars(ax, fmt="{:.1f}")
+        plt.tight_layout()
+        fig.savefig(figs / "throughput.png", dpi=300)
+        plt.close(fig)
 
-        # 2d) Throughput by algorithm
-        if "throughput_rps" in df:
-            fig = plt.figure(figsize=(8, 5))
-            ax = sns.boxplot(data=df, x="algorithm", y="throughput_rps")
-            ax.set_title("Throughput (RPS) by Algorithm")
-            ax.tick_params(axis="x", rotation=45)
-            plt.tight_layout()
-            fig.savefig(figs / "throughput_by_algo.png", dpi=300)
-            plt.close(fig)
+    # 2c) Handshake latency by algorithm
+    if "handshake_ms" in df:
+        fig = plt.figure(figsize=(8, 5))
+        ax = sns.boxplot(data=df, x="algorithm", y="handshake_ms")
+        ax.set_title("Handshake Latency (ms) by Algorithm")
+        ax.tick_params(axis="x", rotation=45)
+        plt.tight_layout()
+        fig.savefig(figs / "handshake_by_algo.png", dpi=300)
+        plt.close(fig)
 
-        # 2e) Response time distribution
-        if "response_time_s" in df:
-            fig = plt.figure(figsize=(8, 5))
-            ax = sns.violinplot(data=df, x="quantum_resistant", y="response_time_s")
-            ax.set_title("Response Time Distribution")
-            plt.tight_layout()
-            fig.savefig(figs / "response_dist.png", dpi=300)
-            plt.close(fig)
+    # 2d) Throughput by algorithm
+    if "throughput_rps" in df:
+        fig = plt.figure(figsize=(8, 5))
+        ax = sns.boxplot(data=df, x="algorithm", y="throughput_rps")
+        ax.set_title("Throughput (RPS) by Algorithm")
+        ax.tick_params(axis="x", rotation=45)
+        plt.tight_layout()
+        fig.savefig(figs / "throughput_by_algo.png", dpi=300)
+        plt.close(fig)
+
+    # 2e) Response time distribution
+    if "response_time_s" in df:
+        fig = plt.figure(figsize=(8, 5))
+        ax = sns.violinplot(data=df, x="quantum_resistant", y="response_time_s")
+        ax.set_title("Response Time Distribution")
+        plt.tight_layout()
+        fig.savefig(figs / "response_dist.png", dpi=300)
+        plt.close(fig)
+
+    # 2f) TTFB by suite (if present)
+    if "ttfb_s" in df:
+        fig = plt.figure(figsize=(8, 5))
+        ax = sns.barplot(data=df, x="suite", y="ttfb_s")
+        ax.set_title("TTFB (s) by Suite")
+        ax.tick_params(axis="x", rotation=45)
+        annotate_bars(ax, fmt="{:.3f}")
+        plt.tight_layout()
+        fig.savefig(figs / "ttfb_by_suite.png", dpi=300)
+        plt.close(fig)
 
-        # 2f) TTFB by suite (if present)
-        if "ttfb_s" in df:
-            fig = plt.figure(figsize=(8, 5))
-            ax = sns.barplot(data=df, x="suite", y="ttfb_s")
-            ax.set_title("TTFB (s) by Suite")
-            ax.tick_params(axis="x", rotation=45)
-            annotate_bars(ax, fmt="{:.3f}")
-            plt.tight_layout()
-            fig.savefig(figs / "ttfb_by_suite.png", dpi=300)
-            plt.close(fig)
 
-    # === 3) Post-Quantum Impact ===
+def fig_post_quantum_impact(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """Post-Quantum Impact"""
     metrics = ["handshake_ms", "throughput_rps", "response_time_s"]
     present = [m for m in metrics if m in df]
     if present:
@@ -303,7 +365,9 @@ def create_visualizations(df: pd.DataFrame, run_dir: Path, separate: bool):
         fig2.savefig(figs / "post_quantum_impact.png", dpi=300)
         plt.close(fig2)
 
-    # === 4) Implementation Comparison (2-in-1) ===
+
+def fig_impl_comparison(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """Porównanie implementacji (2-in-1)"""
     if (
         df.implementation.nunique() > 1
         and "throughput_rps" in df
@@ -327,7 +391,9 @@ def create_visualizations(df: pd.DataFrame, run_dir: Path, separate: bool):
         fig3.savefig(figs / "impl_comparison.png", dpi=300)
         plt.close(fig3)
 
-    # === 5) Throughput vs Concurrency (if available) ===
+
+def fig_throughput_vs_concurrency(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """Throughput vs concurrency z bulk_*.json runu"""
     # Try to load raw bulk JSON to fetch concurrency and payload
     raw_dir = run_dir
     try_json = list(raw_dir.glob("bulk_*.json"))
@@ -352,34 +418,37 @@ def create_visualizations(df: pd.DataFrame, run_dir: Path, separate: bool):
             fig.savefig(figs / "throughput_vs_concurrency.png", dpi=300)
             plt.close(fig)
 
-    # === 6) Micro → Macro correlation (AES only, if resource_*.json present) ===
-    res_files = list(run_dir.glob("resource_*.json"))
-    if res_files and "throughput_mb_s" in df and (df["suite"] == "x25519_aesgcm").any():
-        try:
-            res_df = pd.concat([pd.read_json(p) for p in res_files], ignore_index=True)
-            if "throughput_mb_s" in res_df:
-                micro_mb_s = res_df["throughput_mb_s"].astype(float).mean()
-                tls_aes = df[df["suite"] == "x25519_aesgcm"].copy()
-                tls_aes = tls_aes.dropna(
-                    subset=["throughput_mb_s"]
-                )  # MB/s already mapped if present
-                if not tls_aes.empty:
-                    x = [micro_mb_s] * len(tls_aes)
-                    y = tls_aes["throughput_mb_s"].astype(float).tolist()
-                    rho, p = spearmanr(x, y)
-                    fig = plt.figure(figsize=(6, 5))
-                    plt.scatter(x, y, alpha=0.6)
-                    plt.xlabel("Microbench (AES speed) MB/s")
-                    plt.ylabel("TLS Throughput (MB/s) — AES-GCM")
-                    plt.title(f"Micro → Macro correlation (Spearman ρ: n/a)")
-                    # With constant x, Spearman is undefined; still show scatter line
-                    plt.tight_layout()
-                    fig.savefig(figs / "micro_macro_correlation.png", dpi=300)
-                    plt.close(fig)
-        except Exception:
-            pass
 
-    # === 7) Render extras: bytes-on-the-wire table PNG and TTFB bar chart ===
+def fig_micro_macro(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """Micro → Macro: bulk MB/s runu vs openssl speed / wolfCrypt (microbench.csv)"""
+    micro = load_micro(latest_micro(Path("results")))
+    if micro.empty:
+        return
+    aes = read_aes(run_dir)
+    rows = []
+    for j in run_dir.glob("bulk_*.json"):
+        m = re.match(r"bulk_(\d+)", j.name)
+        try:
+            thr = json.loads(j.read_text()).get("throughput_mb_s")
+        except (OSError, ValueError):
+            continue
+        if m and isinstance(thr, (int, float)) and thr > 0:
+            rows.append({"port": int(m.group(1)), "aes": aes, "macro_mb_s": float(thr)})
+    if not rows:
+        return
+    # Kilka komórek bulk na port -> mediana throughput
+    macro = pd.DataFrame(rows).groupby(["port", "aes"], as_index=False).median()
+    t = micro_macro_table(micro, macro)
+    if t.empty:
+        return
+    fit = fit_micro_macro(t)
+    t.to_csv(figs / "micro_macro.csv", index=False)
+    plot_micro_macro(t, fit, figs / "micro_macro_correlation.png", f"AES-NI {aes} — ")
+
+
+def fig_bytes_on_wire(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """Tabela bytes-on-the-wire jako PNG"""
+    bow_csv = Path("results") / "bytes_on_wire.csv"
     try:
         if bow_csv.exists():
             bow = pd.read_csv(bow_csv)
@@ -402,6 +471,9 @@ def create_visualizations(df: pd.DataFrame, run_dir: Path, separate: bool):
     except Exception:
         pass
 
+
+def fig_ttfb_by_port(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """TTFB i całkowity czas per port"""
     try:
         ttfb_files = list(Path("results").glob("ttfb_*.json"))
         rows = []
@@ -434,49 +506,33 @@ def create_visualizations(df: pd.DataFrame, run_dir: Path, separate: bool):
     except Exception:
         pass
 
-    # Handshake percentiles + 95% CI and CDF
-    if "handshake_ms" in df:
-        g = df.groupby(["implementation", "suite"])["handshake_ms"]
-        stats = g.describe(percentiles=[0.5, 0.95]).reset_index()
 
-        ci_rows = []
-        for (impl, suite), grp in df.dropna(subset=["handshake_ms"]).groupby(
-            ["implementation", "suite"]
-        ):
-            x = grp["handshake_ms"].astype(float).values
-            if len(x) > 1:
-                m = x.mean()
-                s = x.std(ddof=1)
-                n = len(x)
-                se = s / max(np.sqrt(n), 1)
-                ci95 = 1.96 * se
-            else:
-                m = x.mean() if len(x) else np.nan
-                ci95 = np.nan
-            ci_rows.append(
-                {"implementation": impl, "suite": suite, "mean": m, "ci95": ci95}
+def fig_handshake_ci(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """Handshake: średnia z bootstrap 95% CI (BCa) i CDF per suite"""
+    if "handshake_ms" in df:
+        ci = bootstrap_frame(
+            df, ["implementation", "suite"], "handshake_ms", stats=("mean",)
+        )
+        impls = sorted(ci["implementation"].unique())
+        suites_ci = sorted(ci["suite"].unique())
+        width = 0.8 / max(len(suites_ci), 1)
+        fig, ax = plt.subplots(figsize=(10, 6))
+        for j, suite in enumerate(suites_ci):
+            sub = ci[ci.suite == suite].set_index("implementation").reindex(impls)
+            xs = np.arange(len(impls)) - 0.4 + width * (j + 0.5)
+            est = sub["estimate"].to_numpy(dtype=float)
+            yerr = np.vstack(
+                [
+                    est - sub["ci_lo"].to_numpy(dtype=float),
+                    sub["ci_hi"].to_numpy(dtype=float) - est,
+                ]
             )
-        ci = pd.DataFrame(ci_rows)
-        fig = plt.figure(figsize=(10, 6))
-        ax = sns.barplot(data=ci, x="implementation", y="mean", hue="suite", ci=None)
-        # add error bars
-        for i, p in enumerate(ax.patches):
-            impls = ci["implementation"].unique()
-            # patches order: each impl repeated per hue
-            idx = i
-            y = p.get_height()
-            # corresponding ci95
-            row = ci.iloc[idx]
-            if pd.notna(row.get("ci95", np.nan)):
-                ax.errorbar(
-                    x=p.get_x() + p.get_width() / 2,
-                    y=y,
-                    yerr=row["ci95"],
-                    fmt="none",
-                    ecolor="black",
-                    capsize=3,
-                )
-        ax.set_title("Handshake: mean ±95% CI (ms)")
+            ax.bar(xs, est, width, label=suite)
+            ax.errorbar(xs, est, yerr=yerr, fmt="none", ecolor="black", capsize=3)
+        ax.set_xticks(np.arange(len(impls)))
+        ax.set_xticklabels(impls)
+        ax.legend(title="suite")
+        ax.set_title("Handshake: mean, bootstrap 95% CI (BCa) (ms)")
         ax.set_ylabel("ms")
         plt.tight_layout()
         fig.savefig(figs / "handshake_ci.png", dpi=300)
@@ -501,25 +557,10 @@ def create_visualizations(df: pd.DataFrame, run_dir: Path, separate: bool):
             fig.savefig(figs / f"handshake_cdf_{sname}.png", dpi=300)
             plt.close(fig)
 
-    # Throughput panels per payload and concurrency
-    bulk_files = list(run_dir.glob("bulk_*.json"))
-    bulk_rows = []
-    for j in bulk_files:
-        try:
-            js = pd.read_json(j, typ="series")
-            port = int(re.search(r"bulk_(\d+)\.json", j.name).group(1))
-            bulk_rows.append(
-                {
-                    "port": port,
-                    "throughput_mb_s": float(js.get("throughput_mb_s", np.nan)),
-                    "throughput_rps": float(js.get("requests_per_second", np.nan)),
-                    "avg_request_time_s": float(js.get("avg_request_time_s", np.nan)),
-                    "payload_size_mb": float(js.get("payload_size_mb", np.nan)),
-                    "concurrency": int(js.get("concurrency", 1)),
-                }
-            )
-        except Exception:
-            continue
+
+def fig_throughput_panels(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """Panele throughput per payload/concurrency"""
+    bulk_rows = _load_bulk_rows(run_dir)
     if bulk_rows:
         bd = pd.DataFrame(bulk_rows).dropna(subset=["throughput_mb_s"])
 
@@ -554,7 +595,9 @@ def create_visualizations(df: pd.DataFrame, run_dir: Path, separate: bool):
         fig.savefig(figs / "response_time_vs_payload.png", dpi=300)
         plt.close(fig)
 
-    # 0-RTT vs full POST (TTFB and total)
+
+def fig_0rtt_vs_full(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """0-RTT vs full POST"""
     simple_files = list(run_dir.glob("simple_*.json"))
     full_files = list(run_dir.glob("fullpost_*.json"))
     s_rows, f_rows = [], []
@@ -596,32 +639,41 @@ def create_visualizations(df: pd.DataFrame, run_dir: Path, separate: bool):
         fig.savefig(figs / "0rtt_vs_full.png", dpi=300)
         plt.close(fig)
 
-    # Bulk distributions (hist/violin) from raw
-    raw_txt = list((Path("results") / "raw").glob("bulk_*.txt"))
-    if raw_txt:
-        dist = []
-        for p in raw_txt:
-            try:
-                vals = [float(x) for x in Path(p).read_text().splitlines() if x.strip()]
-                port = int(re.search(r"bulk_(\d+)\.txt", p.name).group(1))
-                for v in vals:
-                    dist.append({"port": port, "time_s": v})
-            except Exception:
-                continue
-        dd = pd.DataFrame(dist)
-        for payload in sorted(bd["payload_size_mb"].unique()) if bulk_rows else [None]:
-            fig = plt.figure(figsize=(10, 4))
-            ax1 = plt.subplot(1, 2, 1)
-            sns.histplot(data=dd, x="time_s", hue="port", bins=30, kde=False, ax=ax1)
-            ax1.set_title("Bulk per-request time histogram")
-            ax2 = plt.subplot(1, 2, 2)
-            sns.violinplot(data=dd, x="port", y="time_s", ax=ax2)
-            ax2.set_title("Bulk per-request time violin")
-            plt.tight_layout()
-            fig.savefig(figs / f"bulk_distributions.png", dpi=300)
-            plt.close(fig)
 
-    # === 12) NetEm profiles (if config.txt includes delay/loss) ===
+def fig_bulk_distributions(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """Rozkłady czasów bulk (hist/violin) z surowych próbek per komórka"""
+    cells = _load_raw_latencies(run_dir)
+    if not cells:
+        return
+    keys = sorted(cells, key=lambda k: (k[0], k[1] or 0, k[2] or 0))
+    lo = min(float(cells[k].min()) for k in keys)
+    hi = max(float(cells[k].max()) for k in keys)
+    edges = np.linspace(lo, hi if hi > lo else lo + 1e-9, 31)
+    fig = plt.figure(figsize=(max(10, 1.2 * len(keys) + 4), 4))
+    ax1 = plt.subplot(1, 2, 1)
+    for k in keys:
+        # Histogram liczony w numpy — bez budowania DataFrame z milionów próbek
+        dens, _ = np.histogram(cells[k], bins=edges, density=True)
+        ax1.stairs(dens, edges, label=_cell_label(k).replace("\n", " "), alpha=0.8)
+    ax1.set_xlabel("time_s")
+    ax1.set_ylabel("Density")
+    ax1.legend(fontsize=7)
+    ax1.set_title("Bulk per-request time histogram")
+    ax2 = plt.subplot(1, 2, 2)
+    # Violin z podpróbki (równy krok) — kształt rozkładu bez kosztu KDE na pełnych danych
+    sub = [cells[k][:: max(1, len(cells[k]) // VIOLIN_MAX_POINTS)] for k in keys]
+    ax2.violinplot(sub, showmedians=True)
+    ax2.set_xticks(range(1, len(keys) + 1))
+    ax2.set_xticklabels([_cell_label(k) for k in keys], fontsize=7)
+    ax2.set_ylabel("time_s")
+    ax2.set_title("Bulk per-request time violin")
+    plt.tight_layout()
+    fig.savefig(figs / f"bulk_distributions.png", dpi=300)
+    plt.close(fig)
+
+
+def fig_netem_profile(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """Profil NetEm z config.txt"""
     # This run-level, so here we only annotate present delay/loss into a small figure
     if run_dir.joinpath("config.txt").exists():
         try:
@@ -639,31 +691,28 @@ def create_visualizations(df: pd.DataFrame, run_dir: Path, separate: bool):
         except Exception:
             pass
 
-    # Handshake percentiles + summary table
+
+def fig_handshake_table(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """Tabela p50/p95/CI handshake"""
     if "handshake_ms" in df:
         try:
+            ci = bootstrap_frame(
+                df,
+                ["implementation", "suite"],
+                "handshake_ms",
+                stats=("median", "p95", "mean"),
+            )
             tbl_rows = []
-            for (impl, suite), grp in df.groupby(
-                ["implementation", "suite"], sort=False
-            ):
-                vals = grp["handshake_ms"].astype(float).dropna().values
-                if len(vals) == 0:
-                    continue
-                p50 = np.percentile(vals, 50)
-                p95 = np.percentile(vals, 95)
-                m = np.mean(vals)
-                s = np.std(vals, ddof=1) if len(vals) > 1 else 0.0
-                n = len(vals)
-                ci95 = 1.96 * (s / np.sqrt(n)) if n > 1 else 0.0
+            for (impl, suite), grp in ci.groupby(["implementation", "suite"], sort=False):
+                r = grp.set_index("stat")
                 tbl_rows.append(
                     {
                         "implementation": impl,
                         "suite": suite,
-                        "p50_ms": round(p50, 1),
-                        "p95_ms": round(p95, 1),
-                        "mean_ms": round(m, 1),
-                        "ci95_ms": round(ci95, 1),
-                        "n": n,
+                        "p50_ms": format_ci(*r.loc["median", ["estimate", "ci_lo", "ci_hi"]]),
+                        "p95_ms": format_ci(*r.loc["p95", ["estimate", "ci_lo", "ci_hi"]]),
+                        "mean_ms": format_ci(*r.loc["mean", ["estimate", "ci_lo", "ci_hi"]]),
+                        "n": int(r.loc["mean", "n"]),
                     }
                 )
             if tbl_rows:
@@ -687,37 +736,35 @@ def create_visualizations(df: pd.DataFrame, run_dir: Path, separate: bool):
         except Exception:
             pass
 
-    # Throughput tail latency (p95/p99) per payload and concurrency from raw
+
+def fig_tail_latency_table(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """Tail latency (p95/p99) z raw"""
     try:
-        raw_txt = list((Path("results") / "raw").glob("bulk_*.txt"))
-        if raw_txt:
-            # Build a mapping port->times
-            port_to_times = {}
-            for p in raw_txt:
-                try:
-                    port = int(re.search(r"bulk_(\d+)\.txt", p.name).group(1))
-                    vals = [
-                        float(x) for x in Path(p).read_text().splitlines() if x.strip()
-                    ]
-                    if vals:
-                        port_to_times[port] = vals
-                except Exception:
-                    continue
-            # Tail stats per port
+        cells = _load_raw_latencies(run_dir)
+        if cells:
+            # Tail stats per komórka (bootstrap 95% CI)
+            keys = sorted(cells, key=lambda k: (k[0], k[1] or 0, k[2] or 0))
+            res = bootstrap_arrays([cells[k] for k in keys], stats=("p95", "p99"))
             tail_rows = []
-            for port, vals in port_to_times.items():
-                p95 = np.percentile(vals, 95)
-                p99 = np.percentile(vals, 99)
+            for i, key in enumerate(keys):
                 tail_rows.append(
                     {
-                        "port": port,
-                        "p95_s": round(p95, 4),
-                        "p99_s": round(p99, 4),
-                        "n": len(vals),
+                        "port": key[0],
+                        "payload_mb": "-" if key[1] is None else f"{key[1]:g}",
+                        "c": "-" if key[2] is None else key[2],
+                        "p95_s": format_ci(
+                            res["p95"]["estimate"][i], res["p95"]["lo"][i],
+                            res["p95"]["hi"][i], digits=4,
+                        ),
+                        "p99_s": format_ci(
+                            res["p99"]["estimate"][i], res["p99"]["lo"][i],
+                            res["p99"]["hi"][i], digits=4,
+                        ),
+                        "n": len(cells[key]),
                     }
                 )
             if tail_rows:
-                tdf = pd.DataFrame(tail_rows).sort_values("port")
+                tdf = pd.DataFrame(tail_rows)
                 fig = plt.figure(figsize=(6, max(2, 0.4 * len(tdf) + 1)))
                 ax = fig.add_subplot(111)
                 ax.axis("off")
@@ -742,7 +789,24 @@ def create_visualizations(df: pd.DataFrame, run_dir: Path, separate: bool):
     except Exception:
         pass
 
-    # PQ negotiated group evidence (instructions saved to txt)
+
+# Metryki z bench.csv, dla których liczone są CI w bootstrap_ci.csv
+CI_METRICS = ["handshake_ms", "throughput_rps", "throughput_mb_s", "response_time_s", "ttfb_s"]
+
+
+def table_bootstrap_ci(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """Bootstrap CI (mean/median/p95/p99) dla każdej metryki i (implementation, suite)"""
+    frames = [
+        bootstrap_frame(df, ["implementation", "suite"], m)
+        for m in CI_METRICS
+        if m in df
+    ]
+    if frames:
+        pd.concat(frames, ignore_index=True).to_csv(figs / "bootstrap_ci.csv", index=False)
+
+
+def note_pq_negotiation(df: pd.DataFrame, run_dir: Path, figs: Path):
+    """Instrukcja weryfikacji negocjowanej grupy PQ"""
     try:
         pq_note = figs / "pq_negotiation_howto.txt"
         pq_note.write_text(
@@ -756,12 +820,194 @@ def create_visualizations(df: pd.DataFrame, run_dir: Path, separate: bool):
         pass
 
 
+# Figury analyze.py: (funkcja, wejścia — {run} = katalog runu, wyjścia w figs/)
+ANALYZE_FIGURES = [
+    (table_bytes_on_wire_csv, ["results/bytes_on_wire.csv"], ["bytes_on_wire_table.csv"]),
+    (fig_tls_overview, ["{run}/bench.csv"], ["tls_overview.png"]),
+    (
+        fig_separate_plots,
+        ["{run}/bench.csv"],
+        [
+            "handshake_latency.png",
+            "throughput.png",
+            "handshake_by_algo.png",
+            "throughput_by_algo.png",
+            "response_dist.png",
+            "ttfb_by_suite.png",
+        ],
+    ),
+    (fig_post_quantum_impact, ["{run}/bench.csv"], ["post_quantum_impact.png"]),
+    (fig_impl_comparison, ["{run}/bench.csv"], ["impl_comparison.png"]),
+    (fig_throughput_vs_concurrency, ["{run}/bulk_*.json"], ["throughput_vs_concurrency.png"]),
+    (
+        fig_micro_macro,
+        ["{run}/bulk_*.json", "{run}/config.txt", "results/microbench/*/microbench.csv"],
+        ["micro_macro_correlation.png", "micro_macro.csv"],
+    ),
+    (fig_bytes_on_wire, ["results/bytes_on_wire.csv"], ["bytes_on_wire.png"]),
+    (fig_ttfb_by_port, ["results/ttfb_*.json"], ["ttfb_by_port.png"]),
+    (fig_handshake_ci, ["{run}/bench.csv"], ["handshake_ci.png", "handshake_cdf_*.png"]),
+    (
+        fig_throughput_panels,
+        ["{run}/bulk_*.json"],
+        ["throughput_panels.png", "response_time_vs_payload.png"],
+    ),
+    (
+        fig_0rtt_vs_full,
+        ["{run}/simple_*.json", "{run}/fullpost_*.json"],
+        ["0rtt_vs_full.png"],
+    ),
+    (
+        fig_bulk_distributions,
+        ["{run}/bulk_*.raw", "results/raw/bulk_*.txt"],
+        ["bulk_distributions.png"],
+    ),
+    (fig_netem_profile, ["{run}/config.txt"], ["netem_profile.png"]),
+    (fig_handshake_table, ["{run}/bench.csv"], ["handshake_p50_p95_ci_table.png"]),
+    (
+        fig_tail_latency_table,
+        ["{run}/bulk_*.raw", "results/raw/bulk_*.txt"],
+        ["throughput_tail_latency_table.png", "throughput_tail_latency_note.txt"],
+    ),
+    (table_bootstrap_ci, ["{run}/bench.csv"], ["bootstrap_ci.csv"]),
+    (note_pq_negotiation, [], ["pq_negotiation_howto.txt"]),
+]
+
+
+def build_analyze_specs(df: pd.DataFrame, run_dir: Path, figs: Path, separate: bool):
+    """FigureSpec dla każdej figury; df liczony z bench.csv + WARMUP_DROP"""
+    params = {
+        "warmup_drop": int(os.environ.get("WARMUP_DROP", "3")),
+        "bootstrap_n": DEFAULT_N_BOOT,
+        "bootstrap_seed": DEFAULT_SEED,
+    }
+    specs = []
+    for func, inputs, outputs in ANALYZE_FIGURES:
+        if func is fig_separate_plots and not separate:
+            continue
+        specs.append(
+            FigureSpec(
+                name=func.__name__,
+                func=func,
+                args=(df, run_dir, figs),
+                inputs=[i.format(run=run_dir) for i in inputs],
+                params=params,
+                outputs=outputs,
+            )
+        )
+    return specs
+
+
+def create_visualizations(
+    df: pd.DataFrame, run_dir: Path, separate: bool, force: bool = False, jobs: int = 1
+):
+    run_name = run_dir.name
+    figs = Path("figures") / run_name / "analyze"
+    figs.mkdir(exist_ok=True, parents=True)
+    sns.set_palette("husl")
+
+    cache = FigureCache(
+        figs,
+        force=force,
+        shared_code=[
+            read_csv_robust,
+            prepare_data,
+            annotate_bars,
+            _load_bulk_rows,
+            _load_raw_latencies,
+            bootstrap_arrays,
+            bootstrap_frame,
+        ],
+    )
+    # df jest dziedziczony przez workery (fork), nie serializowany
+    report = cache.build(build_analyze_specs(df, run_dir, figs, separate), jobs=jobs)
+    print_report(report)
+
+
+# Metryki na wykresie trendów: (test, metric, etykieta osi)
+TREND_METRICS = [
+    ("handshake", "mean_ms", "Handshake [ms]"),
+    ("bulk", "rps", "Throughput [req/s]"),
+    ("ttfb", "ttfb_s", "TTFB [s]"),
+    ("0rtt", "mean_time_s", "0-RTT [s]"),
+]
+
+
+def fig_trends(rollups: pd.DataFrame, rollups_csv: Path, figs: Path):
+    """Mediana metryk w kolejnych runach (AES-NI on, bez netem / P0)"""
+    df = rollups[(rollups["aes"] == "on") & rollups["profile"].isin(["", "P0"])]
+    # Komórki run_matrix (payload×concurrency, early data) łączone medianą
+    df = (
+        df.groupby(ROLLUP_KEYS + ["timestamp"], as_index=False)["median"]
+        .median()
+        .sort_values("timestamp")
+    )
+    panels = [
+        (test, metric, label)
+        for test, metric, label in TREND_METRICS
+        if ((df["test"] == test) & (df["metric"] == metric)).any()
+    ]
+    if not panels:
+        print("⏭️  Brak metryk do wykresu trendów")
+        return
+    fig, axes = plt.subplots(
+        len(panels), 1, figsize=(12, 3.5 * len(panels)), sharex=True, squeeze=False
+    )
+    for ax, (test, metric, label) in zip(axes[:, 0], panels):
+        sub = df[(df["test"] == test) & (df["metric"] == metric)]
+        for (impl, suite), grp in sub.groupby(["implementation", "suite"]):
+            ax.plot(grp["timestamp"], grp["median"], marker="o", label=f"{impl}/{suite}")
+        ax.set_ylabel(label)
+        ax.grid(alpha=0.3)
+    axes[0, 0].legend(fontsize=8, ncol=3, loc="best")
+    axes[0, 0].set_title(f"Trendy w czasie ({df['run'].nunique()} runów)")
+    fig.autofmt_xdate()
+    plt.tight_layout()
+    plt.savefig(figs / "trend_over_time.png", dpi=300)
+    plt.close()
+    df.to_csv(figs / "trend_medians.csv", index=False)
+
+
+def create_trend_report(patterns, force: bool = False, jobs: int = 1, workers: int = 4):
+    """--runs: rollupy wszystkich runów + wykres trendów w figures/aggregate"""
+    rollups_csv = Path(DEFAULT_OUT)
+    rollups = aggregate_runs(
+        patterns,
+        rollups_csv,
+        workers=workers,
+        warmup_drop=int(os.environ.get("WARMUP_DROP", "3")),
+    )
+    if rollups.empty:
+        sys.exit(1)
+    figs = Path("figures") / "aggregate"
+    figs.mkdir(exist_ok=True, parents=True)
+    cache = FigureCache(figs, force=force)
+    spec = FigureSpec(
+        name=fig_trends.__name__,
+        func=fig_trends,
+        args=(rollups, rollups_csv, figs),
+        inputs=[str(rollups_csv)],
+        outputs=["trend_over_time.png", "trend_medians.csv"],
+    )
+    print_report(cache.build([spec], jobs=jobs))
+    print(f"✓ Trendy zapisane w: {figs}")
+
+
 def main():
     args = parse_args()
+    if args.runs:
+        create_trend_report(
+            args.runs, force=args.force, jobs=args.jobs, workers=max(1, args.jobs)
+        )
+        return
     run_dir = Path(args.run)
     df_raw, netem = load_data(run_dir)
+    if args.exclude_drift:
+        df_raw = exclude_drift(df_raw)
     df = prepare_data(df_raw)
-    create_visualizations(df, run_dir, args.separate)
+    create_visualizations(
+        df, run_dir, args.separate, force=args.force, jobs=args.jobs
+    )
     print(f"✓ Wykresy zapisane w: figures/{run_dir.name}/analyze")
 
 
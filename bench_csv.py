@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Szybki loader bench.csv (run_all.sh) z obsługą wartości tablicowych [a,b,...]
+"""
+
+import io
+import re
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 200_000
+# Tablica JSON w polu CSV (zawiera przecinki, np. raw_measurements)
+ARRAY_RE = re.compile(r"\[[^\]\n]*\]")
+
+
+def _has_arrays(path: Path, block: int = 1 << 20) -> bool:
+    """Sprawdza blokami, czy plik zawiera jakikolwiek znak '['"""
+    with open(path, "rb") as f:
+        while True:
+            buf = f.read(block)
+            if not buf:
+                return False
+            if b"[" in buf:
+                return True
+
+
+def _quote_arrays(text: str) -> str:
+    """Otacza tablice [..] cudzysłowami, żeby parser C pandas ich nie dzielił"""
+    return ARRAY_RE.sub(lambda m: '"' + m.group(0).replace('"', '""') + '"', text)
+
+
+def _coerce(df: pd.DataFrame) -> pd.DataFrame:
+    """Ustala typy kolumn: run -> Int64, value -> float64"""
+    if "run" in df:
+        df["run"] = pd.to_numeric(df["run"], errors="coerce").astype("Int64")
+    if "value" in df:
+        df["value"] = pd.to_numeric(df["value"], errors="coerce").astype("float64")
+    return df
+
+
+def _explode_arrays(df: pd.DataFrame) -> pd.DataFrame:
+    """Rozwija komórki [a,b,...] w kolumnie value na osobne wiersze (kolumna sample)"""
+    is_arr = df["value"].str.startswith("[", na=False)
+    if not is_arr.any():
+        df["sample"] = pd.array([pd.NA] * len(df), dtype="Int64")
+        return df
+    arr = df.loc[is_arr].copy()
+    arr["value"] = arr["value"].str.strip("[]").str.split(",")
+    arr = arr.explode("value")
+    arr["value"] = arr["value"].str.strip().str.strip('"')
+    arr["sample"] = arr.groupby(level=0).cumcount()
+    scalar = df.loc[~is_arr].copy()
+    scalar["sample"] = np.nan
+    out = pd.concat([scalar, arr]).sort_index(kind="stable").reset_index(drop=True)
+    out["sample"] = out["sample"].astype("Int64")
+    return out
+
+
+def _parse_block(lines: List[str], header: List[str], explode: bool) -> pd.DataFrame:
+    df = pd.read_csv(
+        io.StringIO(_quote_arrays("".join(lines))),
+        header=None,
+        names=header,
+        dtype={c: "object" for c in header if c != "run"},
+        skip_blank_lines=True,
+    )
+    if explode and "value" in df:
+        df = _explode_arrays(df)
+    return _coerce(df)
+
+
+def iter_bench_csv(path, chunksize: int = DEFAULT_CHUNKSIZE,
+                   explode: bool = False) -> Iterator[pd.DataFrame]:
+    """Czyta bench.csv porcjami po chunksize wierszy (ograniczona pamięć)"""
+    path = Path(path)
+    if not _has_arrays(path):
+        # Szybka ścieżka: parser C pandas, brak tablic w pliku
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            if explode and "value" in chunk:
+                chunk["sample"] = pd.array([pd.NA] * len(chunk), dtype="Int64")
+            yield _coerce(chunk)
+        return
+
+    with open(path) as f:
+        header = f.readline().strip().split(",")
+        while True:
+            lines = list(islice(f, chunksize))
+            if not lines:
+                break
+            yield _parse_block(lines, header, explode)
+
+
+def read_bench_csv(path, explode: bool = False,
+                   chunksize: Optional[int] = None) -> pd.DataFrame:
+    """Wczytuje cały bench.csv; explode=True rozwija tablice na wiersze per próbka"""
+    chunks = list(
+        iter_bench_csv(path, chunksize=chunksize or DEFAULT_CHUNKSIZE, explode=explode)
+    )
+    if not chunks:
+        with open(path) as f:
+            header = f.readline().strip().split(",")
+        return _coerce(pd.DataFrame(columns=header))
+    return pd.concat(chunks, ignore_index=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    p = argparse.ArgumentParser(description="Wczytanie bench.csv (podsumowanie)")
+    p.add_argument("csv", help="ścieżka do bench.csv")
+    p.add_argument("--explode", action="store_true", help="rozwiń tablice na próbki")
+    args = p.parse_args()
+    df = read_bench_csv(args.csv, explode=args.explode)
+    print(df.dtypes.to_string())
+    print(f"✅ {len(df)} wierszy")
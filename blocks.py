@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Randomizowany plan blokowy (port × tryb AES) i analiza sparowana po blokach.
+
+run_all.sh / run_matrix.sh mierzą ramiona po kolei (wszystkie AES on przed AES off),
+więc dryf termiczny, zadania w tle czy stan page cache korelują z porównywanym
+czynnikiem. Tutaj w każdym bloku każde ramię (port, aes) występuje raz, w losowej
+kolejności z zapisanym ziarnem; wyniki niosą `block`, a analiza porównuje on/off
+w obrębie bloku (różnice sparowane), co usuwa wariancję między blokami.
+
+Użycie:
+    python blocks.py schedule --ports 4431 8443 --aes on off --blocks 10 --seed 42 \\
+        --out results/run_blocks_X/schedule.json      # TSV: block order port aes
+    python blocks.py analyze results/run_blocks_X
+"""
+
+import argparse
+import itertools
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.stats import wilcoxon
+
+from significance import DEFAULT_N_PERM, benjamini_hochberg, compare_pairs, stars
+
+# Powyżej tylu bloków test znaków liczony z losowych permutacji (inaczej dokładnie, 2^n)
+EXACT_MAX_BLOCKS = 16
+
+
+def make_schedule(ports: Sequence[int], aes_modes: Sequence[str], n_blocks: int,
+                  seed: int) -> List[Dict]:
+    """Lista wierszy {block, order, port, aes}; każdy blok = wszystkie ramiona w losowej kolejności"""
+    rng = np.random.default_rng(seed)
+    arms = list(itertools.product(ports, aes_modes))
+    rows = []
+    for block in range(1, n_blocks + 1):
+        for order, i in enumerate(rng.permutation(len(arms)), 1):
+            port, aes = arms[i]
+            rows.append({"block": block, "order": order, "port": int(port), "aes": aes})
+    return rows
+
+
+def block_value(js: Dict, test: str) -> Dict[str, float]:
+    """Wartości komórki do porównania sparowanego (jedna liczba na metrykę)"""
+    out = {}
+    if test == "handshake":
+        raw = js.get("raw_measurements") or []
+        if raw:
+            out["handshake_p50_ms"] = float(np.median(raw)) * 1000
+        elif js.get("mean_ms") is not None:
+            out["handshake_p50_ms"] = float(js["mean_ms"])
+    elif test == "bulk":
+        times = js.get("request_times_s") or []
+        if times:
+            out["request_p50_s"] = float(np.median(times))
+        if js.get("throughput_mb_s") is not None:
+            out["throughput_mb_s"] = float(js["throughput_mb_s"])
+    return out
+
+
+def load_blocks(run_dir: Path) -> pd.DataFrame:
+    """Wyniki z <run>/blocks/*.json (otagowane przez run_blocks.sh) w formacie długim"""
+    rows = []
+    for p in sorted((Path(run_dir) / "blocks").glob("*.json")):
+        try:
+            js = json.loads(p.read_text())
+        except (OSError, json.JSONDecodeError):
+            continue
+        if "block" not in js:
+            continue
+        for metric, value in block_value(js, js.get("block_test", "handshake")).items():
+            rows.append({
+                "block": int(js["block"]),
+                "order": js.get("block_order"),
+                "port": int(js["port"]),
+                "aes": js.get("block_aes"),
+                "metric": metric,
+                "value": value,
+            })
+    return pd.DataFrame(rows, columns=["block", "order", "port", "aes", "metric", "value"])
+
+
+def sign_flip_pvalue(d: np.ndarray, n_perm: int = DEFAULT_N_PERM, rng=None) -> float:
+    """Dwustronne p testu permutacyjnego dla średniej różnic sparowanych (losowe znaki)"""
+    n = len(d)
+    if n < 2:
+        return float("nan")
+    obs = abs(d.mean())
+    if n <= EXACT_MAX_BLOCKS:
+        signs = np.array(list(itertools.product((1, -1), repeat=n)))
+        return float((np.abs(signs @ d / n) >= obs - 1e-12).mean())
+    rng = rng or np.random.default_rng(0)
+    signs = rng.choice((1, -1), size=(n_perm, n))
+    return float(((np.abs(signs @ d / n) >= obs - 1e-12).sum() + 1) / (n_perm + 1))
+
+
+def paired(df: pd.DataFrame, ref: str = "on", alt: str = "off",
+           n_perm: int = DEFAULT_N_PERM, seed: int = 0) -> pd.DataFrame:
+    """Per (port, metryka): różnice alt/ref − 1 w obrębie bloku, test znaków + Wilcoxon;
+    p_unpaired (ten sam zbiór wartości bez parowania) pokazuje zysk z blokowania"""
+    rng = np.random.default_rng(seed)
+    rows, unpaired = [], []
+    for (port, metric), g in df.groupby(["port", "metric"]):
+        wide = g.pivot_table(index="block", columns="aes", values="value", aggfunc="mean")
+        if ref not in wide or alt not in wide:
+            continue
+        wide = wide[[ref, alt]].dropna()
+        d = (wide[alt] / wide[ref] - 1).to_numpy() * 100
+        try:
+            p_w = float(wilcoxon(d).pvalue) if len(d) >= 2 and np.any(d != 0) else float("nan")
+        except ValueError:
+            p_w = float("nan")
+        rows.append({
+            "port": port,
+            "metric": metric,
+            "blocks": len(d),
+            f"{ref}_median": float(wide[ref].median()) if len(d) else np.nan,
+            f"{alt}_median": float(wide[alt].median()) if len(d) else np.nan,
+            "delta_percent_mean": float(d.mean()) if len(d) else np.nan,
+            "delta_percent_median": float(np.median(d)) if len(d) else np.nan,
+            "delta_percent_sd": float(d.std(ddof=1)) if len(d) > 1 else np.nan,
+            "p_paired": sign_flip_pvalue(d, n_perm, rng),
+            "p_wilcoxon": p_w,
+        })
+        unpaired.append((wide[ref].to_numpy(), wide[alt].to_numpy()))
+    out = pd.DataFrame(rows)
+    if out.empty:
+        return out
+    out["q_value"] = benjamini_hochberg(out["p_paired"])
+    out["significance"] = [stars(q) for q in out["q_value"]]
+    out["p_unpaired"] = compare_pairs(unpaired, n_perm=n_perm, seed=seed)["p_perm"].to_numpy()
+    return out
+
+
+def order_effect(df: pd.DataFrame) -> pd.DataFrame:
+    """Średnie odchylenie (%) od mediany komórki wg pozycji w bloku — kontrola dryfu"""
+    if df.empty:
+        return df
+    rel = df.copy()
+    med = rel.groupby(["port", "aes", "metric"]).value.transform("median")
+    rel["dev_percent"] = (rel["value"] / med - 1) * 100
+    return rel.groupby("order").dev_percent.agg(["mean", "count"]).round(2)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Plan blokowy (port × AES) i analiza sparowana")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("schedule", help="wylosuj plan i wypisz go jako TSV")
+    s.add_argument("--ports", nargs="+", type=int, required=True)
+    s.add_argument("--aes", nargs="+", default=["on", "off"], choices=["on", "off"])
+    s.add_argument("--blocks", type=int, default=10)
+    s.add_argument("--seed", type=int, required=True)
+    s.add_argument("--out", help="zapisz plan (z ziarnem) do JSON")
+    a = sub.add_parser("analyze", help="porównanie sparowane AES on/off po blokach")
+    a.add_argument("run_dir")
+    a.add_argument("--perm", type=int, default=DEFAULT_N_PERM, help="liczba permutacji")
+    args = ap.parse_args()
+
+    if args.cmd == "schedule":
+        rows = make_schedule(args.ports, args.aes, args.blocks, args.seed)
+        if args.out:
+            Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+            Path(args.out).write_text(json.dumps({
+                "seed": args.seed,
+                "blocks": args.blocks,
+                "arms": [[p, m] for p, m in itertools.product(args.ports, args.aes)],
+                "schedule": rows,
+            }, indent=2))
+        for r in rows:
+            print(f"{r['block']}\t{r['order']}\t{r['port']}\t{r['aes']}")
+        return
+
+    run_dir = Path(args.run_dir)
+    df = load_blocks(run_dir)
+    if df.empty:
+        sys.exit(f"❌ Brak otagowanych wyników w {run_dir / 'blocks'}")
+    res = paired(df, n_perm=args.perm)
+    if res.empty:
+        sys.exit("❌ Brak par AES on/off w tych samych blokach")
+    out = run_dir / "blocks_paired.csv"
+    res.round(4).to_csv(out, index=False)
+    for r in res.itertuples():
+        print(f"📊 {r.port} {r.metric}: Δ {r.delta_percent_median:+.1f}% (mediana z {r.blocks} bloków), "
+              f"p sparowane {r.p_paired:.3g} vs niesparowane {r.p_unpaired:.3g} {r.significance}")
+    drift = order_effect(df)
+    print("🔎 Odchylenie wg pozycji w bloku (%):",
+          ", ".join(f"{o}: {m:+.2f}" for o, m in drift["mean"].items()))
+    print(f"✅ zapisano: {out}")
+
+
+if __name__ == "__main__":
+    main()
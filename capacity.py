@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Wyszukiwanie pojemności per port pod SLO (uploady/s lub handshake'i/s).
+
+Obciążenie oferowane jest open-loop (scripts/capacity_client.sh): żądania startują wg
+harmonogramu przybyć (Poisson albo stałe odstępy, zapisane ziarno), a opóźnienie liczone
+jest od planowanego startu — kolejkowanie po stronie klienta wlicza się do p99
+(brak coordinated omission). Każdy krok: rozgrzewka + okno stabilizacji; krok spełnia SLO,
+gdy p99 ≤ --slo-p99-ms, odsetek błędów (z odrzuconymi) ≤ --slo-error-rate i zrealizowane
+tempo ≥ ACHIEVED_MIN × faktycznie zaplanowane w oknie. Tempo rośnie ×2 do pierwszego niepowodzenia, potem
+bisekcja do względnej precyzji --precision. Wynik: najwyższe tempo spełniające SLO.
+
+Użycie:
+    python capacity.py search --port 4431 --mode upload --payload 1 --profile P0 \\
+        --slo-p99-ms 500 --slo-error-rate 0.01
+    python capacity.py summary          # -> results/capacity/capacity.csv + figures/capacity_*.png
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from fanout import ALGORITHM, client_cmd, client_image, host_env, ia32cap_env
+from results_catalog import profile_code
+
+ROOT = Path(__file__).resolve().parent
+CLIENT_SCRIPT = ROOT / "scripts" / "capacity_client.sh"
+PROFILE_LABEL = {"P0": "baseline", "P1": "delay_50ms", "P2": "delay_50ms_loss_0.5",
+                 "P3": "delay_100ms"}
+# Krok nie spełnia SLO, gdy serwer realizuje mniej niż ta część oferowanego tempa
+ACHIEVED_MIN = 0.9
+# Opóźnienie startu żądań względem harmonogramu (p99) powyżej tej części SLO = klient nie nadąża
+CLIENT_LAG_MAX = 0.5
+DEFAULT_SEED = 20250101
+
+
+def arrivals(rate: float, duration: float, arrival: str, rng) -> np.ndarray:
+    """Offsety startu (ns) dla tempa rate [1/s] w oknie duration [s]"""
+    if arrival == "uniform":
+        t = np.arange(0, duration, 1 / rate)
+    else:
+        n = int(rate * duration * 1.5) + 10
+        t = np.cumsum(rng.exponential(1 / rate, n))
+        t = t[t < duration]
+    return (t * 1e9).astype(np.int64)
+
+
+def handshake_cmd(port: int, host: str, cafile: str) -> str:
+    """Samo połączenie TLS: -brief zamiast -quiet (które implikuje -ign_eof i czeka na serwer)"""
+    if port == 11112:
+        return f"wolf-client -h {host} -p 11112 -v 4 --pqc X25519_ML_KEM_768 -A {cafile}"
+    return client_cmd(port, host, cafile).replace("-quiet", "-brief")
+
+
+class Client:
+    """Klient open-loop: kontener z obrazem klienta (jak fan-out) albo proces na hoście"""
+
+    def __init__(self, args, port: int, work: Path):
+        self.args, self.port, self.work = args, port, work
+        self.name: Optional[str] = None
+        shutil.copy(CLIENT_SCRIPT, work / "client.sh")
+
+    def start(self):
+        if self.args.client == "container":
+            self.name = f"tls-capacity-{os.getpid()}"
+            subprocess.run(["docker", "run", "-d", "--rm", "--name", self.name, "--network", "host",
+                            "-v", f"{ROOT / 'certs'}:/certs:ro", "-v", f"{self.work}:/cap",
+                            "--entrypoint", "sleep", client_image(self.port), "infinity"],
+                           check=True, capture_output=True)
+
+    def run_step(self, schedule: str, out: str):
+        in_container = self.args.client == "container"
+        cafile = "/certs/ca.pem" if in_container else str(ROOT / "certs" / "ca.pem")
+        env = {
+            "CAP_DIR": "/cap" if in_container else str(self.work),
+            "SCHEDULE": schedule,
+            "OUT": out,
+            "MODE": self.args.mode,
+            "BYTES": str(int(self.args.payload * 1048576)),
+            "HOST": self.args.host,
+            "CLIENT_CMD": self.args.client_cmd or (handshake_cmd if self.args.mode == "handshake"
+                                                   else client_cmd)(self.port, self.args.host, cafile),
+            "MAX_INFLIGHT": str(self.args.max_inflight),
+            "REQ_TIMEOUT": str(self.args.request_timeout),
+            **ia32cap_env(),  # pusta wartość wyłączyłaby wszystkie rozszerzenia CPU
+        }
+        if in_container:
+            flags = [x for k, v in env.items() for x in ("-e", f"{k}={v}")]
+            subprocess.run(["docker", "exec", *flags, self.name, "sh", "/cap/client.sh"], check=False)
+        else:
+            subprocess.run(["sh", str(self.work / "client.sh")], env=host_env(env), check=False)
+
+    def cleanup(self):
+        if self.name:
+            subprocess.run(["docker", "rm", "-f", self.name], capture_output=True, check=False)
+
+
+def evaluate(path: Path, rate: float, warmup: float, window: float, slo_p99_ms: float,
+             slo_error_rate: float) -> Dict:
+    """Statystyki kroku z okna stabilizacji (żądania planowane po rozgrzewce)"""
+    try:
+        rec = np.loadtxt(path, dtype=np.int64, ndmin=2)
+    except (OSError, ValueError):
+        rec = np.empty((0, 4), dtype=np.int64)
+    res = {"offered_rps": round(rate, 3), "planned": 0}
+    if rec.size == 0:
+        return {**res, "pass": False, "reason": "brak wyników"}
+    w0 = rec[:, 0].min() + warmup * 1e9
+    rec = rec[rec[:, 0] >= w0]
+    ok, failed, dropped = rec[:, 3] == 1, rec[:, 3] == 0, rec[:, 3] == -1
+    lat = (rec[ok, 2] - rec[ok, 0]) / 1e6
+    lag = (rec[~dropped, 1] - rec[~dropped, 0]) / 1e6
+    n = len(rec)
+    # Zrealizowane tempo: udane żądania okna / czas do zakończenia ostatniego z nich
+    # (gdy serwer nie nadąża, zakończenia rozciągają się poza okno)
+    span = max(window, (rec[ok, 2].max() - w0) / 1e9) if ok.any() else window
+    pct = lambda a, q: round(float(np.percentile(a, q)), 3) if len(a) else None
+    res.update(
+        planned=n,
+        successful=int(ok.sum()),
+        failed=int(failed.sum()),
+        dropped=int(dropped.sum()),
+        planned_rps=round(n / window, 3),
+        achieved_rps=round(ok.sum() / span, 3),
+        error_rate=round((failed.sum() + dropped.sum()) / n, 4) if n else None,
+        latency_p50_ms=pct(lat, 50),
+        latency_p99_ms=pct(lat, 99),
+        client_lag_p99_ms=pct(lag, 99),
+    )
+    reasons = []
+    if not ok.any():
+        reasons.append("brak udanych żądań")
+    if res["latency_p99_ms"] is not None and res["latency_p99_ms"] > slo_p99_ms:
+        reasons.append(f"p99 {res['latency_p99_ms']:.1f} ms > {slo_p99_ms:g} ms")
+    if res["error_rate"] is not None and res["error_rate"] > slo_error_rate:
+        reasons.append(f"błędy {res['error_rate']:.2%} > {slo_error_rate:.2%}")
+    if res["achieved_rps"] < ACHIEVED_MIN * res["planned_rps"]:
+        reasons.append(f"zrealizowane {res['achieved_rps']:.1f}/s < {ACHIEVED_MIN:.0%} "
+                       f"oferowanego ({res['planned_rps']:.1f}/s)")
+    res["client_limited"] = bool(res["client_lag_p99_ms"] is not None
+                                 and res["client_lag_p99_ms"] > CLIENT_LAG_MAX * slo_p99_ms)
+    res["pass"] = not reasons
+    res["reason"] = "; ".join(reasons)
+    return res
+
+
+def search(args) -> Dict:
+    """Wzrost ×2 do pierwszego niepowodzenia, potem bisekcja tempa"""
+    rng = np.random.default_rng(args.seed)
+    work = Path(tempfile.mkdtemp(prefix="tls-capacity-"))
+    client = Client(args, args.port, work)
+    steps: List[Dict] = []
+
+    def step(rate: float) -> bool:
+        i = len(steps)
+        offs = arrivals(rate, args.warmup + args.window, args.arrival, rng)
+        np.savetxt(work / f"sched_{i}.txt", offs, fmt="%d")
+        started = time.time()
+        client.run_step(f"sched_{i}.txt", f"step_{i}.txt")
+        res = evaluate(work / f"step_{i}.txt", rate, args.warmup, args.window,
+                       args.slo_p99_ms, args.slo_error_rate)
+        res["wall_s"] = round(time.time() - started, 2)
+        steps.append(res)
+        icon = "✅" if res["pass"] else "❌"
+        print(f"  {icon} {rate:8.2f}/s: p99 {res.get('latency_p99_ms')} ms, "
+              f"błędy {res.get('error_rate')}, zrealizowane {res.get('achieved_rps')}/s"
+              + (f" — {res['reason']}" if res["reason"] else "")
+              + (" ⚠️  klient nie nadąża" if res.get("client_limited") else ""))
+        return res["pass"]
+
+    lo, hi = 0.0, None
+    try:
+        client.start()
+        rate = args.start_rate
+        while hi is None and rate <= args.max_rate:
+            if step(rate):
+                lo, rate = rate, rate * 2
+            else:
+                hi = rate
+        while hi is not None and hi - lo > args.precision * hi and len(steps) < args.max_steps:
+            if hi < args.min_rate:
+                break
+            mid = (lo + hi) / 2
+            if step(mid):
+                lo = mid
+            else:
+                hi = mid
+    finally:
+        client.cleanup()
+        shutil.rmtree(work, ignore_errors=True)
+
+    limited = [s for s in steps if s.get("client_limited") and not s["pass"]]
+    if hi is None:
+        limit = "max_rate"
+    elif limited and min(s["offered_rps"] for s in limited) <= hi:
+        limit = "client"
+    else:
+        limit = "slo"
+    return {
+        "port": args.port,
+        "mode": args.mode,
+        "payload_size_mb": args.payload if args.mode == "upload" else 0,
+        "profile": args.profile,
+        "aes": args.aes,
+        "slo": {"p99_ms": args.slo_p99_ms, "error_rate": args.slo_error_rate},
+        "arrival": args.arrival,
+        "seed": args.seed,
+        "warmup_s": args.warmup,
+        "window_s": args.window,
+        "precision": args.precision,
+        "capacity_rps": round(lo, 3),
+        "capacity_mb_s": round(lo * args.payload, 3) if args.mode == "upload" else None,
+        "first_failing_rps": None if hi is None else round(hi, 3),
+        "converged": hi is not None and hi - lo <= args.precision * hi,
+        "limit": limit,
+        "steps": steps,
+        "measurement_method": f"open_loop_{args.client}_{args.arrival}",
+        "algorithm": ALGORITHM.get(args.port, "Unknown"),
+    }
+
+
+def out_path(args, root: Path) -> Path:
+    label = PROFILE_LABEL.get(profile_code(args.profile) or "", args.profile)
+    size = f"p{args.payload:g}" if args.mode == "upload" else "p0"
+    cell = f"{label}_aes_{args.aes}_{args.mode}_{size}_slo{args.slo_p99_ms:g}"
+    return root / "capacity" / cell / f"capacity_{args.port}_{args.mode}_{size}.json"
+
+
+def summary(root: Path, figures: Path) -> pd.DataFrame:
+    rows = []
+    for p in sorted((root / "capacity").glob("*/capacity_*.json")):
+        try:
+            js = json.loads(p.read_text())
+        except (OSError, json.JSONDecodeError):
+            continue
+        rows.append({k: js.get(k) for k in ("profile", "aes", "mode", "payload_size_mb", "port",
+                                            "algorithm", "capacity_rps", "capacity_mb_s",
+                                            "first_failing_rps", "converged", "limit")}
+                    | {"slo_p99_ms": js["slo"]["p99_ms"], "steps": len(js.get("steps", []))})
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    df["profile"] = df["profile"].map(lambda x: profile_code(str(x)) or x)
+    out = root / "capacity" / "capacity.csv"
+    df.sort_values(["mode", "profile", "aes", "port"]).to_csv(out, index=False)
+    print(f"✅ zapisano: {out}")
+
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    figures.mkdir(parents=True, exist_ok=True)
+    for mode, sub in df.groupby("mode"):
+        fig, ax = plt.subplots(figsize=(10, 5))
+        sub = sub.assign(arm=sub.profile + " / AES " + sub.aes.astype(str))
+        sns.barplot(data=sub, x="port", y="capacity_rps", hue="arm", ax=ax)
+        unit = "uploady/s" if mode == "upload" else "handshake'i/s"
+        ax.set_ylabel(f"pojemność ({unit})")
+        ax.set_title(f"Pojemność pod SLO (p99 ≤ {sub.slo_p99_ms.iloc[0]:g} ms) — {mode}")
+        out_fig = figures / f"capacity_{mode}.png"
+        fig.savefig(out_fig, dpi=300, bbox_inches="tight")
+        plt.close(fig)
+        print(f"✓ zapisano wykres: {out_fig}")
+    return df
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Wyszukiwanie pojemności pod SLO (open-loop, bisekcja)")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("search", help="pojemność jednego portu")
+    s.add_argument("--port", type=int, required=True)
+    s.add_argument("--mode", choices=["upload", "handshake"], default="upload")
+    s.add_argument("--payload", type=float, default=1, help="rozmiar POST w MB (upload)")
+    s.add_argument("--host", default="localhost")
+    s.add_argument("--profile", default="P0", help="profil NetEm (P0–P3 lub etykieta)")
+    s.add_argument("--aes", choices=["on", "off"],
+                   default="off" if os.environ.get("OPENSSL_ia32cap") == "~0x200000200000000" else "on")
+    s.add_argument("--slo-p99-ms", type=float, default=500)
+    s.add_argument("--slo-error-rate", type=float, default=0.01)
+    s.add_argument("--warmup", type=float, default=2, help="rozgrzewka kroku (s), poza statystyką")
+    s.add_argument("--window", type=float, default=10, help="okno stabilizacji kroku (s)")
+    s.add_argument("--start-rate", type=float, default=2, help="pierwsze tempo (1/s)")
+    s.add_argument("--max-rate", type=float, default=512)
+    s.add_argument("--min-rate", type=float, default=0.25, help="poniżej — pojemność 0")
+    s.add_argument("--precision", type=float, default=0.05, help="względna szerokość przedziału")
+    s.add_argument("--max-steps", type=int, default=16)
+    s.add_argument("--arrival", choices=["poisson", "uniform"], default="poisson")
+    s.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    s.add_argument("--max-inflight", type=int, default=256, help="limit żądań w locie (odrzucenia)")
+    s.add_argument("--request-timeout", type=float, default=30, help="limit czasu żądania (s)")
+    s.add_argument("--client", choices=["container", "process"], default="container")
+    s.add_argument("--client-cmd", help="własne polecenie klienta (stdin = żądanie HTTP)")
+    s.add_argument("--results", default="results")
+    s.add_argument("--out", help="plik JSON (domyślnie results/capacity/<komórka>/...)")
+    m = sub.add_parser("summary", help="tabela i wykres pojemności")
+    m.add_argument("--results", default="results")
+    m.add_argument("--figures", default="figures")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.cmd == "summary":
+        if summary(Path(args.results), Path(args.figures)).empty:
+            raise SystemExit("❌ Brak wyników capacity_*.json")
+        return
+    print(f"🎯 Pojemność port {args.port} ({args.mode}, {args.profile}, AES {args.aes}): "
+          f"SLO p99 ≤ {args.slo_p99_ms:g} ms, błędy ≤ {args.slo_error_rate:.1%}, "
+          f"okno {args.window:g}+{args.warmup:g} s")
+    res = search(args)
+    out = Path(args.out) if args.out else out_path(args, Path(args.results))
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(res, indent=2))
+    unit = "MB/s" if args.mode == "upload" else ""
+    extra = f" ({res['capacity_mb_s']} {unit})" if res["capacity_mb_s"] is not None else ""
+    print(f"📊 port {args.port}: pojemność {res['capacity_rps']}/s{extra}, "
+          f"limit: {res['limit']}, kroków: {len(res['steps'])} -> {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Macierz certyfikatów (run_cert_matrix.sh): typ/rozmiar klucza × głębokość łańcucha.
+
+Wymiana kluczy (X25519) i szyfr są stałe, więc różnice handshake'u pochodzą z
+certyfikatu. Rozdzielenie kosztów per serwer — model z efektem stałym typu klucza:
+    latencja_p50[ms] = α_klucz + β · łańcuch[KB]
+α_klucz — koszt podpisu CertificateVerify (serwer) + weryfikacji (klient) dla klucza,
+β — koszt kilobajta łańcucha (transmisja + weryfikacja kolejnych certyfikatów),
+identyfikowane przez zmianę głębokości przy tym samym kluczu. Ten sam model dla
+CPU serwera na handshake. Bajty handshake'u vs rozmiar łańcucha: narzut = bajty − łańcuch.
+
+Użycie:
+    python cert_matrix.py analyze results/cert_matrix/baseline_aes_on_s20
+    python cert_matrix.py analyze            # najnowszy katalog w results/cert_matrix
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+KEY_ORDER = ["ecdsa-p256", "ecdsa-p384", "ed25519", "rsa-2048", "rsa-3072", "rsa-4096"]
+SERVER_LABEL = {"nginx": "nginx (OpenSSL)", "lighttpd": "lighttpd (wolfSSL)",
+                "wolfssl": "wolf-server (wolfSSL)"}
+COLUMNS = ["server", "port", "cert_key", "chain_depth", "chain_bytes", "p50_ms", "p95_ms",
+           "server_cpu_ms_per_handshake", "handshake_bytes_read", "successful_measurements"]
+
+
+def latest_dir(results: Path) -> Optional[Path]:
+    """Najnowszy katalog results/cert_matrix/* z plikami certmatrix_*.json"""
+    dirs = [d for d in Path(results, "cert_matrix").glob("*")
+            if d.is_dir() and any(d.glob("certmatrix_*.json"))]
+    return max(dirs, key=lambda d: d.stat().st_mtime) if dirs else None
+
+
+def load_dir(run_dir: Path) -> pd.DataFrame:
+    rows = []
+    for p in sorted(Path(run_dir).glob("certmatrix_*.json")):
+        try:
+            js = json.loads(p.read_text())
+        except (OSError, json.JSONDecodeError):
+            continue
+        rows.append({c: js.get(c) for c in COLUMNS})
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    if len(df):
+        df["chain_kb"] = df["chain_bytes"] / 1024
+        df["key_rank"] = df["cert_key"].map({k: i for i, k in enumerate(KEY_ORDER)})
+        df = df.sort_values(["server", "key_rank", "chain_depth"]).drop(columns="key_rank")
+    return df
+
+
+def fit_chain_vs_key(df: pd.DataFrame, y: str) -> Optional[Dict]:
+    """OLS y = α_klucz + β·chain_kb (efekt stały klucza); None gdy brak stopni swobody"""
+    d = df.dropna(subset=[y, "chain_kb"])
+    keys = [k for k in KEY_ORDER if k in set(d["cert_key"])] + \
+        sorted(set(d["cert_key"]) - set(KEY_ORDER))
+    if not keys or len(d) < len(keys) + 2:
+        return None
+    X = np.column_stack([(d["cert_key"] == k).to_numpy(float) for k in keys]
+                        + [d["chain_kb"].to_numpy(float)])
+    yv = d[y].to_numpy(float)
+    coef, *_ = np.linalg.lstsq(X, yv, rcond=None)
+    resid = yv - X @ coef
+    ss_tot = float(((yv - yv.mean()) ** 2).sum())
+    dof = len(yv) - X.shape[1]
+    # Błąd standardowy β z macierzy kowariancji OLS
+    sigma2 = float(resid @ resid) / dof if dof > 0 else np.nan
+    try:
+        se = np.sqrt(np.diag(sigma2 * np.linalg.inv(X.T @ X)))
+    except np.linalg.LinAlgError:
+        se = np.full(X.shape[1], np.nan)
+    return {
+        "per_kb": float(coef[-1]),
+        "per_kb_se": float(se[-1]),
+        "key": {k: float(c) for k, c in zip(keys, coef[:-1])},
+        "r2": 1 - float(resid @ resid) / ss_tot if ss_tot > 0 else None,
+        "n": int(len(yv)),
+    }
+
+
+def analyze(df: pd.DataFrame) -> Dict:
+    out = {}
+    for server, g in df.groupby("server"):
+        lat = fit_chain_vs_key(g, "p50_ms")
+        cpu = fit_chain_vs_key(g, "server_cpu_ms_per_handshake")
+        overhead = (g["handshake_bytes_read"] - g["chain_bytes"]).dropna()
+        out[server] = {
+            "latency": lat,
+            "server_cpu": cpu,
+            "handshake_bytes_minus_chain": float(overhead.median()) if len(overhead) else None,
+        }
+    return out
+
+
+def decompose(df: pd.DataFrame, fits: Dict) -> pd.DataFrame:
+    """Per konfiguracja: część latencji z klucza (α) i z łańcucha (β·KB)"""
+    df = df.copy()
+    df["key_ms"] = np.nan
+    df["chain_ms"] = np.nan
+    for server, f in fits.items():
+        lat = f.get("latency")
+        if not lat:
+            continue
+        m = df["server"] == server
+        df.loc[m, "key_ms"] = df.loc[m, "cert_key"].map(lat["key"])
+        df.loc[m, "chain_ms"] = df.loc[m, "chain_kb"] * lat["per_kb"]
+    return df
+
+
+def plot_cert_matrix(df: pd.DataFrame, fits: Dict, out: Path, title: str = ""):
+    """Latencja p50 i CPU serwera vs rozmiar łańcucha; linie = dopasowanie per klucz"""
+    servers = [s for s in SERVER_LABEL if s in set(df["server"])]
+    fig, axes = plt.subplots(2, len(servers), figsize=(6 * len(servers), 9), squeeze=False)
+    cmap = plt.get_cmap("tab10")
+    colors = {k: cmap(i) for i, k in enumerate(KEY_ORDER)}
+    markers = {1: "o", 2: "s", 3: "^"}
+    for j, server in enumerate(servers):
+        g = df[df["server"] == server]
+        for row, (y, fkey, ylabel) in enumerate((
+            ("p50_ms", "latency", "Handshake p50 [ms]"),
+            ("server_cpu_ms_per_handshake", "server_cpu", "CPU serwera [ms/handshake]"),
+        )):
+            ax = axes[row][j]
+            fit = fits.get(server, {}).get(fkey)
+            for key, gk in g.groupby("cert_key"):
+                for depth, gd in gk.groupby("chain_depth"):
+                    ax.scatter(gd["chain_kb"], gd[y], color=colors.get(key, "gray"),
+                               marker=markers.get(int(depth), "o"), s=50, zorder=3)
+                if fit and key in fit["key"]:
+                    xs = np.linspace(0, gk["chain_kb"].max() * 1.05, 10)
+                    ax.plot(xs, fit["key"][key] + fit["per_kb"] * xs,
+                            color=colors.get(key, "gray"), alpha=0.6, label=key)
+            if fit:
+                ax.text(0.02, 0.97, f"β = {fit['per_kb']:.3f} ± {fit['per_kb_se']:.3f} /KB"
+                        + (f", R² = {fit['r2']:.2f}" if fit["r2"] is not None else ""),
+                        transform=ax.transAxes, va="top", fontsize=9,
+                        bbox=dict(boxstyle="round", facecolor="white", alpha=0.8))
+            ax.set_xlabel("Łańcuch certyfikatów [KB DER]")
+            ax.set_ylabel(ylabel)
+            ax.set_title(SERVER_LABEL[server] if row == 0 else "")
+            ax.grid(True, alpha=0.3)
+            if row == 0 and ax.get_legend_handles_labels()[0]:
+                ax.legend(fontsize=8, title="klucz (○ d1, □ d2, △ d3)")
+    fig.suptitle(title or "Macierz certyfikatów: klucz vs rozmiar łańcucha",
+                 fontsize=14, fontweight="bold")
+    plt.tight_layout()
+    out.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(out, dpi=300, bbox_inches="tight")
+    plt.close(fig)
+
+
+def run_analyze(args):
+    run_dir = Path(args.dir) if args.dir else latest_dir(Path(args.results))
+    if run_dir is None:
+        raise SystemExit("❌ brak wyników macierzy certyfikatów (scripts/run_cert_matrix.sh)")
+    df = load_dir(run_dir)
+    if df.empty:
+        raise SystemExit(f"❌ brak plików certmatrix_*.json w {run_dir}")
+    fits = analyze(df)
+    dec = decompose(df, fits)
+    dec.to_csv(run_dir / "cert_matrix.csv", index=False)
+    (run_dir / "cert_matrix_fit.json").write_text(json.dumps(fits, indent=2))
+    plot_cert_matrix(df, fits, Path(args.figures) / "cert_matrix.png")
+
+    print(f"📊 Macierz certyfikatów: {run_dir}")
+    cols = ["server", "cert_key", "chain_depth", "chain_bytes", "p50_ms", "key_ms", "chain_ms",
+            "server_cpu_ms_per_handshake", "handshake_bytes_read"]
+    print(dec[cols].to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    for server, f in fits.items():
+        lat, cpu = f["latency"], f["server_cpu"]
+        if lat:
+            print(f"🔑 {server}: łańcuch {lat['per_kb']:.3f} ± {lat['per_kb_se']:.3f} ms/KB, "
+                  f"klucz: " + ", ".join(f"{k} {v:.2f} ms" for k, v in lat["key"].items()))
+        if cpu:
+            print(f"   CPU serwera: {cpu['per_kb']:.4f} ms/KB, klucz: "
+                  + ", ".join(f"{k} {v:.3f} ms" for k, v in cpu["key"].items()))
+        if f["handshake_bytes_minus_chain"] is not None:
+            print(f"   bajty handshake'u − łańcuch: {f['handshake_bytes_minus_chain']:.0f} B (mediana)")
+    print(f"✅ {run_dir / 'cert_matrix.csv'}, {Path(args.figures) / 'cert_matrix.png'}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Macierz certyfikatów: klucz vs łańcuch")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    a = sub.add_parser("analyze", help="tabela, dopasowanie α_klucz + β·KB, wykres")
+    a.add_argument("dir", nargs="?", help="katalog results/cert_matrix/<...> (domyślnie najnowszy)")
+    a.add_argument("--results", default="results")
+    a.add_argument("--figures", default="figures")
+    args = ap.parse_args()
+    run_analyze(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,15 +6,25 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import re
 
-if len(sys.argv) != 3:
-    sys.exit("użycie: compare_aesni.py <run_dir_on> <run_dir_off>")
-
-run_on, run_off = map(pathlib.Path, sys.argv[1:])
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+from bench_csv import read_bench_csv
+from significance import compare_pairs
+from fingerprint import check_comparable, load as load_fingerprint
+
+force = "--force" in sys.argv
+args = [a for a in sys.argv[1:] if a != "--force"]
+if len(args) != 2:
+    sys.exit("użycie: compare_aesni.py <run_dir_on> <run_dir_off> [--force]")
+
+run_on, run_off = map(pathlib.Path, args)
+# OPENSSL_ia32cap różni się z definicji (to porównywany czynnik); reszta musi się zgadzać
+check_comparable(load_fingerprint(run_on), load_fingerprint(run_off), force=force,
+                 ignore=("openssl_ia32cap",), labels=("AES on", "AES off"))
 run_name = run_on.name
 
 
 def load(run_dir, label):
-    df = pd.read_csv(run_dir / "bench.csv", engine="python", on_bad_lines="skip")
+    df = read_bench_csv(run_dir / "bench.csv")
     df["aes_ni"] = label
     return df
 
@@ -32,6 +42,20 @@ pivot = (
 )
 pivot["delta_percent"] = ((pivot["off"] - pivot["on"]) / pivot["on"] * 100).round(1)
 
+# Istotność: wartości per run (on vs off) dla każdej komórki, korekta BH po całej macierzy
+groups = {
+    key: grp.value.to_numpy()
+    for key, grp in df.groupby(["aes_ni", "implementation", "suite", "test", "metric"])
+}
+cells = [k for k in pivot.index if ("on",) + k in groups and ("off",) + k in groups]
+if cells:
+    sig = compare_pairs([(groups[("on",) + k], groups[("off",) + k]) for k in cells])
+    sig.index = pd.MultiIndex.from_tuples(cells, names=pivot.index.names)
+    pivot = pivot.join(sig[["p_perm", "p_mannwhitney", "hl_percent", "q_value", "significance"]])
+else:
+    pivot["q_value"] = float("nan")
+    pivot["significance"] = ""
+
 out_csv = run_on / "aesni_compare.csv"
 pivot.to_csv(out_csv)
 print(f"✅ zapisano CSV: {out_csv.absolute()}")
@@ -108,9 +132,19 @@ for metric, fname in [
     if sub.empty:
         continue
     heat = sub.pivot(index="suite", columns="implementation", values="delta_percent")
+    stars = sub.pivot(index="suite", columns="implementation", values="significance")
+    labels = heat.copy().astype(object)
+    for i in heat.index:
+        for c in heat.columns:
+            v = heat.loc[i, c]
+            st = stars.loc[i, c] if pd.notna(stars.loc[i, c]) else ""
+            labels.loc[i, c] = "" if pd.isna(v) else f"{v:+.1f}\n{st}".rstrip()
     fig, ax = plt.subplots(figsize=(8, 5))
-    sns.heatmap(heat, annot=True, fmt="+.1f", cmap="RdBu_r", center=0, ax=ax)
-    ax.set_title(f"AES-NI Δ% heatmap ({metric})")
+    sns.heatmap(heat, annot=labels, fmt="", cmap="RdBu_r", center=0, ax=ax)
+    ax.set_title(
+        f"AES-NI Δ% heatmap ({metric})\n"
+        "perm. test, BH q: *** <0.001, ** <0.01, * <0.05, n.s."
+    )
     out_path = figures_dir / fname
     plt.savefig(out_path, dpi=300, bbox_inches="tight")
     plt.close(fig)
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Fan-out: K niezależnych klientów bulk (kontenery lub procesy) na dedykowanych rdzeniach.
+
+Jeden klient w kontenerze tls-perf-nginx nie nasyca serwera przy dużym concurrency
+i konkuruje z nginx o CPU. Tu każdy klient (scripts/fanout_client.sh) działa na
+własnym rdzeniu (--cpuset-cpus / taskset), start synchronizuje bariera plikowa,
+a każdy klient zapisuje własne próbki. Koordynator scala je w jedną komórkę bulk
+(JSON + .raw jak run_bulk.sh) i raportuje:
+  - histogram czasów per klient (wspólne przedziały logarytmiczne),
+  - skew: rozrzut startu klientów, stosunek p50 max/min, CV przepustowości,
+  - zużycie CPU rdzenia klienta; klient ≥ CLIENT_SATURATION rdzenia => wąskie
+    gardło po stronie klienta, nie serwera.
+
+Użycie:
+    python fanout.py run --port 4431 --clients 4 --requests 256 --concurrency 32 \\
+        --payload 1 --out results/bulk/baseline_aes_on_r256_p1_c32/bulk_4431_r256_p1_c32.json
+    python fanout.py merge DIR --clients 4 --payload 1 --out cell.json   # ponowne scalenie
+"""
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from raw_samples import write_raw
+from results_catalog import profile_code
+
+ROOT = Path(__file__).resolve().parent
+CLIENT_SCRIPT = ROOT / "scripts" / "fanout_client.sh"
+OPENSSL_IMAGE = os.environ.get("FANOUT_IMAGE", "openquantumsafe/oqs-ossl3")
+WOLF_CLI_CONTAINER = "wolfssl-cli"
+BARRIER_TIMEOUT_S = 120
+CLIENT_SATURATION = 0.9  # udział rdzenia, od którego klient uznajemy za nasycony
+HIST_BINS = 40
+ALGORITHM = {
+    4431: "X25519_AES-GCM",
+    4432: "X25519_ChaCha20",
+    8443: "X25519MLKEM768_AES-GCM",
+    4434: "X25519_AES-GCM_wolfSSL",
+    4435: "X25519_ChaCha20_wolfSSL",
+    11112: "X25519_ML_KEM_768_wolfSSL",
+}
+
+
+def client_cmd(port: int, host: str, cafile: str) -> str:
+    """Polecenie klienta TLS dla portu (żądanie HTTP na stdin)"""
+    if port == 11112:
+        return f"wolf-client -h {host} -p 11112 -v 4 --pqc X25519_ML_KEM_768 -A {cafile} -x"
+    groups = "-provider oqsprovider -groups X25519MLKEM768 " if port == 8443 else ""
+    return (f"openssl s_client -quiet -provider default {groups}-tls1_3 "
+            f"-CAfile {cafile} -connect {host}:{port}")
+
+
+def ia32cap_env() -> Dict[str, str]:
+    """OPENSSL_ia32cap dla klientów tylko gdy ustawione — pustą wartość OpenSSL czyta
+    jako wektor 0 (wyłącza wszystkie rozszerzenia CPU, nie tylko AES-NI)"""
+    mask = os.environ.get("OPENSSL_ia32cap")
+    return {"OPENSSL_ia32cap": mask} if mask else {}
+
+
+def host_env(env: Dict[str, str]) -> Dict[str, str]:
+    """Środowisko procesu na hoście: os.environ (bez pustego OPENSSL_ia32cap) + env"""
+    base = {k: v for k, v in os.environ.items() if k != "OPENSSL_ia32cap"}
+    return {**base, **ia32cap_env(), **env}
+
+
+def client_image(port: int) -> str:
+    if port != 11112:
+        return OPENSSL_IMAGE
+    # Obraz zbudowany przez docker compose dla wolfssl-cli (nazwa zależy od projektu)
+    res = subprocess.run(["docker", "inspect", "-f", "{{.Config.Image}}", WOLF_CLI_CONTAINER],
+                         capture_output=True, text=True, check=False)
+    if res.returncode != 0 or not res.stdout.strip():
+        raise SystemExit(f"❌ brak kontenera {WOLF_CLI_CONTAINER} (obraz klienta wolfSSL)")
+    return res.stdout.strip()
+
+
+def pick_cores(k: int, spec: str) -> List[Optional[int]]:
+    """Rdzenie klientów: lista '2,3,4' albo 'auto' (ostatnie K rdzeni hosta)"""
+    if spec == "none":
+        return [None] * k
+    if spec != "auto":
+        cores = [int(c) for c in spec.split(",") if c != ""]
+        if len(cores) < k:
+            raise SystemExit(f"❌ --cpus: {len(cores)} rdzeni dla {k} klientów")
+        return cores[:k]
+    n = os.cpu_count() or 1
+    if k >= n:
+        print(f"⚠️  {k} klientów na {n} rdzeniach — klienci dzielą CPU z serwerem")
+        return [i % n for i in range(k)]
+    return list(range(n - k, n))
+
+
+def split(total: int, k: int) -> List[int]:
+    return [total // k + (1 if i < total % k else 0) for i in range(k)]
+
+
+class Fanout:
+    """K klientów + bariera startu; mode: container (docker) albo process (taskset)"""
+
+    def __init__(self, args, port: int, work: Path):
+        self.args, self.port, self.work = args, port, work
+        self.k = args.clients
+        self.cores = pick_cores(self.k, args.cpus)
+        self.names: List[str] = []
+        self.procs: List[subprocess.Popen] = []
+        self.rusage: Dict[int, float] = {}
+
+    def _env(self, i: int, requests: int, workers: int, fanout_dir: str, cafile: str) -> Dict:
+        return {
+            "FANOUT_DIR": fanout_dir,
+            "CLIENT_ID": str(i),
+            "REQUESTS": str(requests),
+            "WORKERS": str(workers),
+            "BYTES": str(int(self.args.payload * 1048576)),
+            "HOST": self.args.host,
+            "CLIENT_CMD": self.args.client_cmd or client_cmd(self.port, self.args.host, cafile),
+            # Klient nie czeka na sygnał startu dłużej niż koordynator na barierę
+            "GO_TIMEOUT_S": str(BARRIER_TIMEOUT_S),
+            **ia32cap_env(),
+        }
+
+    def start(self):
+        reqs = split(self.args.requests, self.k)
+        workers = [max(1, w) for w in split(self.args.concurrency, self.k)]
+        if self.args.mode == "container":
+            shutil.copy(CLIENT_SCRIPT, self.work / "client.sh")
+            image = client_image(self.port)
+            for i, core in enumerate(self.cores):
+                name = f"tls-fanout-{os.getpid()}-{i}"
+                cmd = ["docker", "run", "-d", "--rm", "--name", name, "--network", "host",
+                       "-v", f"{ROOT / 'certs'}:/certs:ro", "-v", f"{self.work}:/fanout",
+                       "--entrypoint", "sleep"]
+                if core is not None:
+                    cmd += ["--cpuset-cpus", str(core)]
+                subprocess.run(cmd + [image, "infinity"], check=True, capture_output=True)
+                self.names.append(name)
+            for i, name in enumerate(self.names):
+                env = self._env(i, reqs[i], workers[i], "/fanout", "/certs/ca.pem")
+                flags = [x for k, v in env.items() for x in ("-e", f"{k}={v}")]
+                self.procs.append(subprocess.Popen(
+                    ["docker", "exec", *flags, name, "sh", "/fanout/client.sh"]))
+        else:
+            pin = shutil.which("taskset")
+            for i, core in enumerate(self.cores):
+                env = host_env(self._env(i, reqs[i], workers[i], str(self.work),
+                                         str(ROOT / "certs" / "ca.pem")))
+                cmd = ["sh", str(CLIENT_SCRIPT)]
+                if pin and core is not None:
+                    cmd = [pin, "-c", str(core)] + cmd
+                # Własna grupa procesów — cleanup() zatrzymuje klienta razem z potomkami
+                self.procs.append(subprocess.Popen(cmd, env=env, start_new_session=True))
+
+    def barrier(self):
+        """Czeka aż wszyscy klienci zgłoszą gotowość, potem jeden sygnał startu"""
+        deadline = time.monotonic() + BARRIER_TIMEOUT_S
+        while len(list(self.work.glob("ready_*"))) < self.k:
+            if time.monotonic() > deadline or any(p.poll() not in (None, 0) for p in self.procs):
+                raise SystemExit("❌ bariera fan-out: nie wszyscy klienci wystartowali")
+            time.sleep(0.01)
+        (self.work / "go").touch()
+
+    def wait(self):
+        for i, p in enumerate(self.procs):
+            if self.args.mode == "process":
+                # rusage procesu klienta (z potomkami) — cgroup hosta nie rozróżnia klientów
+                _, status, ru = os.wait4(p.pid, 0)
+                p.returncode = os.waitstatus_to_exitcode(status)
+                self.rusage[i] = (ru.ru_utime + ru.ru_stime) * 1e9
+            else:
+                p.wait()
+
+    def _stop(self, p: subprocess.Popen, sig: int):
+        if self.args.mode == "process":
+            try:
+                os.killpg(p.pid, sig)
+            except ProcessLookupError:
+                pass
+        else:
+            p.send_signal(sig)
+
+    def cleanup(self):
+        """Zatrzymuje klientów, którzy wciąż działają (np. po nieudanej barierze), i kontenery"""
+        for p in self.procs:
+            if p.poll() is not None:
+                continue
+            self._stop(p, signal.SIGTERM)
+            try:
+                p.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._stop(p, signal.SIGKILL)
+                p.wait()
+        for name in self.names:
+            subprocess.run(["docker", "rm", "-f", name], capture_output=True, check=False)
+
+
+def _read_client(work: Path, i: int) -> np.ndarray:
+    path = work / f"client_{i}.txt"
+    if not path.exists() or path.stat().st_size == 0:
+        return np.empty((0, 4))
+    return np.loadtxt(path, dtype=float, ndmin=2).reshape(-1, 4)
+
+
+def _cpu_util(work: Path, i: int, rusage_ns: Optional[float]) -> Optional[float]:
+    path = work / f"client_{i}.cpu"
+    if not path.exists():
+        return None
+    cpu0, cpu1, wall0, wall1 = (float(v) for v in path.read_text().split())
+    used = rusage_ns if rusage_ns is not None else cpu1 - cpu0
+    if wall1 <= wall0 or used <= 0:
+        return None
+    return used / (wall1 - wall0)
+
+
+def merge(work: Path, k: int, payload_mb: float, cores: List[Optional[int]],
+          rusage: Optional[Dict[int, float]] = None) -> Dict:
+    """Scala próbki K klientów w jedną komórkę + statystyki per klient i skew"""
+    rows = [_read_client(work, i) for i in range(k)]
+    allrows = np.vstack(rows) if any(len(r) for r in rows) else np.empty((0, 4))
+    ok = allrows[allrows[:, 3] == 1] if len(allrows) else allrows
+    lat_all = (ok[:, 1] - ok[:, 0]) / 1e9
+    edges = (np.geomspace(max(lat_all.min(), 1e-4), lat_all.max() * 1.0001, HIST_BINS + 1)
+             if len(lat_all) else np.array([]))
+
+    clients = []
+    first_starts = [r[:, 0].min() for r in rows if len(r)]
+    t0 = min(first_starts) if first_starts else 0.0
+    for i, r in enumerate(rows):
+        good = r[r[:, 3] == 1] if len(r) else r
+        lat = (good[:, 1] - good[:, 0]) / 1e9
+        wall = (r[:, 1].max() - r[:, 0].min()) / 1e9 if len(r) else 0.0
+        clients.append({
+            "id": i,
+            "core": cores[i] if i < len(cores) else None,
+            "requests": int(len(r)),
+            "failed": int(len(r) - len(good)),
+            "p50_s": float(np.median(lat)) if len(lat) else None,
+            "p99_s": float(np.percentile(lat, 99)) if len(lat) else None,
+            "throughput_mb_s": len(good) * payload_mb / wall if wall > 0 else None,
+            "start_offset_ms": (r[:, 0].min() - t0) / 1e6 if len(r) else None,
+            "cpu_util": _cpu_util(work, i, (rusage or {}).get(i)),
+            "hist_counts": np.histogram(lat, bins=edges)[0].tolist() if len(edges) else [],
+        })
+
+    wall = (allrows[:, 1].max() - allrows[:, 0].min()) / 1e9 if len(allrows) else 0.0
+    p50s = [c["p50_s"] for c in clients if c["p50_s"]]
+    tps = np.array([c["throughput_mb_s"] for c in clients if c["throughput_mb_s"]])
+    utils = [c["cpu_util"] for c in clients if c["cpu_util"] is not None]
+    cpu_max = max(utils) if utils else None
+    out = {
+        "requests_per_second": len(ok) / wall if wall > 0 else None,
+        "avg_request_time_s": float(lat_all.mean()) if len(lat_all) else None,
+        "successful_requests": int(len(ok)),
+        "failed_requests": int(len(allrows) - len(ok)),
+        "throughput_mb_s": len(ok) * payload_mb / wall if wall > 0 else None,
+        "request_times_s": lat_all.tolist(),
+        "fanout_clients": k,
+        "client_start_skew_ms": (max(first_starts) - t0) / 1e6 if first_starts else None,
+        "client_p50_skew": max(p50s) / min(p50s) if p50s else None,
+        "client_throughput_cv": float(tps.std() / tps.mean()) if len(tps) > 1 else None,
+        "client_cpu_max": cpu_max,
+        # Nasycony rdzeń klienta => wynik ogranicza klient; inaczej serwer
+        "bottleneck": None if cpu_max is None else
+        ("client" if cpu_max >= CLIENT_SATURATION else "server"),
+        "hist_edges_s": edges.tolist(),
+        "clients": clients,
+    }
+    out["_records"] = ok[:, :3]
+    return out
+
+
+def write_cell(res: Dict, out: Path, args, port: int):
+    records = res.pop("_records")
+    cell = {
+        "host": args.host,
+        "port": port,
+        "total_requests": args.requests,
+        "payload_size_mb": args.payload,
+        "concurrency": args.concurrency,
+        **res,
+        "measurement_method": f"fanout_{args.mode}_http_post",
+        "fanout_mode": args.mode,
+        "algorithm": ALGORITHM.get(port, "Unknown"),
+        "note": f"HTTP POST from {res['fanout_clients']} {args.mode} clients on dedicated cores",
+    }
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(cell, indent=2))
+    write_raw(out.with_suffix(".raw"), records, test="bulk", port=port,
+              requests=args.requests, payload_mb=args.payload,
+              concurrency=args.concurrency, aes=args.aes,
+              profile=profile_code(args.profile) or args.profile)
+
+
+def _report(res: Dict, port: int):
+    fmt = lambda v, f: "–" if v is None else format(v, f)
+    print(f"📊 port {port}: {res['successful_requests']} ok / {res['failed_requests']} failed, "
+          f"{fmt(res['throughput_mb_s'], '.2f')} MB/s, {fmt(res['requests_per_second'], '.2f')} req/s")
+    for c in res["clients"]:
+        print(f"  klient {c['id']} (rdzeń {c['core']}): p50 {fmt(c['p50_s'], '.4f')}s, "
+              f"p99 {fmt(c['p99_s'], '.4f')}s, {fmt(c['throughput_mb_s'], '.2f')} MB/s, "
+              f"CPU {fmt(c['cpu_util'], '.0%')}, start +{fmt(c['start_offset_ms'], '.1f')}ms")
+    print(f"  skew: start {fmt(res['client_start_skew_ms'], '.1f')}ms, "
+          f"p50 max/min {fmt(res['client_p50_skew'], '.2f')}, "
+          f"CV przepustowości {fmt(res['client_throughput_cv'], '.2f')}")
+    if res["bottleneck"] == "client":
+        print(f"  ⚠️  rdzeń klienta nasycony ({res['client_cpu_max']:.0%}) — "
+              f"zwiększ --clients, wynik ogranicza klient")
+    elif res["bottleneck"] == "server":
+        print(f"  ✅ klienci poniżej {CLIENT_SATURATION:.0%} rdzenia — ograniczenie po stronie serwera")
+
+
+def run(args):
+    work = Path(tempfile.mkdtemp(prefix="tls-fanout-"))
+    fan = Fanout(args, args.port, work)
+    print(f"🔀 fan-out: {args.clients} klientów ({args.mode}), rdzenie {fan.cores}, "
+          f"port {args.port}, c={args.concurrency}, n={args.requests}")
+    try:
+        fan.start()
+        fan.barrier()
+        fan.wait()
+        res = merge(work, args.clients, args.payload, fan.cores,
+                    fan.rusage if args.mode == "process" else None)
+    finally:
+        fan.cleanup()
+        shutil.rmtree(work, ignore_errors=True)
+    _report(res, args.port)
+    if args.out:
+        write_cell(res, Path(args.out), args, args.port)
+        print(f"✅ {args.out}")
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Bulk z K klientów (fan-out) scalony w jedną komórkę")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    def common(sp):
+        sp.add_argument("--clients", type=int, default=4, help="liczba klientów K")
+        sp.add_argument("--requests", type=int, default=64, help="żądania łącznie")
+        sp.add_argument("--concurrency", type=int, default=8,
+                        help="połączenia łącznie (dzielone między klientów)")
+        sp.add_argument("--payload", type=float, default=1, help="rozmiar POST w MB")
+        sp.add_argument("--host", default="localhost")
+        sp.add_argument("--aes", choices=["on", "off"], default="on")
+        sp.add_argument("--profile", default="baseline", help="profil NetEm (etykieta lub P0–P3)")
+        sp.add_argument("--mode", choices=["container", "process"], default="container")
+        sp.add_argument("--out", help="plik JSON komórki (obok zapisywany .raw)")
+
+    r = sub.add_parser("run", help="uruchom K klientów i scal wyniki")
+    r.add_argument("--port", type=int, required=True)
+    r.add_argument("--cpus", default="auto", help="rdzenie klientów: 'auto', 'none' lub '2,3,4,5'")
+    r.add_argument("--client-cmd", help="własne polecenie klienta (stdin = żądanie HTTP)")
+    common(r)
+
+    m = sub.add_parser("merge", help="scal próbki z katalogu fan-out")
+    m.add_argument("dir")
+    m.add_argument("--port", type=int, default=0)
+    common(m)
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.cmd == "run":
+        run(args)
+        return
+    res = merge(Path(args.dir), args.clients, args.payload, [])
+    _report(res, args.port)
+    if args.out:
+        write_cell(res, Path(args.out), args, args.port)
+
+
+if __name__ == "__main__":
+    main()
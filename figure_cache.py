@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Cache wykresów kluczowany hashem wejść — przebudowywane są tylko nieaktualne figury.
+
+Każda figura (FigureSpec) deklaruje pliki wejściowe (ścieżki lub wzorce glob),
+parametry i pliki wyjściowe. Klucz = sha256(kod funkcji + kod pomocniczy +
+parametry + hashe treści wejść). Manifest trzymany jest w <output_dir>/.figure_cache.json.
+"""
+
+import glob
+import hashlib
+import inspect
+import json
+import multiprocessing as mp
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import matplotlib
+
+MANIFEST_NAME = ".figure_cache.json"
+# Podbić przy zmianie formatu klucza/manifestu
+CACHE_VERSION = 1
+
+
+def source_hash(*objs) -> str:
+    """Hash kodu źródłowego funkcji (lub repr() dla stałych) — wersja kodu rysującego"""
+    h = hashlib.sha256()
+    for obj in objs:
+        try:
+            text = inspect.getsource(obj)
+        except (TypeError, OSError):
+            text = repr(obj)
+        h.update(text.encode())
+    return h.hexdigest()
+
+
+def expand_inputs(patterns: Iterable) -> List[str]:
+    """Rozwija wzorce glob do posortowanej listy istniejących plików"""
+    files = set()
+    for pat in patterns:
+        if pat is None:
+            continue
+        pat = str(pat)
+        if glob.has_magic(pat):
+            files.update(p for p in glob.glob(pat, recursive=True) if os.path.isfile(p))
+        elif os.path.isfile(pat):
+            files.add(pat)
+    return sorted(files)
+
+
+class FigureSpec:
+    """Opis jednej figury: funkcja + argumenty + zadeklarowane wejścia/wyjścia"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable,
+        args: tuple = (),
+        inputs: Iterable = (),
+        params: Optional[Dict] = None,
+        outputs: Iterable[str] = (),
+        code: Iterable = (),
+    ):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.inputs = list(inputs)
+        self.params = params or {}
+        self.outputs = list(outputs)  # wzorce glob względem output_dir
+        self.code = list(code)  # dodatkowe funkcje pomocnicze wpływające na wynik
+
+    def run(self):
+        return self.func(*self.args)
+
+
+# Zadania dla workerów — ustawiane przed fork(), dziedziczone bez pickle (np. DataFrame)
+_PENDING: List[FigureSpec] = []
+
+
+def _worker_init():
+    import matplotlib.pyplot as plt
+
+    plt.switch_backend("Agg")
+
+
+def _run_pending(index: int):
+    """Uruchamia _PENDING[index] w workerze; zwraca (index, czas_s, błąd)"""
+    t0 = time.perf_counter()
+    try:
+        _PENDING[index].run()
+        err = None
+    except Exception as e:
+        traceback.print_exc()
+        err = str(e)
+    return index, time.perf_counter() - t0, err
+
+
+def default_jobs() -> int:
+    return os.cpu_count() or 1
+
+
+class FigureCache:
+    """Manifest hashy wejść per figura; decyduje, co trzeba przerysować"""
+
+    def __init__(self, output_dir: Path, force: bool = False, shared_code: Iterable = ()):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.force = force
+        self.manifest_path = self.output_dir / MANIFEST_NAME
+        self.shared = source_hash(*shared_code) if shared_code else ""
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict:
+        try:
+            data = json.loads(self.manifest_path.read_text())
+            if data.get("version") == CACHE_VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {"version": CACHE_VERSION, "figures": {}, "files": {}}
+
+    def save(self):
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.manifest, indent=1, sort_keys=True))
+        os.replace(tmp, self.manifest_path)
+
+    def file_hash(self, path: str) -> str:
+        """sha256 treści; przeliczany tylko gdy zmienił się size/mtime"""
+        st = os.stat(path)
+        memo = self.manifest["files"].get(path)
+        if memo and memo[0] == st.st_size and memo[1] == st.st_mtime_ns:
+            return memo[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.manifest["files"][path] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def key(self, spec: FigureSpec) -> str:
+        h = hashlib.sha256()
+        h.update(f"v{CACHE_VERSION}|mpl{matplotlib.__version__}|{self.shared}".encode())
+        h.update(source_hash(spec.func, *spec.code).encode())
+        h.update(json.dumps(spec.params, sort_keys=True, default=str).encode())
+        for path in expand_inputs(spec.inputs):
+            h.update(f"{path}:{self.file_hash(path)}".encode())
+        return h.hexdigest()
+
+    def _outputs(self, spec: FigureSpec) -> List[str]:
+        found = set()
+        for pat in spec.outputs:
+            found.update(
+                os.path.relpath(p, self.output_dir)
+                for p in glob.glob(str(self.output_dir / pat))
+            )
+        return sorted(found)
+
+    def is_stale(self, spec: FigureSpec, key: str) -> bool:
+        if self.force:
+            return True
+        entry = self.manifest["figures"].get(spec.name)
+        if not entry or entry.get("key") != key:
+            return True
+        # Wyjścia zapisane przy ostatnim renderze muszą nadal istnieć
+        return any(not (self.output_dir / o).exists() for o in entry.get("outputs", []))
+
+    def record(self, spec: FigureSpec, key: str):
+        self.manifest["figures"][spec.name] = {
+            "key": key,
+            "outputs": self._outputs(spec),
+            "built_at": time.time(),
+        }
+
+    def build(self, specs: List[FigureSpec], jobs: int = 1) -> Dict:
+        """Renderuje nieaktualne figury (jobs>1: pula procesów), zwraca raport"""
+        report = {"rebuilt": [], "cached": [], "failed": [], "timings": {}}
+        stale = []
+        for spec in specs:
+            key = self.key(spec)
+            if self.is_stale(spec, key):
+                stale.append((spec, key))
+            else:
+                report["cached"].append(spec.name)
+
+        t0 = time.perf_counter()
+        for (spec, key), secs, err in self._execute(stale, jobs):
+            report["timings"][spec.name] = secs
+            if err is not None:
+                print(f"❌ {spec.name}: {err}")
+                report["failed"].append(spec.name)
+                continue
+            self.record(spec, key)
+            report["rebuilt"].append(spec.name)
+        report["wall_s"] = time.perf_counter() - t0
+        order = {spec.name: i for i, spec in enumerate(specs)}
+        report["rebuilt"].sort(key=order.get)
+        report["failed"].sort(key=order.get)
+        report["jobs"] = jobs
+        self.save()
+        return report
+
+    def _execute(self, stale, jobs: int):
+        """Generator (zadanie, czas, błąd); fork dzieli dane z procesem-rodzicem"""
+        global _PENDING
+        if jobs <= 1 or len(stale) <= 1 or "fork" not in mp.get_all_start_methods():
+            for item in stale:
+                t0 = time.perf_counter()
+                try:
+                    item[0].run()
+                    err = None
+                except Exception as e:
+                    err = str(e)
+                yield item, time.perf_counter() - t0, err
+            return
+
+        _PENDING = [spec for spec, _ in stale]
+        done = set()
+        try:
+            try:
+                with self._pool(min(jobs, len(stale))) as pool:
+                    futures = [pool.submit(_run_pending, i) for i in range(len(stale))]
+                    for fut in as_completed(futures):
+                        i, secs, err = fut.result()
+                        done.add(i)
+                        yield stale[i], secs, err
+            except BrokenProcessPool as e:
+                # Padł worker (np. OOM/segfault) — nie wiadomo który, więc niedokończone
+                # figury po kolei, każda w osobnym workerze: wywrotka psuje tylko swoją
+                print(f"⚠️  pula procesów przerwana ({e}) — pozostałe figury szeregowo")
+                for i in range(len(stale)):
+                    if i not in done:
+                        yield stale[i], *self._run_isolated(i)
+        finally:
+            _PENDING = []
+
+    @staticmethod
+    def _pool(workers: int) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp.get_context("fork"),
+            initializer=_worker_init,
+        )
+
+    def _run_isolated(self, index: int):
+        """(czas, błąd) dla _PENDING[index] w jednorazowym workerze"""
+        t0 = time.perf_counter()
+        try:
+            with self._pool(1) as pool:
+                _, secs, err = pool.submit(_run_pending, index).result()
+            return secs, err
+        except BrokenProcessPool:
+            return time.perf_counter() - t0, "worker przerwany (proces renderujący padł)"
+
+
+def print_report(report: Dict):
+    """Podsumowanie: co przerysowano, co wzięto z cache, czasy per figura"""
+    print("\n📦 Cache wykresów:")
+    print(f"   ♻️  przebudowane ({len(report['rebuilt'])}): {', '.join(report['rebuilt']) or '-'}")
+    print(f"   ⏭️  z cache ({len(report['cached'])}): {', '.join(report['cached']) or '-'}")
+    if report["failed"]:
+        print(f"   ❌ błędy ({len(report['failed'])}): {', '.join(report['failed'])}")
+    timings = report.get("timings", {})
+    if timings:
+        print(f"⏱️  Czasy renderowania (jobs={report.get('jobs', 1)}):")
+        for name, secs in sorted(timings.items(), key=lambda kv: -kv[1]):
+            print(f"   {name:<36} {secs:7.2f} s")
+        total = sum(timings.values())
+        wall = report.get("wall_s", total)
+        print(f"   suma {total:.2f} s, czas całkowity {wall:.2f} s")
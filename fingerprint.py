@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Odcisk środowiska runu (fingerprint.json) i pre-flight kontroli szumu.
+
+Zbiera: model CPU, microcode, governor, turbo/boost, SMT, izolowane rdzenie, kernel,
+digesty obrazów kontenerów, OPENSSL_ia32cap (wstrzykiwany przez runnery przez
+`docker exec -e` oraz środowisko kontenerów), load average hosta.
+Analiza (regress.py, compare_aesni.py) odmawia porównania runów, których odciski
+różnią się w polach MATTERS — chyba że --force.
+
+Użycie:
+    python fingerprint.py collect --out results/run_X/fingerprint.json
+    python fingerprint.py diff results/run_A results/run_B
+    sudo python fingerprint.py preflight apply --state /tmp/preflight.json
+    sudo python fingerprint.py preflight restore --state /tmp/preflight.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+CONTAINERS = ["tls-perf-nginx", "lighttpd-wolfssl", "wolfssl-server-kyber", "wolfssl-cli",
+              "backend-sink"]
+
+# Pola, których różnica unieważnia porównanie (ścieżki w odcisku, kropka = zagnieżdżenie)
+MATTERS = [
+    "host.cpu_model",
+    "host.microcode",
+    "host.governor",
+    "host.turbo",
+    "host.smt",
+    "host.isolated_cores",
+    "host.kernel",
+    "containers.*.image_id",
+    "openssl_ia32cap",
+]
+
+# Load average / liczba rdzeni powyżej tego progu = ostrzeżenie (nie blokuje)
+LOAD_WARN = 0.25
+
+CPU_SYS = Path("/sys/devices/system/cpu")
+
+
+def _read(path) -> Optional[str]:
+    try:
+        return Path(path).read_text().strip()
+    except OSError:
+        return None
+
+
+def _run(cmd: List[str], timeout: float = 10) -> Optional[str]:
+    try:
+        r = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return r.stdout.strip() if r.returncode == 0 else None
+
+
+def _cpuinfo(field: str) -> Optional[str]:
+    txt = _read("/proc/cpuinfo") or ""
+    m = re.search(rf"^{field}\s*:\s*(.+)$", txt, re.M)
+    return m.group(1).strip() if m else None
+
+
+def governor_paths() -> List[str]:
+    return sorted(glob.glob(str(CPU_SYS / "cpu[0-9]*/cpufreq/scaling_governor")))
+
+
+def turbo_state() -> Tuple[Optional[str], Optional[str]]:
+    """(plik sterujący, "on"/"off"); intel_pstate no_turbo ma odwróconą logikę"""
+    no_turbo = CPU_SYS / "intel_pstate/no_turbo"
+    boost = CPU_SYS / "cpufreq/boost"
+    if no_turbo.exists():
+        v = _read(no_turbo)
+        return str(no_turbo), (None if v is None else ("off" if v == "1" else "on"))
+    if boost.exists():
+        v = _read(boost)
+        return str(boost), (None if v is None else ("on" if v == "1" else "off"))
+    return None, None
+
+
+def host_fingerprint() -> Dict:
+    govs = sorted({_read(p) for p in governor_paths()} - {None})
+    _, turbo = turbo_state()
+    smt = _read(CPU_SYS / "smt/control")
+    if smt is not None and _read(CPU_SYS / "smt/active") is not None:
+        smt = f"{smt} (active={_read(CPU_SYS / 'smt/active')})"
+    cpu_model = _cpuinfo("model name")
+    if cpu_model is None and platform.system() == "Darwin":
+        cpu_model = _run(["sysctl", "-n", "machdep.cpu.brand_string"])
+    flags = (_cpuinfo("flags") or "").split()
+    try:
+        load = [round(x, 2) for x in os.getloadavg()]
+    except OSError:
+        load = None
+    return {
+        "cpu_model": cpu_model,
+        "microcode": _cpuinfo("microcode"),
+        "cpu_aes_flag": ("aes" in flags) if flags else None,
+        "nproc": os.cpu_count(),
+        "governor": ",".join(govs) if govs else None,
+        "turbo": turbo,
+        "smt": smt,
+        "isolated_cores": _read(CPU_SYS / "isolated"),
+        "kernel": platform.release(),
+        "os": platform.platform(),
+        "loadavg": load,
+    }
+
+
+def container_fingerprint(name: str) -> Optional[Dict]:
+    fmt = "{{.Image}}|{{.Config.Image}}"
+    out = _run(["docker", "inspect", "--format", fmt, name])
+    if not out:
+        return None
+    image_id, image = out.split("|", 1)
+    digests = _run(["docker", "image", "inspect", "--format", "{{json .RepoDigests}}", image_id])
+    return {
+        "image": image,
+        "image_id": image_id,
+        "repo_digests": json.loads(digests) if digests else [],
+        "env_openssl_ia32cap": _run(["docker", "exec", name, "sh", "-c",
+                                     'printf %s "${OPENSSL_ia32cap:-}"']),
+        "openssl_version": _run(["docker", "exec", name, "sh", "-c",
+                                 "openssl version 2>/dev/null | head -1"]),
+    }
+
+
+def collect(containers: List[str] = CONTAINERS) -> Dict:
+    fp = {
+        "collected_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": host_fingerprint(),
+        # Runnery przekazują go klientom przez `docker exec -e OPENSSL_ia32cap=...`
+        "openssl_ia32cap": os.environ.get("OPENSSL_ia32cap", ""),
+        "containers": {},
+    }
+    if shutil.which("docker"):
+        for name in containers:
+            c = container_fingerprint(name)
+            if c is not None:
+                fp["containers"][name] = c
+    return fp
+
+
+def _get(fp: Dict, path: str) -> Dict[str, object]:
+    """Wartości pola (z rozwinięciem '*') jako {pełna_ścieżka: wartość}"""
+    nodes = {"": fp}
+    for part in path.split("."):
+        nxt = {}
+        for prefix, node in nodes.items():
+            if not isinstance(node, dict):
+                continue
+            keys = node.keys() if part == "*" else [part]
+            for k in keys:
+                if k in node:
+                    nxt[f"{prefix}.{k}" if prefix else k] = node[k]
+        nodes = nxt
+    return nodes
+
+
+def diff(a: Dict, b: Dict, ignore: Tuple[str, ...] = ()) -> List[Tuple[str, object, object]]:
+    """Różnice w polach MATTERS; brak pola po obu stronach nie jest różnicą"""
+    out = []
+    for path in MATTERS:
+        if path in ignore:
+            continue
+        va, vb = _get(a, path), _get(b, path)
+        for key in sorted(set(va) | set(vb)):
+            if va.get(key) != vb.get(key):
+                out.append((key, va.get(key), vb.get(key)))
+    return out
+
+
+def load(run_dir: Path) -> Optional[Dict]:
+    p = Path(run_dir)
+    p = p if p.suffix == ".json" else p / "fingerprint.json"
+    try:
+        return json.loads(p.read_text())
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def load_warnings(fp: Dict) -> List[str]:
+    h = fp.get("host", {})
+    load_avg, n = h.get("loadavg"), h.get("nproc")
+    if load_avg and n and load_avg[0] / n > LOAD_WARN:
+        return [f"load average {load_avg[0]} przy {n} rdzeniach ({fp.get('collected_at')})"]
+    return []
+
+
+def check_comparable(a: Optional[Dict], b: Optional[Dict], force: bool = False,
+                     ignore: Tuple[str, ...] = (), labels=("A", "B")) -> bool:
+    """Odmawia (SystemExit) porównania runów o różnych odciskach, chyba że force.
+    Brak odcisku (starsze runy) = ostrzeżenie."""
+    if a is None or b is None:
+        missing = [l for l, fp in zip(labels, (a, b)) if fp is None]
+        print(f"⚠️  Brak fingerprint.json ({', '.join(missing)}) — zgodność środowiska niesprawdzona")
+        return True
+    for fp in (a, b):
+        for w in load_warnings(fp):
+            print(f"⚠️  Obciążony host: {w}")
+    d = diff(a, b, ignore)
+    if not d:
+        return True
+    print(f"❌ Różne środowiska ({labels[0]} vs {labels[1]}):")
+    for key, va, vb in d:
+        print(f"   {key}: {va!r} -> {vb!r}")
+    if not force:
+        raise SystemExit("❌ Porównanie odrzucone — użyj --force, jeśli różnica jest zamierzona")
+    print("⚠️  --force: porównuję mimo różnic")
+    return False
+
+
+# --- pre-flight -------------------------------------------------------------------
+
+def _write(path: str, value: str) -> bool:
+    try:
+        Path(path).write_text(value)
+        return True
+    except OSError as e:
+        print(f"⚠️  {path}: {e.strerror} (wymaga root)")
+        return False
+
+
+def preflight_apply(state_path: Path):
+    """Governor performance + wyłączone turbo; poprzedni stan do state_path"""
+    state = {"governor": {}, "turbo": {}}
+    for p in governor_paths():
+        old = _read(p)
+        if old is not None and _write(p, "performance"):
+            state["governor"][p] = old
+    path, turbo = turbo_state()
+    if path and turbo is not None:
+        old = _read(path)
+        off = "1" if path.endswith("no_turbo") else "0"
+        if _write(path, off):
+            state["turbo"][path] = old
+    state_path.write_text(json.dumps(state, indent=2))
+    if not state["governor"] and not state["turbo"]:
+        print("⚠️  Pre-flight: nic nie zmieniono (brak cpufreq/uprawnień)")
+    else:
+        print(f"✅ Pre-flight: governor performance ({len(state['governor'])} CPU), "
+              f"turbo {'wyłączone' if state['turbo'] else 'bez zmian'} — stan: {state_path}")
+
+
+def preflight_restore(state_path: Path):
+    try:
+        state = json.loads(state_path.read_text())
+    except (OSError, json.JSONDecodeError):
+        print(f"⚠️  Brak stanu pre-flight: {state_path}")
+        return
+    for group in ("turbo", "governor"):
+        for p, v in state.get(group, {}).items():
+            _write(p, v)
+    print("✅ Pre-flight: przywrócono governor/turbo")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Odcisk środowiska i pre-flight kontroli szumu")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("collect", help="zapisz fingerprint.json")
+    c.add_argument("--out", required=True)
+    c.add_argument("--containers", nargs="*", default=CONTAINERS)
+    d = sub.add_parser("diff", help="porównaj odciski dwóch runów (kod 1 gdy różne)")
+    d.add_argument("a")
+    d.add_argument("b")
+    d.add_argument("--ignore", nargs="*", default=[], help="pola MATTERS do pominięcia")
+    pf = sub.add_parser("preflight", help="governor performance / turbo off i przywrócenie")
+    pf.add_argument("action", choices=["apply", "restore"])
+    pf.add_argument("--state", required=True, help="plik stanu sprzed zmian")
+    args = ap.parse_args()
+
+    if args.cmd == "collect":
+        fp = collect(args.containers)
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(fp, indent=2))
+        h = fp["host"]
+        print(f"🔎 Fingerprint: {h['cpu_model']}, governor={h['governor']}, turbo={h['turbo']}, "
+              f"SMT={h['smt']}, kernel={h['kernel']}, load={h['loadavg']}, "
+              f"kontenery={len(fp['containers'])} -> {args.out}")
+        for w in load_warnings(fp):
+            print(f"⚠️  Obciążony host: {w}")
+    elif args.cmd == "diff":
+        a, b = load(Path(args.a)), load(Path(args.b))
+        if a is None or b is None:
+            sys.exit("❌ Brak fingerprint.json")
+        d = diff(a, b, tuple(args.ignore))
+        for key, va, vb in d:
+            print(f"   {key}: {va!r} -> {vb!r}")
+        print("✅ Odciski zgodne" if not d else f"❌ {len(d)} różnic")
+        sys.exit(1 if d else 0)
+    else:
+        if args.action == "apply":
+            preflight_apply(Path(args.state))
+        else:
+            preflight_restore(Path(args.state))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Skrypt do generowania wykresów TLS Performance & Security Analysis
 Zgodny ze specyfikacją 12 wykresów dla thesis
 """
 
+import argparse
 import json
 import csv
 import numpy as np
@@ -12,8 +13,20 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 
+from figure_cache import FigureCache, FigureSpec, default_jobs, print_report
+from results_catalog import get_catalog
+from aggregate_runs import SUITE_BY_PORT
+from microbench import SUITE_CIPHER, latest_micro, load_micro, micro_at
+from scaling import fit_usl, usl
+from cert_matrix import analyze as cert_matrix_fit, latest_dir as cert_matrix_dir
+from cert_matrix import fit_chain_vs_key, load_dir as load_cert_matrix, plot_cert_matrix
+
 # Konfiguracja
 plt.style.use("seaborn-v0_8")
 plt.rcParams["figure.figsize"] = (12, 8)
@@ -77,16 +90,38 @@ def calculate_percentiles(
     return p25, p50, p75, p95, iqr
 
 
-def load_handshake_data(base_path: Path, aes_mode: str, ports: List[int]) -> Dict:
-    """Ładuje dane handshake dla danego trybu AES"""
+def harness_overhead_s(json_data: Dict) -> float:
+    """Narzut harnessu z kalibracji komórki (calibrate_harness.sh); 0 gdy brak"""
+    return (json_data.get("calibration") or {}).get("harness_overhead_s") or 0.0
+
+
+def bulk_throughput(ds: "ChartData", json_data: Dict) -> Tuple[float, float]:
+    """(throughput MB/s, średni czas żądania s) komórki bulk; netto przy subtract_overhead.
+
+    Netto: payload / czas netto żądania, czyli throughput brutto przeskalowany ilorazem
+    czasów brutto/netto (współbieżność i liczba żądań bez zmian)
+    """
+    thr = json_data["throughput_mb_s"]
+    avg = json_data.get("avg_request_time_s") or 0.0
+    if ds.subtract_overhead:
+        net = max(avg - harness_overhead_s(json_data), 0.0)
+        if net > 0:
+            thr = thr * avg / net
+        avg = net
+    return thr, avg
+
+
+def load_handshake_data(ds: "ChartData", aes_mode: str, ports: List[int]) -> Dict:
+    """Ładuje dane handshake dla danego trybu AES (netto, gdy ds.subtract_overhead)"""
     data = {}
-    folder = base_path / f"handshake/baseline_aes_{aes_mode}_s33"
 
     for port in ports:
-        filepath = folder / f"handshake_{port}_s33.json"
-        json_data = load_json_data(filepath)
+        json_data = ds.json(test="handshake", port=port, aes=aes_mode, profile="P0")
         if json_data and "raw_measurements" in json_data:
             raw_data = json_data["raw_measurements"]
+            overhead = harness_overhead_s(json_data)
+            if ds.subtract_overhead:
+                raw_data = [max(x - overhead, 0.0) for x in raw_data]
             p25, p50, p75, p95, iqr = calculate_percentiles(raw_data)
             data[port] = {
                 "p25": p25,
@@ -96,76 +131,126 @@ def load_handshake_data(base_path: Path, aes_mode: str, ports: List[int]) -> Dic
                 "iqr": iqr,
                 "raw": [x * 1000 for x in raw_data],  # ms
                 "algorithm": json_data.get("algorithm", f"Port {port}"),
+                "overhead_ms": overhead * 1000,
             }
     return data
 
 
-def load_ttfb_data(base_path: Path, ports: List[int]) -> Dict:
+def load_ttfb_data(
+    ds: "ChartData", ports: List[int], payload_kb: Optional[float] = None
+) -> Dict:
     """Ładuje dane TTFB"""
     data = {}
-    folder = base_path / "ttfb/baseline_kb1"
+    payload_mb = payload_kb / 1024 if payload_kb is not None else None
 
     for port in ports:
-        filepath = folder / f"ttfb_{port}.json"
-        json_data = load_json_data(filepath)
-        if json_data and "ttfb_s" in json_data:
+        json_data = ds.json(test="ttfb", port=port, profile="P0", payload_mb=payload_mb)
+        if json_data and json_data.get("ttfb_s") is not None:
             ttfb_ms = json_data["ttfb_s"] * 1000
             data[port] = {"ttfb_ms": ttfb_ms}
+            # Rozkłady (run_ttfb.sh z TTFB_SAMPLES) — starsze pliki mają tylko ttfb_s
+            for key, field in (
+                ("ttfb_p95_ms", "ttfb_p95_s"),
+                ("warm_ms", "ttfb_warm_s"),
+                ("warm_p95_ms", "ttfb_warm_p95_s"),
+                ("connect_ms", "connect_p50_s"),
+                ("tls_done_ms", "tls_done_p50_s"),
+                ("request_sent_ms", "request_sent_p50_s"),
+            ):
+                if json_data.get(field) is not None:
+                    data[port][key] = json_data[field] * 1000
     return data
 
 
 def load_throughput_data(
-    base_path: Path, aes_mode: str, payload_mb: int, concurrency: int, ports: List[int]
+    ds: "ChartData", aes_mode: str, payload_mb: int, concurrency: int, ports: List[int]
 ) -> Dict:
     """Ładuje dane throughput"""
     data = {}
-    folder = (
-        base_path / f"bulk/baseline_aes_{aes_mode}_r64_p{payload_mb}_c{concurrency}"
-    )
 
     for port in ports:
-        filepath = folder / f"bulk_{port}_r64_p{payload_mb}_c{concurrency}.json"
-        json_data = load_json_data(filepath)
+        json_data = ds.json(
+            test="bulk",
+            port=port,
+            aes=aes_mode,
+            profile="P0",
+            payload_mb=payload_mb,
+            concurrency=concurrency,
+        )
         if json_data and "throughput_mb_s" in json_data:
-            data[port] = {
-                "throughput_mb_s": json_data["throughput_mb_s"],
-                "avg_request_time_s": json_data.get("avg_request_time_s", 0),
-            }
+            thr, avg = bulk_throughput(ds, json_data)
+            data[port] = {"throughput_mb_s": thr, "avg_request_time_s": avg}
+    return data
+
+
+def load_scaling_data(
+    ds: "ChartData", aes_mode: str, payload_mb: float, ports: List[int]
+) -> Dict:
+    """Throughput dla wszystkich zmierzonych c + dopasowanie USL per port"""
+    data = {}
+    for port in ports:
+        rows = ds.catalog.query(
+            include_runs=False, test="bulk", port=port, aes=aes_mode,
+            profile="P0", payload_mb=payload_mb,
+        )
+        points = []
+        for c in sorted({r["concurrency"] for r in rows if r["concurrency"]}):
+            json_data = ds.json(
+                test="bulk", port=port, aes=aes_mode, profile="P0",
+                payload_mb=payload_mb, concurrency=c,
+            )
+            if json_data and "throughput_mb_s" in json_data:
+                points.append((int(c), float(bulk_throughput(ds, json_data)[0])))
+        if points:
+            c, thr = zip(*points)
+            data[port] = {"concurrency": list(c), "throughput_mb_s": list(thr),
+                          "usl": fit_usl(c, thr)}
     return data
 
 
-def load_0rtt_data(base_path: Path, early_data_mb: float, ports: List[int]) -> Dict:
+def load_0rtt_data(ds: "ChartData", early_data_mb: float, ports: List[int]) -> Dict:
     """Ładuje dane 0-RTT"""
     data = {}
-    folder = base_path / f"0rtt/baseline_aes_on_ed{early_data_mb}_n10"
 
     for port in ports:
-        filepath = folder / f"simple_{port}_ed{early_data_mb}_n10.json"
-        json_data = load_json_data(filepath)
-        if json_data and "avg_time" in json_data:
+        json_data = ds.json(
+            test="0rtt", port=port, aes="on", profile="P0", payload_mb=early_data_mb
+        )
+        if json_data and json_data.get("avg_time") is not None:
             data[port] = {"avg_time_s": json_data["avg_time"]}
+        # zero_rtt_engine.py: akceptacja early data i rozkłady accepted/rejected
+        if json_data and json_data.get("acceptance_ratio") is not None:
+            d = data.setdefault(port, {})
+            for key in (
+                "acceptance_ratio", "attempts", "accepted", "rejected", "too_large", "timeout",
+                "accepted_p50_s", "accepted_p95_s", "rejected_p50_s", "rejected_p95_s",
+                "max_early_data_bytes", "ticket_max_early_data",
+            ):
+                if json_data.get(key) is not None:
+                    d[key] = json_data[key]
     return data
 
 
-def load_full_post_data(base_path: Path, payload_mb: float, ports: List[int]) -> Dict:
+def load_full_post_data(ds: "ChartData", payload_mb: float, ports: List[int]) -> Dict:
     """Ładuje dane Full POST"""
     data = {}
-    # Skrypt wygenerował dane dla 8MB, nie 1MB
-    folder = base_path / f"full_post/baseline_aes_on_mb8_n3"
 
     for port in ports:
-        # Użyj właściwej nazwy pliku: fullpost_4431.json
-        filepath = folder / f"fullpost_{port}.json"
-        json_data = load_json_data(filepath)
-        if json_data and "avg_time" in json_data:
+        json_data = ds.json(
+            test="full_post", port=port, aes="on", profile="P0", payload_mb=payload_mb
+        )
+        if json_data and json_data.get("avg_time") is not None:
             data[port] = {"avg_time_s": json_data["avg_time"]}
     return data
 
 
-def load_bytes_on_wire_data(base_path: Path) -> Dict:
+def load_bytes_on_wire_data(ds: "ChartData") -> Dict:
     """Ładuje dane bytes-on-wire"""
     data = {}
-    filepath = base_path / "bytes_on_wire/baseline/bytes_on_wire_mac.csv"
+    filepath = ds.path(test="bytes_on_wire", profile="P0")
+    if filepath is None:
+        print("Błąd ładowania bytes-on-wire: brak pliku w katalogu wyników")
+        return data
 
     try:
         with open(filepath, "r") as f:
@@ -185,6 +270,157 @@ def load_bytes_on_wire_data(base_path: Path) -> Dict:
     return data
 
 
+def aes_delta(data_on: Dict, data_off: Dict, field: str) -> Dict:
+    """Δ% AES-OFF vs AES-ON per port: {port: {"on", "off", "delta_pct"}}"""
+    out = {}
+    for port in sorted(set(data_on) & set(data_off)):
+        on, off = data_on[port][field], data_off[port][field]
+        out[port] = {"on": on, "off": off, "delta_pct": ((off / on) - 1) * 100}
+    return out
+
+
+class ChartData:
+    """Wspólny zbiór danych fig01–fig15: pliki ładowane raz (równolegle), widoki w LRU"""
+
+    VIEWS = (
+        "_handshake",
+        "_ttfb",
+        "_throughput",
+        "_scaling",
+        "_zero_rtt",
+        "_full_post",
+        "_bytes_on_wire",
+        "_handshake_delta",
+        "_throughput_delta",
+    )
+
+    def __init__(self, base_path: Path, cache_size: int = 128, subtract_overhead: bool = False):
+        self.base_path = Path(base_path)
+        # Latencje netto: minus narzut harnessu z kalibracji komórki
+        self.subtract_overhead = subtract_overhead
+        # Figury netto mają własne pliki (fig05_..._net.png), nie nadpisują brutto
+        self.fig_suffix = "_net" if subtract_overhead else ""
+        self.catalog = get_catalog(self.base_path)
+        self._files: Dict[Path, Optional[Dict]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"files": 0, "load_s": 0.0, "hits": 0, "misses": 0}
+        # Widoki pochodne (percentyle, delty) — LRU per instancja
+        self.path = lru_cache(maxsize=None)(self._path)
+        for name in self.VIEWS:
+            setattr(self, name, lru_cache(maxsize=cache_size)(getattr(self, name)))
+
+    # --- pliki ---
+
+    def _path(self, **dims) -> Optional[Path]:
+        return self.catalog.latest(**dims)
+
+    def _load(self, path: Path) -> Optional[Dict]:
+        t0 = time.perf_counter()
+        js = load_json_data(path)
+        with self._lock:
+            self._files[path] = js
+            self.stats["files"] += 1
+            self.stats["load_s"] += time.perf_counter() - t0
+        return js
+
+    def preload(self, paths: List[Path], workers: int = 8):
+        """Równoległe parsowanie wszystkich potrzebnych plików JSON"""
+        # Tylko pliki z katalogu (Path); wzorce z FIGURE_EXTRA_INPUTS to napisy glob
+        todo = sorted(
+            {p for p in paths if isinstance(p, Path) and p.suffix == ".json"} - set(self._files)
+        )
+        if not todo:
+            return
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            list(pool.map(self._load, todo))
+        self.stats["wall_s"] = time.perf_counter() - t0
+
+    def json(self, **dims) -> Optional[Dict]:
+        """Najnowszy plik wyników o podanych wymiarach (sparsowany raz)"""
+        path = self.path(**dims)
+        if path is None:
+            return None
+        if path in self._files:
+            self.stats["hits"] += 1
+            return self._files[path]
+        self.stats["misses"] += 1
+        return self._load(path)
+
+    # --- widoki ---
+
+    def _handshake(self, aes_mode, ports):
+        return load_handshake_data(self, aes_mode, list(ports))
+
+    def _ttfb(self, ports, payload_kb):
+        return load_ttfb_data(self, list(ports), payload_kb)
+
+    def _throughput(self, aes_mode, payload_mb, concurrency, ports):
+        return load_throughput_data(self, aes_mode, payload_mb, concurrency, list(ports))
+
+    def _scaling(self, aes_mode, payload_mb, ports):
+        return load_scaling_data(self, aes_mode, payload_mb, list(ports))
+
+    def _zero_rtt(self, early_data_mb, ports):
+        return load_0rtt_data(self, early_data_mb, list(ports))
+
+    def _full_post(self, payload_mb, ports):
+        return load_full_post_data(self, payload_mb, list(ports))
+
+    def _bytes_on_wire(self):
+        return load_bytes_on_wire_data(self)
+
+    def _handshake_delta(self, ports):
+        return aes_delta(self.handshake("on", ports), self.handshake("off", ports), "p50")
+
+    def _throughput_delta(self, payload_mb, concurrency, ports):
+        return aes_delta(
+            self.throughput("on", payload_mb, concurrency, ports),
+            self.throughput("off", payload_mb, concurrency, ports),
+            "throughput_mb_s",
+        )
+
+    def handshake(self, aes_mode: str, ports: List[int]) -> Dict:
+        return self._handshake(aes_mode, tuple(ports))
+
+    def ttfb(self, ports: List[int], payload_kb: Optional[float] = None) -> Dict:
+        return self._ttfb(tuple(ports), payload_kb)
+
+    def throughput(self, aes_mode: str, payload_mb, concurrency, ports: List[int]) -> Dict:
+        return self._throughput(aes_mode, payload_mb, concurrency, tuple(ports))
+
+    def scaling(self, aes_mode: str, payload_mb, ports: List[int]) -> Dict:
+        """Throughput(c) + USL (σ, κ, N*, X* z CI) per port"""
+        return self._scaling(aes_mode, payload_mb, tuple(ports))
+
+    def zero_rtt(self, early_data_mb: float, ports: List[int]) -> Dict:
+        return self._zero_rtt(early_data_mb, tuple(ports))
+
+    def full_post(self, payload_mb: float, ports: List[int]) -> Dict:
+        return self._full_post(payload_mb, tuple(ports))
+
+    def bytes_on_wire(self) -> Dict:
+        return self._bytes_on_wire()
+
+    def handshake_delta(self, ports: List[int]) -> Dict:
+        """Δ% p50 handshake AES-OFF vs AES-ON"""
+        return self._handshake_delta(tuple(ports))
+
+    def throughput_delta(self, payload_mb, concurrency, ports: List[int]) -> Dict:
+        """Δ% throughput AES-OFF vs AES-ON"""
+        return self._throughput_delta(payload_mb, concurrency, tuple(ports))
+
+    def summary(self) -> str:
+        infos = [getattr(self, name).cache_info() for name in self.VIEWS]
+        hits = sum(i.hits for i in infos)
+        misses = sum(i.misses for i in infos)
+        return (
+            f"{self.stats['files']} plików, parsowanie {self.stats['load_s']:.2f} s "
+            f"(czas całkowity {self.stats.get('wall_s', self.stats['load_s']):.2f} s); "
+            f"widoki LRU: {hits} trafień / {misses} obliczeń"
+        )
+
+
 def parse_openssl_speed(filepath: Path) -> float:
     """Parsuje wyniki OpenSSL speed test"""
     try:
@@ -209,13 +445,13 @@ def parse_openssl_speed(filepath: Path) -> float:
 # === GENEROWANIE WYKRESÓW ===
 
 
-def fig01_handshake_latency_aes_on(base_path: Path, output_dir: Path):
+def fig01_handshake_latency_aes_on(ds: "ChartData", output_dir: Path):
     """Fig.01 — Handshake latency p50/p95 per port (AES-ON)"""
     print("\n🔍 Fig.01 - Analiza danych Handshake Latency (AES-ON):")
     print("Typ wykresu: Słupkowy (bar chart) z p50 + whiskers dla p95")
 
     all_ports = [4431, 4432, 8443, 4434, 4435, 11112]
-    data = load_handshake_data(base_path, "on", all_ports)
+    data = ds.handshake("on", all_ports)
 
     if not data:
         print("❌ Brak danych dla Fig.01")
@@ -275,19 +511,21 @@ def fig01_handshake_latency_aes_on(base_path: Path, output_dir: Path):
 
     plt.tight_layout()
     plt.savefig(
-        output_dir / "fig01_handshake_latency_aes_on.png", dpi=300, bbox_inches="tight"
+        output_dir / f"fig01_handshake_latency_aes_on{ds.fig_suffix}.png",
+        dpi=300,
+        bbox_inches="tight",
     )
     plt.close()
     print("✅ Fig.01 wygenerowany")
 
 
-def fig02_handshake_aes_off_delta(base_path: Path, output_dir: Path):
+def fig02_handshake_aes_off_delta(ds: "ChartData", output_dir: Path):
     """Fig.02 — Handshake AES-OFF: delta vs AES-ON"""
     print("\n🔍 Fig.02 - Analiza danych Handshake AES-OFF Delta:")
     print("Typ wykresu: Słupkowy (bar chart) z % zmianą")
 
-    data_on = load_handshake_data(base_path, "on", OPENSSL_PORTS)
-    data_off = load_handshake_data(base_path, "off", OPENSSL_PORTS)
+    data_on = ds.handshake("on", OPENSSL_PORTS)
+    data_off = ds.handshake("off", OPENSSL_PORTS)
 
     if not data_on or not data_off:
         print("❌ Brak danych dla Fig.02")
@@ -300,15 +538,13 @@ def fig02_handshake_aes_off_delta(base_path: Path, output_dir: Path):
     print("\n📊 Dane na wykresie (AES-OFF vs AES-ON delta):")
     print("Format: Port | AES-ON p50 [ms] | AES-OFF p50 [ms] | Delta [%]")
 
-    ports = sorted(set(data_on.keys()) & set(data_off.keys()))
-    deltas = []
+    delta = ds.handshake_delta(OPENSSL_PORTS)
+    ports = list(delta)
+    deltas = [delta[p]["delta_pct"] for p in ports]
 
     for port in ports:
-        p50_on = data_on[port]["p50"]
-        p50_off = data_off[port]["p50"]
-        delta_pct = ((p50_off / p50_on) - 1) * 100
-        deltas.append(delta_pct)
-        print(f"Port {port}: {p50_on:.1f} | {p50_off:.1f} | {delta_pct:+.1f}%")
+        d = delta[port]
+        print(f"Port {port}: {d['on']:.1f} | {d['off']:.1f} | {d['delta_pct']:+.1f}%")
 
     fig, ax = plt.subplots(figsize=(10, 6))
 
@@ -338,19 +574,21 @@ def fig02_handshake_aes_off_delta(base_path: Path, output_dir: Path):
 
     plt.tight_layout()
     plt.savefig(
-        output_dir / "fig02_handshake_aes_off_delta.png", dpi=300, bbox_inches="tight"
+        output_dir / f"fig02_handshake_aes_off_delta{ds.fig_suffix}.png",
+        dpi=300,
+        bbox_inches="tight",
     )
     plt.close()
     print("✅ Fig.02 wygenerowany")
 
 
-def fig03_cdf_handshake_aes_on(base_path: Path, output_dir: Path):
+def fig03_cdf_handshake_aes_on(ds: "ChartData", output_dir: Path):
     """Fig.03 — CDF czasu handshaku (AES-ON)"""
     print("\n🔍 Fig.03 - Analiza danych CDF Handshake:")
     print("Typ wykresu: Liniowy (CDF) - rozkład kumulatywny")
 
     selected_ports = [4431, 4432, 8443]
-    data = load_handshake_data(base_path, "on", selected_ports)
+    data = ds.handshake("on", selected_ports)
 
     if not data:
         print("❌ Brak danych dla Fig.03")
@@ -392,18 +630,20 @@ def fig03_cdf_handshake_aes_on(base_path: Path, output_dir: Path):
 
     plt.tight_layout()
     plt.savefig(
-        output_dir / "fig03_cdf_handshake_aes_on.png", dpi=300, bbox_inches="tight"
+        output_dir / f"fig03_cdf_handshake_aes_on{ds.fig_suffix}.png",
+        dpi=300,
+        bbox_inches="tight",
     )
     plt.close()
     print("✅ Fig.03 wygenerowany")
 
 
-def fig04_ttfb_per_port(base_path: Path, output_dir: Path):
-    """Fig.04 — TTFB p50/p95 per port (P0)"""
+def fig04_ttfb_per_port(ds: "ChartData", output_dir: Path):
+    """Fig.04 — TTFB p50/p95 per port (P0), cold vs warm + fazy połączenia"""
     print("\n🔍 Fig.04 - Analiza danych TTFB:")
-    print("Typ wykresu: Słupkowy (bar chart) z TTFB per port")
+    print("Typ wykresu: Słupkowy (p50, wąsy do p95) cold/warm + fazy cold TTFB")
 
-    data = load_ttfb_data(base_path, HTTP_PORTS)
+    data = ds.ttfb(HTTP_PORTS)
 
     if not data:
         print("❌ Brak danych dla Fig.04")
@@ -412,39 +652,84 @@ def fig04_ttfb_per_port(base_path: Path, output_dir: Path):
     print(f"Porty HTTP: {HTTP_PORTS}")
     print(f"Znalezione dane: {sorted(data.keys())}")
     print("\n📊 Dane na wykresie (TTFB):")
-    print("Format: Port | TTFB[ms]")
+    print("Format: Port | cold p50/p95 [ms] | warm p50/p95 [ms]")
     for port in sorted(data.keys()):
-        ttfb_ms = data[port]["ttfb_ms"]
-        print(f"Port {port}: {ttfb_ms:.2f}ms")
+        d = data[port]
+        print(
+            f"Port {port}: {d['ttfb_ms']:.2f}/{d.get('ttfb_p95_ms', float('nan')):.2f}ms | "
+            f"{d.get('warm_ms', float('nan')):.2f}/{d.get('warm_p95_ms', float('nan')):.2f}ms"
+        )
 
     ports = sorted(data.keys())
-    ttfb_values = [data[p]["ttfb_ms"] for p in ports]
-
-    fig, ax = plt.subplots(figsize=(10, 6))
-
-    x = range(len(ports))
-    bars = ax.bar(x, ttfb_values, color=COLORS["aes_on"], alpha=0.7)
-
-    # Dodaj wartości na słupkach
-    for i, ttfb in enumerate(ttfb_values):
-        ax.text(
-            i, ttfb + 0.2, f"{ttfb:.1f}ms", ha="center", va="bottom", fontweight="bold"
+    x = np.arange(len(ports))
+    has_warm = any("warm_ms" in data[p] for p in ports)
+    has_phases = any("tls_done_ms" in data[p] for p in ports)
+
+    fig, axes = plt.subplots(1, 2 if has_phases else 1, figsize=(16 if has_phases else 10, 6))
+    ax = axes[0] if has_phases else axes
+    width = 0.38 if has_warm else 0.7
+
+    def _bars(offset, key, p95_key, color, label):
+        vals = np.array([data[p].get(key, np.nan) for p in ports])
+        p95 = np.array([data[p].get(p95_key, np.nan) for p in ports])
+        err = np.where(np.isnan(p95), 0, np.clip(p95 - vals, 0, None))
+        ax.bar(
+            x + offset, np.nan_to_num(vals), width, yerr=[np.zeros_like(err), err],
+            capsize=4, color=color, alpha=0.7, label=label,
         )
+        for i, v in enumerate(vals):
+            if not np.isnan(v):
+                ax.text(i + offset, v, f"{v:.1f}", ha="center", va="bottom", fontsize=8)
+
+    if has_warm:
+        _bars(-width / 2, "ttfb_ms", "ttfb_p95_ms", COLORS["aes_on"], "cold (nowe połączenie)")
+        _bars(width / 2, "warm_ms", "warm_p95_ms", COLORS["aes_off"], "warm (keep-alive)")
+        ax.legend()
+    else:
+        _bars(0, "ttfb_ms", "ttfb_p95_ms", COLORS["aes_on"], "cold")
 
     ax.set_xlabel("Port")
-    ax.set_ylabel("TTFB [ms]")
+    ax.set_ylabel("TTFB [ms] (słupek p50, wąs p95)")
     ax.set_title("Fig.04 — TTFB per Port (P0)", fontsize=14, fontweight="bold")
     ax.set_xticks(x)
     ax.set_xticklabels([PORT_NAMES[p] for p in ports])
     ax.grid(True, alpha=0.3)
 
+    if has_phases:
+        # Fazy cold TTFB z median znaczników curl (kumulatywnych od startu transferu)
+        ax = axes[1]
+        bottom = np.zeros(len(ports))
+        # Starsze pliki bez faz — pusty słupek zamiast całego TTFB jako „serwer”
+        has = np.array(["tls_done_ms" in data[p] for p in ports])
+        prev_key = None
+        phases = [
+            ("connect_ms", "TCP connect", "#9e9e9e"),
+            ("tls_done_ms", "handshake TLS", COLORS["aes_on"]),
+            ("request_sent_ms", "wysłanie żądania", "#ffb74d"),
+            ("ttfb_ms", "serwer → 1. bajt", "#81c784"),
+        ]
+        for key, label, color in phases:
+            cum = np.array([data[p].get(key, np.nan) for p in ports])
+            seg = cum - (np.array([data[p].get(prev_key, 0.0) for p in ports]) if prev_key else 0)
+            seg = np.where(has, np.clip(np.nan_to_num(seg), 0, None), 0)
+            ax.bar(x, seg, 0.6, bottom=bottom, color=color, alpha=0.8, label=label)
+            bottom += seg
+            prev_key = key
+        ax.set_xlabel("Port")
+        ax.set_ylabel("Czas [ms] (mediany, cold)")
+        ax.set_title("Fazy TTFB (cold)", fontsize=12)
+        ax.set_xticks(x)
+        ax.set_xticklabels([PORT_NAMES[p] for p in ports])
+        ax.legend(fontsize=8)
+        ax.grid(True, alpha=0.3, axis="y")
+
     plt.tight_layout()
     plt.savefig(output_dir / "fig04_ttfb_per_port.png", dpi=300, bbox_inches="tight")
     plt.close()
     print("✅ Fig.04 wygenerowany")
 
 
-def fig05_throughput_vs_concurrency(base_path: Path, output_dir: Path):
+def fig05_throughput_vs_concurrency(ds: "ChartData", output_dir: Path):
     """Fig.05 — Throughput vs concurrency (10 MB)"""
     print("\n🔍 Fig.05 - Analiza danych Throughput vs Concurrency:")
     print("Typ wykresu: Liniowy (line plot) - skalowanie concurrency")
@@ -456,7 +741,7 @@ def fig05_throughput_vs_concurrency(base_path: Path, output_dir: Path):
     print(f"Payload: 10 MB")
 
     for conc in concurrencies:
-        data = load_throughput_data(base_path, "on", 10, conc, HTTP_PORTS)
+        data = ds.throughput("on", 10, conc, HTTP_PORTS)
         all_data[conc] = data
         print(f"  Concurrency {conc}: {len(data)} portów załadowanych")
 
@@ -508,19 +793,21 @@ def fig05_throughput_vs_concurrency(base_path: Path, output_dir: Path):
 
     plt.tight_layout()
     plt.savefig(
-        output_dir / "fig05_throughput_vs_concurrency.png", dpi=300, bbox_inches="tight"
+        output_dir / f"fig05_throughput_vs_concurrency{ds.fig_suffix}.png",
+        dpi=300,
+        bbox_inches="tight",
     )
     plt.close()
     print("✅ Fig.05 wygenerowany")
 
 
-def fig06_throughput_payload_size(base_path: Path, output_dir: Path):
+def fig06_throughput_payload_size(ds: "ChartData", output_dir: Path):
     """Fig.06 — Throughput: wpływ wielkości payloadu (c=32)"""
     print("\n🔍 Fig.06 - Analiza danych Payload Size Impact:")
     print("Typ wykresu: Słupkowy (bar chart) - porównanie 1MB vs 10MB")
 
-    data_1mb = load_throughput_data(base_path, "on", 1, 32, HTTP_PORTS)
-    data_10mb = load_throughput_data(base_path, "on", 10, 32, HTTP_PORTS)
+    data_1mb = ds.throughput("on", 1, 32, HTTP_PORTS)
+    data_10mb = ds.throughput("on", 10, 32, HTTP_PORTS)
 
     if not data_1mb or not data_10mb:
         print("❌ Brak danych dla Fig.06")
@@ -590,19 +877,21 @@ def fig06_throughput_payload_size(base_path: Path, output_dir: Path):
 
     plt.tight_layout()
     plt.savefig(
-        output_dir / "fig06_throughput_payload_size.png", dpi=300, bbox_inches="tight"
+        output_dir / f"fig06_throughput_payload_size{ds.fig_suffix}.png",
+        dpi=300,
+        bbox_inches="tight",
     )
     plt.close()
     print("✅ Fig.06 wygenerowany")
 
 
-def fig07_throughput_aes_off_delta(base_path: Path, output_dir: Path):
+def fig07_throughput_aes_off_delta(ds: "ChartData", output_dir: Path):
     """Fig.07 — Throughput AES-OFF delta (10 MB, c=32)"""
     print("\n🔍 Fig.07 - Analiza danych AES-OFF Throughput Delta:")
     print("Typ wykresu: Słupkowy (bar chart) z % zmianą dla AES-OFF")
 
-    data_on = load_throughput_data(base_path, "on", 10, 32, OPENSSL_PORTS)
-    data_off = load_throughput_data(base_path, "off", 10, 32, OPENSSL_PORTS)
+    data_on = ds.throughput("on", 10, 32, OPENSSL_PORTS)
+    data_off = ds.throughput("off", 10, 32, OPENSSL_PORTS)
 
     if not data_on or not data_off:
         print("❌ Brak danych dla Fig.07")
@@ -616,21 +905,13 @@ def fig07_throughput_aes_off_delta(base_path: Path, output_dir: Path):
     print("\n📊 Dane na wykresie (AES-OFF impact on throughput):")
     print("Format: Port | AES-ON[MB/s] | AES-OFF[MB/s] | Delta[%]")
 
-    ports = sorted(set(data_on.keys()) & set(data_off.keys()))
+    delta = ds.throughput_delta(10, 32, OPENSSL_PORTS)
+    ports = list(delta)
     for port in ports:
-        thr_on = data_on[port]["throughput_mb_s"]
-        thr_off = data_off[port]["throughput_mb_s"]
-        delta_pct = ((thr_off / thr_on) - 1) * 100
-        print(f"Port {port}: {thr_on:.1f} | {thr_off:.1f} | {delta_pct:+.1f}%")
-
-    ports = sorted(set(data_on.keys()) & set(data_off.keys()))
-    deltas = []
+        d = delta[port]
+        print(f"Port {port}: {d['on']:.1f} | {d['off']:.1f} | {d['delta_pct']:+.1f}%")
 
-    for port in ports:
-        thr_on = data_on[port]["throughput_mb_s"]
-        thr_off = data_off[port]["throughput_mb_s"]
-        delta_pct = ((thr_off / thr_on) - 1) * 100
-        deltas.append(delta_pct)
+    deltas = [delta[p]["delta_pct"] for p in ports]
 
     fig, ax = plt.subplots(figsize=(10, 6))
 
@@ -662,137 +943,128 @@ def fig07_throughput_aes_off_delta(base_path: Path, output_dir: Path):
 
     plt.tight_layout()
     plt.savefig(
-        output_dir / "fig07_throughput_aes_off_delta.png", dpi=300, bbox_inches="tight"
+        output_dir / f"fig07_throughput_aes_off_delta{ds.fig_suffix}.png",
+        dpi=300,
+        bbox_inches="tight",
     )
     plt.close()
     print("✅ Fig.07 wygenerowany")
 
 
-def fig08_0rtt_acceptance_rate(base_path: Path, output_dir: Path):
-    """Fig.08 — 0-RTT acceptance rate (baseline)"""
+def fig08_0rtt_acceptance_rate(ds: "ChartData", output_dir: Path):
+    """Fig.08 — 0-RTT: akceptacja early data i czasy prób accepted/rejected (baseline)"""
     print("\n🔍 Fig.08 - Analiza danych 0-RTT Acceptance Rate:")
-    print("Typ wykresu: Słupkowy (bar chart) z dwoma seriami")
+    print("Typ wykresu: Słupkowy — acceptance ratio + czasy prób (p50, wąs p95)")
 
-    # Próbujemy załadować rzeczywiste dane 0-RTT
     early_data_sizes = [0.1, 1]
     ports = [4431, 4432, 8443]  # Tylko OpenSSL porty wspierają 0-RTT
 
     print(f"Porty do analizy: {ports}")
     print(f"Rozmiary early data: {early_data_sizes} MB")
 
-    # Sprawdzamy czy mamy dane o akceptacji 0-RTT
-    data_01 = load_0rtt_data(base_path, 0.1, ports)
-    data_1 = load_0rtt_data(base_path, 1, ports)
-
-    print(f"Dane 0-RTT (0.1 MB): {data_01}")
-    print(f"Dane 0-RTT (1 MB): {data_1}")
+    data = {ed: ds.zero_rtt(ed, ports) for ed in early_data_sizes}
+    if not any(data.values()):
+        print("❌ Brak danych dla Fig.08")
+        return
 
-    fig, ax = plt.subplots(figsize=(10, 6))
+    print("\n📊 Dane na wykresie (0-RTT):")
+    print("Format: Port | ED[MB] | accepted/attempts | accepted p50 | rejected p50 | max ED[B]")
+    for ed in early_data_sizes:
+        for port in ports:
+            d = data[ed].get(port, {})
+            if not d:
+                continue
+            ms = lambda v: "–" if v is None else f"{v * 1000:.1f}ms"
+            print(
+                f"Port {port} | {ed} | {d.get('accepted', '?')}/{d.get('attempts', '?')} | "
+                f"{ms(d.get('accepted_p50_s'))} | {ms(d.get('rejected_p50_s'))} | "
+                f"{d.get('max_early_data_bytes', '?')}"
+            )
 
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
     x = np.arange(len(ports))
     width = 0.35
-
-    # Używamy rzeczywistych czasów z danych (w ms)
-    times_01 = []
-    times_1 = []
-
-    for port in ports:
-        time_01 = data_01.get(port, {}).get("avg_time_s", 0) * 1000  # s -> ms
-        time_1 = data_1.get(port, {}).get("avg_time_s", 0) * 1000  # s -> ms
-        times_01.append(time_01)
-        times_1.append(time_1)
-
-    print("\n📊 Dane na wykresie (0-RTT timing):")
-    print("Format: Port | 0.1MB time[ms] | 1MB time[ms] | Delta[ms]")
-    for i, port in enumerate(ports):
-        delta = times_1[i] - times_01[i]
-        print(f"Port {port}: {times_01[i]:.1f} | {times_1[i]:.1f} | +{delta:.1f}")
-
-    bars1 = ax.bar(
-        x - width / 2,
-        times_01,
-        width,
-        label="0.1 MB Early Data",
-        color=COLORS["aes_on"],
-        alpha=0.7,
-    )
-    bars2 = ax.bar(
-        x + width / 2,
-        times_1,
-        width,
-        label="1 MB Early Data",
-        color=COLORS["aes_off"],
-        alpha=0.7,
-    )
-
-    # Dodaj wartości na słupkach
-    for i, (t01, t1) in enumerate(zip(times_01, times_1)):
-        if t01 > 0:
-            ax.text(
-                i - width / 2,
-                t01 + 20,
-                f"{t01:.0f}ms",
-                ha="center",
-                va="bottom",
-                fontweight="bold",
+    colors = [COLORS["aes_on"], COLORS["aes_off"]]
+
+    # Lewy panel: odsetek zaakceptowanych early data (brak pomiaru = "?")
+    for j, ed in enumerate(early_data_sizes):
+        off = (j - 0.5) * width
+        for i, port in enumerate(ports):
+            d = data[ed].get(port, {})
+            ratio = d.get("acceptance_ratio")
+            ax1.bar(
+                x[i] + off, (ratio or 0) * 100, width, color=colors[j], alpha=0.7,
+                label=f"{ed} MB Early Data" if i == 0 else None,
             )
-        if t1 > 0:
-            ax.text(
-                i + width / 2,
-                t1 + 20,
-                f"{t1:.0f}ms",
-                ha="center",
-                va="bottom",
-                fontweight="bold",
+            txt = "?" if ratio is None else f"{ratio * 100:.0f}%"
+            if d.get("too_large"):
+                txt += "\n(za duże)"
+            ax1.text(x[i] + off, (ratio or 0) * 100 + 1, txt, ha="center", va="bottom",
+                     fontsize=8, fontweight="bold")
+    max_ed = {
+        p: next((data[ed][p]["max_early_data_bytes"] for ed in early_data_sizes
+                 if data[ed].get(p, {}).get("max_early_data_bytes") is not None), None)
+        for p in ports
+    }
+    ax1.set_xticks(x)
+    ax1.set_xticklabels([
+        PORT_NAMES[p] + (f"\nmax ED {max_ed[p] / 1024:.1f} KB" if max_ed[p] is not None else "")
+        for p in ports
+    ])
+    ax1.set_ylim(0, 110)
+    ax1.set_xlabel("Port")
+    ax1.set_ylabel("Early data accepted [%]")
+    ax1.set_title("Akceptacja early data", fontsize=12)
+    ax1.legend()
+    ax1.grid(True, alpha=0.3, axis="y")
+
+    # Prawy panel: czas próby — accepted vs rejected (p50, wąs do p95); starsze
+    # pliki bez podziału pokazują średnią jako "rejected/nieznane"
+    for j, ed in enumerate(early_data_sizes):
+        for k, (status, hatch) in enumerate((("accepted", ""), ("rejected", "//"))):
+            off = (j * 2 + k - 1.5) * width / 2
+            vals, errs = [], []
+            for port in ports:
+                d = data[ed].get(port, {})
+                p50 = d.get(f"{status}_p50_s")
+                if p50 is None and status == "rejected" and "acceptance_ratio" not in d:
+                    p50 = d.get("avg_time_s")
+                p95 = d.get(f"{status}_p95_s", p50)
+                vals.append((p50 or 0) * 1000)
+                errs.append(max(0.0, ((p95 or 0) - (p50 or 0)) * 1000))
+            ax2.bar(
+                x + off, vals, width / 2, yerr=[np.zeros(len(errs)), errs], capsize=3,
+                color=colors[j], alpha=0.7, hatch=hatch, edgecolor="black", linewidth=0.5,
+                label=f"{ed} MB — {status}",
             )
-
-    ax.set_xlabel("Port")
-    ax.set_ylabel("0-RTT Attempt Duration [ms]")
-    ax.set_title(
-        "Fig.08 — 0-RTT Attempt Duration (acceptance=0%)",
-        fontsize=14,
-        fontweight="bold",
-    )
-    ax.set_xticks(x)
-    ax.set_xticklabels([PORT_NAMES[p] for p in ports])
-    ax.legend()
-    ax.grid(True, alpha=0.3)
-
-    # Dodaj informacyjną notatkę
-    ax.text(
-        0.5,
-        0.9,
-        "Serwer nie zaakceptował early-data w tym setupie.\n"
-        + "Czasy pokazują próby 0-RTT (acceptance=0%)",
-        transform=ax.transAxes,
-        ha="center",
-        va="center",
-        bbox=dict(boxstyle="round,pad=0.5", facecolor="lightblue", alpha=0.7),
-        fontsize=9,
-    )
-
-    print(
-        "💡 Interpretacja: Wykres pokazuje czasy 0-RTT attempts (nie acceptance rate)"
-    )
-    print("   - Większe early data = dłuższy czas transferu")
-    print("   - Brak informacji o akceptacji przez serwer")
+    ax2.set_xticks(x)
+    ax2.set_xticklabels([PORT_NAMES[p] for p in ports])
+    ax2.set_xlabel("Port")
+    ax2.set_ylabel("0-RTT Attempt Duration [ms] (p50, wąs p95)")
+    ax2.set_title("Czas próby 0-RTT: accepted vs rejected", fontsize=12)
+    ax2.legend(fontsize=8)
+    ax2.grid(True, alpha=0.3, axis="y")
+
+    fig.suptitle("Fig.08 — 0-RTT Early Data Acceptance (P0)", fontsize=14, fontweight="bold")
+    print("💡 Interpretacja: nginx ogranicza early data do max_early_data biletu (16 KB) —")
+    print("   większe żądania klient wysyła po pełnym handshake'u")
 
     plt.tight_layout()
     plt.savefig(
         output_dir / "fig08_0rtt_performance_timing.png", dpi=300, bbox_inches="tight"
     )
     plt.close()
-    print("✅ Fig.08 wygenerowany (naprawiona wersja)")
+    print("✅ Fig.08 wygenerowany")
 
 
-def fig09_0rtt_vs_full_post(base_path: Path, output_dir: Path):
+def fig09_0rtt_vs_full_post(ds: "ChartData", output_dir: Path):
     """Fig.09 — 0-RTT vs Full POST: TTFB/całkowity czas (baseline)"""
     print("\n🔍 Fig.09 - Analiza danych 0-RTT vs Full POST:")
     print("Typ wykresu: Słupkowy (bar chart) - porównanie czasów")
 
-    data_0rtt = load_0rtt_data(base_path, 1, [4431, 4432, 8443])
-    data_full_post = load_full_post_data(
-        base_path, 8, [4431, 4432, 8443]
+    data_0rtt = ds.zero_rtt(1, [4431, 4432, 8443])
+    data_full_post = ds.full_post(
+        8, [4431, 4432, 8443]
     )  # 8MB payload
 
     print(f"Dane 0-RTT: {data_0rtt}")
@@ -882,12 +1154,12 @@ def fig09_0rtt_vs_full_post(base_path: Path, output_dir: Path):
     print("✅ Fig.09 wygenerowany")
 
 
-def fig10_bytes_on_wire(base_path: Path, output_dir: Path):
+def fig10_bytes_on_wire(ds: "ChartData", output_dir: Path):
     """Fig.10 — Bytes-on-the-wire per port (baseline)"""
     print("\n🔍 Fig.10 - Analiza danych Bytes-on-Wire:")
     print("Typ wykresu: Słupkowy (stacked bar) - rozmiar handshake")
 
-    data = load_bytes_on_wire_data(base_path)
+    data = ds.bytes_on_wire()
 
     if not data:
         print("❌ Brak danych dla Fig.10")
@@ -955,21 +1227,39 @@ def fig10_bytes_on_wire(base_path: Path, output_dir: Path):
     print("✅ Fig.10 wygenerowany")
 
 
-def fig11_openssl_speed_vs_throughput(base_path: Path, output_dir: Path):
+def fig11_openssl_speed_vs_throughput(ds: "ChartData", output_dir: Path):
     """Fig.11 — OpenSSL Speed vs Real Throughput (SCATTER PLOT)"""
     print("\n🔍 Fig.11 - Analiza danych OpenSSL Speed vs Throughput:")
     print("Typ wykresu: Scatter plot - korelacja micro vs macro benchmark")
 
-    # OpenSSL speed (tylko jeden wynik dla wszystkich)
-    speed_aes_on = parse_openssl_speed(base_path / "series/openssl_speed_aes_on.txt")
+    # openssl speed per port (szyfr zestawu, blok 16 KiB) z microbench.csv;
+    # bez mikrobenchmarków — jeden wynik AES-128-GCM z series/ dla wszystkich
+    micro = load_micro(latest_micro(ds.base_path))
+    speed_aes_on = 0.0
+    if micro.empty:
+        speed_aes_on = parse_openssl_speed(ds.base_path / "series/openssl_speed_aes_on.txt")
 
     # Real throughput dla OpenSSL portów
-    data = load_throughput_data(base_path, "on", 10, 32, OPENSSL_PORTS)
+    data = ds.throughput("on", 10, 32, OPENSSL_PORTS)
+
+    speeds = {}
+    for port in OPENSSL_PORTS:
+        if micro.empty:
+            speeds[port] = speed_aes_on
+            continue
+        cipher = SUITE_CIPHER[SUITE_BY_PORT[port][1]]
+        bps = micro_at(micro, "openssl", cipher, "on")
+        if bps:
+            speeds[port] = bps / 1048576
+        else:
+            # Bez referencji micro port nie ma czego porównać — pomijamy zamiast x=0
+            print(f"⚠️  Brak {cipher} w microbench.csv — pomijam port {port}")
+    data = {p: d for p, d in data.items() if p in speeds}
 
-    print(f"OpenSSL Speed (AES-128-GCM): {speed_aes_on:.1f} MB/s")
+    print(f"OpenSSL Speed: {'microbench.csv' if not micro.empty else 'series/ (AES-128-GCM)'}")
     print(f"Real throughput dane: {len(data)} portów")
 
-    if not data or speed_aes_on == 0:
+    if not data or not any(speeds.values()):
         print("❌ Brak danych dla Fig.11")
         return
 
@@ -978,7 +1268,7 @@ def fig11_openssl_speed_vs_throughput(base_path: Path, output_dir: Path):
     for port in OPENSSL_PORTS:
         if port in data:
             thr = data[port]["throughput_mb_s"]
-            print(f"Port {port}: {speed_aes_on:.1f} | {thr:.1f}")
+            print(f"Port {port}: {speeds[port]:.1f} | {thr:.1f}")
 
     fig, ax = plt.subplots(figsize=(10, 6))
 
@@ -994,19 +1284,18 @@ def fig11_openssl_speed_vs_throughput(base_path: Path, output_dir: Path):
     x = np.arange(len(port_labels))
     width = 0.35
 
-    # OpenSSL speed jako referencja (linia pozioma)
     bars = ax.bar(
         x, throughputs, color=COLORS["aes_on"], alpha=0.7, label="HTTP Throughput"
     )
 
-    # Dodaj OpenSSL speed jako linię referencyjną
-    ax.axhline(
-        y=speed_aes_on,
-        color="red",
-        linestyle="--",
-        alpha=0.7,
-        label=f"OpenSSL Speed: {speed_aes_on:.0f} MB/s",
+    # OpenSSL speed jako referencja: znacznik per port (szyfr zestawu)
+    ref = [speeds[p] for p in OPENSSL_PORTS if p in data]
+    ax.scatter(
+        x, ref, color="red", marker="_", s=2000, linewidths=2, zorder=3,
+        label="OpenSSL Speed (szyfr zestawu, 16 KiB)",
     )
+    for i, v in enumerate(ref):
+        ax.text(i + 0.3, v, f"{v:.0f}", color="red", va="center", fontsize=9)
 
     # Dodaj wartości na słupkach
     for i, thr in enumerate(throughputs):
@@ -1026,7 +1315,7 @@ def fig11_openssl_speed_vs_throughput(base_path: Path, output_dir: Path):
 
     plt.tight_layout()
     plt.savefig(
-        output_dir / "fig11_openssl_speed_vs_throughput.png",
+        output_dir / f"fig11_openssl_speed_vs_throughput{ds.fig_suffix}.png",
         dpi=300,
         bbox_inches="tight",
     )
@@ -1034,12 +1323,12 @@ def fig11_openssl_speed_vs_throughput(base_path: Path, output_dir: Path):
     print("✅ Fig.11 wygenerowany")
 
 
-def fig12_dashboard_summary(base_path: Path, output_dir: Path):
+def fig12_dashboard_summary(ds: "ChartData", output_dir: Path):
     """Fig.12 — Dashboard 2×2 (syntetyczny „executive summary")"""
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
 
     # Panel 1: Handshake p50 (AES-ON)
-    data_hs = load_handshake_data(base_path, "on", [4431, 4432, 8443, 4434, 4435])
+    data_hs = ds.handshake("on", [4431, 4432, 8443, 4434, 4435])
     if data_hs:
         ports = sorted(data_hs.keys())
         p50_values = [data_hs[p]["p50"] for p in ports]
@@ -1052,7 +1341,7 @@ def fig12_dashboard_summary(base_path: Path, output_dir: Path):
         ax1.grid(True, alpha=0.3)
 
     # Panel 2: TTFB p50
-    data_ttfb = load_ttfb_data(base_path, HTTP_PORTS)
+    data_ttfb = ds.ttfb(HTTP_PORTS)
     if data_ttfb:
         ports = sorted(data_ttfb.keys())
         ttfb_values = [data_ttfb[p]["ttfb_ms"] for p in ports]
@@ -1065,7 +1354,7 @@ def fig12_dashboard_summary(base_path: Path, output_dir: Path):
         ax2.grid(True, alpha=0.3)
 
     # Panel 3: Throughput 10MB @ c=32
-    data_thr = load_throughput_data(base_path, "on", 10, 32, HTTP_PORTS)
+    data_thr = ds.throughput("on", 10, 32, HTTP_PORTS)
     if data_thr:
         ports = sorted(data_thr.keys())
         thr_values = [data_thr[p]["throughput_mb_s"] for p in ports]
@@ -1078,16 +1367,12 @@ def fig12_dashboard_summary(base_path: Path, output_dir: Path):
         ax3.grid(True, alpha=0.3)
 
     # Panel 4: Δ% AES-OFF (tylko OpenSSL)
-    data_on = load_throughput_data(base_path, "on", 10, 32, OPENSSL_PORTS)
-    data_off = load_throughput_data(base_path, "off", 10, 32, OPENSSL_PORTS)
+    data_on = ds.throughput("on", 10, 32, OPENSSL_PORTS)
+    data_off = ds.throughput("off", 10, 32, OPENSSL_PORTS)
     if data_on and data_off:
-        ports = sorted(set(data_on.keys()) & set(data_off.keys()))
-        deltas = []
-        for port in ports:
-            thr_on = data_on[port]["throughput_mb_s"]
-            thr_off = data_off[port]["throughput_mb_s"]
-            delta_pct = ((thr_off / thr_on) - 1) * 100
-            deltas.append(delta_pct)
+        delta = ds.throughput_delta(10, 32, OPENSSL_PORTS)
+        ports = list(delta)
+        deltas = [delta[p]["delta_pct"] for p in ports]
 
         x = range(len(ports))
         ax4.bar(x, deltas, color=COLORS["delta"], alpha=0.8)
@@ -1101,7 +1386,9 @@ def fig12_dashboard_summary(base_path: Path, output_dir: Path):
     plt.suptitle("Fig.12 — Executive Summary Dashboard", fontsize=16, fontweight="bold")
     plt.tight_layout()
     plt.savefig(
-        output_dir / "fig12_dashboard_summary.png", dpi=300, bbox_inches="tight"
+        output_dir / f"fig12_dashboard_summary{ds.fig_suffix}.png",
+        dpi=300,
+        bbox_inches="tight",
     )
     plt.close()
     print("✅ Fig.12 wygenerowany")
@@ -1122,8 +1409,26 @@ def get_cert_size_der(cert_path: Path) -> int:
         return 0
 
 
-def fig13_cert_chain_vs_handshake(base_path: Path, output_dir: Path):
-    """Fig.13 — Handshake Latency by Implementation (ZMIENIONY)"""
+def fig13_cert_chain_vs_handshake(ds: "ChartData", output_dir: Path):
+    """Fig.13 — koszt łańcucha vs koszt klucza (macierz certyfikatów);
+    bez wyników run_cert_matrix.sh: porównanie implementacji"""
+    run_dir = cert_matrix_dir(ds.base_path)
+    df = load_cert_matrix(run_dir) if run_dir else None
+    if df is not None and not df.empty:
+        print(f"\n🔍 Fig.13 - Macierz certyfikatów: {run_dir}")
+        fits = cert_matrix_fit(df)
+        for server, f in fits.items():
+            lat = f["latency"]
+            if lat:
+                print(f"{server}: łańcuch {lat['per_kb']:.3f} ms/KB, klucz: "
+                      + ", ".join(f"{k} {v:.2f}" for k, v in lat["key"].items()))
+        plot_cert_matrix(
+            df, fits, output_dir / f"fig13_cert_chain_vs_handshake{ds.fig_suffix}.png",
+            title="Fig.13 — Handshake: typ klucza vs rozmiar łańcucha certyfikatów",
+        )
+        print("✅ Fig.13 wygenerowany (macierz certyfikatów)")
+        return
+
     print("\n🔍 Fig.13 - Analiza danych Handshake by Implementation:")
     print("Typ wykresu: Słupkowy (bar chart) - latencja per implementacja")
 
@@ -1140,7 +1445,7 @@ def fig13_cert_chain_vs_handshake(base_path: Path, output_dir: Path):
     print(f"Certyfikaty: wszędzie {list(set(cert_mapping.values()))}")
 
     # Ładowanie danych handshake
-    data_hs = load_handshake_data(base_path, "on", list(cert_mapping.keys()))
+    data_hs = ds.handshake("on", list(cert_mapping.keys()))
 
     if not data_hs:
         print("❌ Brak danych dla Fig.13")
@@ -1219,23 +1524,26 @@ def fig13_cert_chain_vs_handshake(base_path: Path, output_dir: Path):
 
     plt.tight_layout()
     plt.savefig(
-        output_dir / "fig13_cert_chain_vs_handshake.png", dpi=300, bbox_inches="tight"
+        output_dir / f"fig13_cert_chain_vs_handshake{ds.fig_suffix}.png",
+        dpi=300,
+        bbox_inches="tight",
     )
     plt.close()
     print("✅ Fig.13 wygenerowany")
 
 
-def fig14_concurrency_scaling_ratio(base_path: Path, output_dir: Path):
-    """Fig.14 — Concurrency scaling ratio (32/8)"""
+def fig14_concurrency_scaling_ratio(ds: "ChartData", output_dir: Path):
+    """Fig.14 — Concurrency scaling ratio (32/8) + dopasowanie USL"""
     print("\n🔍 Fig.14 - Analiza danych Concurrency Scaling:")
-    print("Typ wykresu: Słupkowy (bar chart) - scaling ratio per payload")
+    print("Typ wykresu: Słupkowy (bar chart) - scaling ratio per payload + krzywe USL")
 
     payloads = [1, 10]
 
     print(f"Payloads: {payloads} MB")
     print("Scaling ratio = Throughput(c=32) / Throughput(c=8)")
 
-    fig, ax = plt.subplots(figsize=(12, 6))
+    fig, axes = plt.subplots(1, 3, figsize=(20, 6), gridspec_kw={"width_ratios": [3, 2, 2]})
+    ax = axes[0]
 
     x = np.arange(len(HTTP_PORTS))
     width = 0.35
@@ -1244,8 +1552,8 @@ def fig14_concurrency_scaling_ratio(base_path: Path, output_dir: Path):
     ratios_10mb = []
 
     for payload in payloads:
-        data_c8 = load_throughput_data(base_path, "on", payload, 8, HTTP_PORTS)
-        data_c32 = load_throughput_data(base_path, "on", payload, 32, HTTP_PORTS)
+        data_c8 = ds.throughput("on", payload, 8, HTTP_PORTS)
+        data_c32 = ds.throughput("on", payload, 32, HTTP_PORTS)
 
         print(f"\nPayload {payload}MB:")
         print(f"  c=8: {len(data_c8)} portów")
@@ -1320,23 +1628,68 @@ def fig14_concurrency_scaling_ratio(base_path: Path, output_dir: Path):
 
     ax.set_xlabel("Port")
     ax.set_ylabel("Scaling Ratio (Throughput c=32 / c=8)")
-    ax.set_title(
-        "Fig.14 — Concurrency Scaling Ratio (32/8)", fontsize=14, fontweight="bold"
-    )
+    ax.set_title("Scaling Ratio (32/8)")
     ax.set_xticks(x)
     ax.set_xticklabels([PORT_NAMES[p] for p in HTTP_PORTS])
     ax.legend()
     ax.grid(True, alpha=0.3)
 
+    # USL: punkty pomiarowe + dopasowana krzywa, szczyt N* zaznaczony
+    print("\n📊 USL (Universal Scalability Law):")
+    print("Format: Payload | Port | σ [95% CI] | κ [95% CI] | N* | X* [MB/s] | R²")
+    for ax_usl, payload in zip(axes[1:], payloads):
+        scaling = ds.scaling("on", payload, HTTP_PORTS)
+        c_max = 1
+        for port in [p for p in PORT_ORDER if p in scaling]:
+            d = scaling[port]
+            color = get_port_color(port)
+            marker = "o" if port in (4431, 4434) else "s"
+            ax_usl.scatter(d["concurrency"], d["throughput_mb_s"], color=color,
+                           marker=marker, alpha=0.8, label=f"{port}")
+            c_max = max(c_max, max(d["concurrency"]))
+            fit = d["usl"]
+            if not fit:
+                print(f"{payload} MB | {port}: za mało punktów c ({len(d['concurrency'])})")
+                continue
+            n = np.geomspace(1, max(d["concurrency"]) * 2, 200)
+            ax_usl.plot(n, usl(n, fit["usl_lambda"], fit["usl_sigma"], fit["usl_kappa"]),
+                        color=color, linestyle="-" if marker == "o" else "--", alpha=0.8)
+            n_peak = fit["usl_peak_concurrency"]
+            if np.isfinite(n_peak) and n_peak <= n[-1]:
+                ax_usl.plot(n_peak, fit["usl_peak_throughput_mb_s"], marker="*",
+                            color=color, markersize=12)
+            print(
+                f"{payload} MB | {port} | {fit['usl_sigma']:.4f} "
+                f"[{fit['usl_sigma_lo']:.4f}, {fit['usl_sigma_hi']:.4f}] | "
+                f"{fit['usl_kappa']:.2e} [{fit['usl_kappa_lo']:.2e}, {fit['usl_kappa_hi']:.2e}] | "
+                f"{n_peak:.0f} | {fit['usl_peak_throughput_mb_s']:.1f} | {fit['usl_r2']:.3f}"
+            )
+        ax_usl.set_xscale("log", base=2)
+        ax_usl.set_xlim(0.8, c_max * 2.5)
+        ax_usl.set_xlabel("Concurrency")
+        ax_usl.set_ylabel("Throughput [MB/s]")
+        ax_usl.set_title(f"USL fit — {payload} MB (★ = N*)")
+        if ax_usl.get_legend_handles_labels()[0]:
+            ax_usl.legend(title="Port", fontsize=8)
+        else:
+            ax_usl.text(0.5, 0.5, "Brak danych", ha="center", va="center",
+                        transform=ax_usl.transAxes)
+        ax_usl.grid(True, alpha=0.3)
+
+    fig.suptitle(
+        "Fig.14 — Concurrency Scaling: Ratio (32/8) + USL", fontsize=14, fontweight="bold"
+    )
     plt.tight_layout()
     plt.savefig(
-        output_dir / "fig14_concurrency_scaling_ratio.png", dpi=300, bbox_inches="tight"
+        output_dir / f"fig14_concurrency_scaling_ratio{ds.fig_suffix}.png",
+        dpi=300,
+        bbox_inches="tight",
     )
     plt.close()
     print("✅ Fig.14 wygenerowany")
 
 
-def fig15_throughput_distribution(base_path: Path, output_dir: Path):
+def fig15_throughput_distribution(ds: "ChartData", output_dir: Path):
     """Fig.15 — Rozkład throughput (1 MB vs 10 MB)"""
     print("\n🔍 Fig.15 - Analiza danych Throughput Distribution:")
     print(
@@ -1344,8 +1697,8 @@ def fig15_throughput_distribution(base_path: Path, output_dir: Path):
     )
 
     # Ładowanie danych dla obu rozmiarów payload
-    data_1mb = load_throughput_data(base_path, "on", 1, 32, HTTP_PORTS)
-    data_10mb = load_throughput_data(base_path, "on", 10, 32, HTTP_PORTS)
+    data_1mb = ds.throughput("on", 1, 32, HTTP_PORTS)
+    data_10mb = ds.throughput("on", 10, 32, HTTP_PORTS)
 
     print(f"Dane 1MB: {len(data_1mb)} portów")
     print(f"Dane 10MB: {len(data_10mb)} portów")
@@ -1448,43 +1801,214 @@ def fig15_throughput_distribution(base_path: Path, output_dir: Path):
 
     plt.tight_layout()
     plt.savefig(
-        output_dir / "fig15_throughput_distribution.png", dpi=300, bbox_inches="tight"
+        output_dir / f"fig15_throughput_distribution{ds.fig_suffix}.png",
+        dpi=300,
+        bbox_inches="tight",
     )
     plt.close()
     print("✅ Fig.15 wygenerowany")
 
 
+# === GRAF ZALEŻNOŚCI WYKRESÓW (cache) ===
+
+# Szczeble c dla fig14 (domyślna drabina run_ladder.sh + macierz 8/32)
+SCALING_CONCURRENCIES = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+# figura -> zapytania do katalogu wyników: (test, wymiary, porty)
+FIGURE_INPUTS = {
+    fig01_handshake_latency_aes_on: [("handshake", {"aes": "on"}, PORT_ORDER)],
+    fig02_handshake_aes_off_delta: [
+        ("handshake", {"aes": "on"}, OPENSSL_PORTS),
+        ("handshake", {"aes": "off"}, OPENSSL_PORTS),
+    ],
+    fig03_cdf_handshake_aes_on: [("handshake", {"aes": "on"}, PORT_ORDER)],
+    fig04_ttfb_per_port: [("ttfb", {}, HTTP_PORTS)],
+    fig05_throughput_vs_concurrency: [
+        ("bulk", {"aes": "on", "payload_mb": 10, "concurrency": c}, HTTP_PORTS)
+        for c in (8, 32)
+    ],
+    fig06_throughput_payload_size: [
+        ("bulk", {"aes": "on", "payload_mb": p, "concurrency": 32}, HTTP_PORTS)
+        for p in (1, 10)
+    ],
+    fig07_throughput_aes_off_delta: [
+        ("bulk", {"aes": a, "payload_mb": 10, "concurrency": 32}, OPENSSL_PORTS)
+        for a in ("on", "off")
+    ],
+    fig08_0rtt_acceptance_rate: [
+        ("0rtt", {"aes": "on", "payload_mb": e}, OPENSSL_PORTS) for e in (0.1, 1)
+    ],
+    fig09_0rtt_vs_full_post: [
+        ("0rtt", {"aes": "on", "payload_mb": 1}, OPENSSL_PORTS),
+        ("full_post", {"aes": "on", "payload_mb": 8}, OPENSSL_PORTS),
+    ],
+    fig10_bytes_on_wire: [("bytes_on_wire", {}, None)],
+    fig11_openssl_speed_vs_throughput: [
+        ("bulk", {"aes": "on", "payload_mb": 10, "concurrency": 32}, OPENSSL_PORTS)
+    ],
+    fig12_dashboard_summary: [
+        ("handshake", {"aes": "on"}, HTTP_PORTS),
+        ("ttfb", {}, HTTP_PORTS),
+        ("bulk", {"aes": "on", "payload_mb": 10, "concurrency": 32}, HTTP_PORTS),
+        ("bulk", {"aes": "off", "payload_mb": 10, "concurrency": 32}, OPENSSL_PORTS),
+    ],
+    fig13_cert_chain_vs_handshake: [("handshake", {"aes": "on"}, PORT_ORDER)],
+    fig14_concurrency_scaling_ratio: [
+        ("bulk", {"aes": "on", "payload_mb": p, "concurrency": c}, HTTP_PORTS)
+        for p in (1, 10)
+        for c in SCALING_CONCURRENCIES
+    ],
+    fig15_throughput_distribution: [
+        ("bulk", {"aes": "on", "payload_mb": p, "concurrency": 32}, HTTP_PORTS)
+        for p in (1, 10)
+    ],
+}
+
+# Pliki spoza katalogu wyników
+FIGURE_EXTRA_INPUTS = {
+    fig11_openssl_speed_vs_throughput: [
+        "{base}/series/openssl_speed_aes_on.txt",
+        "{base}/microbench/*/microbench.csv",
+    ],
+    fig13_cert_chain_vs_handshake: [
+        "certs/ecdsa-p256.crt",
+        "{base}/cert_matrix/*/certmatrix_*.json",
+    ],
+}
+
+# Figury z latencjami handshake/bulk — przy --subtract-overhead osobne pliki *_net.png
+NET_FIGURES = {
+    fig01_handshake_latency_aes_on,
+    fig02_handshake_aes_off_delta,
+    fig03_cdf_handshake_aes_on,
+    fig05_throughput_vs_concurrency,
+    fig06_throughput_payload_size,
+    fig07_throughput_aes_off_delta,
+    fig11_openssl_speed_vs_throughput,
+    fig12_dashboard_summary,
+    fig13_cert_chain_vs_handshake,
+    fig14_concurrency_scaling_ratio,
+    fig15_throughput_distribution,
+}
+
+# Kod współdzielony przez wszystkie figury (zmiana => przerysowanie wszystkiego)
+SHARED_CODE = [
+    load_json_data,
+    calculate_percentiles,
+    harness_overhead_s,
+    bulk_throughput,
+    load_handshake_data,
+    load_ttfb_data,
+    load_throughput_data,
+    load_scaling_data,
+    fit_usl,
+    usl,
+    load_0rtt_data,
+    load_full_post_data,
+    load_bytes_on_wire_data,
+    aes_delta,
+    ChartData,
+    parse_openssl_speed,
+    micro_at,
+    get_cert_size_der,
+    load_cert_matrix,
+    fit_chain_vs_key,
+    plot_cert_matrix,
+    get_port_color,
+    COLORS,
+    PORT_NAMES,
+]
+
+
+def catalog_inputs(base_path: Path, queries) -> List[Path]:
+    """Rozwiązuje zapytania (test, wymiary, porty) na konkretne pliki wyników"""
+    catalog = get_catalog(base_path)
+    paths = []
+    for test, dims, ports in queries:
+        for port in ports or [None]:
+            path = catalog.latest(test=test, port=port, profile="P0", **dims)
+            if path:
+                paths.append(path)
+    return paths
+
+
+def build_figure_specs(ds: ChartData, output_dir: Path) -> List[FigureSpec]:
+    """Lista figur z zadeklarowanymi wejściami dla FigureCache"""
+    specs = []
+    for func, queries in FIGURE_INPUTS.items():
+        prefix = func.__name__.split("_")[0]
+        extra = [x.format(base=ds.base_path) for x in FIGURE_EXTRA_INPUTS.get(func, [])]
+        # Netto i brutto to osobne wpisy cache; pozostałe figury nie zależą od trybu
+        suffix = ds.fig_suffix if func in NET_FIGURES else ""
+        specs.append(
+            FigureSpec(
+                name=prefix + suffix,
+                func=func,
+                args=(ds, output_dir),
+                inputs=catalog_inputs(ds.base_path, queries) + extra,
+                params={"subtract_overhead": bool(suffix)},
+                outputs=[f"{prefix}_*{suffix}.png"],
+            )
+        )
+    return specs
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Generowanie wykresów (fig01–fig15)")
+    p.add_argument("--results", default="results", help="katalog wyników")
+    p.add_argument("--output", default="figures", help="katalog wykresów")
+    p.add_argument(
+        "--force", action="store_true", help="przerysuj wszystko, ignoruj cache"
+    )
+    p.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=default_jobs(),
+        help="liczba procesów renderujących (domyślnie liczba rdzeni)",
+    )
+    p.add_argument(
+        "--load-workers",
+        type=int,
+        default=8,
+        help="liczba wątków wczytujących pliki wyników",
+    )
+    p.add_argument(
+        "--subtract-overhead",
+        action="store_true",
+        help="odejmij narzut harnessu (calibrate_harness.sh) od latencji handshake/bulk "
+        "i przelicz throughput; figury netto jako *_net.png",
+    )
+    return p.parse_args()
+
+
 def main():
     """Główna funkcja generująca wszystkie wykresy Z LOGOWANIEM"""
-    base_path = Path("results")
-    output_dir = Path("figures")
+    args = parse_args()
+    base_path = Path(args.results)
+    output_dir = Path(args.output)
     output_dir.mkdir(exist_ok=True)
 
     print("🚀 Generowanie wykresów TLS Performance & Security Analysis")
     print("🔍 TRYB DEBUG: Wyświetlanie danych dla każdego wykresu")
     print("=" * 60)
 
-    # Generuj wszystkie wykresy (1-15) z logowaniem
-    fig01_handshake_latency_aes_on(base_path, output_dir)
-    fig02_handshake_aes_off_delta(base_path, output_dir)
-    fig03_cdf_handshake_aes_on(base_path, output_dir)
-    fig04_ttfb_per_port(base_path, output_dir)
-    fig05_throughput_vs_concurrency(base_path, output_dir)
-    fig06_throughput_payload_size(base_path, output_dir)
-    fig07_throughput_aes_off_delta(base_path, output_dir)
-    fig08_0rtt_acceptance_rate(base_path, output_dir)
-    fig09_0rtt_vs_full_post(base_path, output_dir)
-    fig10_bytes_on_wire(base_path, output_dir)
-    fig11_openssl_speed_vs_throughput(base_path, output_dir)
-    fig12_dashboard_summary(base_path, output_dir)
-
-    # Dodatkowe wykresy (13-15)
-    fig13_cert_chain_vs_handshake(base_path, output_dir)
-    fig14_concurrency_scaling_ratio(base_path, output_dir)
-    fig15_throughput_distribution(base_path, output_dir)
+    # Wszystkie wykresy (1-15); przerysowywane tylko te z nieaktualnymi wejściami
+    # Katalog wyników skanowany raz tutaj; workery (fork) dziedziczą indeks
+    cache = FigureCache(output_dir, force=args.force, shared_code=SHARED_CODE)
+    ds = ChartData(base_path, subtract_overhead=args.subtract_overhead)
+    if args.subtract_overhead:
+        print("🧪 Latencje netto: odjęty narzut harnessu z kalibracji komórek")
+    specs = build_figure_specs(ds, output_dir)
+    # Pliki tylko nieaktualnych figur, parsowane raz przed fork() — workery dziedziczą
+    stale = [s for s in specs if cache.is_stale(s, cache.key(s))]
+    ds.preload([p for s in stale for p in s.inputs], workers=args.load_workers)
+    report = cache.build(specs, jobs=args.jobs)
 
     print("=" * 60)
-    print(f"✅ Wszystkie wykresy wygenerowane w katalogu: {output_dir}")
+    print_report(report)
+    print(f"📂 Dane: {ds.summary()}")
+    print(f"✅ Wykresy w katalogu: {output_dir}")
     print("📊 Lista wygenerowanych plików:")
     for png_file in sorted(output_dir.glob("*.png")):
         print(f"   - {png_file.name}")
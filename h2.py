@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+HTTP/2 (ALPN h2) multipleksowany upload vs HTTP/1.1 przy tej samej łącznej współbieżności.
+
+scripts/run_h2.sh uruchamia h2load w tls-perf-nginx: h2 — S strumieni na C połączeniach
+(-c C -m S/C, okna flow-control -w/-W), h1 — `--h1 -c S` (S połączeń keep-alive).
+`cell` parsuje wyjście h2load i jego --log-file (czas startu, status, czas strumienia)
+do JSON komórki; `analyze` paruje h2 z h1 i liczy efekty head-of-line:
+  tail_ratio   = p99 / p50 czasu strumienia,
+  hol_index    = tail_ratio(h2) / tail_ratio(h1) — >1: ogon h2 rośnie bardziej
+                 (jedna strata TCP wstrzymuje wszystkie strumienie połączenia),
+  loss_penalty = p99(P2) / p99(P0) per protokół (ta sama komórka bez i ze stratami).
+
+Użycie:
+    python h2.py cell --stdout h2load.txt --log h2load.log --port 4431 --protocol h2 \\
+        --connections 4 --streams 32 --requests 256 --payload 1 --out cell.json
+    python h2.py analyze        # -> results/h2/h2_compare.csv, figures/h2_vs_h1.png
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from fanout import ALGORITHM
+from results_catalog import profile_code
+
+UNIT_S = {"us": 1e-6, "ms": 1e-3, "s": 1.0}
+TIMING_ROWS = {"time for request": "request", "time for connect": "connect",
+               "time to 1st byte": "ttfb"}
+
+
+def _secs(tok: str) -> Optional[float]:
+    m = re.fullmatch(r"([\d.]+)(us|ms|s)", tok)
+    return float(m.group(1)) * UNIT_S[m.group(2)] if m else None
+
+
+def parse_h2load(text: str) -> Dict:
+    """Podsumowanie h2load: liczniki żądań, statusy, min/max/mean/sd czasów, negocjacja TLS/ALPN"""
+    out: Dict = {}
+    m = re.search(r"finished in ([\d.]+(?:us|ms|s)), ([\d.]+) req/s", text)
+    if m:
+        out["finished_s"] = _secs(m.group(1))
+        out["requests_per_second"] = float(m.group(2))
+    m = re.search(r"requests: (\d+) total, (\d+) started, (\d+) done, (\d+) succeeded, "
+                  r"(\d+) failed, (\d+) errored, (\d+) timeout", text)
+    if m:
+        for k, v in zip(["total", "started", "done", "succeeded", "failed", "errored",
+                         "timeout"], m.groups()):
+            out[f"requests_{k}"] = int(v)
+    m = re.search(r"status codes: (\d+) 2xx, (\d+) 3xx, (\d+) 4xx, (\d+) 5xx", text)
+    if m:
+        out["status_codes"] = dict(zip(["2xx", "3xx", "4xx", "5xx"], map(int, m.groups())))
+    for label, key in TIMING_ROWS.items():
+        m = re.search(rf"^{label}:\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)", text, re.M)
+        if m:
+            out[f"{key}_s"] = dict(zip(["min", "max", "mean", "sd"], map(_secs, m.groups())))
+    for label, key in [("TLS Protocol", "tls_protocol"), ("Cipher", "cipher"),
+                       ("Server Temp Key", "server_temp_key"),
+                       ("Application protocol", "alpn")]:
+        m = re.search(rf"^{label}: (.+)$", text, re.M)
+        if m:
+            out[key] = m.group(1).strip()
+    return out
+
+
+def read_log(path: Path) -> np.ndarray:
+    """--log-file h2load: start (µs od epoki), status HTTP, czas do końca odpowiedzi (µs)"""
+    try:
+        arr = np.loadtxt(path, dtype=np.int64, ndmin=2, usecols=(0, 1, 2))
+    except (OSError, ValueError):
+        return np.empty((0, 3), dtype=np.int64)
+    return arr
+
+
+def stream_stats(log: np.ndarray) -> Dict:
+    ok = (log[:, 1] >= 200) & (log[:, 1] < 300) if len(log) else np.array([], dtype=bool)
+    dur = log[ok, 2] / 1e6
+    if len(dur) == 0:
+        return {"request_times_s": []}
+    p50, p95, p99 = np.percentile(dur, [50, 95, 99])
+    # Przerwy między kolejnymi zakończeniami strumieni — wstrzymanie wszystkich strumieni
+    # połączenia (HOL) widać jako długą przerwę, po której kończy się seria strumieni
+    ends = np.sort(log[ok, 0] + log[ok, 2]) / 1e3
+    gaps = np.diff(ends) if len(ends) > 1 else np.array([0.0])
+    return {
+        "stream_p50_s": round(float(p50), 6),
+        "stream_p95_s": round(float(p95), 6),
+        "stream_p99_s": round(float(p99), 6),
+        "stream_max_s": round(float(dur.max()), 6),
+        "tail_ratio": round(float(p99 / p50), 3) if p50 > 0 else None,
+        "completion_gap_p50_ms": round(float(np.median(gaps)), 3),
+        "completion_gap_max_ms": round(float(gaps.max()), 3),
+        "request_times_s": [round(float(x), 6) for x in dur],
+    }
+
+
+def build_cell(args) -> Dict:
+    summary = parse_h2load(Path(args.stdout).read_text())
+    stats = stream_stats(read_log(Path(args.log)))
+    ok = summary.get("requests_succeeded", 0)
+    fin = summary.get("finished_s")
+    alpn = summary.get("alpn")
+    expected = "h2" if args.protocol == "h2" else "http/1.1"
+    per_conn = args.streams // args.connections if args.protocol == "h2" else 1
+    return {
+        "port": args.port,
+        "protocol": args.protocol,
+        "alpn": alpn,
+        "alpn_ok": alpn == expected,
+        "connections": args.connections if args.protocol == "h2" else args.streams,
+        # C konfiguracji runu także w komórce h1 — klucz pary h2/h1 w compare()
+        "h2_connections": args.connections,
+        "streams_per_connection": per_conn,
+        "concurrency": args.streams,
+        "total_requests": args.requests,
+        "payload_size_mb": args.payload,
+        "window_bits": args.window_bits,
+        "connection_window_bits": args.connection_window_bits,
+        "server_body_preread": args.server_preread or None,
+        "profile": args.profile,
+        "aes": args.aes,
+        "successful_requests": ok,
+        "failed_requests": summary.get("requests_total", args.requests) - ok,
+        "throughput_mb_s": round(ok * args.payload / fin, 3) if fin else None,
+        "requests_per_second": summary.get("requests_per_second"),
+        "connect_mean_s": (summary.get("connect_s") or {}).get("mean"),
+        "ttfb_mean_s": (summary.get("ttfb_s") or {}).get("mean"),
+        **stats,
+        "h2load": summary,
+        "measurement_method": "h2load_in_nginx_container",
+        "algorithm": ALGORITHM.get(args.port, "Unknown"),
+    }
+
+
+def load_cells(root: Path) -> pd.DataFrame:
+    rows = []
+    for p in sorted((root / "h2").glob("*/h2_*.json")):
+        try:
+            js = json.loads(p.read_text())
+        except (OSError, json.JSONDecodeError):
+            continue
+        if "protocol" not in js:
+            continue
+        rows.append({k: v for k, v in js.items() if k not in ("request_times_s", "h2load")})
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df["profile"] = df["profile"].map(lambda x: profile_code(str(x)) or x)
+    return df
+
+
+def compare(df: pd.DataFrame) -> pd.DataFrame:
+    """h2 vs h1 przy tej samej współbieżności + kara za straty (P2 względem P0)"""
+    # Konfiguracja h2 w kluczu — inaczej runy z różnym H2_CONNS / oknami nadpisałyby się
+    keys = ["profile", "aes", "port", "payload_size_mb", "concurrency", "h2_connections",
+            "window_bits", "connection_window_bits", "server_body_preread"]
+    df = df.copy()
+    df["server_body_preread"] = df["server_body_preread"].fillna("default")
+    cols = ["throughput_mb_s", "stream_p50_s", "stream_p99_s", "tail_ratio",
+            "completion_gap_max_ms", "connections"]
+    wide = df.pivot_table(index=keys, columns="protocol", values=cols, aggfunc="last")
+    wide.columns = [f"{c}_{p}" for c, p in wide.columns]
+    wide = wide.reset_index()
+    get = lambda c: wide[c] if c in wide else np.nan
+    wide["throughput_ratio_h2_h1"] = get("throughput_mb_s_h2") / get("throughput_mb_s_h1")
+    wide["p99_ratio_h2_h1"] = get("stream_p99_s_h2") / get("stream_p99_s_h1")
+    wide["hol_index"] = get("tail_ratio_h2") / get("tail_ratio_h1")
+    base = wide[wide.profile == "P0"].set_index(keys[1:])
+    for proto in ("h2", "h1"):
+        col = f"stream_p99_s_{proto}"
+        if col not in wide:
+            continue
+        ref = wide[keys[1:]].apply(tuple, axis=1).map(base[col].to_dict() if not base.empty else {})
+        wide[f"loss_penalty_{proto}"] = wide[col] / ref
+    return wide.round(4)
+
+
+def plot(cmp: pd.DataFrame, figures: Path):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    long = []
+    for proto in ("h1", "h2"):
+        for metric, label in [("throughput_mb_s", "throughput (MB/s)"),
+                              ("stream_p99_s", "p99 strumienia (s)")]:
+            col = f"{metric}_{proto}"
+            if col in cmp:
+                long.append(cmp.assign(protocol=proto, metric=label, value=cmp[col])
+                            [["profile", "port", "protocol", "metric", "value"]])
+    if not long:
+        return
+    data = pd.concat(long, ignore_index=True)
+    data["port"] = data["port"].astype(str)
+    g = sns.catplot(data=data, x="port", y="value", hue="protocol", col="metric", row="profile",
+                    kind="bar", sharey=False, height=3.2, aspect=1.4)
+    g.set_titles("{row_name} — {col_name}")
+    figures.mkdir(parents=True, exist_ok=True)
+    out = figures / "h2_vs_h1.png"
+    g.savefig(out, dpi=300, bbox_inches="tight")
+    plt.close(g.fig)
+    print(f"✓ zapisano wykres: {out}")
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="HTTP/2 multipleksowany upload vs HTTP/1.1 (h2load)")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("cell", help="wyjście h2load -> JSON komórki")
+    c.add_argument("--stdout", required=True, help="standardowe wyjście h2load")
+    c.add_argument("--log", required=True, help="plik --log-file h2load")
+    c.add_argument("--port", type=int, required=True)
+    c.add_argument("--protocol", choices=["h2", "h1"], required=True)
+    c.add_argument("--connections", type=int, required=True, help="C (h2)")
+    c.add_argument("--streams", type=int, required=True, help="S — łączna współbieżność")
+    c.add_argument("--requests", type=int, required=True)
+    c.add_argument("--payload", type=float, required=True, help="rozmiar POST w MB")
+    c.add_argument("--window-bits", type=int, default=30)
+    c.add_argument("--connection-window-bits", type=int, default=30)
+    c.add_argument("--server-preread", default="", help="http2_body_preread_size nginx")
+    c.add_argument("--profile", default="P0")
+    c.add_argument("--aes", choices=["on", "off"], default="on")
+    c.add_argument("--out", required=True)
+    a = sub.add_parser("analyze", help="porównanie h2 vs h1 i efekty HOL")
+    a.add_argument("--results", default="results")
+    a.add_argument("--figures", default="figures")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.cmd == "cell":
+        if args.connections < 1 or args.streams % args.connections:
+            sys.exit(f"❌ --streams ({args.streams}) musi być wielokrotnością --connections ({args.connections})")
+        cell = build_cell(args)
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(cell, indent=2))
+        fmt = lambda v, f: "–" if v is None else format(v, f)
+        print(f"  📊 {args.protocol} (ALPN {cell['alpn'] or '–'}): "
+              f"{cell['successful_requests']}/{args.requests} ok, "
+              f"{fmt(cell['throughput_mb_s'], '.2f')} MB/s, strumień p50 "
+              f"{fmt(cell.get('stream_p50_s'), '.4f')} s, p99 {fmt(cell.get('stream_p99_s'), '.4f')} s")
+        if not cell["alpn_ok"]:
+            print(f"  ⚠️  wynegocjowano {cell['alpn'] or 'brak ALPN'} zamiast "
+                  f"{'h2' if args.protocol == 'h2' else 'http/1.1'}")
+        return
+    root = Path(args.results)
+    df = load_cells(root)
+    if df.empty:
+        sys.exit(f"❌ Brak wyników h2_*.json w {root / 'h2'}")
+    cmp = compare(df)
+    out = root / "h2" / "h2_compare.csv"
+    cmp.to_csv(out, index=False)
+    for r in cmp.to_dict("records"):
+        print(f"📊 {r['profile']} port {r['port']} S={r['concurrency']} C={r['h2_connections']}: throughput h2/h1 "
+              f"{r.get('throughput_ratio_h2_h1', float('nan')):.2f}, p99 h2/h1 "
+              f"{r.get('p99_ratio_h2_h1', float('nan')):.2f}, HOL index {r.get('hol_index', float('nan')):.2f}")
+    print(f"✅ zapisano: {out}")
+    plot(cmp, Path(args.figures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""
+localtls — lokalne serwery TLS (Python asyncio + ssl) zamiast stosu docker compose.
+
+Odwzorowuje układ portów nginx: 4431 AES-GCM, 4432 ChaCha20-Poly1305, sink `/upload`,
+bilety sesji TLS 1.3 i keep-alive HTTP/1.1. Zestawy szyfrów i grupy ustawiane są per
+port przez OPENSSL_CONF procesu potomnego (moduł ssl nie konfiguruje szyfrów TLS 1.3),
+więc dostępne jest wszystko, co obsługuje lokalny OpenSSL. Runnery celują w te
+serwery przez TLS_TARGET=local (scripts/localdocker/docker).
+
+Użycie:
+    python -m localtls                                  # 4431 + 4432 na 127.0.0.1
+    python -m localtls --port 4436,TLS_AES_256_GCM_SHA384,P-256 --pidfile /tmp/localtls.pid
+"""
+
+from .layout import PORTS, parse_port_spec, openssl_conf
+from .server import make_context, serve
+
+__all__ = ["PORTS", "parse_port_spec", "openssl_conf", "make_context", "serve"]
@@ -0,0 +1,105 @@
+"""CLI: proces nadzorczy uruchamia jeden proces potomny na port (własny OPENSSL_CONF)"""
+
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .layout import PORTS, openssl_conf, parse_port_spec
+from .server import make_context, serve
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_child(args):
+    spec = parse_port_spec(args.port[0])
+    try:
+        ctx = make_context(args.cert, args.key, spec["ciphersuites"], args.tickets)
+    except (ValueError, OSError) as e:
+        # ssl.SSLError dziedziczy po OSError (np. nieznana grupa w OPENSSL_CONF)
+        print(f"❌ localtls :{spec['port']}: {e}", file=sys.stderr)
+        sys.exit(2)
+    try:
+        asyncio.run(serve(spec["port"], ctx, args.host, args.keepalive_timeout))
+    except KeyboardInterrupt:
+        pass
+
+
+def run_supervisor(args):
+    specs = [parse_port_spec(str(p)) for p in args.ports] + [parse_port_spec(s) for s in args.port]
+    tmp = Path(tempfile.mkdtemp(prefix="localtls-"))
+    procs = []
+    for spec in specs:
+        conf = openssl_conf(spec, tmp / f"openssl_{spec['port']}.cnf")
+        cmd = [sys.executable, "-m", "localtls", "--child",
+               "--port", f"{spec['port']},{spec['ciphersuites']},{spec['groups']}",
+               "--host", args.host, "--cert", args.cert, "--key", args.key,
+               "--tickets", str(args.tickets), "--keepalive-timeout", str(args.keepalive_timeout)]
+        env = dict(os.environ, OPENSSL_CONF=str(conf), PYTHONPATH=str(ROOT))
+        procs.append((spec, subprocess.Popen(cmd, env=env)))
+
+    # Procesy potomne = procesy serwera (CPU serwera: scripts/localdocker podmienia pidof)
+    if args.pidfile:
+        Path(args.pidfile).write_text("".join(f"{p.pid}\n" for _, p in procs))
+
+    def stop(*_):
+        for _, p in procs:
+            if p.poll() is None:
+                p.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    time.sleep(0.5)
+    for spec, p in procs:
+        state = "✅" if p.poll() is None else "❌"
+        print(f"{state} localtls {args.host}:{spec['port']}  {spec['ciphersuites']}  groups={spec['groups']}")
+    sys.stdout.flush()
+    try:
+        for _, p in procs:
+            p.wait()
+    finally:
+        stop()
+        if args.pidfile:
+            Path(args.pidfile).unlink(missing_ok=True)
+        for f in tmp.glob("*"):
+            f.unlink()
+        tmp.rmdir()
+    # Błąd startu któregokolwiek portu = błąd całości
+    failed = [p.returncode for _, p in procs if p.returncode and p.returncode > 0]
+    sys.exit(max(failed) if failed else 0)
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python -m localtls",
+                                 description="Lokalne serwery TLS (asyncio) w układzie portów nginx")
+    ap.add_argument("--ports", nargs="*", type=int, default=None,
+                    help=f"porty z układu nginx (domyślnie {' '.join(map(str, PORTS))})")
+    ap.add_argument("--port", action="append", default=[],
+                    help="dodatkowy port: PORT[,CIPHERSUITES[,GROUPS]] (składnia OpenSSL)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--cert", default=str(ROOT / "certs/ecdsa-p256.crt"))
+    ap.add_argument("--key", default=str(ROOT / "certs/ecdsa-p256.key"))
+    ap.add_argument("--tickets", type=int, default=2, help="bilety sesji TLS 1.3 na połączenie")
+    ap.add_argument("--keepalive-timeout", type=float, default=75.0, help="[s], jak nginx")
+    ap.add_argument("--pidfile", help="PID-y procesów serwera (jeden na linię)")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+    if args.ports is None:
+        args.ports = [] if args.port else list(PORTS)
+    unknown = [p for p in args.ports if p not in PORTS]
+    if unknown:
+        ap.error(f"porty spoza układu: {unknown} (użyj --port PORT,CIPHERSUITES,GROUPS)")
+    run_supervisor(args)
+
+
+if __name__ == "__main__":
+    main()
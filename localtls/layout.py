@@ -0,0 +1,41 @@
+"""Układ portów (jak docker/nginx-oqs/conf.d/tls-perf.conf) i konfiguracja OpenSSL per port"""
+
+from pathlib import Path
+from typing import Dict
+
+# port -> ssl_conf_command Ciphersuites / Groups z konfiguracji nginx
+PORTS: Dict[int, Dict[str, str]] = {
+    4431: {"ciphersuites": "TLS_AES_128_GCM_SHA256:TLS_AES_256_GCM_SHA384", "groups": "X25519"},
+    4432: {"ciphersuites": "TLS_CHACHA20_POLY1305_SHA256", "groups": "X25519"},
+}
+
+
+def parse_port_spec(spec: str) -> Dict:
+    """'PORT[,CIPHERSUITES[,GROUPS]]' -> {port, ciphersuites, groups}; brakujące z PORTS/4431"""
+    parts = spec.split(",")
+    try:
+        port = int(parts[0])
+    except ValueError:
+        raise ValueError(f"niepoprawny port: {spec}")
+    base = PORTS.get(port, PORTS[4431])
+    return {
+        "port": port,
+        "ciphersuites": parts[1] if len(parts) > 1 and parts[1] else base["ciphersuites"],
+        "groups": parts[2] if len(parts) > 2 and parts[2] else base["groups"],
+    }
+
+
+def openssl_conf(spec: Dict, path: Path) -> Path:
+    """Plik OPENSSL_CONF z system_default = szyfry/grupy portu (odpowiednik ssl_conf_command)"""
+    path.write_text(
+        "openssl_conf = openssl_init\n"
+        "[openssl_init]\n"
+        "ssl_conf = ssl_sect\n"
+        "[ssl_sect]\n"
+        "system_default = system_default_sect\n"
+        "[system_default_sect]\n"
+        "MinProtocol = TLSv1.3\n"
+        f"Ciphersuites = {spec['ciphersuites']}\n"
+        f"Groups = {spec['groups']}\n"
+    )
+    return path
@@ -0,0 +1,95 @@
+"""Serwer HTTP/1.1 na asyncio + ssl: sink /upload (jak backend-sink), keep-alive, bilety sesji"""
+
+import asyncio
+import contextlib
+import ssl
+
+CHUNK = 1024 * 1024
+INDEX = b"<html><body><h1>localtls</h1></body></html>\n"
+
+
+def make_context(cert: str, key: str, ciphersuites: str = "", tickets: int = 2) -> ssl.SSLContext:
+    """Kontekst serwera TLS 1.3; szyfry/grupy pochodzą z OPENSSL_CONF procesu.
+    Sprawdza, czy lokalny OpenSSL faktycznie włączył zadane zestawy szyfrów."""
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.minimum_version = ssl.TLSVersion.TLSv1_3
+    ctx.load_cert_chain(cert, key)
+    ctx.num_tickets = tickets
+    enabled = {c["name"] for c in ctx.get_ciphers()}
+    missing = [s for s in ciphersuites.split(":") if s and s not in enabled]
+    if missing:
+        raise ValueError(f"lokalny OpenSSL ({ssl.OPENSSL_VERSION}) nie włączył: {':'.join(missing)}")
+    return ctx
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: dict) -> bool:
+    """Czyta i odrzuca ciało żądania (Content-Length albo chunked); False = zerwane połączenie"""
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                # trailer do pustej linii
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return True
+            await reader.readexactly(size + 2)
+    remaining = int(headers.get("content-length", "0") or 0)
+    while remaining > 0:
+        data = await reader.read(min(CHUNK, remaining))
+        if not data:
+            return False
+        remaining -= len(data)
+    return True
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 keepalive_timeout: float = 75.0):
+    try:
+        while True:
+            try:
+                line = await asyncio.wait_for(reader.readline(), keepalive_timeout)
+            except asyncio.TimeoutError:
+                break
+            if not line.strip():
+                break
+            method, path, version = line.decode("latin-1").split(None, 2)
+            version = version.strip()
+            headers = {}
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = h.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+            if not await _read_body(reader, headers):
+                break
+
+            body = b"OK" if path.startswith("/upload") else INDEX
+            conn = headers.get("connection", "").lower()
+            keep = conn != "close" if version == "HTTP/1.1" else conn == "keep-alive"
+            writer.write(
+                f"{version} 200 OK\r\nServer: localtls\r\nContent-Type: text/plain\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep else 'close'}\r\n\r\n".encode()
+                + (body if method != "HEAD" else b"")
+            )
+            await writer.drain()
+            if not keep:
+                break
+    except (ConnectionError, ssl.SSLError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+        with contextlib.suppress(Exception):
+            await writer.wait_closed()
+
+
+async def serve(port: int, ctx: ssl.SSLContext, host: str = "127.0.0.1",
+                keepalive_timeout: float = 75.0):
+    """Nasłuch na jednym porcie do przerwania"""
+    server = await asyncio.start_server(
+        lambda r, w: handle(r, w, keepalive_timeout),
+        host, port, ssl=ctx, ssl_handshake_timeout=10, backlog=1024, reuse_address=True,
+    )
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+"""
+Mikrobenchmarki szyfrów AEAD (openssl speed -evp, wolfCrypt benchmark) i model
+micro → macro dla bulk TLS.
+
+run_microbench.sh zapisuje surowe wyjścia do results/microbench/<TS>/:
+    openssl_aes_<on|off>.txt      openssl speed -mr -evp <alg> (tls-perf-nginx)
+    wolfssl_aes_on_b<size>.txt    wolf-benchmark <size> (wolfssl-server)
+`parse` zamienia je na rekordy (impl, alg, aes, block_bytes, bytes_per_s,
+cycles_per_byte) w microbench.csv.
+
+Model: czas na bajt w TLS = narzut + b · czas szyfru na bajt
+    1/macro = a + b · 1/micro   (ns/B, OLS)
+crypto_share = (1/micro) / (1/macro) — udział kryptografii w koszcie bajtu;
+gap_explained_pct — jaką część różnicy względem x25519_aesgcm (AES-NI on) tej
+samej implementacji tłumaczy różnica czasu szyfru.
+
+Tryb handshake (MODE=handshake): koszt prymitywów X25519, ML-KEM-768, ECDSA P-256,
+RSA-2048 (openssl_handshake_ops.txt, wolfssl_handshake_ops.txt -> handshake_ops.csv)
+składany w oczekiwany koszt CPU serwera/klienta na handshake per zestaw i
+porównywany ze zmierzonym server_cpu_ms_per_handshake (run_handshake.sh).
+
+Użycie:
+    python microbench.py parse results/microbench/20250101_120000 --cpu-mhz 3200
+    python microbench.py model --payload 10 --concurrency 1
+    python microbench.py handshake --cert ecdsa-p256
+"""
+
+import argparse
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from scipy.stats import spearmanr
+
+from aggregate_runs import SUITE_BY_PORT
+from results_catalog import get_catalog
+
+ALGS = ("aes-128-gcm", "aes-256-gcm", "chacha20-poly1305")
+# Rekord TLS 1.3 ma do 16 KiB — ten rozmiar bloku reprezentuje bulk
+TLS_BLOCK = 16384
+# Szyfr negocjowany w danym zestawie (docker/nginx-oqs/conf.d, lighttpd.conf)
+SUITE_CIPHER = {
+    "x25519_aesgcm": "aes-128-gcm",
+    "chacha20": "chacha20-poly1305",
+    "kyber_hybrid": "aes-256-gcm",
+}
+MICRO_COLUMNS = ["impl", "alg", "aes", "block_bytes", "bytes_per_s", "cycles_per_byte"]
+OPS_COLUMNS = ["impl", "op", "ops_per_s", "cost_us"]
+
+# Operacje kryptograficzne handshake'u TLS 1.3 (pełny, bez resumption);
+# {cert} = podpis CertificateVerify, weryfikacje klienta: CertificateVerify + certyfikat liścia
+SERVER_OPS = {
+    "x25519": ["x25519_keygen", "x25519_derive", "{cert}_sign"],
+    "x25519_mlkem768": ["x25519_keygen", "x25519_derive", "mlkem768_encaps", "{cert}_sign"],
+}
+CLIENT_OPS = {
+    "x25519": ["x25519_keygen", "x25519_derive", "{cert}_verify", "{cert}_verify"],
+    "x25519_mlkem768": [
+        "x25519_keygen", "x25519_derive", "mlkem768_keygen", "mlkem768_decaps",
+        "{cert}_verify", "{cert}_verify",
+    ],
+}
+SUITE_GROUP = {"x25519_aesgcm": "x25519", "chacha20": "x25519", "kyber_hybrid": "x25519_mlkem768"}
+CERT_OPS = {"ecdsa-p256": "ecdsa_p256", "rsa-2048": "rsa2048"}
+# Klient handshake'u (run_handshake.sh): openssl s_client, dla 11112 wolf-client
+CLIENT_IMPL = {11112: "wolfssl"}
+# openssl speed nie mierzy osobno generowania klucza X25519 — to jedno mnożenie
+# skalarne, jak derive
+OP_FALLBACK = {"x25519_keygen": "x25519_derive"}
+
+MR_HEADER = re.compile(r"^\+H((?::\d+)+)")
+MR_RESULT = re.compile(r"^\+F:\d+:([^:]+)((?::[\d.eE+-]+)+)")
+# "AES-128-GCM-enc  1024 MiB took 1.000 seconds, 2345.678 MiB/s Cycles per byte =   1.23"
+WOLF_LINE = re.compile(
+    r"^(?P<alg>[A-Za-z0-9-]+)\s.*?(?P<rate>[\d.]+)\s+(?P<unit>[KMG]i?B)/s"
+    r"(?:.*?Cycles per byte\s*=\s*(?P<cpb>[\d.]+))?"
+)
+WOLF_FILE = re.compile(r"wolfssl_aes_(on|off)_b(\d+)\.txt$")
+UNIT_BYTES = {"KB": 1e3, "MB": 1e6, "GB": 1e9, "KiB": 1024, "MiB": 1048576, "GiB": 1024**3}
+
+
+def normalize_alg(name: str) -> Optional[str]:
+    """Nazwa szyfru z openssl/wolfCrypt -> aes-128-gcm | aes-256-gcm | chacha20-poly1305"""
+    n = name.lower()
+    if "cha" in n and "poly" in n:
+        return "chacha20-poly1305"
+    for bits in ("128", "256"):
+        if f"aes-{bits}-gcm" in n and "dec" not in n:
+            return f"aes-{bits}-gcm"
+    return None
+
+
+def parse_openssl_mr(text: str, aes: str, cpu_mhz: Optional[float] = None) -> List[Dict]:
+    """Wyjście `openssl speed -mr` (+H: rozmiary bloków, +F: bajty/s per rozmiar)"""
+    sizes: List[int] = []
+    rows = []
+    for line in text.splitlines():
+        m = MR_HEADER.match(line)
+        if m:
+            sizes = [int(s) for s in m.group(1).strip(":").split(":")]
+            continue
+        m = MR_RESULT.match(line)
+        if not m or not sizes:
+            continue
+        alg = normalize_alg(m.group(1))
+        if alg is None:
+            continue
+        for size, val in zip(sizes, m.group(2).strip(":").split(":")):
+            bps = float(val)
+            rows.append(
+                {
+                    "impl": "openssl",
+                    "alg": alg,
+                    "aes": aes,
+                    "block_bytes": size,
+                    "bytes_per_s": bps,
+                    "cycles_per_byte": cpu_mhz * 1e6 / bps if cpu_mhz and bps > 0 else np.nan,
+                }
+            )
+    return rows
+
+
+def parse_wolf_benchmark(text: str, aes: str, block: int,
+                         cpu_mhz: Optional[float] = None) -> List[Dict]:
+    """Wyjście wolfCrypt benchmark (jeden rozmiar bloku na plik)"""
+    rows = []
+    for line in text.splitlines():
+        m = WOLF_LINE.match(line.strip())
+        if not m:
+            continue
+        alg = normalize_alg(m.group("alg"))
+        if alg is None:
+            continue
+        bps = float(m.group("rate")) * UNIT_BYTES[m.group("unit")]
+        cpb = m.group("cpb")
+        rows.append(
+            {
+                "impl": "wolfssl",
+                "alg": alg,
+                "aes": aes,
+                "block_bytes": block,
+                "bytes_per_s": bps,
+                "cycles_per_byte": float(cpb) if cpb
+                else (cpu_mhz * 1e6 / bps if cpu_mhz and bps > 0 else np.nan),
+            }
+        )
+    return rows
+
+
+def _op_rows(impl: str, ops: Dict[str, float]) -> List[Dict]:
+    return [
+        {"impl": impl, "op": op, "ops_per_s": rate, "cost_us": 1e6 / rate}
+        for op, rate in ops.items()
+        if rate > 0
+    ]
+
+
+def parse_openssl_asym(text: str) -> List[Dict]:
+    """Wyjście `openssl speed ecdhx25519 ecdsap256 rsa2048 ML-KEM-768` (tabele op/s)"""
+    ops: Dict[str, float] = {}
+    for line in text.splitlines():
+        tokens = line.split()
+        idx = [i for i, t in enumerate(tokens) if re.fullmatch(r"[\d.]+s", t)]
+        if not idx:
+            continue
+        label = " ".join(tokens[: idx[0]]).lower()
+        try:
+            rates = [float(t) for t in tokens[idx[-1] + 1:]]
+        except ValueError:
+            continue
+        if not rates:
+            continue
+        if label.startswith("rsa 2048") and len(rates) >= 2:
+            ops["rsa2048_sign"], ops["rsa2048_verify"] = rates[0], rates[1]
+        elif "ecdsa" in label and "nistp256" in label and len(rates) >= 2:
+            ops["ecdsa_p256_sign"], ops["ecdsa_p256_verify"] = rates[0], rates[1]
+        elif "ecdh" in label and "x25519" in label:
+            ops["x25519_derive"] = rates[0]
+        elif re.search(r"ml-?kem-?768", label) and "x25519" not in label and len(rates) >= 3:
+            ops["mlkem768_keygen"], ops["mlkem768_encaps"], ops["mlkem768_decaps"] = rates[:3]
+    return _op_rows("openssl", ops)
+
+
+WOLF_OPS = [
+    # (wymagane fragmenty etykiety, operacja)
+    (("rsa", "2048", "private"), "rsa2048_sign"),
+    (("rsa", "2048", "sign"), "rsa2048_sign"),
+    (("rsa", "2048", "public"), "rsa2048_verify"),
+    (("rsa", "2048", "verify"), "rsa2048_verify"),
+    (("ecdsa", "256", "sign"), "ecdsa_p256_sign"),
+    (("ecdsa", "256", "verify"), "ecdsa_p256_verify"),
+    (("25519", "key gen"), "x25519_keygen"),
+    (("25519", "agree"), "x25519_derive"),
+    (("768", "key gen"), "mlkem768_keygen"),
+    (("768", "encap"), "mlkem768_encaps"),
+    (("768", "decap"), "mlkem768_decaps"),
+]
+WOLF_OPS_LINE = re.compile(r"^(?P<label>.*?)\s+\d+\s+ops took .*?(?P<rate>[\d.]+)\s+ops/sec")
+
+
+def parse_wolf_asym(text: str) -> List[Dict]:
+    """Wyjście wolfCrypt benchmark -rsa -ecc -curve25519 -ml-kem (ops/sec)"""
+    ops: Dict[str, float] = {}
+    for line in text.splitlines():
+        m = WOLF_OPS_LINE.match(line.strip())
+        if not m:
+            continue
+        label = m.group("label").lower()
+        if "ed25519" in label:
+            continue
+        kem = any(k in label for k in ("ml-kem", "mlkem", "kyber"))
+        for needles, op in WOLF_OPS:
+            if op.startswith("mlkem") != kem:
+                continue
+            if all(n in label for n in needles):
+                ops.setdefault(op, float(m.group("rate")))
+                break
+    return _op_rows("wolfssl", ops)
+
+
+def parse_handshake_ops(run_dir: Path) -> pd.DataFrame:
+    """openssl_/wolfssl_handshake_ops.txt -> DataFrame OPS_COLUMNS"""
+    rows: List[Dict] = []
+    f = run_dir / "openssl_handshake_ops.txt"
+    if f.exists():
+        rows += parse_openssl_asym(f.read_text(errors="replace"))
+    f = run_dir / "wolfssl_handshake_ops.txt"
+    if f.exists():
+        rows += parse_wolf_asym(f.read_text(errors="replace"))
+    return pd.DataFrame(rows, columns=OPS_COLUMNS)
+
+
+def parse_dir(run_dir: Path, cpu_mhz: Optional[float] = None) -> pd.DataFrame:
+    """Wszystkie surowe wyjścia katalogu -> DataFrame MICRO_COLUMNS"""
+    rows: List[Dict] = []
+    for f in sorted(run_dir.glob("openssl_aes_*.txt")):
+        aes = f.stem.rsplit("_", 1)[-1]
+        rows += parse_openssl_mr(f.read_text(errors="replace"), aes, cpu_mhz)
+    for f in sorted(run_dir.glob("wolfssl_aes_*_b*.txt")):
+        m = WOLF_FILE.search(f.name)
+        if m:
+            rows += parse_wolf_benchmark(
+                f.read_text(errors="replace"), m.group(1), int(m.group(2)), cpu_mhz
+            )
+    df = pd.DataFrame(rows, columns=MICRO_COLUMNS)
+    # Kilka przebiegów tego samego bloku -> mediana
+    return (
+        df.groupby(MICRO_COLUMNS[:4], as_index=False)[MICRO_COLUMNS[4:]]
+        .median()
+        .sort_values(MICRO_COLUMNS[:4])
+    )
+
+
+def latest_micro(results: Path, name: str = "microbench.csv") -> Optional[Path]:
+    """Najnowszy results/microbench/<TS>/<name>"""
+    found = sorted(Path(results).glob(f"microbench/*/{name}"))
+    return found[-1] if found else None
+
+
+def load_micro(path: Optional[Path]) -> pd.DataFrame:
+    if path is None or not Path(path).exists():
+        return pd.DataFrame(columns=MICRO_COLUMNS)
+    return pd.read_csv(path, dtype={"aes": str})
+
+
+def micro_at(micro: pd.DataFrame, impl: str, alg: str, aes: str,
+             block: int = TLS_BLOCK) -> Optional[float]:
+    """bytes/s dla bloku `block` (lub największego zmierzonego ≤ block)"""
+    sel = micro[(micro.impl == impl) & (micro.alg == alg) & (micro.aes == aes)]
+    sel = sel[sel.block_bytes <= block]
+    if sel.empty:
+        return None
+    return float(sel.sort_values("block_bytes").iloc[-1]["bytes_per_s"])
+
+
+def macro_from_catalog(results: Path, payload_mb: float, concurrency: int) -> pd.DataFrame:
+    """Najnowszy throughput bulk (P0) per port × AES z katalogu wyników"""
+    catalog = get_catalog(results)
+    rows = []
+    for port in SUITE_BY_PORT:
+        for aes in ("on", "off"):
+            path = catalog.latest(test="bulk", port=port, aes=aes, profile="P0",
+                                  payload_mb=payload_mb, concurrency=concurrency)
+            if path is None:
+                continue
+            try:
+                thr = json.loads(Path(path).read_text()).get("throughput_mb_s")
+            except (OSError, ValueError):
+                continue
+            if isinstance(thr, (int, float)) and thr > 0:
+                rows.append({"port": port, "aes": aes, "macro_mb_s": float(thr)})
+    return pd.DataFrame(rows, columns=["port", "aes", "macro_mb_s"])
+
+
+def micro_macro_table(micro: pd.DataFrame, macro: pd.DataFrame) -> pd.DataFrame:
+    """Łączy throughput TLS (port, aes) z szybkością szyfru zestawu"""
+    rows = []
+    for _, r in macro.iterrows():
+        impl, suite = SUITE_BY_PORT.get(int(r.port), ("unknown", str(r.port)))
+        alg = SUITE_CIPHER.get(suite)
+        bps = micro_at(micro, impl, alg, r.aes) if alg else None
+        if bps is None:
+            continue
+        micro_mb_s = bps / 1048576
+        rows.append(
+            {
+                "port": int(r.port),
+                "implementation": impl,
+                "suite": suite,
+                "alg": alg,
+                "aes": r.aes,
+                "micro_mb_s": micro_mb_s,
+                "macro_mb_s": r.macro_mb_s,
+                "micro_ns_per_b": 1e9 / (micro_mb_s * 1048576),
+                "macro_ns_per_b": 1e9 / (r.macro_mb_s * 1048576),
+            }
+        )
+    t = pd.DataFrame(rows)
+    if t.empty:
+        return t
+    t["crypto_share"] = t.micro_ns_per_b / t.macro_ns_per_b
+    # Luka względem x25519_aesgcm z AES-NI tej samej implementacji
+    t["gap_explained_pct"] = np.nan
+    for impl, grp in t.groupby("implementation"):
+        ref = grp[(grp.suite == "x25519_aesgcm") & (grp.aes == "on")]
+        if ref.empty:
+            continue
+        ref = ref.iloc[0]
+        d_macro = grp.macro_ns_per_b - ref.macro_ns_per_b
+        d_micro = grp.micro_ns_per_b - ref.micro_ns_per_b
+        ok = d_macro.abs() > 1e-12
+        t.loc[grp.index[ok], "gap_explained_pct"] = 100 * d_micro[ok] / d_macro[ok]
+    return t.sort_values(["implementation", "suite", "aes"]).reset_index(drop=True)
+
+
+def fit_micro_macro(t: pd.DataFrame) -> Dict:
+    """OLS 1/macro = a + b·1/micro (ns/B) + Spearman ρ(micro, macro)"""
+    if len(t) < 3 or t.micro_ns_per_b.nunique() < 2:
+        return {}
+    x, y = t.micro_ns_per_b.to_numpy(), t.macro_ns_per_b.to_numpy()
+    b, a = np.polyfit(x, y, 1)
+    pred = a + b * x
+    ss_tot = np.sum((y - y.mean()) ** 2)
+    rho, p = spearmanr(t.micro_mb_s, t.macro_mb_s)
+    return {
+        "n": int(len(t)),
+        "overhead_ns_per_b": float(a),
+        "slope": float(b),
+        "r2": float(1 - np.sum((y - pred) ** 2) / ss_tot) if ss_tot > 0 else float("nan"),
+        "spearman_rho": float(rho),
+        "spearman_p": float(p),
+    }
+
+
+def plot_micro_macro(t: pd.DataFrame, fit: Dict, out: Path, title: str = ""):
+    """Rozrzut micro vs macro (ns/B) z prostą modelu"""
+    fig, ax = plt.subplots(figsize=(8, 6))
+    markers = {"on": "o", "off": "x"}
+    colors = {"openssl": "#1f77b4", "wolfssl": "#ff7f0e"}
+    for (impl, aes), grp in t.groupby(["implementation", "aes"]):
+        ax.scatter(grp.micro_ns_per_b, grp.macro_ns_per_b, marker=markers.get(aes, "o"),
+                   color=colors.get(impl, "gray"), s=60, label=f"{impl} AES-NI {aes}")
+        for _, r in grp.iterrows():
+            ax.annotate(str(r.port), (r.micro_ns_per_b, r.macro_ns_per_b), fontsize=8,
+                        xytext=(4, 4), textcoords="offset points")
+    if fit:
+        xs = np.linspace(0, t.micro_ns_per_b.max() * 1.1, 50)
+        ax.plot(xs, fit["overhead_ns_per_b"] + fit["slope"] * xs, "k--", alpha=0.6,
+                label=f"OLS: {fit['overhead_ns_per_b']:.3f} + {fit['slope']:.2f}·x "
+                      f"(R²={fit['r2']:.2f})")
+        ax.set_title(f"{title}Micro → Macro (Spearman ρ = {fit['spearman_rho']:.2f})")
+    else:
+        ax.set_title(f"{title}Micro → Macro (za mało punktów do modelu)")
+    ax.set_xlabel("Szyfr (openssl speed / wolfCrypt) [ns/B]")
+    ax.set_ylabel("TLS bulk [ns/B]")
+    ax.legend(fontsize=8)
+    ax.grid(True, alpha=0.3)
+    plt.tight_layout()
+    out.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(out, dpi=300)
+    plt.close(fig)
+
+
+def handshake_cost(ops: pd.DataFrame, cert: str = "ecdsa-p256") -> pd.DataFrame:
+    """Oczekiwany koszt CPU handshake'u per port: suma kosztów operacji (µs)"""
+    cost = {(r.impl, r.op): r.cost_us for r in ops.itertuples()}
+    rows = []
+    for port, (impl, suite) in SUITE_BY_PORT.items():
+        group = SUITE_GROUP.get(suite)
+        if group is None:
+            continue
+        row = {"port": port, "implementation": impl, "suite": suite, "cert": cert}
+        sides = (
+            ("server", SERVER_OPS, impl),
+            ("client", CLIENT_OPS, CLIENT_IMPL.get(port, "openssl")),
+        )
+        for side, table, lib in sides:
+            total, missing = 0.0, []
+            for op in table[group]:
+                op = op.format(cert=CERT_OPS[cert])
+                c = cost.get((lib, op), cost.get((lib, OP_FALLBACK.get(op))))
+                if c is None:
+                    missing.append(op)
+                    continue
+                total += c
+                if side == "server":
+                    row[f"server_{op}_us"] = row.get(f"server_{op}_us", 0.0) + c
+            row[f"expected_{side}_us"] = np.nan if missing else total
+            row[f"{side}_missing"] = ",".join(missing)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def measured_server_cpu(results: Path, aes: str = "on") -> Dict[int, float]:
+    """server_cpu_ms_per_handshake z najnowszych wyników handshake (P0) per port"""
+    catalog = get_catalog(results)
+    out = {}
+    for port in SUITE_BY_PORT:
+        path = catalog.latest(test="handshake", port=port, aes=aes, profile="P0")
+        if path is None:
+            continue
+        try:
+            v = json.loads(Path(path).read_text()).get("server_cpu_ms_per_handshake")
+        except (OSError, ValueError):
+            continue
+        if isinstance(v, (int, float)):
+            out[port] = float(v) * 1000
+    return out
+
+
+def plot_handshake_cost(t: pd.DataFrame, out: Path, cert: str):
+    """Słupki: oczekiwany koszt serwera (z podziałem na operacje) vs zmierzone CPU"""
+    t = t.reset_index(drop=True)
+    op_cols = [c for c in t.columns if c.startswith("server_") and c.endswith("_us")]
+    fig, ax = plt.subplots(figsize=(12, 6))
+    x = np.arange(len(t))
+    w = 0.38
+    bottom = np.zeros(len(t))
+    for col in op_cols:
+        vals = t[col].fillna(0).to_numpy()
+        ax.bar(x - w / 2, vals, w, bottom=bottom, label=col[len("server_"):-len("_us")])
+        bottom += vals
+    if "measured_server_us" in t:
+        ax.bar(x + w / 2, t.measured_server_us.fillna(0), w, color="gray", alpha=0.7,
+               label="zmierzone CPU serwera")
+    ax.set_xticks(x)
+    ax.set_xticklabels([f"{r.port}\n{r.implementation}\n{r.suite}" for r in t.itertuples()],
+                       fontsize=8)
+    ax.set_ylabel("CPU na handshake [µs]")
+    ax.set_title(f"Oczekiwany koszt kryptografii vs zmierzone CPU serwera (cert {cert})")
+    ax.legend(fontsize=8)
+    ax.grid(True, alpha=0.3)
+    plt.tight_layout()
+    out.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(out, dpi=300)
+    plt.close(fig)
+
+
+def run_handshake(args) -> int:
+    results = Path(args.results)
+    ops_csv = Path(args.ops) if args.ops else latest_micro(results, "handshake_ops.csv")
+    if ops_csv is None or not ops_csv.exists():
+        print("❌ Brak handshake_ops.csv — uruchom MODE=handshake scripts/run_microbench.sh")
+        return 1
+    t = handshake_cost(pd.read_csv(ops_csv), args.cert)
+    measured = measured_server_cpu(results, args.aes)
+    t["measured_server_us"] = t.port.map(measured)
+    t["crypto_share"] = t.expected_server_us / t.measured_server_us
+    print("Port  | impl    | suite          | oczek. serwer [µs] | oczek. klient [µs] | zmierz. serwer [µs] | krypto %")
+    for r in t.itertuples():
+        def fmt(v, w):
+            return f"{v:{w}.1f}" if pd.notna(v) else " " * (w - 1) + "–"
+        share = f"{100 * r.crypto_share:.0f}" if pd.notna(r.crypto_share) else ""
+        print(f"{r.port:<5} | {r.implementation:7} | {r.suite:14} | {fmt(r.expected_server_us, 18)} | "
+              f"{fmt(r.expected_client_us, 18)} | {fmt(r.measured_server_us, 19)} | {share}")
+        if r.server_missing:
+            print(f"  ⚠️  brak pomiaru: {r.server_missing}")
+    out = ops_csv.parent / f"handshake_cost_{args.cert}.csv"
+    t.to_csv(out, index=False)
+    fig = Path(args.figures) / f"handshake_cost_model_{args.cert}.png"
+    plot_handshake_cost(t, fig, args.cert)
+    print(f"✅ {out} , wykres: {fig}")
+    return 0
+
+
+def run_parse(args) -> int:
+    run_dir = Path(args.dir)
+    ops = parse_handshake_ops(run_dir)
+    if not ops.empty:
+        ops.to_csv(run_dir / "handshake_ops.csv", index=False)
+        for r in ops.itertuples():
+            print(f"🔑 {r.impl:8} {r.op:18} {r.ops_per_s:12.1f} op/s  {r.cost_us:9.2f} µs")
+        print(f"✅ {len(ops)} operacji -> {run_dir / 'handshake_ops.csv'}")
+    df = parse_dir(run_dir, args.cpu_mhz)
+    if df.empty:
+        if not ops.empty:
+            return 0
+        print(f"❌ Brak wyników mikrobenchmarków w {run_dir}")
+        return 1
+    out = run_dir / "microbench.csv"
+    df.to_csv(out, index=False)
+    tls = df[df.block_bytes == TLS_BLOCK]
+    for _, r in tls.iterrows():
+        cpb = "" if np.isnan(r.cycles_per_byte) else f", {r.cycles_per_byte:.2f} cyc/B"
+        print(f"📊 {r.impl:8} {r.alg:18} AES-NI {r.aes:3}: "
+              f"{r.bytes_per_s / 1048576:9.1f} MB/s{cpb}")
+    print(f"✅ {len(df)} rekordów -> {out}")
+    return 0
+
+
+def run_model(args) -> int:
+    results = Path(args.results)
+    micro_csv = Path(args.micro) if args.micro else latest_micro(results)
+    micro = load_micro(micro_csv)
+    if micro.empty:
+        print("❌ Brak microbench.csv — uruchom scripts/run_microbench.sh")
+        return 1
+    macro = macro_from_catalog(results, args.payload, args.concurrency)
+    t = micro_macro_table(micro, macro)
+    if t.empty:
+        print(f"❌ Brak wyników bulk (P0, {args.payload:g} MB, c={args.concurrency})")
+        return 1
+    fit = fit_micro_macro(t)
+    print("Port  | impl    | suite          | AES | micro [MB/s] | macro [MB/s] | crypto % | luka wyjaśniona %")
+    for _, r in t.iterrows():
+        gap = "" if np.isnan(r.gap_explained_pct) else f"{r.gap_explained_pct:.0f}"
+        print(f"{r.port:<5} | {r.implementation:7} | {r.suite:14} | {r.aes:3} | "
+              f"{r.micro_mb_s:12.1f} | {r.macro_mb_s:12.1f} | {100 * r.crypto_share:8.1f} | {gap}")
+    if fit:
+        print(f"📈 1/macro = {fit['overhead_ns_per_b']:.3f} + {fit['slope']:.2f}·1/micro "
+              f"[ns/B], R² = {fit['r2']:.3f}, Spearman ρ = {fit['spearman_rho']:.2f} "
+              f"(p = {fit['spearman_p']:.3g}, n = {fit['n']})")
+    out_dir = results / "microbench"
+    t.to_csv(out_dir / "micro_macro.csv", index=False)
+    (out_dir / "micro_macro_fit.json").write_text(json.dumps(fit, indent=1))
+    fig = Path(args.figures) / "micro_macro_model.png"
+    plot_micro_macro(t, fit, fig, f"{args.payload:g} MB, c={args.concurrency} — ")
+    print(f"✅ {out_dir / 'micro_macro.csv'} , wykres: {fig}")
+    return 0
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Mikrobenchmarki szyfrów i model micro → macro")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    ps = sub.add_parser("parse", help="surowe wyjścia run_microbench.sh -> microbench.csv")
+    ps.add_argument("dir", help="katalog results/microbench/<TS>")
+    ps.add_argument("--cpu-mhz", type=float, help="taktowanie CPU (cykle/bajt dla openssl)")
+    m = sub.add_parser("model", help="regresja bulk TLS na wynikach mikrobenchmarków")
+    m.add_argument("--results", default="results", help="katalog wyników")
+    m.add_argument("--figures", default="figures", help="katalog wykresów")
+    m.add_argument("--micro", help="plik microbench.csv (domyślnie najnowszy)")
+    m.add_argument("--payload", type=float, default=10.0, help="payload bulk [MB]")
+    m.add_argument("--concurrency", type=int, default=1, help="concurrency bulk")
+    h = sub.add_parser("handshake", help="oczekiwany koszt CPU handshake'u vs zmierzone CPU serwera")
+    h.add_argument("--results", default="results", help="katalog wyników")
+    h.add_argument("--figures", default="figures", help="katalog wykresów")
+    h.add_argument("--ops", help="plik handshake_ops.csv (domyślnie najnowszy)")
+    h.add_argument("--cert", choices=sorted(CERT_OPS), default="ecdsa-p256",
+                   help="certyfikat serwera (podpis CertificateVerify)")
+    h.add_argument("--aes", choices=["on", "off"], default="on")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.cmd == "parse":
+        raise SystemExit(run_parse(args))
+    if args.cmd == "handshake":
+        raise SystemExit(run_handshake(args))
+    raise SystemExit(run_model(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Binarny format surowych próbek per komórka (zastępuje results/raw/bulk_<port>.txt).
+
+Plik <nazwa>.raw:
+    8 B   magic b"TLSRAW01"
+    4 B   długość nagłówka JSON (uint32 LE)
+    N B   nagłówek JSON: wymiary komórki (test, port, requests, payload_mb,
+          concurrency, aes, profile), liczba rekordów, opis pól
+    ...   dopełnienie do wielokrotności 64 B
+    dane  rekordy float64 LE: start_ns, end_ns, bytes
+
+start_ns — zegar hosta w chwili wysłania żądania; end_ns = start_ns + czas
+żądania zmierzony w kontenerze (time -p), więc end-start = request_times_s.
+
+Użycie:
+    python raw_samples.py pack samples.txt out.raw --port 4431 --payload 1 --concurrency 8
+    python raw_samples.py info results/bulk/*/bulk_4431_*.raw
+"""
+
+import argparse
+import json
+import struct
+import sys
+import warnings
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+MAGIC = b"TLSRAW01"
+ALIGN = 64
+RECORD_DTYPE = np.dtype([("start_ns", "<f8"), ("end_ns", "<f8"), ("bytes", "<f8")])
+DIM_FIELDS = ("test", "port", "requests", "payload_mb", "concurrency", "aes", "profile")
+
+
+def _data_offset(header_len: int) -> int:
+    end = len(MAGIC) + 4 + header_len
+    return (end + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_raw(path, records: np.ndarray, **dims) -> Path:
+    """Zapisuje rekordy (n, 3) lub strukturalne RECORD_DTYPE z nagłówkiem wymiarów"""
+    path = Path(path)
+    recs = np.asarray(records)
+    if recs.dtype != RECORD_DTYPE:
+        recs = np.ascontiguousarray(recs, dtype="<f8").reshape(-1, 3)
+        recs = recs.view(RECORD_DTYPE).reshape(-1)
+    header = {
+        "version": 1,
+        "count": int(len(recs)),
+        "fields": list(RECORD_DTYPE.names),
+        "dtype": "<f8",
+        **{k: dims.get(k) for k in DIM_FIELDS},
+    }
+    blob = json.dumps(header, sort_keys=True).encode()
+    offset = _data_offset(len(blob))
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(blob)))
+        f.write(blob)
+        f.write(b"\0" * (offset - f.tell()))
+        f.write(recs.tobytes())
+    tmp.replace(path)
+    return path
+
+
+def read_header(path) -> Dict:
+    """Nagłówek pliku .raw (+ klucz data_offset)"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: to nie jest plik .raw (zły magic)")
+        (n,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(n))
+    header["data_offset"] = _data_offset(n)
+    return header
+
+
+class RawSamples:
+    """Próbki jednej komórki zmapowane w pamięci (np.memmap, tylko odczyt)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.header = read_header(self.path)
+        count = self.header["count"]
+        if count:
+            self.records = np.memmap(
+                self.path,
+                dtype=RECORD_DTYPE,
+                mode="r",
+                offset=self.header["data_offset"],
+                shape=(count,),
+            )
+        else:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getattr__(self, name):
+        # Wymiary komórki z nagłówka: raw.port, raw.payload_mb, ...
+        if name in DIM_FIELDS:
+            return self.header.get(name)
+        raise AttributeError(name)
+
+    def latency_s(self) -> np.ndarray:
+        """Czasy żądań w sekundach"""
+        return (self.records["end_ns"] - self.records["start_ns"]) / 1e9
+
+    def throughput_mb_s(self) -> np.ndarray:
+        """Przepustowość per żądanie (bytes / czas) w MB/s"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.records["bytes"] / 1048576 / self.latency_s()
+
+
+def open_raw(path) -> RawSamples:
+    return RawSamples(path)
+
+
+def iter_raw(directory, pattern: str = "**/*.raw", **dims) -> Iterator[RawSamples]:
+    """Pliki .raw w katalogu, których nagłówek pasuje do podanych wymiarów"""
+    for path in sorted(Path(directory).glob(pattern)):
+        try:
+            raw = RawSamples(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  {path}: {e}")
+            continue
+        if all(
+            v is None or raw.header.get(k) == v or _num_eq(raw.header.get(k), v)
+            for k, v in dims.items()
+        ):
+            yield raw
+
+
+def _num_eq(a, b) -> bool:
+    try:
+        return float(a) == float(b)
+    except (TypeError, ValueError):
+        return False
+
+
+def raw_for_json(json_path) -> Optional[Path]:
+    """Plik .raw towarzyszący plikowi JSON komórki (ta sama nazwa)"""
+    p = Path(json_path).with_suffix(".raw")
+    return p if p.exists() else None
+
+
+def pack_text(src, dst, **dims) -> Path:
+    """Tekst 'start_ns end_ns bytes' (jeden rekord na linię) -> plik .raw"""
+    with warnings.catch_warnings():
+        # Pusty plik (wszystkie żądania nieudane) -> 0 rekordów, bez ostrzeżenia
+        warnings.simplefilter("ignore", UserWarning)
+        recs = np.loadtxt(src, dtype="<f8", ndmin=2)
+    if recs.size and recs.shape[1] != 3:
+        raise ValueError(f"{src}: oczekiwane 3 kolumny, jest {recs.shape[1]}")
+    return write_raw(dst, recs.reshape(-1, 3), **dims)
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Surowe próbki per komórka (format .raw)")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    pk = sub.add_parser("pack", help="tekst 'start_ns end_ns bytes' -> .raw")
+    pk.add_argument("src")
+    pk.add_argument("dst")
+    pk.add_argument("--test", default="bulk")
+    pk.add_argument("--port", type=int)
+    pk.add_argument("--requests", type=int)
+    pk.add_argument("--payload", type=float, dest="payload_mb")
+    pk.add_argument("--concurrency", type=int)
+    pk.add_argument("--aes", choices=["on", "off"])
+    pk.add_argument("--profile")
+
+    info = sub.add_parser("info", help="nagłówek i podsumowanie plików .raw")
+    info.add_argument("files", nargs="+")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.cmd == "pack":
+        from results_catalog import profile_code
+
+        dims = {k: getattr(args, k) for k in DIM_FIELDS}
+        if dims["profile"]:
+            # Etykieta z run_bulk.sh (baseline, delay_50ms, ...) -> kod P0–P3
+            dims["profile"] = profile_code(dims["profile"]) or dims["profile"]
+        out = pack_text(args.src, args.dst, **dims)
+        print(f"✅ {read_header(out)['count']} rekordów -> {out}")
+        return
+    for f in args.files:
+        try:
+            raw = RawSamples(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}", file=sys.stderr)
+            continue
+        dims = ", ".join(f"{k}={raw.header.get(k)}" for k in DIM_FIELDS)
+        lat = raw.latency_s()
+        stats = ""
+        if len(lat):
+            p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+            stats = f" p50={p50:.4f}s p95={p95:.4f}s p99={p99:.4f}s"
+        print(f"{f}: n={len(raw)} ({dims}){stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Wykrywanie regresji wydajności względem przypiętego baseline'u.
+
+    python regress.py pin results/run_20250101_120000 --name nginx-oqs-0.10
+    python regress.py compare results/latest --baseline nginx-oqs-0.10 --min-effect 5
+
+Porównanie per (test, port, profil, AES, payload, concurrency): mediana / p95
+z bootstrapowym CI ilorazu nowy/baseline. Werdykt komórki: improved / regressed
+tylko gdy CI wyklucza 1 i efekt >= --min-effect %; unknown przy zbyt małej
+liczbie próbek. Kod wyjścia 1, gdy cokolwiek jest regressed.
+Runy o różnych odciskach środowiska (fingerprint.py) nie są porównywane bez --force.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from aggregate_runs import SUITE_BY_PORT
+from bench_csv import read_bench_csv
+from bootstrap_ci import DEFAULT_N_BOOT, DEFAULT_SEED, compare_ci
+from fingerprint import check_comparable, load as load_fingerprint
+from results_catalog import parse_dimensions, profile_code
+
+BASELINE_DIR = Path("results/baselines")
+DEFAULT_MIN_EFFECT = 5.0  # %
+MIN_SAMPLES = 5
+
+# (test, metryka, statystyka, kierunek "lepiej")
+CHECKS = [
+    ("handshake", "handshake_ms", "median", "lower"),
+    ("handshake", "handshake_ms", "p95", "lower"),
+    ("bulk", "throughput_mb_s", "median", "higher"),
+    ("bulk", "request_time_s", "p95", "lower"),
+    ("0rtt", "avg_time_s", "median", "lower"),
+    ("0rtt", "acceptance_ratio", "median", "higher"),
+    ("full_post", "avg_time_s", "median", "lower"),
+    ("ttfb", "ttfb_s", "median", "lower"),
+]
+
+# Metryka -> (pole bench.csv per iterację, pole JSON); handshake_ms z raw_measurements.
+# Nazwy bench.csv jak po pairs() w run_all.sh (avg_time / avg_request_time_s -> mean_time_s)
+SCALAR_FIELDS = {
+    "throughput_mb_s": ("throughput_mb_s", "throughput_mb_s"),
+    "avg_time_s": ("mean_time_s", "avg_time"),
+    "ttfb_s": ("ttfb_s", "ttfb_s"),
+    "acceptance_ratio": ("acceptance_ratio", "acceptance_ratio"),
+}
+
+DIM_KEYS = ["test", "port", "profile", "aes", "payload_mb", "concurrency"]
+PORT_BY_SUITE = {v: k for k, v in SUITE_BY_PORT.items()}
+
+CellKey = Tuple
+
+
+def _run_config(run_dir: Path) -> Dict:
+    """Profil / AES / payload / concurrency z config.txt runu run_all.sh"""
+    cfg = {"profile": None, "aes": None, "payload_mb": None, "concurrency": None}
+    txt = run_dir / "config.txt"
+    if not txt.exists():
+        return cfg
+    t = txt.read_text(errors="replace")
+    m = re.search(r"AES-NI:\s*(on|off)", t, re.I)
+    if m:
+        cfg["aes"] = m.group(1).lower()
+    delay = re.search(r"delay=(\d+)ms", t)
+    loss = re.search(r"loss=([\d.]+)", t)
+    d = int(delay.group(1)) if delay else 0
+    cfg["profile"] = (
+        "P0" if d == 0 else profile_code(f"delay_{d}ms_loss_{loss.group(1) if loss else 0}")
+    )
+    m = re.search(r"PAYLOAD_SIZE_MB:\s*([\d.]+)", t)
+    if m:
+        cfg["payload_mb"] = float(m.group(1))
+    m = re.search(r"CONCURRENCY:\s*(\d+)", t)
+    if m:
+        cfg["concurrency"] = int(m.group(1))
+    return cfg
+
+
+def _key(dims: Dict) -> CellKey:
+    return tuple(dims.get(k) for k in DIM_KEYS)
+
+
+def _json_samples(js: Dict) -> Dict[str, np.ndarray]:
+    out = {}
+    if isinstance(js.get("raw_measurements"), list):
+        out["handshake_ms"] = np.asarray(js["raw_measurements"], dtype=float) * 1000
+    if isinstance(js.get("request_times_s"), list):
+        out["request_time_s"] = np.asarray(js["request_times_s"], dtype=float)
+    # 0-RTT (zero_rtt_engine.py): czasy prób, które doszły do serwera
+    timed = [t for k in ("accepted_latency_s", "rejected_latency_s")
+             for t in (js.get(k) or [])]
+    if timed:
+        out["avg_time_s"] = np.asarray(timed, dtype=float)
+    cold = js.get("cold")
+    if isinstance(cold, dict) and isinstance(cold.get("ttfb_s"), list):
+        out["ttfb_s"] = np.asarray(cold["ttfb_s"], dtype=float)
+    for metric, (_, field) in SCALAR_FIELDS.items():
+        if metric not in out and field and isinstance(js.get(field), (int, float)):
+            out[metric] = np.array([js[field]], dtype=float)
+    return out
+
+
+def collect_cells(run_dir: Path) -> Dict[CellKey, Dict[str, np.ndarray]]:
+    """Próbki per komórka z plików JSON runu (+ iteracje z bench.csv dla run_all)"""
+    run_dir = Path(run_dir).resolve()
+    cfg = _run_config(run_dir)
+    cells: Dict[CellKey, Dict[str, np.ndarray]] = {}
+    by_test_port: Dict[Tuple, CellKey] = {}
+    for path in sorted(run_dir.rglob("*.json")):
+        dims = parse_dimensions(path, run_dir.parent)
+        if not dims or dims["port"] is None or dims["test"] == "bytes_on_wire":
+            continue
+        for k in ("profile", "aes"):
+            dims[k] = dims[k] or cfg[k] or ("P0" if k == "profile" else "on")
+        if dims["test"] != "bulk":
+            dims["payload_mb"] = dims["concurrency"] = None
+        try:
+            js = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        key = _key(dims)
+        cells.setdefault(key, {}).update(_json_samples(js))
+        by_test_port[(dims["test"], dims["port"])] = key
+
+    csv = run_dir / "bench.csv"
+    if csv.exists():
+        _attach_bench_iterations(read_bench_csv(csv, explode=True), cells, by_test_port, cfg)
+    return cells
+
+
+def _attach_bench_iterations(df, cells, by_test_port, cfg):
+    """Wartości per iteracja z bench.csv zastępują pojedyncze skalary z JSON"""
+    warmup_drop = int(os.environ.get("WARMUP_DROP", "3"))
+    field_to_metric = {f: m for m, (f, _) in SCALAR_FIELDS.items()}
+    # raw_measurements (rozwinięte per próbka, w sekundach) -> handshake_ms
+    field_to_metric["raw_measurements"] = "handshake_ms"
+    df = df[df["metric"].isin(field_to_metric)].dropna(subset=["value"]).copy()
+    raw = df["metric"] == "raw_measurements"
+    df.loc[raw, "value"] = df.loc[raw, "value"] * 1000
+    for (impl, suite, test, field), grp in df.groupby(
+        ["implementation", "suite", "test", "metric"]
+    ):
+        port = PORT_BY_SUITE.get((impl, suite))
+        if port is None:
+            continue
+        if warmup_drop > 0 and grp["run"].notna().any():
+            trimmed = grp[grp["run"] > grp["run"].min() + warmup_drop - 1]
+            grp = trimmed if len(trimmed) else grp
+        key = by_test_port.get((test, port))
+        if key is None:
+            dims = {"test": test, "port": port, "profile": cfg["profile"] or "P0",
+                    "aes": cfg["aes"] or "on"}
+            if test == "bulk":
+                dims.update(payload_mb=cfg["payload_mb"], concurrency=cfg["concurrency"])
+            key = _key(dims)
+        metric = field_to_metric[field]
+        cur = cells.setdefault(key, {}).get(metric)
+        # raw_measurements z bench.csv obejmują wszystkie iteracje (JSON — tylko ostatnią);
+        # pozostałe metryki zastępują tylko skalar z JSON
+        if field == "raw_measurements" or cur is None or len(cur) <= 1:
+            cells[key][metric] = grp["value"].to_numpy(dtype=float)
+
+
+def _key_dict(key: CellKey) -> Dict:
+    return dict(zip(DIM_KEYS, key))
+
+
+def _label(key: CellKey) -> str:
+    d = _key_dict(key)
+    extra = ""
+    if d["payload_mb"] is not None:
+        extra = f" p{d['payload_mb']:g} c{d['concurrency']}"
+    return f"{d['test']}/{d['port']} {d['profile']} aes_{d['aes']}{extra}"
+
+
+def pin_baseline(run_dir: Path, name: str) -> Path:
+    """Zapisuje próbki runu jako baseline (niezależny od późniejszego sprzątania results/)"""
+    cells = collect_cells(run_dir)
+    if not cells:
+        sys.exit(f"❌ Brak wyników w {run_dir}")
+    BASELINE_DIR.mkdir(parents=True, exist_ok=True)
+    out = BASELINE_DIR / f"{name}.json"
+    payload = {
+        "name": name,
+        "source_run": str(Path(run_dir).resolve()),
+        "pinned_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "fingerprint": load_fingerprint(run_dir),
+        "cells": [
+            {**_key_dict(k), "samples": {m: v.tolist() for m, v in metrics.items()}}
+            for k, metrics in sorted(cells.items(), key=lambda kv: str(kv[0]))
+        ],
+    }
+    out.write_text(json.dumps(payload))
+    print(f"📌 Baseline '{name}': {len(cells)} komórek z {run_dir} -> {out}")
+    return out
+
+
+def load_baseline(name_or_path: str) -> Tuple[Dict, Dict[CellKey, Dict[str, np.ndarray]]]:
+    path = Path(name_or_path)
+    if not path.exists():
+        path = BASELINE_DIR / f"{name_or_path}.json"
+    if not path.exists():
+        sys.exit(f"❌ Brak baseline'u: {name_or_path}")
+    data = json.loads(path.read_text())
+    cells = {
+        _key(c): {m: np.asarray(v, dtype=float) for m, v in c["samples"].items()}
+        for c in data["cells"]
+    }
+    return data, cells
+
+
+def judge(base: np.ndarray, new: np.ndarray, stat: str, better: str,
+          min_effect: float, n_boot: int, seed: int) -> Dict:
+    """Werdykt dla jednej metryki: zmiana % (dodatnia = gorzej), CI i klasyfikacja"""
+    res = compare_ci(base, new, stat=stat, kind="ratio", n_boot=n_boot, seed=seed)
+    sign = 1 if better == "lower" else -1
+    change = (res["estimate"] - 1) * 100
+    lo, hi = (res["ci_lo"] - 1) * 100, (res["ci_hi"] - 1) * 100
+    worse = sign * change
+    if min(len(base), len(new)) < MIN_SAMPLES or np.isnan(lo):
+        verdict = "unknown"
+    elif abs(change) >= min_effect and (lo > 0 or hi < 0):
+        verdict = "regressed" if worse > 0 else "improved"
+    else:
+        verdict = "unchanged"
+    return {
+        "baseline": float(_stat(base, stat)),
+        "new": float(_stat(new, stat)),
+        "change_percent": round(change, 3),
+        "ci_low_percent": None if np.isnan(lo) else round(lo, 3),
+        "ci_high_percent": None if np.isnan(hi) else round(hi, 3),
+        "n_baseline": res["n_a"],
+        "n_new": res["n_b"],
+        "verdict": verdict,
+    }
+
+
+def _stat(x: np.ndarray, stat: str) -> float:
+    if stat == "mean":
+        return np.mean(x)
+    return np.quantile(x, 0.5 if stat == "median" else float(stat[1:]) / 100,
+                       method="inverted_cdf")
+
+
+def compare_runs(base_cells, new_cells, min_effect: float,
+                 n_boot: int = DEFAULT_N_BOOT, seed: int = DEFAULT_SEED) -> List[Dict]:
+    rows = []
+    for key in sorted(set(base_cells) | set(new_cells), key=str):
+        test = key[0]
+        for t, metric, stat, better in CHECKS:
+            if t != test:
+                continue
+            b = base_cells.get(key, {}).get(metric)
+            n = new_cells.get(key, {}).get(metric)
+            row = {**_key_dict(key), "metric": metric, "stat": stat, "better": better}
+            if b is None and n is None:
+                continue
+            if b is None or n is None:
+                row["verdict"] = "new" if b is None else "missing"
+            else:
+                row.update(judge(b, n, stat, better, min_effect, n_boot, seed))
+            rows.append(row)
+    return rows
+
+
+def print_table(rows: List[Dict]):
+    icons = {"regressed": "❌", "improved": "✅", "unchanged": "➖",
+             "unknown": "❔", "new": "🆕", "missing": "⏭️ "}
+    for r in rows:
+        key = _label(_key(r))
+        name = f"{r['metric']} {r['stat']}"
+        if "change_percent" in r:
+            ci = ""
+            if r["ci_low_percent"] is not None:
+                ci = f" [{r['ci_low_percent']:+.1f}, {r['ci_high_percent']:+.1f}]"
+            print(f"{icons[r['verdict']]} {key:<34} {name:<22} "
+                  f"{r['baseline']:10.4g} -> {r['new']:10.4g} "
+                  f"({r['change_percent']:+.1f}%{ci}) {r['verdict']}")
+        else:
+            print(f"{icons[r['verdict']]} {key:<34} {name:<22} {r['verdict']}")
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Regresje wydajności względem baseline'u")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    pin = sub.add_parser("pin", help="przypnij run jako baseline")
+    pin.add_argument("run", help="katalog run_* / run_matrix_*")
+    pin.add_argument("--name", help="nazwa baseline'u (domyślnie nazwa katalogu)")
+
+    cmp_ = sub.add_parser("compare", help="porównaj run z baseline'em")
+    cmp_.add_argument("run", help="katalog nowego runu (np. results/latest)")
+    cmp_.add_argument("-b", "--baseline", required=True, help="nazwa lub ścieżka baseline'u")
+    cmp_.add_argument(
+        "--min-effect",
+        type=float,
+        default=DEFAULT_MIN_EFFECT,
+        help="minimalna istotna praktycznie zmiana w %% (domyślnie 5)",
+    )
+    cmp_.add_argument("-o", "--out", help="plik werdyktu JSON (domyślnie <run>/regression.json)")
+    cmp_.add_argument("--n-boot", type=int, default=DEFAULT_N_BOOT)
+    cmp_.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    cmp_.add_argument(
+        "--force", action="store_true", help="porównaj mimo różnych odcisków środowiska"
+    )
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.cmd == "pin":
+        run = Path(args.run)
+        pin_baseline(run, args.name or run.resolve().name)
+        return
+
+    meta, base_cells = load_baseline(args.baseline)
+    run = Path(args.run)
+    comparable = check_comparable(
+        meta.get("fingerprint"), load_fingerprint(run), force=args.force,
+        labels=("baseline", "run"),
+    )
+    new_cells = collect_cells(run)
+    if not new_cells:
+        sys.exit(f"❌ Brak wyników w {run}")
+    rows = compare_runs(base_cells, new_cells, args.min_effect, args.n_boot, args.seed)
+    counts = defaultdict(int)
+    for r in rows:
+        counts[r["verdict"]] += 1
+    regressed = counts.get("regressed", 0)
+    verdict = {
+        "baseline": meta["name"],
+        "baseline_run": meta.get("source_run"),
+        "run": str(run.resolve()),
+        "min_effect_percent": args.min_effect,
+        "environment_match": comparable,
+        "verdict": "regressed" if regressed else "ok",
+        "summary": dict(counts),
+        "cells": rows,
+    }
+    out = Path(args.out) if args.out else run / "regression.json"
+    out.write_text(json.dumps(verdict, indent=2))
+    print_table(rows)
+    print(f"\n📊 {dict(counts)} -> {out}")
+    if regressed:
+        print(f"❌ Regresja względem baseline'u '{meta['name']}'")
+        sys.exit(1)
+    print(f"✅ Brak regresji względem baseline'u '{meta['name']}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Katalog wyników (SQLite) — indeksuje pliki w results/ po wymiarach
+(test, port, profil NetEm, AES, samples, payload, concurrency, ...)
+parsowanych z nazw katalogów, nazw plików i (awaryjnie) treści JSON.
+
+Użycie:
+    python results_catalog.py scan
+    python results_catalog.py latest --test handshake --port 4431 --aes on
+    python results_catalog.py query --test bulk --payload 10 --concurrency 32
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DB_NAME = ".catalog.sqlite"
+
+# Prefiks nazwy pliku -> nazwa testu
+FILE_PREFIX_TEST = {
+    "handshake": "handshake",
+    "bulk": "bulk",
+    "simple": "0rtt",
+    "fullpost": "full_post",
+    "ttfb": "ttfb",
+    "bytes": "bytes_on_wire",
+    "ladder": "ladder",
+    "certmatrix": "cert_matrix",
+    "capacity": "capacity",
+    "ttfbh2": "ttfb_h2",
+    "h2": "h2",
+}
+
+# Katalog najwyższego poziomu -> nazwa testu (gdy nazwa pliku nie wystarcza)
+DIR_TEST = {
+    "handshake": "handshake",
+    "bulk": "bulk",
+    "0rtt": "0rtt",
+    "full_post": "full_post",
+    "ttfb": "ttfb",
+    "bytes_on_wire": "bytes_on_wire",
+    "ladder": "ladder",
+    "cert_matrix": "cert_matrix",
+    "capacity": "capacity",
+    "ttfb_h2": "ttfb_h2",
+    "h2": "h2",
+}
+
+INDEXED_SUFFIXES = {".json", ".csv"}
+
+# Tokeny wymiarów w nazwach plików/katalogów: r64, p0.1, c8, s33, ed1, n10, mb8, kb16
+TOKEN_PATTERNS = [
+    ("samples", re.compile(r"^s(\d+)$"), int),
+    ("requests", re.compile(r"^r(\d+)$"), int),
+    ("payload_mb", re.compile(r"^p(\d+(?:\.\d+)?)$"), float),
+    ("concurrency", re.compile(r"^c(\d+)$"), int),
+    ("payload_mb", re.compile(r"^ed(\d+(?:\.\d+)?)$"), float),
+    ("payload_mb", re.compile(r"^mb(\d+(?:\.\d+)?)$"), float),
+    ("payload_kb", re.compile(r"^kb(\d+(?:\.\d+)?)$"), float),
+    ("count", re.compile(r"^n(\d+)$"), int),
+]
+
+PROFILE_RE = re.compile(r"^(baseline|custom|delay_(\d+)ms(?:_loss_(\d+(?:\.\d+)?))?)")
+AES_RE = re.compile(r"(?:^|[_/])aes_?(on|off)(?=[_/]|$)")
+RUN_RE = re.compile(r"^run_(?:matrix_)?\d{8}_\d{6}")
+
+COLUMNS = [
+    "path",
+    "test",
+    "port",
+    "profile",
+    "aes",
+    "samples",
+    "requests",
+    "payload_mb",
+    "concurrency",
+    "count",
+    "run",
+    "size",
+    "mtime_ns",
+    "checksum",
+    "indexed_at",
+]
+
+
+def profile_code(label: str) -> Optional[str]:
+    """Mapuje etykietę katalogu (baseline/delay_50ms_loss_0.5/P2) na kod P0–P3"""
+    if re.fullmatch(r"[Pp][0-3]", label):
+        return label.upper()
+    m = PROFILE_RE.match(label)
+    if not m:
+        return None
+    if m.group(1) == "baseline":
+        return "P0"
+    if m.group(1) == "custom":
+        return "custom"
+    delay = int(m.group(2))
+    loss = float(m.group(3) or 0)
+    known = {(50, 0.0): "P1", (50, 0.5): "P2", (100, 0.0): "P3"}
+    return known.get((delay, loss), f"delay_{delay}ms_loss_{loss:g}")
+
+
+def parse_dimensions(path: Path, root: Path) -> Optional[Dict]:
+    """Parsuje wymiary wyniku ze ścieżki; None gdy plik nie jest wynikiem testu"""
+    rel = path.relative_to(root)
+    parts = rel.parts
+    stem_tokens = path.stem.split("_")
+
+    dims: Dict = {k: None for k in COLUMNS}
+    dims["test"] = FILE_PREFIX_TEST.get(stem_tokens[0])
+    if dims["test"] is None:
+        for part in parts[:-1]:
+            if part in DIR_TEST:
+                dims["test"] = DIR_TEST[part]
+                break
+    if dims["test"] is None:
+        return None
+
+    if parts and RUN_RE.match(parts[0]):
+        dims["run"] = parts[0]
+
+    # Katalogi (od zewnętrznego), potem nazwa pliku — późniejsze wygrywają
+    for part in list(parts[:-1]) + [path.stem]:
+        code = profile_code(part)
+        if code is not None:
+            dims["profile"] = code
+        for tok in part.split("_"):
+            for key, rx, conv in TOKEN_PATTERNS:
+                m = rx.match(tok)
+                if m:
+                    dims[key] = conv(m.group(1))
+                    break
+
+    m = None
+    for m in AES_RE.finditer(rel.as_posix()):
+        pass
+    if m:
+        dims["aes"] = m.group(1)
+    if stem_tokens[-1] in ("on", "off"):
+        dims["aes"] = stem_tokens[-1]
+    if any(p.endswith("_aesoff") for p in parts[:-1]):
+        dims["aes"] = "off"
+
+    if len(stem_tokens) > 1 and re.fullmatch(r"\d{4,5}", stem_tokens[1]):
+        dims["port"] = int(stem_tokens[1])
+
+    kb = dims.pop("payload_kb", None)
+    if kb is not None and dims["payload_mb"] is None:
+        dims["payload_mb"] = kb / 1024
+
+    if path.suffix == ".json":
+        _fill_from_json(path, dims)
+    return dims
+
+
+def _fill_from_json(path: Path, dims: Dict):
+    """Uzupełnia brakujące wymiary z treści JSON (kopie w run_* gubią nazwy)"""
+    try:
+        with open(path, "r") as f:
+            js = json.load(f)
+    except Exception:
+        return
+    if not isinstance(js, dict):
+        return
+    for key, field, conv in [
+        ("port", "port", int),
+        ("samples", "samples", int),
+        ("requests", "total_requests", int),
+        ("payload_mb", "payload_size_mb", float),
+        ("concurrency", "concurrency", int),
+    ]:
+        if dims[key] is None and js.get(field) is not None:
+            try:
+                dims[key] = conv(js[field])
+            except (TypeError, ValueError):
+                pass
+
+
+def file_checksum(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ResultsCatalog:
+    """Indeks plików wynikowych w SQLite z przyrostowym skanowaniem po mtime"""
+
+    def __init__(self, root="results", db_path=None):
+        self.root = Path(root)
+        self.db_path = Path(db_path) if db_path else self.root / DB_NAME
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.row_factory = sqlite3.Row
+        self._init_schema()
+
+    def _init_schema(self):
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                path TEXT PRIMARY KEY,
+                test TEXT NOT NULL,
+                port INTEGER,
+                profile TEXT,
+                aes TEXT,
+                samples INTEGER,
+                requests INTEGER,
+                payload_mb REAL,
+                concurrency INTEGER,
+                count INTEGER,
+                run TEXT,
+                size INTEGER,
+                mtime_ns INTEGER,
+                checksum TEXT,
+                indexed_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_dims
+                ON results (test, port, aes, profile, mtime_ns);
+            CREATE INDEX IF NOT EXISTS idx_cell
+                ON results (test, payload_mb, concurrency);
+            """
+        )
+        self.conn.commit()
+
+    def scan(self) -> Dict[str, int]:
+        """Przyrostowo aktualizuje indeks; przelicza tylko pliki ze zmienionym mtime/size"""
+        known = {
+            row["path"]: (row["size"], row["mtime_ns"])
+            for row in self.conn.execute("SELECT path, size, mtime_ns FROM results")
+        }
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        seen = set()
+        now = time.time()
+        if self.root.exists():
+            for dirpath, dirnames, filenames in os.walk(self.root):
+                # results/latest to symlink do run_* — nie indeksujemy dwa razy
+                dirnames[:] = [
+                    d for d in dirnames if not os.path.islink(os.path.join(dirpath, d))
+                ]
+                for name in filenames:
+                    p = Path(dirpath) / name
+                    if p.suffix not in INDEXED_SUFFIXES or name.startswith("."):
+                        continue
+                    key = p.as_posix()
+                    try:
+                        st = p.stat()
+                    except OSError:
+                        continue
+                    seen.add(key)
+                    if known.get(key) == (st.st_size, st.st_mtime_ns):
+                        stats["unchanged"] += 1
+                        continue
+                    dims = parse_dimensions(p, self.root)
+                    if dims is None:
+                        continue
+                    dims.update(
+                        path=key,
+                        size=st.st_size,
+                        mtime_ns=st.st_mtime_ns,
+                        checksum=file_checksum(p),
+                        indexed_at=now,
+                    )
+                    self.conn.execute(
+                        f"INSERT OR REPLACE INTO results ({', '.join(COLUMNS)}) "
+                        f"VALUES ({', '.join('?' for _ in COLUMNS)})",
+                        [dims[c] for c in COLUMNS],
+                    )
+                    stats["updated" if key in known else "added"] += 1
+        gone = [p for p in known if p not in seen]
+        self.conn.executemany(
+            "DELETE FROM results WHERE path = ?", [(p,) for p in gone]
+        )
+        stats["removed"] = len(gone)
+        self.conn.commit()
+        return stats
+
+    def query(self, include_runs: bool = True, limit=None, **dims) -> List[sqlite3.Row]:
+        """Zwraca wiersze pasujące do wymiarów (None = dowolna wartość), od najnowszych"""
+        where, args = [], []
+        for key, value in dims.items():
+            if value is None:
+                continue
+            if key not in COLUMNS:
+                raise ValueError(f"Nieznany wymiar: {key}")
+            if key == "payload_mb":
+                where.append("ABS(payload_mb - ?) < 1e-9")
+            else:
+                where.append(f"{key} = ?")
+            args.append(value)
+        if not include_runs:
+            # Kopie w run_* i series/ (wsteczna zgodność, bez .raw i etykiety profilu)
+            where.append("run IS NULL AND path NOT LIKE ?")
+            args.append(f"{(self.root / 'series').as_posix()}/%")
+        sql = "SELECT * FROM results"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY mtime_ns DESC, path"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return self.conn.execute(sql, args).fetchall()
+
+    def latest(self, include_runs: bool = False, **dims) -> Optional[Path]:
+        """Najnowszy plik dla danych wymiarów"""
+        rows = self.query(include_runs=include_runs, limit=1, **dims)
+        return Path(rows[0]["path"]) if rows else None
+
+    def close(self):
+        self.conn.close()
+
+
+_CATALOGS: Dict[str, ResultsCatalog] = {}
+
+
+def _reopen_after_fork():
+    # Połączenia SQLite nie wolno używać w procesie potomnym (np. pula wykresów)
+    for cat in _CATALOGS.values():
+        cat.conn = sqlite3.connect(str(cat.db_path))
+        cat.conn.row_factory = sqlite3.Row
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reopen_after_fork)
+
+
+def get_catalog(root="results") -> ResultsCatalog:
+    """Katalog dla danego roota, zeskanowany raz na proces"""
+    key = str(Path(root).resolve())
+    if key not in _CATALOGS:
+        cat = ResultsCatalog(root)
+        cat.scan()
+        _CATALOGS[key] = cat
+    return _CATALOGS[key]
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Katalog wyników TLS (SQLite)")
+    p.add_argument("command", choices=["scan", "latest", "query"])
+    p.add_argument("--root", default="results", help="katalog wyników")
+    p.add_argument("--test")
+    p.add_argument("--port", type=int)
+    p.add_argument("--profile", help="P0–P3 lub etykieta (baseline, delay_50ms...)")
+    p.add_argument("--aes", choices=["on", "off"])
+    p.add_argument("--samples", type=int)
+    p.add_argument("--requests", type=int)
+    p.add_argument("--payload", type=float, help="payload / early data w MB")
+    p.add_argument("--kb", type=float, help="payload w KB (TTFB)")
+    p.add_argument("--concurrency", type=int)
+    p.add_argument("--count", type=int)
+    p.add_argument("--run", help="nazwa katalogu run_*")
+    p.add_argument(
+        "--include-runs",
+        action="store_true",
+        help="uwzględnij kopie w run_* i series/ (latest domyślnie je pomija)",
+    )
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    cat = ResultsCatalog(args.root)
+    stats = cat.scan()
+    if args.command == "scan":
+        print(
+            f"✓ Katalog: +{stats['added']} ~{stats['updated']} "
+            f"-{stats['removed']} ={stats['unchanged']} ({cat.db_path})"
+        )
+        return
+
+    payload = args.payload
+    if args.kb is not None:
+        payload = args.kb / 1024
+    dims = dict(
+        test=args.test,
+        port=args.port,
+        profile=profile_code(args.profile) if args.profile else None,
+        aes=args.aes,
+        samples=args.samples,
+        requests=args.requests,
+        payload_mb=payload,
+        concurrency=args.concurrency,
+        count=args.count,
+        run=args.run,
+    )
+    if args.command == "latest":
+        path = cat.latest(include_runs=args.include_runs or bool(args.run), **dims)
+        if path is None:
+            sys.exit(1)
+        print(path)
+    else:
+        for row in cat.query(include_runs=True, **dims):
+            print("\t".join("" if row[c] is None else str(row[c]) for c in COLUMNS[:11]))
+
+
+if __name__ == "__main__":
+    main()
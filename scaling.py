@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Skalowanie bulk względem concurrency (drabina c=1…256 z run_ladder.sh).
+
+Dla każdego portu: krzywa throughput vs p99 (punkty = kolejne c) i automatyczne
+wykrycie kolana (Kneedle na throughput(c)). Wynik per port trafia do
+results/ladder/<profil>_aes_<on|off>_p<P>/ladder_<port>.json — run_all.sh
+(TESTS=ladder) przepisuje knee_* do bench.csv.
+
+Model: Universal Scalability Law (Gunther)
+    X(N) = λN / (1 + σ(N−1) + κN(N−1))
+σ — rywalizacja (contention), κ — koherencja (crosstalk). CI parametrów z
+bootstrapu reszt względnych; szczyt N* = sqrt((1−σ)/κ), X* = X(N*).
+
+Użycie:
+    python scaling.py knee --ports 4431 4434 --payload 1 --aes on
+    python scaling.py usl --ports 4431 4434 --payload 10
+"""
+
+import argparse
+import json
+import os
+import warnings
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import matplotlib
+from scipy.optimize import curve_fit
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from bootstrap_ci import DEFAULT_SEED, format_ci
+from raw_samples import RawSamples, raw_for_json
+from results_catalog import get_catalog, profile_code
+
+DEFAULT_PORTS = [4431, 4432, 8443, 4434, 4435, 11112]
+MIN_POINTS = 3
+USL_MIN_POINTS = 4  # 3 parametry + co najmniej 1 stopień swobody
+USL_N_BOOT = int(os.environ.get("USL_N_BOOT", "1000"))
+USL_PARAMS = ("lambda", "sigma", "kappa", "peak_concurrency", "peak_throughput_mb_s")
+PROFILE_LABEL = {
+    "P0": "baseline",
+    "P1": "delay_50ms",
+    "P2": "delay_50ms_loss_0.5",
+    "P3": "delay_100ms",
+}
+
+
+def _latencies(path: Path, js: Dict) -> Optional[np.ndarray]:
+    """Czasy żądań komórki: .raw obok JSON, w ostateczności request_times_s"""
+    raw = raw_for_json(path)
+    if raw is not None:
+        try:
+            lat = RawSamples(raw).latency_s()
+            if len(lat):
+                return lat
+        except (OSError, ValueError):
+            pass
+    if isinstance(js.get("request_times_s"), list) and js["request_times_s"]:
+        return np.asarray(js["request_times_s"], dtype=float)
+    return None
+
+
+def ladder_points(results: Path, port: int, payload_mb: float, aes: str = "on",
+                  profile: str = "P0") -> List[Dict]:
+    """Najnowszy wynik bulk dla każdego c (rosnąco): throughput, p50/p99"""
+    catalog = get_catalog(results)
+    best: Dict[int, Path] = {}
+    for row in catalog.query(
+        include_runs=False, test="bulk", port=port, aes=aes, profile=profile,
+        payload_mb=payload_mb,
+    ):
+        c = row["concurrency"]
+        if c is not None and c not in best:  # wiersze od najnowszych
+            best[c] = Path(row["path"])
+    points = []
+    for c in sorted(best):
+        try:
+            js = json.loads(best[c].read_text())
+        except (OSError, ValueError):
+            continue
+        thr = js.get("throughput_mb_s")
+        if not isinstance(thr, (int, float)):
+            continue
+        lat = _latencies(best[c], js)
+        points.append(
+            {
+                "concurrency": int(c),
+                "throughput_mb_s": float(thr),
+                "p50_s": float(np.percentile(lat, 50)) if lat is not None else None,
+                "p99_s": float(np.percentile(lat, 99)) if lat is not None else None,
+                "n": int(len(lat)) if lat is not None else 0,
+                "source": str(best[c]),
+            }
+        )
+    return points
+
+
+def kneedle(x: np.ndarray, y: np.ndarray) -> Optional[int]:
+    """Indeks kolana krzywej wklęsłej rosnącej (Satopää i in., 2011)"""
+    if len(x) < MIN_POINTS or np.ptp(x) == 0 or np.ptp(y) == 0:
+        return None
+    xn = (x - x.min()) / np.ptp(x)
+    yn = (y - y.min()) / np.ptp(y)
+    diff = yn - xn
+    i = int(np.argmax(diff))
+    # Brak wybrzuszenia ponad przekątną => krzywa liniowa/wypukła, kolana nie ma
+    return i if diff[i] > 0 else None
+
+
+def detect_knee(points: List[Dict]) -> Dict:
+    """Kolano throughput(c) (oś liniowa c); obcina spadek za maksimum"""
+    if len(points) < MIN_POINTS:
+        return {}
+    c = np.array([p["concurrency"] for p in points], dtype=float)
+    thr = np.array([p["throughput_mb_s"] for p in points], dtype=float)
+    peak = int(np.argmax(thr))
+    i = kneedle(c[: peak + 1], thr[: peak + 1])
+    if i is None:
+        # Throughput rośnie liniowo do końca drabiny — kolano poza zakresem
+        i = peak
+    knee = points[i]
+    return {
+        "knee_concurrency": knee["concurrency"],
+        "knee_throughput_mb_s": knee["throughput_mb_s"],
+        "knee_p99_s": knee["p99_s"],
+        "peak_concurrency": points[peak]["concurrency"],
+        "peak_throughput_mb_s": points[peak]["throughput_mb_s"],
+        "knee_in_range": bool(i < len(points) - 1),
+    }
+
+
+def usl(n, lam, sigma, kappa):
+    """Przepustowość wg USL dla concurrency n"""
+    n = np.asarray(n, dtype=float)
+    return lam * n / (1 + sigma * (n - 1) + kappa * n * (n - 1))
+
+
+def usl_peak(lam: float, sigma: float, kappa: float):
+    """(N*, X(N*)); bez koherencji (κ=0) szczytu nie ma — throughput dąży do λ/σ"""
+    if kappa <= 0:
+        return float("inf"), (lam / sigma if sigma > 0 else float("inf"))
+    n = float(np.sqrt(max(1 - sigma, 0) / kappa))
+    n = max(n, 1.0)
+    return n, float(usl(n, lam, sigma, kappa))
+
+
+def _fit(c: np.ndarray, x: np.ndarray, p0) -> Optional[np.ndarray]:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            popt, _ = curve_fit(
+                usl, c, x, p0=p0, bounds=([0, 0, 0], [np.inf, 1, np.inf]),
+                sigma=x, maxfev=5000,  # błąd względny: wszystkie c ważą tyle samo
+            )
+        except (RuntimeError, ValueError):
+            return None
+    return popt
+
+
+def fit_usl(concurrency, throughput, n_boot: int = USL_N_BOOT,
+            seed: int = DEFAULT_SEED, alpha: float = 0.05) -> Dict:
+    """Dopasowanie USL z CI (percentyle bootstrapu reszt względnych)"""
+    c = np.asarray(concurrency, dtype=float)
+    x = np.asarray(throughput, dtype=float)
+    ok = (c > 0) & (x > 0)
+    c, x = c[ok], x[ok]
+    if len(np.unique(c)) < USL_MIN_POINTS:
+        return {}
+    # λ ~ przepustowość pojedynczego klienta
+    lam0 = float(x[c == c.min()].mean() / c.min())
+    popt = _fit(c, x, [lam0, 0.05, 1e-4])
+    if popt is None:
+        return {}
+    fitted = usl(c, *popt)
+    rel = x / fitted - 1
+    est = dict(zip(USL_PARAMS[:3], map(float, popt)))
+    est["peak_concurrency"], est["peak_throughput_mb_s"] = usl_peak(*popt)
+
+    rng = np.random.default_rng(seed)
+    boot = []
+    for _ in range(n_boot):
+        xb = fitted * (1 + rng.choice(rel, size=len(rel)))
+        pb = _fit(c, np.maximum(xb, 1e-12), popt)
+        if pb is not None:
+            boot.append([*pb, *usl_peak(*pb)])
+    out = {"usl_n_points": int(len(c)),
+           "usl_r2": float(1 - np.sum((x - fitted) ** 2) / np.sum((x - x.mean()) ** 2))}
+    boot = np.array(boot) if boot else np.empty((0, len(USL_PARAMS)))
+    for i, name in enumerate(USL_PARAMS):
+        out[f"usl_{name}"] = est[name]
+        col = boot[:, i] if len(boot) else np.array([])
+        col = col[np.isfinite(col)]
+        # CI tylko gdy większość replik ma skończony wynik (κ≈0 => szczyt w ∞)
+        if len(col) >= 0.9 * max(len(boot), 1) and len(col):
+            lo, hi = np.percentile(col, [100 * alpha / 2, 100 * (1 - alpha / 2)])
+        else:
+            lo = hi = float("nan")
+        out[f"usl_{name}_lo"], out[f"usl_{name}_hi"] = float(lo), float(hi)
+    return out
+
+
+def _json_safe(d: Dict) -> Dict:
+    """inf/nan -> None (JSON bez rozszerzeń, jq w run_all.sh)"""
+    return {k: (None if isinstance(v, float) and not np.isfinite(v) else v)
+            for k, v in d.items()}
+
+
+def fig_throughput_latency(curves: Dict[int, Dict], out: Path, title: str):
+    """Throughput (x) vs p99 (y), punkty podpisane c, kolano zaznaczone"""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for port, cur in sorted(curves.items()):
+        pts = [p for p in cur["points"] if p["p99_s"] is not None]
+        if not pts:
+            continue
+        x = [p["throughput_mb_s"] for p in pts]
+        y = [p["p99_s"] * 1000 for p in pts]
+        (line,) = ax.plot(x, y, marker="o", label=str(port))
+        for p, xi, yi in zip(pts, x, y):
+            ax.annotate(f"c{p['concurrency']}", (xi, yi), fontsize=7,
+                        xytext=(3, 3), textcoords="offset points")
+        knee = cur.get("knee", {})
+        if knee.get("knee_p99_s") is not None:
+            ax.scatter([knee["knee_throughput_mb_s"]], [knee["knee_p99_s"] * 1000],
+                       s=160, facecolors="none", edgecolors=line.get_color(), linewidths=2)
+    ax.set_xlabel("Throughput [MB/s]")
+    ax.set_ylabel("p99 latency [ms]")
+    ax.set_yscale("log")
+    ax.set_title(title + " (○ = kolano)")
+    if ax.get_legend_handles_labels()[0]:
+        ax.legend(title="Port")
+    ax.grid(True, alpha=0.3)
+    plt.tight_layout()
+    out.parent.mkdir(parents=True, exist_ok=True)
+    plt.savefig(out, dpi=300)
+    plt.close(fig)
+
+
+def cell_dir(results: Path, profile: str, aes: str, payload_mb: float) -> Path:
+    label = PROFILE_LABEL.get(profile, profile)
+    return Path(results) / "ladder" / f"{label}_aes_{aes}_p{payload_mb:g}"
+
+
+def run_knee(args) -> int:
+    results = Path(args.results)
+    # run_ladder.sh podaje etykietę (baseline, delay_50ms, ...) — ujednolicenie do P0–P3
+    args.profile = profile_code(args.profile) or args.profile
+    out_dir = cell_dir(results, args.profile, args.aes, args.payload)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    curves = {}
+    for port in args.ports:
+        points = ladder_points(results, port, args.payload, args.aes, args.profile)
+        if len(points) < MIN_POINTS:
+            print(f"⏭️  {port}: za mało punktów drabiny ({len(points)} < {MIN_POINTS})")
+            continue
+        knee = detect_knee(points)
+        fit = fit_usl([p["concurrency"] for p in points],
+                      [p["throughput_mb_s"] for p in points])
+        curves[port] = {"points": points, "knee": knee}
+        doc = {
+            "port": port,
+            "payload_size_mb": args.payload,
+            "aes": args.aes,
+            "profile": args.profile,
+            **knee,
+            **_json_safe(fit),
+            "points": points,
+        }
+        (out_dir / f"ladder_{port}.json").write_text(json.dumps(doc, indent=1))
+        mark = "" if knee["knee_in_range"] else " (brak kolana w zakresie drabiny)"
+        print(
+            f"📈 {port}: kolano c={knee['knee_concurrency']} "
+            f"({knee['knee_throughput_mb_s']:.1f} MB/s), "
+            f"maks. c={knee['peak_concurrency']} ({knee['peak_throughput_mb_s']:.1f} MB/s){mark}"
+        )
+    if not curves:
+        print("❌ Brak danych drabiny concurrency")
+        return 1
+    fig = Path(args.figures) / f"ladder_throughput_p99_{out_dir.name}.png"
+    fig_throughput_latency(
+        curves, fig, f"Throughput vs p99 — {args.profile}, AES {args.aes}, {args.payload:g} MB"
+    )
+    print(f"✅ {out_dir} , wykres: {fig}")
+    return 0
+
+
+def run_usl(args) -> int:
+    """Dopasowanie USL per port dla istniejących wyników bulk (dowolne c)"""
+    results = Path(args.results)
+    args.profile = profile_code(args.profile) or args.profile
+    rows = []
+    print("Port  | σ [95% CI]                | κ [95% CI]                    | N*    | X* [MB/s]   | R²")
+    for port in args.ports:
+        points = ladder_points(results, port, args.payload, args.aes, args.profile)
+        fit = fit_usl([p["concurrency"] for p in points],
+                      [p["throughput_mb_s"] for p in points], n_boot=args.n_boot)
+        if not fit:
+            print(f"⏭️  {port}: za mało punktów do USL ({len(points)} < {USL_MIN_POINTS})")
+            continue
+        rows.append({"port": port, **fit})
+        sig = format_ci(fit["usl_sigma"], fit["usl_sigma_lo"], fit["usl_sigma_hi"], 4)
+        kap = format_ci(fit["usl_kappa"], fit["usl_kappa_lo"], fit["usl_kappa_hi"], 6)
+        print(f"{port:<5} | {sig:<25} | {kap:<29} | {fit['usl_peak_concurrency']:<5.0f} | "
+              f"{fit['usl_peak_throughput_mb_s']:<11.1f} | {fit['usl_r2']:.3f}")
+    if not rows:
+        print("❌ Brak danych do dopasowania USL")
+        return 1
+    out_dir = cell_dir(results, args.profile, args.aes, args.payload)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out = out_dir / "usl_fit.json"
+    out.write_text(json.dumps([_json_safe(r) for r in rows], indent=1))
+    print(f"✅ {out}")
+    return 0
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Skalowanie bulk względem concurrency")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    k = sub.add_parser("knee", help="krzywa throughput–p99 i kolano nasycenia per port")
+    k.add_argument("--results", default="results", help="katalog wyników")
+    k.add_argument("--figures", default="figures", help="katalog wykresów")
+    k.add_argument("--ports", type=int, nargs="+", default=DEFAULT_PORTS)
+    k.add_argument("--payload", type=float, default=1.0, help="payload [MB]")
+    k.add_argument("--aes", choices=["on", "off"], default="on")
+    k.add_argument("--profile", default="P0", help="profil NetEm (P0–P3 lub etykieta)")
+    u = sub.add_parser("usl", help="dopasowanie Universal Scalability Law per port")
+    u.add_argument("--results", default="results", help="katalog wyników")
+    u.add_argument("--ports", type=int, nargs="+", default=DEFAULT_PORTS)
+    u.add_argument("--payload", type=float, default=1.0, help="payload [MB]")
+    u.add_argument("--aes", choices=["on", "off"], default="on")
+    u.add_argument("--profile", default="P0", help="profil NetEm (P0–P3 lub etykieta)")
+    u.add_argument("--n-boot", type=int, default=USL_N_BOOT, help="liczba replik bootstrapu")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.cmd == "knee":
+        raise SystemExit(run_knee(args))
+    if args.cmd == "usl":
+        raise SystemExit(run_usl(args))
+
+
+if __name__ == "__main__":
+    main()
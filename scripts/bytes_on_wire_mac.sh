@@ -13,28 +13,7 @@ HITS=${HITS:-6}                  # ile żądań curl na port (żeby handshake na
 DRIVE=${DRIVE:-1}                # 1=generuj ruch curl; 0=nie generuj (pasywnie)
 OUTDIR=${OUTDIR:-results}
 
-# Determine NetEm profile from current network conditions
-get_netem_profile() {
-  # Check if NetEm is active and determine profile
-  if command -v dnctl >/dev/null 2>&1; then
-    local pipe_info=$(dnctl list 2>/dev/null | grep "pipe 1" || echo "")
-    if [[ -n "$pipe_info" ]]; then
-      if echo "$pipe_info" | grep -q "delay 50ms.*plr 0.005"; then
-        echo "delay_50ms_loss_0.5"  # P2
-      elif echo "$pipe_info" | grep -q "delay 50ms.*plr 0"; then
-        echo "delay_50ms"           # P1
-      elif echo "$pipe_info" | grep -q "delay 100ms.*plr 0"; then
-        echo "delay_100ms"          # P3
-      else
-        echo "custom"
-      fi
-    else
-      echo "baseline"               # P0 (no NetEm)
-    fi
-  else
-    echo "baseline"
-  fi
-}
+source "$(dirname "${BASH_SOURCE[0]}")/common.sh"
 
 # Create organized folder structure
 NETEM_PROFILE=$(get_netem_profile)
@@ -0,0 +1,87 @@
+#!/usr/bin/env bash
+# Kalibracja narzutu harnessu dla portu (uruchamiana przed każdą komórką przez runnery).
+# Mierzy tę samą ścieżkę pomiaru co runner, ale z pustym poleceniem:
+#   null_shell_s   time -p sh -c "true"                 (fork/exec powłoki)
+#   null_client_s  time -p sh -c "<klient> ... -help"   (start klienta + ładowanie providerów,
+#                                                       bez połączenia)
+#   exec_wall_s    zegar hosta wokół `docker exec … true` (dla runnerów mierzących cały exec)
+#   timer_resolution_s  rozdzielczość wyjścia time -p (liczba miejsc po przecinku)
+# harness_overhead_s = mediana null_client_s — odejmowana w analizie (--subtract-overhead).
+# Użycie: calibrate_harness.sh <port>  → JSON na stdout (null gdy kalibracja się nie udała)
+set -euo pipefail
+
+PORT=${1:?port}
+N=${CALIB_SAMPLES:-10}
+
+# Kontener i polecenie klienta jak w measure() runnerów; -provider przed -help,
+# żeby opcje providerów zostały przetworzone (i załadowane) przed wyjściem
+case $PORT in
+  8443)
+    CONTAINER=tls-perf-nginx
+    NULL_CMD="/usr/local/bin/openssl s_client -provider default -provider oqsprovider -groups X25519MLKEM768 -help" ;;
+  4431|4432|4434|4435)
+    CONTAINER=tls-perf-nginx
+    NULL_CMD="/usr/local/bin/openssl s_client -provider default -help" ;;
+  11112)
+    CONTAINER=wolfssl-cli
+    NULL_CMD="/usr/local/bin/wolf-client -\\?" ;;
+  *)
+    echo null; exit 0 ;;
+esac
+
+now_ns() {
+  local t
+  t=$(date +%s%N)
+  if [[ "$t" =~ ^[0-9]+$ ]]; then echo "$t"; else python3 -c 'import time; print(time.time_ns())'; fi
+}
+
+timed() {
+  docker exec -e OPENSSL_ia32cap="${OPENSSL_ia32cap:-~0}" "$CONTAINER" sh -lc \
+    "time -p sh -c '$1 >/dev/null 2>&1' 2>&1 | grep real | awk '{print \$2}'" 2>/dev/null || true
+}
+
+shell=() client=() wall=()
+for _ in $(seq "$N"); do
+  t=$(timed true); [[ -n "$t" ]] && shell+=("$t")
+  t=$(timed "$NULL_CMD"); [[ -n "$t" ]] && client+=("$t")
+  t0=$(now_ns)
+  if docker exec "$CONTAINER" true >/dev/null 2>&1; then
+    wall+=("$(awk -v a="$t0" -v b="$(now_ns)" 'BEGIN{printf "%.6f", (b - a) / 1e9}')")
+  fi
+done
+
+if [[ ${#client[@]} -eq 0 ]]; then
+  echo null
+  exit 0
+fi
+
+arr() { if [[ $# -gt 0 ]]; then printf '%s\n' "$@"; fi | jq -R . | jq -sc 'map(tonumber)'; }
+
+# Rozdzielczość = 10^-(max liczba miejsc po przecinku w wyjściu time -p)
+decimals=$(printf '%s\n' "${shell[@]}" "${client[@]}" \
+  | awk -F. '{d = (NF > 1) ? length($2) : 0; if (d > m) m = d} END{print m + 0}')
+
+jq -nc \
+  --arg container "$CONTAINER" \
+  --arg cmd "$NULL_CMD" \
+  --argjson n "$N" \
+  --argjson decimals "$decimals" \
+  --argjson shell "$(arr ${shell[@]+"${shell[@]}"})" \
+  --argjson client "$(arr "${client[@]}")" \
+  --argjson wall "$(arr ${wall[@]+"${wall[@]}"})" '
+  def pct(p): sort | if length == 0 then null else .[((length - 1) * p | floor)] end;
+  {
+    method: "time_p_null_command",
+    container: $container,
+    null_command: $cmd,
+    samples: $n,
+    timer_decimals: $decimals,
+    timer_resolution_s: (if $decimals > 0 then pow(10; -$decimals) else 1 end),
+    null_shell_s: $shell,
+    null_client_s: $client,
+    exec_wall_s: $wall,
+    null_shell_p50_s: ($shell | pct(0.5)),
+    exec_wall_p50_s: ($wall | pct(0.5)),
+    harness_overhead_s: ($client | pct(0.5)),
+    harness_overhead_p95_s: ($client | pct(0.95))
+  }'
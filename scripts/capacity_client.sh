@@ -0,0 +1,66 @@
+#!/bin/sh
+# Klient open-loop dla wyszukiwania pojemności (POSIX sh — kontener lub host).
+# Uruchamiany przez capacity.py; żądania startują wg harmonogramu przybyć niezależnie
+# od tego, czy poprzednie się skończyły (stałe obciążenie oferowane, nie concurrency).
+#   CAP_DIR       katalog wspólny z koordynatorem
+#   SCHEDULE      plik z offsetami startu (ns od początku kroku), jeden na linię
+#   OUT           plik wyników (w CAP_DIR)
+#   MODE          upload (POST BYTES) | handshake (samo połączenie TLS)
+#   BYTES, HOST   rozmiar ciała POST, nagłówek Host
+#   CLIENT_CMD    polecenie klienta TLS (czyta żądanie ze stdin)
+#   MAX_INFLIGHT  limit równoległych żądań; powyżej żądanie liczone jako odrzucone
+#   REQ_TIMEOUT   limit czasu żądania (s)
+# Wynik: "sched_ns start_ns end_ns ok" na żądanie (ok: 1 sukces, 0 błąd, -1 odrzucone)
+set -u
+
+D=$CAP_DIR
+OUT_FILE="$D/$OUT"
+: >"$OUT_FILE"
+
+now_ns() {
+  t=$(date +%s%N)
+  case $t in
+    *N|*[!0-9]*) echo $(( $(date +%s) * 1000000000 )) ;;
+    *) echo "$t" ;;
+  esac
+}
+
+if command -v timeout >/dev/null 2>&1; then
+  TMO="timeout $REQ_TIMEOUT"
+else
+  TMO=""
+fi
+
+request() {
+  sched=$1
+  s=$(now_ns)
+  if [ "$MODE" = handshake ]; then
+    $TMO sh -c "$CLIENT_CMD" </dev/null >/dev/null 2>&1
+  else
+    { printf 'POST /upload HTTP/1.1\r\nHost: %s\r\nContent-Length: %d\r\nConnection: close\r\n\r\n' "$HOST" "$BYTES"
+      head -c "$BYTES" /dev/zero; } | $TMO sh -c "$CLIENT_CMD" >/dev/null 2>&1
+  fi
+  rc=$?
+  # Krótka linia z O_APPEND — zapisy równoległych żądań się nie przeplatają
+  echo "$sched $s $(now_ns) $([ $rc -eq 0 ] && echo 1 || echo 0)" >>"$OUT_FILE"
+}
+
+start=$(now_ns)
+i=0
+while read -r off; do
+  due=$((start + off))
+  rem=$((due - $(now_ns)))
+  if [ "$rem" -gt 0 ]; then
+    sleep "$((rem / 1000000000)).$(printf %09d $((rem % 1000000000)))"
+  fi
+  # W locie = wystartowane - zakończone (linie w pliku wyników)
+  done_n=$(wc -l <"$OUT_FILE")
+  if [ $((i - done_n)) -ge "$MAX_INFLIGHT" ]; then
+    echo "$due $due $due -1" >>"$OUT_FILE"
+  else
+    request "$due" &
+  fi
+  i=$((i + 1))
+done <"$D/$SCHEDULE"
+wait
+touch "$D/$OUT.done"
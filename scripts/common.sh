@@ -0,0 +1,51 @@
+# Wspólne funkcje runnerów (source "$ROOT_DIR/scripts/common.sh"):
+#   get_netem_profile      — etykieta profilu NetEm (baseline, delay_50ms, ...)
+#   server_proc            — kontener i proces serwera TLS dla portu albo nazwy serwera
+#   server_cpu_ticks       — utime+stime procesów serwera (tyknięcia + CLK_TCK)
+
+# Determine NetEm profile from current network conditions
+get_netem_profile() {
+  # Check if NetEm is active and determine profile
+  if command -v dnctl >/dev/null 2>&1; then
+    local pipe_info=$(dnctl list 2>/dev/null | grep "pipe 1" || echo "")
+    if [[ -n "$pipe_info" ]]; then
+      if echo "$pipe_info" | grep -q "delay 50ms.*plr 0.005"; then
+        echo "delay_50ms_loss_0.5"  # P2
+      elif echo "$pipe_info" | grep -q "delay 50ms.*plr 0"; then
+        echo "delay_50ms"           # P1
+      elif echo "$pipe_info" | grep -q "delay 100ms.*plr 0"; then
+        echo "delay_100ms"          # P3
+      else
+        echo "custom"
+      fi
+    else
+      echo "baseline"               # P0 (no NetEm)
+    fi
+  else
+    echo "baseline"
+  fi
+}
+
+# Kontener i proces serwera TLS dla portu albo nazwy serwera (run_cert_matrix.sh).
+# Klient 4431–8443 działa w tym samym kontenerze co nginx, więc liczymy tylko procesy
+# serwera, nie cały cgroup
+server_proc() {
+  case $1 in
+    4431|4432|8443|nginx) echo "tls-perf-nginx nginx" ;;
+    4434|4435|lighttpd)   echo "lighttpd-wolfssl lighttpd" ;;
+    11112|wolfssl)        echo "wolfssl-server-kyber wolf-server" ;;
+  esac
+}
+
+# Suma utime+stime procesów serwera w tyknięciach zegara (+ CLK_TCK); pusty wynik = brak danych
+server_cpu_ticks() {
+  local c p
+  read -r c p <<<"$(server_proc "$1")"
+  [[ -n "${c:-}" ]] || return 0
+  docker exec "$c" sh -c '
+    hz=$(getconf CLK_TCK 2>/dev/null || echo 100); t=0
+    for pid in $(pidof '"$p"'); do
+      set -- $(sed "s/.*) //" /proc/$pid/stat 2>/dev/null); t=$((t + ${12:-0} + ${13:-0}))
+    done
+    echo "$t $hz"' 2>/dev/null || true
+}
@@ -1,14 +1,27 @@
 #!/usr/bin/env python3
 import argparse
 import json
+import sys
 from pathlib import Path
 import re
 import csv
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from significance import DEFAULT_N_PERM, compare_pairs, samples_from_json
+
 parser = argparse.ArgumentParser(
     description="Compute AES-NI delta% from run_matrix directory"
 )
 parser.add_argument("run_dir", help="Path to results/run_matrix_<TS> directory")
+parser.add_argument(
+    "--perm", type=int, default=DEFAULT_N_PERM, help="liczba permutacji w teście"
+)
+parser.add_argument(
+    "--correction",
+    choices=["bh", "holm"],
+    default="bh",
+    help="korekta wielokrotnych porównań (bh = FDR, holm = FWER)",
+)
 args = parser.parse_args()
 
 RUN_DIR = Path(args.run_dir).resolve()
@@ -26,6 +39,8 @@ IMPL_BY_PORT = {
 }
 
 rows = []
+# Próbki per wiersz (on, off) do testów istotności
+samples = []
 
 # Handshake: files like handshake_<port>_s33_on.json and _off.json
 for prof in PROFILES:
@@ -62,46 +77,68 @@ for prof in PROFILES:
                         "delta_percent": delta,
                     }
                 )
+                samples.append((samples_from_json(f_on), samples_from_json(f_off)))
         except Exception:
             pass
 
-# Bulk: path <P>/bulk/p<payload>_c<conc>/bulk_<port>_r64_p<p>_c<c>_<on|off>.json
-payloads = ["0.1", "1", "10"]
-concs = ["1", "8", "32"]
+# Bulk: path <P>/bulk/p<payload>_c<conc>/bulk_<port>_r<R>_p<p>_c<c>_<on|off>.json
+# Każda komórka payload x concurrency obecna w obu gałęziach (on/off)
+CELL_RE = re.compile(r"^p(?P<p>[\d.]+)_c(?P<c>\d+)$")
 for prof in PROFILES:
-    for p in payloads:
-        for c in concs:
-            d_on = AES_ON / prof / "bulk" / f"p{p}_c{c}"
-            d_off = AES_OFF / prof / "bulk" / f"p{p}_c{c}"
-            if not (d_on.exists() and d_off.exists()):
+    for d_on in sorted((AES_ON / prof / "bulk").glob("p*_c*")):
+        m = CELL_RE.match(d_on.name)
+        d_off = AES_OFF / prof / "bulk" / d_on.name
+        if not (m and d_off.exists()):
+            continue
+        p, c = m.group("p"), m.group("c")
+        for port in [4431, 4432, 8443, 4434, 4435, 11112]:
+            f_on = next(d_on.glob(f"bulk_{port}_r*_p{p}_c{c}_on.json"), None)
+            f_off = next(d_off.glob(f"bulk_{port}_r*_p{p}_c{c}_off.json"), None)
+            if not (f_on and f_off):
                 continue
-            for port in [4431, 4432, 8443, 4434, 4435, 11112]:
-                f_on = d_on / f"bulk_{port}_r64_p{p}_c{c}_on.json"
-                f_off = d_off / f"bulk_{port}_r64_p{p}_c{c}_off.json"
-                if not (f_on.exists() and f_off.exists()):
-                    continue
-                try:
-                    on = json.loads(f_on.read_text())
-                    off = json.loads(f_off.read_text())
-                    on_v = on.get("throughput_mb_s")
-                    off_v = off.get("throughput_mb_s")
-                    if on_v and off_v and on_v != 0:
-                        delta = (off_v - on_v) / on_v * 100.0
-                        rows.append(
-                            {
-                                "metric": "throughput_mb_s",
-                                "profile": prof,
-                                "payload_mb": p,
-                                "concurrency": c,
-                                "implementation": IMPL_BY_PORT.get(port, "unknown"),
-                                "port": port,
-                                "on_value": on_v,
-                                "off_value": off_v,
-                                "delta_percent": delta,
-                            }
-                        )
-                except Exception:
-                    pass
+            try:
+                on = json.loads(f_on.read_text())
+                off = json.loads(f_off.read_text())
+                on_v = on.get("throughput_mb_s")
+                off_v = off.get("throughput_mb_s")
+                if on_v and off_v and on_v != 0:
+                    delta = (off_v - on_v) / on_v * 100.0
+                    rows.append(
+                        {
+                            "metric": "throughput_mb_s",
+                            "profile": prof,
+                            "payload_mb": p,
+                            "concurrency": c,
+                            "implementation": IMPL_BY_PORT.get(port, "unknown"),
+                            "port": port,
+                            "on_value": on_v,
+                            "off_value": off_v,
+                            "delta_percent": delta,
+                        }
+                    )
+                    # Per-request times (request_times_s) — test na czasach żądań
+                    samples.append((samples_from_json(f_on), samples_from_json(f_off)))
+            except Exception:
+                pass
+
+# Testy istotności dla całej macierzy naraz + korekta wielokrotnych porównań
+SIG_FIELDS = ["n_on", "n_off", "hl_shift", "p_perm", "p_mannwhitney", "q_value", "significance"]
+have = [i for i, (a, b) in enumerate(samples) if a is not None and b is not None]
+if have:
+    sig = compare_pairs(
+        [samples[i] for i in have], n_perm=args.perm, correction=args.correction
+    )
+    for k, i in enumerate(have):
+        r = sig.iloc[k]
+        rows[i].update(
+            n_on=int(r.n_a),
+            n_off=int(r.n_b),
+            hl_shift=r.hl_shift,
+            p_perm=r.p_perm,
+            p_mannwhitney=r.p_mannwhitney,
+            q_value=r.q_value,
+            significance=r.significance,
+        )
 
 out_csv = RUN_DIR / "aesni_delta.csv"
 with out_csv.open("w", newline="") as f:
@@ -117,10 +154,12 @@ with out_csv.open("w", newline="") as f:
             "on_value",
             "off_value",
             "delta_percent",
-        ],
+        ]
+        + SIG_FIELDS,
     )
     w.writeheader()
     for r in rows:
         w.writerow(r)
 
 print(f"Wrote {len(rows)} rows to {out_csv}")
+print(f"Significance tests ({args.correction}): {len(have)}/{len(rows)} rows with per-sample data")
@@ -0,0 +1,78 @@
+#!/bin/sh
+# Klient fan-out (POSIX sh — działa w kontenerze oqs-ossl3 / wolfssl-cli i na hoście).
+# Uruchamiany przez fanout.py; parametry w zmiennych środowiskowych:
+#   FANOUT_DIR   katalog wspólny z koordynatorem (bariera + próbki)
+#   CLIENT_ID    numer klienta
+#   REQUESTS     liczba żądań tego klienta
+#   WORKERS      równoległe połączenia w tym kliencie
+#   BYTES        rozmiar ciała POST
+#   HOST         nagłówek Host
+#   CLIENT_CMD   polecenie klienta TLS (czyta żądanie ze stdin)
+#   GO_TIMEOUT_S maks. czekanie na sygnał startu (domyślnie 120 s)
+# Wynik: client_<id>.txt — "start_ns end_ns bytes ok" na żądanie, client_<id>.cpu
+set -u
+
+D=$FANOUT_DIR
+ID=$CLIENT_ID
+
+now_ns() {
+  t=$(date +%s%N)
+  case $t in
+    *N|*[!0-9]*) echo $(( $(date +%s) * 1000000000 )) ;;
+    *) echo "$t" ;;
+  esac
+}
+
+# Czas CPU kontenera/procesu (cgroup v2, v1) w ns — nasycenie rdzenia klienta
+cpu_ns() {
+  if [ -r /sys/fs/cgroup/cpu.stat ]; then
+    awk '/^usage_usec/{printf "%.0f", $2 * 1000}' /sys/fs/cgroup/cpu.stat
+  elif [ -r /sys/fs/cgroup/cpuacct/cpuacct.usage ]; then
+    cat /sys/fs/cgroup/cpuacct/cpuacct.usage
+  else
+    echo 0
+  fi
+}
+
+worker() {
+  n=$1 out=$2 i=0
+  while [ "$i" -lt "$n" ]; do
+    t0=$(now_ns)
+    if { printf 'POST /upload HTTP/1.1\r\nHost: %s\r\nContent-Length: %d\r\nConnection: close\r\n\r\n' "$HOST" "$BYTES"
+         head -c "$BYTES" /dev/zero; } | sh -c "$CLIENT_CMD" >/dev/null 2>&1; then
+      ok=1
+    else
+      ok=0
+    fi
+    echo "$t0 $(now_ns) $BYTES $ok" >>"$out"
+    i=$((i + 1))
+  done
+}
+
+# Bariera: zgłoś gotowość i czekaj na sygnał startu od koordynatora
+# (z limitem czasu — bez koordynatora klient nie może czekać w nieskończoność)
+touch "$D/ready_$ID"
+end=$(( $(date +%s) + ${GO_TIMEOUT_S:-120} )) tick=0
+while [ ! -f "$D/go" ]; do
+  sleep 0.005
+  tick=$((tick + 1))
+  if [ $((tick % 100)) -eq 0 ] && { [ ! -d "$D" ] || [ "$(date +%s)" -gt "$end" ]; }; then
+    echo "❌ klient $ID: brak sygnału startu" >&2
+    exit 1
+  fi
+done
+
+cpu0=$(cpu_ns); wall0=$(now_ns)
+w=0
+while [ "$w" -lt "$WORKERS" ]; do
+  # Równy podział żądań między połączenia (pierwsze dostają resztę)
+  n=$(( REQUESTS / WORKERS + (w < REQUESTS % WORKERS ? 1 : 0) ))
+  worker "$n" "$D/client_${ID}_w$w.txt" &
+  w=$((w + 1))
+done
+wait
+cpu1=$(cpu_ns); wall1=$(now_ns)
+
+cat "$D"/client_${ID}_w*.txt >"$D/client_$ID.txt" 2>/dev/null || : >"$D/client_$ID.txt"
+rm -f "$D"/client_${ID}_w*.txt
+echo "$cpu0 $cpu1 $wall0 $wall1" >"$D/client_$ID.cpu"
@@ -32,6 +32,87 @@ echo "==> OPENSSL_MODULES is set to: ${OPENSSL_MODULES:-<not set>}"
 
 PASSPHRASE="test"
 
+###############################################################################
+# 0.  Macierz certyfikatów (run_cert_matrix.sh):
+#       gen-certs.sh matrix <klucz> <głębokość>
+#     klucz: ecdsa-p256 | ecdsa-p384 | ed25519 | rsa-2048 | rsa-3072 | rsa-4096
+#     głębokość 1 = liść podpisany przez root, 2–3 = 1–2 certyfikaty pośrednie.
+#     Wynik: certs/matrix/<klucz>_d<głębokość>/{root.pem,leaf.key,chain.pem}
+#     (chain.pem = liść + pośrednie, wysyłany przez serwer); katalog jest cache'em —
+#     params.txt z parametrami i wersją OpenSSL, zgodny => bez ponownej generacji
+###############################################################################
+key_args() {
+  case $1 in
+    ecdsa-p256) echo "-newkey ec -pkeyopt ec_paramgen_curve:P-256" ;;
+    ecdsa-p384) echo "-newkey ec -pkeyopt ec_paramgen_curve:P-384" ;;
+    ed25519)    echo "-newkey ed25519" ;;
+    rsa-*)      echo "-newkey rsa:${1#rsa-}" ;;
+    *)          return 1 ;;
+  esac
+}
+
+gen_matrix() {
+  local kind=$1 depth=$2
+  local kargs
+  kargs=$(key_args "$kind") || { echo "❌ nieznany typ klucza: $kind" >&2; exit 1; }
+  [[ "$depth" =~ ^[1-3]$ ]] || { echo "❌ głębokość łańcucha 1–3, jest: $depth" >&2; exit 1; }
+
+  local dir="$CERT_DIR/matrix/${kind}_d${depth}"
+  local params
+  params="key=$kind depth=$depth openssl=$("$OPENSSL_BIN" version | head -1)"
+  if [[ -f "$dir/params.txt" && "$(cat "$dir/params.txt")" == "$params" && -s "$dir/chain.pem" ]]; then
+    echo "⏭️  [$kind d$depth] cache: $dir"
+    return 0
+  fi
+  rm -rf "$dir"; mkdir -p "$dir"
+
+  # Ed25519 nie przyjmuje osobnego skrótu (-sha256)
+  local md=(-sha256)
+  [[ "$kind" == "ed25519" ]] && md=()
+  printf "basicConstraints=critical,CA:TRUE\nkeyUsage=critical,keyCertSign,cRLSign\n" >"$dir/ca.ext"
+  printf "basicConstraints=CA:FALSE\nsubjectAltName=DNS:localhost,IP:127.0.0.1\n" >"$dir/leaf.ext"
+
+  echo "==> [$kind d$depth] Root CA"
+  "$OPENSSL_BIN" req -config "$OPENSSL_CNF" -x509 $kargs -nodes "${md[@]}" \
+    -keyout "$dir/root.key" -out "$dir/root.pem" -days 825 \
+    -subj "/C=PL/O=TLS-Thesis/CN=Matrix-Root-$kind" -addext "basicConstraints=critical,CA:TRUE" \
+    -addext "keyUsage=critical,keyCertSign,cRLSign" 2>/dev/null
+
+  local issuer=root i
+  : >"$dir/intermediates.pem"
+  for ((i = 1; i < depth; i++)); do
+    echo "==> [$kind d$depth] Intermediate $i"
+    "$OPENSSL_BIN" req -config "$OPENSSL_CNF" -new $kargs -nodes \
+      -keyout "$dir/int$i.key" -out "$dir/int$i.csr" -subj "/C=PL/O=TLS-Thesis/CN=Matrix-Int$i-$kind" 2>/dev/null
+    "$OPENSSL_BIN" x509 -req -in "$dir/int$i.csr" -CA "$dir/$issuer.pem" -CAkey "$dir/$issuer.key" \
+      -CAcreateserial -days 825 "${md[@]}" -extfile "$dir/ca.ext" -out "$dir/int$i.pem" 2>/dev/null
+    # Kolejność w łańcuchu: liść, potem pośrednie od najbliższego liściowi
+    cat "$dir/int$i.pem" "$dir/intermediates.pem" >"$dir/intermediates.tmp"
+    mv "$dir/intermediates.tmp" "$dir/intermediates.pem"
+    issuer=int$i
+  done
+
+  echo "==> [$kind d$depth] Leaf"
+  "$OPENSSL_BIN" req -config "$OPENSSL_CNF" -new $kargs -nodes \
+    -keyout "$dir/leaf.key" -out "$dir/leaf.csr" -subj "/C=PL/O=TLS-Thesis/CN=localhost" 2>/dev/null
+  "$OPENSSL_BIN" x509 -req -in "$dir/leaf.csr" -CA "$dir/$issuer.pem" -CAkey "$dir/$issuer.key" \
+    -CAcreateserial -days 825 "${md[@]}" -extfile "$dir/leaf.ext" -out "$dir/leaf.crt" 2>/dev/null
+  cat "$dir/leaf.crt" "$dir/intermediates.pem" >"$dir/chain.pem"
+
+  "$OPENSSL_BIN" verify -CAfile "$dir/root.pem" -untrusted "$dir/intermediates.pem" "$dir/leaf.crt" >/dev/null \
+    || { echo "❌ [$kind d$depth] łańcuch nie weryfikuje się" >&2; exit 1; }
+  rm -f "$dir"/*.csr "$dir"/*.ext "$dir"/*.srl
+  # Klucze CA nie są potrzebne serwerom — zostają tylko w cache'u
+  echo "$params" >"$dir/params.txt"
+  echo "✅ [$kind d$depth] $dir"
+}
+
+if [[ "${1:-}" == "matrix" ]]; then
+  [[ $# -eq 3 ]] || { echo "Użycie: $0 matrix <klucz> <głębokość 1-3>" >&2; exit 1; }
+  gen_matrix "$2" "$3"
+  exit 0
+fi
+
 ###############################################################################
 # 1.  Local CA (self-signed)
 ###############################################################################
@@ -65,11 +146,13 @@ build() {
     -keyout "$key" -out "$csr" -nodes -subj "$subj"
 }
 
+# SAN localhost/127.0.0.1: curl (run_ttfb.sh) weryfikuje nazwę hosta
 sign() {
   local name="$1"
   echo "==> [${name}] Signing with local CA"
   "$OPENSSL_BIN" x509 -req -in "$CERT_DIR/${name}.csr" \
     -CA "$CA_CERT" -CAkey "$CA_KEY" -CAcreateserial \
+    -extfile <(printf "subjectAltName=DNS:localhost,IP:127.0.0.1\n") \
     -days 825 -sha256 -out "$CERT_DIR/${name}.crt"
 }
 
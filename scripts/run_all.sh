@@ -37,7 +37,9 @@ if [[ $MEASURE_RESOURCES -eq 1 ]]; then
 fi
 
 TIMESTAMP=$(date +%Y%m%d_%H%M%S)
-RUN_DIR="$ROOT_DIR/results/run_${TIMESTAMP}${AESNI_SUFFIX}"
+# Runnery piszą do RESULTS_DIR (run_local.sh: results_local/) — run i katalog wyników też
+OUTDIR="${RESULTS_DIR:-$ROOT_DIR/results}"
+RUN_DIR="$OUTDIR/run_${TIMESTAMP}${AESNI_SUFFIX}"
 mkdir -p "$RUN_DIR"
 
 if [[ $NETEM -eq 1 ]]; then
@@ -54,9 +56,26 @@ Loss: ${NETEM_LOSS}
 Applied at: $(date)
 EOF
 
-  trap '"$ROOT_DIR/scripts/netem_mac.sh" clear' EXIT
 fi
 
+# Pre-flight kontroli szumu (PREFLIGHT=1): governor performance + turbo off (root),
+# przywracane na wyjściu razem z NetEm
+PREFLIGHT=${PREFLIGHT:-0}
+cleanup() {
+  if [[ $NETEM -eq 1 ]]; then "$ROOT_DIR/scripts/netem_mac.sh" clear || true; fi
+  if [[ $PREFLIGHT -eq 1 ]]; then
+    python3 "$ROOT_DIR/fingerprint.py" preflight restore --state "$RUN_DIR/preflight_state.json" || true
+  fi
+}
+trap cleanup EXIT
+if [[ $PREFLIGHT -eq 1 ]]; then
+  python3 "$ROOT_DIR/fingerprint.py" preflight apply --state "$RUN_DIR/preflight_state.json" || true
+fi
+
+# Odcisk środowiska (CPU, governor, turbo, SMT, kernel, obrazy, OPENSSL_ia32cap, load)
+python3 "$ROOT_DIR/fingerprint.py" collect --out "$RUN_DIR/fingerprint.json" ||
+  echo "⚠️  Nie udało się zebrać fingerprint.json"
+
 cat > "$RUN_DIR/config.txt" <<EOF
 Timestamp: $TIMESTAMP
 Date: $(date)
@@ -70,6 +89,9 @@ PAYLOAD_SIZE_MB: $PAYLOAD_SIZE_MB
 CONCURRENCY: $CONCURRENCY
 NetEm: $([[ $NETEM -eq 1 ]] && echo "Yes (delay=${NETEM_DELAY}ms, loss=${NETEM_LOSS})" || echo "No")
 Resource Measurement: $([[ $MEASURE_RESOURCES -eq 1 ]] && echo "Yes" || echo "No")
+Pre-flight: $([[ $PREFLIGHT -eq 1 ]] && echo "Yes (governor performance, turbo off)" || echo "No")
+Fingerprint: fingerprint.json
+Sentinel: $([[ ${SENTINEL_EVERY:-20} -gt 0 ]] && echo "every ${SENTINEL_EVERY:-20} cells, tol ${SENTINEL_TOL:-10}%" || echo "No")
 EOF
 
 echo "📁 Zapisuję wyniki w: $RUN_DIR"
@@ -100,6 +122,20 @@ unit() {
     throughput_mb_s) echo "MB/s";;
     avg_time_s) echo s;;
     ttfb_s) echo s;;
+    sentinel_flag) echo -;;
+    ttfb_*_s|connect_p50_s|tls_done_p50_s|request_sent_p50_s) echo s;;
+    knee_concurrency|peak_concurrency) echo conn;;
+    knee_throughput_mb_s|peak_throughput_mb_s) echo "MB/s";;
+    knee_p99_s) echo s;;
+    server_cpu_ms_per_handshake) echo ms;;
+    harness_overhead_ms) echo ms;;
+    accepted_p*_s|rejected_p*_s|pool_prefill_s|exec_overhead_s) echo s;;
+    max_early_data_bytes|ticket_max_early_data|early_data_bytes) echo B;;
+    client_start_skew_ms) echo ms;;
+    client_cpu_max) echo core;;
+    fanout_clients) echo clients;;
+    usl_peak_concurrency*) echo conn;;
+    usl_peak_throughput_mb_s*|usl_lambda*) echo "MB/s";;
     *) echo -;;
   esac
 }
@@ -110,14 +146,23 @@ pairs() {
     | map(
         if   .key|test("avg_(request_)?time(_s)?") then {k:"mean_time_s",v:.value}
         elif .key=="requests_per_second"           then {k:"rps",v:.value}
-        elif .key|test("^(host|port|config|successful_|total_|concurrency|note|measurement_|algorithm|payload_|throughput_|method)") then empty
+        elif .key=="throughput_mb_s"               then {k:"throughput_mb_s",v:.value}
+        elif .key|test("^(host|port|config|successful_|total_|concurrency|note|measurement_|algorithm|payload_|throughput_|method|request_times|points|aes|profile|knee_in_range|cold$|warm$|samples$|accepted_latency_s|rejected_latency_s|search_probes|attempts|clients$|hist_edges_s|fanout_mode|bottleneck|calibration|mux_streams)") then empty
         elif .key=="ttfb_s"                         then {k:"ttfb_s",v:.value}
         elif .key=="avg_time"                       then {k:"avg_time_s",v:.value}
         else {k:.key,v:.value} end )
+    # Tylko liczby i tablice liczb (raw_measurements — rozwijane przez bench_csv.py);
+    # pola tekstowe (http, http_version) i obiekty (mux) to nie metryki
+    | map(select(.v | type == "number" or (type == "array" and length > 0 and all(type == "number"))))
     | .[] | "\(.k) \(.v)"
   ' "$1"
 }
 
+find_result() {
+  # Najnowszy plik wyników pasujący do wymiarów (--test/--port/--aes/...)
+  python3 "$ROOT_DIR/results_catalog.py" --root "$OUTDIR" latest "$@" 2>/dev/null || true
+}
+
 run_once() {
   local impl=$1 suite=$2 test=$3 run=$4
   echo "▶ $impl/$suite/$test #$run"
@@ -138,59 +183,30 @@ run_once() {
   case $test in
     handshake) 
       "$ROOT_DIR/scripts/run_handshake.sh" "$prt" >/dev/null
-      # Try to find results in new organized folders first
-      json=""
-      if [[ -f "$ROOT_DIR/results/handshake/baseline_aes_on_s33/handshake_${prt}.json" ]]; then
-        json="$ROOT_DIR/results/handshake/baseline_aes_on_s33/handshake_${prt}.json"
-      elif [[ -f "$ROOT_DIR/results/handshake/delay_50ms_aes_on_s33/handshake_${prt}.json" ]]; then
-        json="$ROOT_DIR/results/handshake/delay_50ms_aes_on_s33/handshake_${prt}.json"
-      elif [[ -f "$ROOT_DIR/results/handshake/delay_50ms_loss_0.5_aes_on_s33/handshake_${prt}.json" ]]; then
-        json="$ROOT_DIR/results/handshake/delay_50ms_loss_0.5_aes_on_s33/handshake_${prt}.json"
-      elif [[ -f "$ROOT_DIR/results/handshake/delay_100ms_aes_on_s33/handshake_${prt}.json" ]]; then
-        json="$ROOT_DIR/results/handshake/delay_100ms_aes_on_s33/handshake_${prt}.json"
-      fi
+      # Najnowszy wynik z katalogu (results_catalog.py)
+      json=$(find_result --test handshake --port "$prt" --aes "$AESNI_STATUS")
       ;;
     bulk)      
       "$ROOT_DIR/scripts/run_bulk.sh" "$prt" >/dev/null
-      # Try to find results in new organized folders first
-      json=""
-      if [[ -f "$ROOT_DIR/results/bulk/baseline_aes_on_r64_p${PAYLOAD_SIZE_MB}_c${CONCURRENCY}/bulk_${prt}.json" ]]; then
-        json="$ROOT_DIR/results/bulk/baseline_aes_on_r64_p${PAYLOAD_SIZE_MB}_c${CONCURRENCY}/bulk_${prt}.json"
-      elif [[ -f "$ROOT_DIR/results/bulk/delay_50ms_aes_on_r64_p${PAYLOAD_SIZE_MB}_c${CONCURRENCY}/bulk_${prt}.json" ]]; then
-        json="$ROOT_DIR/results/bulk/delay_50ms_aes_on_r64_p${PAYLOAD_SIZE_MB}_c${CONCURRENCY}/bulk_${prt}.json"
-      elif [[ -f "$ROOT_DIR/results/bulk/delay_50ms_loss_0.5_aes_on_r64_p${PAYLOAD_SIZE_MB}_c${CONCURRENCY}/bulk_${prt}.json" ]]; then
-        json="$ROOT_DIR/results/bulk/delay_50ms_loss_0.5_aes_on_r64_p${PAYLOAD_SIZE_MB}_c${CONCURRENCY}/bulk_${prt}.json"
-      elif [[ -f "$ROOT_DIR/results/bulk/delay_100ms_aes_on_r64_p${PAYLOAD_SIZE_MB}_c${CONCURRENCY}/bulk_${prt}.json" ]]; then
-        json="$ROOT_DIR/results/bulk/delay_100ms_aes_on_r64_p${PAYLOAD_SIZE_MB}_c${CONCURRENCY}/bulk_${prt}.json"
-      fi
+      # Najnowszy wynik z katalogu (results_catalog.py)
+      json=$(find_result --test bulk --port "$prt" --aes "$AESNI_STATUS" \
+        --payload "$PAYLOAD_SIZE_MB" --concurrency "$CONCURRENCY")
       ;;
     0rtt)      
       "$ROOT_DIR/scripts/run_0rtt.sh" "$prt" >/dev/null
-      # Try to find results in new organized folders first
-      json=""
-      if [[ -f "$ROOT_DIR/results/0rtt/baseline_aes_on_ed4_n5/simple_${prt}.json" ]]; then
-        json="$ROOT_DIR/results/0rtt/baseline_aes_on_ed4_n5/simple_${prt}.json"
-      elif [[ -f "$ROOT_DIR/results/0rtt/delay_50ms_aes_on_ed4_n5/simple_${prt}.json" ]]; then
-        json="$ROOT_DIR/results/0rtt/delay_50ms_aes_on_ed4_n5/simple_${prt}.json"
-      elif [[ -f "$ROOT_DIR/results/0rtt/delay_50ms_loss_0.5_aes_on_ed4_n5/simple_${prt}.json" ]]; then
-        json="$ROOT_DIR/results/0rtt/delay_50ms_loss_0.5_aes_on_ed4_n5/simple_${prt}.json"
-      elif [[ -f "$ROOT_DIR/results/0rtt/delay_100ms_aes_on_ed4_n5/simple_${prt}.json" ]]; then
-        json="$ROOT_DIR/results/0rtt/delay_100ms_aes_on_ed4_n5/simple_${prt}.json"
-      fi
+      # Najnowszy wynik z katalogu (results_catalog.py)
+      json=$(find_result --test 0rtt --port "$prt" --aes "$AESNI_STATUS")
+      ;;
+    ladder)
+      # Drabina concurrency (run_ladder.sh) -> knee_* z results/ladder/
+      "$ROOT_DIR/scripts/run_ladder.sh" "$prt" >/dev/null
+      json=$(find_result --test ladder --port "$prt" --aes "$AESNI_STATUS" \
+        --payload "$PAYLOAD_SIZE_MB")
       ;;
     ttfb)      
       "$ROOT_DIR/scripts/run_ttfb.sh" "$prt" >/dev/null || true
-      # Try to find results in new organized folders first
-      json=""
-      if [[ -f "$ROOT_DIR/results/ttfb/baseline_kb16/ttfb_${prt}.json" ]]; then
-        json="$ROOT_DIR/results/ttfb/baseline_kb16/ttfb_${prt}.json"
-      elif [[ -f "$ROOT_DIR/results/ttfb/delay_50ms_kb16/ttfb_${prt}.json" ]]; then
-        json="$ROOT_DIR/results/ttfb/delay_50ms_kb16/ttfb_${prt}.json"
-      elif [[ -f "$ROOT_DIR/results/ttfb/delay_50ms_loss_0.5_kb16/ttfb_${prt}.json" ]]; then
-        json="$ROOT_DIR/results/ttfb/delay_50ms_loss_0.5_kb16/ttfb_${prt}.json"
-      elif [[ -f "$ROOT_DIR/results/ttfb/delay_100ms_kb16/ttfb_${prt}.json" ]]; then
-        json="$ROOT_DIR/results/ttfb/delay_100ms_kb16/ttfb_${prt}.json"
-      fi
+      # Najnowszy wynik z katalogu (results_catalog.py)
+      json=$(find_result --test ttfb --port "$prt")
       ;;
   esac
 
@@ -200,6 +216,8 @@ run_once() {
   fi
 
   cp "$json" "$RUN_DIR/"
+  # Surowe próbki komórki bulk (.raw) obok kopii JSON
+  [[ -f "${json%.json}.raw" ]] && cp "${json%.json}.raw" "$RUN_DIR/"
 
   while read -r m v; do
     echo "$impl,$suite,$test,$run,$m,$v,$(unit "$m")" >>"$CSV"
@@ -229,7 +247,10 @@ run_once() {
   fi
 }
 
-export -f run_once port unit pairs
+export -f run_once port unit pairs find_result
+
+source "$ROOT_DIR/scripts/sentinel.sh"
+SENTINEL_DIR="$RUN_DIR"
 export PAYLOAD_SIZE_MB
 export CONCURRENCY
 
@@ -246,6 +267,8 @@ echo "   Cipher suites:   ${SUITES[*]}"
 echo "   Tests:           ${TESTS[*]}"
 echo ""
 
+sentinel_probe
+
 total_tests=$((${#IMPLEMENTATIONS[@]} * ${#SUITES[@]} * ${#TESTS[@]} * ITERATIONS))
 current_test=0
 
@@ -262,6 +285,7 @@ for impl in "${IMPLEMENTATIONS[@]}"; do
         echo -ne "    Progress: $current_test/$total_tests ($progress%)\r"
 
         run_once "$impl" "$suite" "$test" "$run"
+        sentinel_tick "$impl,$suite,$test,$run"
 
         if [[ $((current_test % 10)) -eq 0 ]]; then
           echo ""
@@ -273,6 +297,12 @@ for impl in "${IMPLEMENTATIONS[@]}"; do
   done
 done
 
+# Końcowy odczyt domyka ostatni przedział; oznaczenia komórek -> bench.csv (sentinel_flag)
+if [[ $SENTINEL_EVERY -gt 0 ]]; then
+  sentinel_probe
+  python3 "$ROOT_DIR/sentinel.py" annotate "$RUN_DIR" --bench "$CSV" || true
+fi
+
 END_TIME=$(date +%s)
 DURATION=$((END_TIME - START_TIME))
 DURATION_MIN=$((DURATION / 60))
@@ -291,18 +321,18 @@ Total measurements: $current_test
 Completed at: $(date)
 EOF
 
-if [[ -d "$ROOT_DIR/results/raw" ]]; then
-  cp -r "$ROOT_DIR/results/raw" "$RUN_DIR/"
+if [[ -d "$OUTDIR/raw" ]]; then
+  cp -r "$OUTDIR/raw" "$RUN_DIR/"
 fi
 
 find "$ROOT_DIR/results" -name "hf_*.json" -o -name "pm_*.txt" -o -name "combined_*.json" \
   | grep -v "$RUN_DIR" | xargs rm -f 2>/dev/null || true
 
-ln -sfn "$RUN_DIR" "$ROOT_DIR/results/latest"
+ln -sfn "$RUN_DIR" "$OUTDIR/latest"
 
 echo ""
 echo "✅ Results saved in: $RUN_DIR"
-echo "🔗 Latest results:  results/latest"
+echo "🔗 Latest results:  $OUTDIR/latest"
 
 if [[ -f "$CSV" ]]; then
   rows=$(wc -l < "$CSV")
@@ -0,0 +1,126 @@
+#!/usr/bin/env bash
+# Randomizowany plan blokowy: w każdym bloku każde ramię (port, AES on/off) raz,
+# w kolejności losowanej z zapisanym ziarnem (blocks.py schedule). Wyniki kopiowane do
+# <run>/blocks/ z tagami block/block_order/block_seed; na końcu analiza sparowana
+# (blocks.py analyze -> blocks_paired.csv).
+#   BLOCKS=12 SEED=42 PORTS="4431 8443" ./scripts/run_blocks.sh
+#   BLOCK_TEST=bulk REQUESTS=32 PAYLOAD_SIZE_MB=1 ./scripts/run_blocks.sh
+set -euo pipefail
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+PORTS=(${PORTS:-4431 4432 8443 4434 4435 11112})
+AES_MODES=(${AES_MODES:-on off})
+BLOCKS=${BLOCKS:-10}
+BLOCK_TEST=${BLOCK_TEST:-handshake}     # handshake | bulk
+SEED=${SEED:-$(( $(date +%s) % 1000000 ))}
+SAMPLES=${SAMPLES:-11}                  # próbek handshake na komórkę (ramię w bloku)
+REQUESTS=${REQUESTS:-32}
+PAYLOAD_SIZE_MB=${PAYLOAD_SIZE_MB:-1}
+CONCURRENCY=${CONCURRENCY:-1}
+OUTDIR="${RESULTS_DIR:-$ROOT_DIR/results}"
+
+case $BLOCK_TEST in
+  handshake|bulk) ;;
+  *) echo "❌ BLOCK_TEST musi być handshake lub bulk (jest: $BLOCK_TEST)" >&2; exit 1 ;;
+esac
+
+TIMESTAMP=$(date +%Y%m%d_%H%M%S)
+RUN_DIR="$OUTDIR/run_blocks_${TIMESTAMP}"
+mkdir -p "$RUN_DIR/blocks"
+
+PREFLIGHT=${PREFLIGHT:-0}
+if [[ $PREFLIGHT -eq 1 ]]; then
+  python3 "$ROOT_DIR/fingerprint.py" preflight apply --state "$RUN_DIR/preflight_state.json" || true
+  trap 'python3 "$ROOT_DIR/fingerprint.py" preflight restore --state "$RUN_DIR/preflight_state.json" || true' EXIT
+fi
+python3 "$ROOT_DIR/fingerprint.py" collect --out "$RUN_DIR/fingerprint.json" ||
+  echo "⚠️  Nie udało się zebrać fingerprint.json"
+
+cat > "$RUN_DIR/config.txt" <<EOF
+Timestamp: $TIMESTAMP
+Date: $(date)
+Design: randomised blocks (port x AES)
+Seed: $SEED
+Blocks: $BLOCKS
+Test: $BLOCK_TEST
+Ports: ${PORTS[*]}
+AES modes: ${AES_MODES[*]}
+SAMPLES: $SAMPLES
+REQUESTS: $REQUESTS
+PAYLOAD_SIZE_MB: $PAYLOAD_SIZE_MB
+CONCURRENCY: $CONCURRENCY
+Fingerprint: fingerprint.json
+Schedule: schedule.json
+EOF
+
+find_result() {
+  # Najnowszy plik wyników pasujący do wymiarów (--test/--port/--aes/...)
+  python3 "$ROOT_DIR/results_catalog.py" --root "$OUTDIR" latest "$@" 2>/dev/null || true
+}
+
+apply_aes() {
+  if [[ "$1" == "off" ]]; then
+    export OPENSSL_ia32cap="~0x200000200000000"
+  else
+    unset OPENSSL_ia32cap
+  fi
+}
+
+python3 "$ROOT_DIR/blocks.py" schedule --ports "${PORTS[@]}" --aes "${AES_MODES[@]}" \
+  --blocks "$BLOCKS" --seed "$SEED" --out "$RUN_DIR/schedule.json" > "$RUN_DIR/schedule.tsv"
+
+arms=$(( ${#PORTS[@]} * ${#AES_MODES[@]} ))
+total=$(( arms * BLOCKS ))
+echo "🎲 Plan blokowy: $BLOCKS bloków × $arms ramion ($BLOCK_TEST), seed=$SEED -> $RUN_DIR"
+
+done_cells=0
+missing=0
+while IFS=$'\t' read -r block order port aes; do
+  done_cells=$((done_cells + 1))
+  echo "▶ [$done_cells/$total] blok $block #$order: port $port, AES $aes"
+  apply_aes "$aes"
+  tag="block${block}"
+  # Wynik musi powstać w tej komórce — latest zwróciłby inaczej plik z poprzedniego bloku
+  # (ta sama ścieżka <profil>_aes_X_...) i zdublowane dane weszłyby do testów sparowanych
+  marker="$RUN_DIR/.cell_start"
+  touch "$marker"
+  rc=0
+  if [[ $BLOCK_TEST == handshake ]]; then
+    SAMPLES="$SAMPLES" RUN_TAG="$tag" RESULTS_DIR="$OUTDIR" \
+      "$ROOT_DIR/scripts/run_handshake.sh" "$port" >/dev/null || rc=$?
+    src=$(find_result --test handshake --port "$port" --aes "$aes" --samples "$SAMPLES")
+    dst="$RUN_DIR/blocks/handshake_${port}_aes_${aes}_b$(printf %03d "$block").json"
+  else
+    REQUESTS="$REQUESTS" PAYLOAD_SIZE_MB="$PAYLOAD_SIZE_MB" CONCURRENCY="$CONCURRENCY" \
+      RUN_TAG="$tag" RESULTS_DIR="$OUTDIR" \
+      "$ROOT_DIR/scripts/run_bulk.sh" "$port" >/dev/null || rc=$?
+    src=$(find_result --test bulk --port "$port" --aes "$aes" --requests "$REQUESTS" \
+      --payload "$PAYLOAD_SIZE_MB" --concurrency "$CONCURRENCY")
+    dst="$RUN_DIR/blocks/bulk_${port}_aes_${aes}_b$(printf %03d "$block").json"
+  fi
+  if [[ $rc -ne 0 || -z "$src" || ! -f "$src" || ! "$src" -nt "$marker" ]]; then
+    echo "  ⚠️  brak wyniku dla bloku $block (port $port, AES $aes$([[ $rc -ne 0 ]] && echo ", kod $rc"))"
+    missing=$((missing + 1))
+    continue
+  fi
+  jq --argjson block "$block" --argjson order "$order" --argjson seed "$SEED" \
+     --arg aes "$aes" --arg test "$BLOCK_TEST" \
+     '. + {block: $block, block_order: $order, block_seed: $seed, block_aes: $aes, block_test: $test}' \
+     "$src" > "$dst"
+  [[ -f "${src%.json}.raw" ]] && cp "${src%.json}.raw" "${dst%.json}.raw"
+done < "$RUN_DIR/schedule.tsv"
+unset OPENSSL_ia32cap
+rm -f "$RUN_DIR/.cell_start"
+
+cat >> "$RUN_DIR/config.txt" <<EOF
+
+=== FINAL STATISTICS ===
+Cells: $total
+Missing: $missing
+Completed at: $(date)
+EOF
+
+echo ""
+python3 "$ROOT_DIR/blocks.py" analyze "$RUN_DIR" ||
+  echo "⚠️  Analiza sparowana nie powiodła się (za mało bloków z parą on/off?)"
+echo "✅ Wyniki blokowe: $RUN_DIR"
@@ -16,37 +16,16 @@ fi
 if [[ $# -eq 1 ]]; then
   PORTS=("$1")
 else
-  PORTS=(4431 4432 8443 4434 4435 11112)
+  PORTS=(${PORTS:-4431 4432 8443 4434 4435 11112})
 fi
 
 REQUESTS=${REQUESTS:-64}
 PAYLOAD_SIZE_MB=${PAYLOAD_SIZE_MB:-1}
 PAYLOAD_SIZE_BYTES=$(awk -v m="$PAYLOAD_SIZE_MB" 'BEGIN{printf "%d", m*1048576}')
 CONCURRENCY=${CONCURRENCY:-8}
-OUTDIR="$ROOT_DIR/results"; mkdir -p "$OUTDIR"
-
-# Determine NetEm profile from current network conditions
-get_netem_profile() {
-  # Check if NetEm is active and determine profile
-  if command -v dnctl >/dev/null 2>&1; then
-    local pipe_info=$(dnctl list 2>/dev/null | grep "pipe 1" || echo "")
-    if [[ -n "$pipe_info" ]]; then
-      if echo "$pipe_info" | grep -q "delay 50ms.*plr 0.005"; then
-        echo "delay_50ms_loss_0.5"  # P2
-      elif echo "$pipe_info" | grep -q "delay 50ms.*plr 0"; then
-        echo "delay_50ms"           # P1
-      elif echo "$pipe_info" | grep -q "delay 100ms.*plr 0"; then
-        echo "delay_100ms"          # P3
-      else
-        echo "custom"
-      fi
-    else
-      echo "baseline"               # P0 (no NetEm)
-    fi
-  else
-    echo "baseline"
-  fi
-}
+OUTDIR="${RESULTS_DIR:-$ROOT_DIR/results}"; mkdir -p "$OUTDIR"
+
+source "$ROOT_DIR/scripts/common.sh"
 
 # Create organized folder structure
 NETEM_PROFILE=$(get_netem_profile)
@@ -65,7 +44,7 @@ PORTS_KEY=$(join_ports "${PORTS[@]}")
 RUN_TAG_SUFFIX=${RUN_TAG:+_$(echo "$RUN_TAG" | tr ' ' '_')}
 SERIES_DIR="$OUTDIR/series/bulk/ports_${PORTS_KEY}_r${REQUESTS}_p${PAYLOAD_SIZE_MB}_c${CONCURRENCY}_${AES_TAG}${RUN_TAG_SUFFIX}"
 rm -rf "$SERIES_DIR" 2>/dev/null || true
-mkdir -p "$SERIES_DIR" "$ROOT_DIR/results/raw"
+mkdir -p "$SERIES_DIR"
 
 printf "script=run_bulk.sh\nports=%s\nrequests=%s\npayload_mb=%s\nconcurrency=%s\naes=%s\nnetem_profile=%s\nrun_tag=%s\nstarted_at=%s\n" \
   "$PORTS_KEY" "$REQUESTS" "$PAYLOAD_SIZE_MB" "$CONCURRENCY" "$AES_TAG" "$NETEM_PROFILE" "${RUN_TAG:-}" "$(date -Iseconds)" >"$SERIES_DIR/series_info.txt"
@@ -77,8 +56,39 @@ echo "🔐 AES status: $AES_TAG"
 echo "📦 Payload: ${PAYLOAD_SIZE_MB}MB, Concurrency: ${CONCURRENCY}, Requests: ${REQUESTS}"
 echo ""
 
+# Tryb fan-out (FANOUT=K): K klientów na dedykowanych rdzeniach (fanout.py), start
+# przez barierę, próbki scalone w tę samą komórkę (JSON + .raw) co tryb klasyczny
+if [[ "${FANOUT:-0}" -gt 1 ]]; then
+  for PORT in "${PORTS[@]}"; do
+    out="$TEST_DIR/bulk_${PORT}_r${REQUESTS}_p${PAYLOAD_SIZE_MB}_c${CONCURRENCY}.json"
+    if ! python3 "$ROOT_DIR/fanout.py" run --port "$PORT" --clients "$FANOUT" \
+        --requests "$REQUESTS" --concurrency "$CONCURRENCY" --payload "$PAYLOAD_SIZE_MB" \
+        --host "$HOST" --aes "${AES_TAG#aes_}" --profile "$NETEM_PROFILE" \
+        --mode "${FANOUT_MODE:-container}" --cpus "${FANOUT_CPUS:-auto}" --out "$out"; then
+      echo "❌ Fan-out failed for port $PORT"
+      continue
+    fi
+    cp "$out" "$TEST_DIR/bulk_${PORT}.json"
+    cp "${out%.json}.raw" "$TEST_DIR/bulk_${PORT}.raw"
+    cp "$out" "$SERIES_DIR/bulk_${PORT}_r${REQUESTS}_p${PAYLOAD_SIZE_MB}_c${CONCURRENCY}.json"
+  done
+  echo ""; echo "✅ Fan-out bulk throughput testing completed (${FANOUT} clients)"
+  exit 0
+fi
+
 echo "Using consistent Docker OpenSSL methodology for all ports"
-mkdir -p results/raw
+
+# Zegar hosta w ns (macOS date nie zna %N)
+now_ns() {
+  local t
+  t=$(date +%s%N)
+  if [[ "$t" =~ ^[0-9]+$ ]]; then echo "$t"; else python3 -c 'import time; print(time.time_ns())'; fi
+}
+
+# Rekord surowej próbki: start_ns, end_ns (= start + czas z time -p), bytes
+record_sample() {
+  awk -v s="$1" -v t="$2" -v b="$PAYLOAD_SIZE_BYTES" 'BEGIN{printf "%.0f %.0f %d\n", s, s + t * 1e9, b}' >>"$3"
+}
 
 measure() {
   local host=$1 port=$2
@@ -111,7 +121,15 @@ measure() {
 
 for PORT in "${PORTS[@]}"; do
   echo ""; echo ">> Testing ${HOST}:${PORT} (Docker OpenSSL)"
-  raw="results/raw/bulk_${PORT}.txt"; : >"$raw"
+  # Czasy żądań (JSON) i surowe rekordy komórki (.raw) — pliki tymczasowe per port
+  raw=$(mktemp); samples=$(mktemp)
+  # Kalibracja narzutu harnessu przed komórką (CALIBRATE=0 wyłącza)
+  calibration=null
+  if [[ "${CALIBRATE:-1}" == "1" ]]; then
+    calibration=$("$ROOT_DIR/scripts/calibrate_harness.sh" "$PORT" 2>/dev/null || echo null)
+    [[ -n "$calibration" ]] || calibration=null
+    jq -r 'if . then "  🧪 Narzut harnessu: \(.harness_overhead_s * 1e6 | round / 1000) ms (p50 pustego klienta), rozdzielczość zegara \(.timer_resolution_s) s" else "  ⚠️  Kalibracja harnessu nieudana" end' <<<"$calibration"
+  fi
   total_req_seconds=0
   total_wall_seconds=0
   successful=0
@@ -121,19 +139,21 @@ for PORT in "${PORTS[@]}"; do
     # Sequential mode (original behavior)
     for i in $(seq "$REQUESTS"); do
       echo -n "  Request $i/$REQUESTS: "
+      t0=$(now_ns)
       if t=$(measure "$HOST" "$PORT" 2>/dev/null); then
         if [[ -n "$t" && "$t" != "0" && "$t" != "" ]]; then
           echo "$t" >>"$raw"
+          record_sample "$t0" "$t" "$samples"
           total_req_seconds=$(echo "$total_req_seconds + $t" | bc -l)
           printf "%.3fs ✅\n" "$t"
-          ((successful++))
+          successful=$((successful + 1))
         else
           echo "FAILED (empty) ❌"
-          ((failed++))
+          failed=$((failed + 1))
         fi
       else
         echo "FAILED (error) ❌"
-        ((failed++))
+        failed=$((failed + 1))
       fi
     done
     total_wall_seconds=$total_req_seconds
@@ -150,9 +170,11 @@ for PORT in "${PORTS[@]}"; do
       pids=()
       for j in $(seq "$this_batch"); do
         (
+          t0=$(now_ns)
           if t=$(measure "$HOST" "$PORT" 2>/dev/null); then
             if [[ -n "$t" && "$t" != "0" && "$t" != "" ]]; then
               echo "$t" >>"$raw"
+              record_sample "$t0" "$t" "$samples"
               echo "$t" >"$tmpdir/t.$j"
               exit 0
             fi
@@ -165,7 +187,7 @@ for PORT in "${PORTS[@]}"; do
       batch_failed=0
       for pid in "${pids[@]}"; do
         if ! wait "$pid"; then
-          ((batch_failed++))
+          batch_failed=$((batch_failed + 1))
         fi
       done
       end=$(date +%s.%N)
@@ -176,10 +198,10 @@ for PORT in "${PORTS[@]}"; do
         if [[ -f "$f" ]]; then
           val=$(cat "$f")
           total_req_seconds=$(echo "$total_req_seconds + $val" | bc -l)
-          ((successful++))
+          successful=$((successful + 1))
         fi
       done
-      ((failed+=batch_failed))
+      failed=$((failed + batch_failed))
       rm -rf "$tmpdir"
       printf "    Batch elapsed: %.3fs, success so far: %d, failed: %d\n" "$batch_elapsed" "$successful" "$failed"
     done
@@ -187,6 +209,7 @@ for PORT in "${PORTS[@]}"; do
 
   if [[ $successful -eq 0 ]]; then
     echo "❌ All requests failed for port $PORT"
+    rm -f "$raw" "$samples"
     continue
   fi
 
@@ -207,6 +230,8 @@ for PORT in "${PORTS[@]}"; do
         --arg successful "$successful" --arg total_requests "$REQUESTS" \
         --arg failed "$failed" --arg payload "$PAYLOAD_SIZE_MB" \
         --arg throughput "$throughput_mbps" --arg concurrency "$CONCURRENCY" \
+        --argjson times "$(jq -s '.' "$raw")" \
+        --argjson calibration "$calibration" \
         '{
           host: $host, 
           port: ($port|tonumber),
@@ -218,6 +243,9 @@ for PORT in "${PORTS[@]}"; do
           payload_size_mb: ($payload|tonumber),
           throughput_mb_s: ($throughput|tonumber),
           concurrency: ($concurrency|tonumber),
+          request_times_s: $times,
+          calibration: $calibration,
+          harness_overhead_ms: (if $calibration then ($calibration.harness_overhead_s * 1e6 | round / 1000) else null end),
           measurement_method: "openssl_in_nginx_container_http_post",
           algorithm: (
             if ($port|tonumber) == 4431 then "X25519_AES-GCM"
@@ -232,6 +260,14 @@ for PORT in "${PORTS[@]}"; do
         }' > "$out"
   cp "$out" "$TEST_DIR/bulk_${PORT}.json"
   cp "$out" "$SERIES_DIR/bulk_${PORT}_r${REQUESTS}_p${PAYLOAD_SIZE_MB}_c${CONCURRENCY}.json"
+
+  # Surowe próbki komórki obok JSON (raw_samples.py, odczyt przez numpy.memmap)
+  python3 "$ROOT_DIR/raw_samples.py" pack "$samples" "${out%.json}.raw" \
+    --port "$PORT" --requests "$REQUESTS" --payload "$PAYLOAD_SIZE_MB" \
+    --concurrency "$CONCURRENCY" --aes "${AES_TAG#aes_}" \
+    --profile "$NETEM_PROFILE" >/dev/null
+  cp "${out%.json}.raw" "$TEST_DIR/bulk_${PORT}.raw"
+  rm -f "$raw" "$samples"
 done
 
 echo ""; echo "✅ Consistent bulk throughput testing completed"
@@ -0,0 +1,57 @@
+#!/usr/bin/env bash
+# Pojemność pod SLO (capacity.py): dla każdego profilu NetEm i portu bisekcja tempa
+# przybyć open-loop do najwyższego obciążenia z p99 ≤ SLO_P99_MS i błędami ≤ SLO_ERROR_RATE.
+#   ./scripts/run_capacity.sh                         # uploady/s, wszystkie porty, P0–P3
+#   CAP_MODE=handshake PROFILES="P0 P1" ./scripts/run_capacity.sh 4431 8443
+set -euo pipefail
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+if [[ $# -ge 1 ]]; then
+  PORTS=("$@")
+else
+  PORTS=(${PORTS:-4431 4432 8443 4434 4435 11112})
+fi
+PROFILES=(${PROFILES:-P0 P1 P2 P3})
+CAP_MODE=${CAP_MODE:-upload}             # upload | handshake
+PAYLOAD_SIZE_MB=${PAYLOAD_SIZE_MB:-1}
+SLO_P99_MS=${SLO_P99_MS:-500}
+SLO_ERROR_RATE=${SLO_ERROR_RATE:-0.01}
+CAP_WARMUP_S=${CAP_WARMUP_S:-2}
+CAP_WINDOW_S=${CAP_WINDOW_S:-10}
+CAP_START_RATE=${CAP_START_RATE:-2}
+CAP_MAX_RATE=${CAP_MAX_RATE:-512}
+CAP_PRECISION=${CAP_PRECISION:-0.05}
+CAP_ARRIVAL=${CAP_ARRIVAL:-poisson}
+CAP_CLIENT=${CAP_CLIENT:-container}      # container | process (klient na hoście)
+SEED=${SEED:-20250101}
+OUTDIR="${RESULTS_DIR:-$ROOT_DIR/results}"
+
+AES=$([[ "${OPENSSL_ia32cap:-}" == "~0x200000200000000" ]] && echo "off" || echo "on")
+
+# Profile NetEm mają sens tylko dla kontenerów; localtls/TLS_TARGET=local — bez NetEm
+netem() {
+  [[ "${TLS_TARGET:-}" == local ]] && return 0
+  "$ROOT_DIR/scripts/netem_profiles.sh" "$1" || true
+}
+trap 'netem clear' EXIT
+
+echo "==== Pojemność pod SLO ($CAP_MODE, p99 ≤ ${SLO_P99_MS} ms, błędy ≤ ${SLO_ERROR_RATE}) ===="
+echo "🌐 Profile: ${PROFILES[*]}, 🔐 AES: $AES, porty: ${PORTS[*]}"
+
+for profile in "${PROFILES[@]}"; do
+  echo "==> Applying NetEm profile: $profile"
+  netem "$profile"
+  for port in "${PORTS[@]}"; do
+    python3 "$ROOT_DIR/capacity.py" search --port "$port" --mode "$CAP_MODE" \
+      --payload "$PAYLOAD_SIZE_MB" --profile "$profile" --aes "$AES" \
+      --slo-p99-ms "$SLO_P99_MS" --slo-error-rate "$SLO_ERROR_RATE" \
+      --warmup "$CAP_WARMUP_S" --window "$CAP_WINDOW_S" \
+      --start-rate "$CAP_START_RATE" --max-rate "$CAP_MAX_RATE" --precision "$CAP_PRECISION" \
+      --arrival "$CAP_ARRIVAL" --seed "$SEED" --client "$CAP_CLIENT" --results "$OUTDIR" ||
+      echo "⚠️  port $port ($profile): wyszukiwanie nie powiodło się"
+  done
+done
+
+python3 "$ROOT_DIR/capacity.py" summary --results "$OUTDIR" \
+  --figures "$([[ "${TLS_TARGET:-}" == local ]] && echo "$ROOT_DIR/figures_local" || echo "$ROOT_DIR/figures")" || true
+echo "✅ Pojemność: $OUTDIR/capacity/"
@@ -0,0 +1,190 @@
+#!/usr/bin/env bash
+set -euo pipefail
+# Macierz certyfikatów: typ/rozmiar klucza × głębokość łańcucha -> handshake (latencja,
+# CPU serwera, bajty handshake'u). Dla każdej konfiguracji: gen-certs.sh matrix (cache),
+# render szablonów serwerów, przeładowanie, SAMPLES handshake'ów jednym docker exec.
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+HOST=localhost
+
+CERT_KEYS=(${CERT_KEYS:-ecdsa-p256 ecdsa-p384 ed25519 rsa-2048 rsa-3072 rsa-4096})
+CERT_DEPTHS=(${CERT_DEPTHS:-1 2 3})
+# Serwery: nginx (OpenSSL, 4441), lighttpd (wolfSSL, 4436), wolf-server (11113)
+CERT_SERVERS=(${CERT_SERVERS:-nginx lighttpd wolfssl})
+SAMPLES=${SAMPLES:-20}
+OUTDIR="${RESULTS_DIR:-$ROOT_DIR/results}"; mkdir -p "$OUTDIR"
+
+NGINX_PORT=4441
+LIGHTTPD_PORT=4436
+WOLF_PORT=11113
+
+source "$ROOT_DIR/scripts/common.sh"
+
+NETEM_PROFILE=$(get_netem_profile)
+AES_TAG=${FORCE_AES_TAG:-$([[ "${OPENSSL_ia32cap:-}" == "~0x200000200000000" ]] && echo "aes_off" || echo "aes_on")}
+TEST_DIR="$OUTDIR/cert_matrix/${NETEM_PROFILE}_${AES_TAG}_s${SAMPLES}"
+if [[ "${CLEAN:-1}" == "1" ]]; then
+  rm -rf "$TEST_DIR" 2>/dev/null || true
+fi
+mkdir -p "$TEST_DIR"
+
+NGINX_CONF="$ROOT_DIR/docker/nginx-oqs/conf.d/zz-cert-matrix.conf"
+LIGHTTPD_CONF="$ROOT_DIR/docker/lighttpd-wolfssl/conf.d/cert-matrix.conf"
+
+render() {
+  # render <szablon> <cel> <port> <cert_id>
+  sed -e "s|@PORT@|$3|g" -e "s|@CERT_ID@|$4|g" "$1" >"$2"
+}
+
+wait_port() {
+  local port=$1 i
+  for i in $(seq 50); do
+    timeout 1 bash -c "echo >/dev/tcp/$HOST/$port" 2>/dev/null && return 0
+    sleep 0.2
+  done
+  return 1
+}
+
+stop_wolf() {
+  docker exec wolfssl-server-kyber sh -c "pkill -f 'wolf-server .*-p $WOLF_PORT' || true" >/dev/null 2>&1 || true
+}
+
+cleanup() {
+  rm -f "$NGINX_CONF" "$LIGHTTPD_CONF"
+  docker exec tls-perf-nginx nginx -s reload >/dev/null 2>&1 || true
+  docker restart lighttpd-wolfssl >/dev/null 2>&1 || true
+  stop_wolf
+}
+trap cleanup EXIT
+
+# Przełącza serwer na certyfikat <cert_id>; zwraca port
+deploy() {
+  local server=$1 id=$2
+  case $server in
+    nginx)
+      render "$ROOT_DIR/docker/nginx-oqs/templates/cert-matrix.conf.tmpl" "$NGINX_CONF" "$NGINX_PORT" "$id"
+      docker exec tls-perf-nginx nginx -t >/dev/null 2>&1 || return 1
+      docker exec tls-perf-nginx nginx -s reload >/dev/null
+      sleep 0.5  # stare workery kończą się po reload
+      ;;
+    lighttpd)
+      # mod_wolfssl nie przeładowuje certyfikatów gniazda — restart kontenera
+      render "$ROOT_DIR/docker/lighttpd-wolfssl/templates/cert-matrix.conf.tmpl" "$LIGHTTPD_CONF" "$LIGHTTPD_PORT" "$id"
+      docker restart lighttpd-wolfssl >/dev/null
+      wait_port "$LIGHTTPD_PORT" || return 1
+      ;;
+    wolfssl)
+      stop_wolf
+      local args
+      args=$(sed -e "s|@PORT@|$WOLF_PORT|g" -e "s|@CERT_ID@|$id|g" \
+        "$ROOT_DIR/docker/wolfssl-server/templates/cert-matrix.args.tmpl")
+      docker exec -d -w /tmp/wolfssl wolfssl-server-kyber sh -c "exec /usr/local/bin/wolf-server $args"
+      sleep 0.5
+      ;;
+  esac
+}
+
+# SAMPLES handshake'ów w jednej pętli w kontenerze klienta; linia na próbkę:
+# "czas_ns bajty_odczytane bajty_wysłane ok" (bajty z s_client; wolfSSL: "-")
+measure() {
+  local server=$1 id=$2
+  case $server in
+    nginx|lighttpd)
+      local port=$NGINX_PORT
+      [[ "$server" == "lighttpd" ]] && port=$LIGHTTPD_PORT
+      docker exec -e OPENSSL_ia32cap="${OPENSSL_ia32cap:-~0}" tls-perf-nginx sh -c '
+        for i in $(seq '"$SAMPLES"'); do
+          t0=$(date +%s%N)
+          out=$(/usr/local/bin/openssl s_client -provider default -tls1_3 \
+            -CAfile /etc/nginx/certs/matrix/'"$id"'/root.pem \
+            -connect '"$HOST:$port"' </dev/null 2>&1)
+          t1=$(date +%s%N)
+          rw=$(echo "$out" | sed -n "s/.*handshake has read \([0-9]*\) bytes and written \([0-9]*\).*/\1 \2/p")
+          ok=0; echo "$out" | grep -q "Verify return code: 0 (ok)" && ok=1
+          echo "$((t1 - t0)) ${rw:-- -} $ok"
+        done'
+      ;;
+    wolfssl)
+      docker exec wolfssl-cli sh -c '
+        srv_ip=$(getent hosts wolfssl-server-kyber 2>/dev/null | awk "{print \$1}"); srv_ip=${srv_ip:-172.21.0.2}
+        for i in $(seq '"$SAMPLES"'); do
+          t0=$(date +%s%N)
+          ok=0
+          echo | /usr/local/bin/wolf-client -h $srv_ip -p '"$WOLF_PORT"' -v 4 \
+            -A /certs/matrix/'"$id"'/root.pem >/dev/null 2>&1 && ok=1
+          t1=$(date +%s%N)
+          echo "$((t1 - t0)) - - $ok"
+        done'
+      ;;
+  esac
+}
+
+echo "==== Certificate matrix (${CERT_KEYS[*]} × depth ${CERT_DEPTHS[*]}, ${SAMPLES} samples) ===="
+echo "📁 Test directory: $TEST_DIR"
+echo "🌐 NetEm profile: $NETEM_PROFILE"
+echo "🔐 AES status: $AES_TAG"
+echo ""
+
+for key in "${CERT_KEYS[@]}"; do
+  for depth in "${CERT_DEPTHS[@]}"; do
+    "$ROOT_DIR/scripts/gen-certs.sh" matrix "$key" "$depth" | tail -1
+    id="${key}_d${depth}"
+    chain="$ROOT_DIR/certs/matrix/$id/chain.pem"
+    # Rozmiar łańcucha wysyłanego przez serwer (DER, suma certyfikatów)
+    chain_bytes=$(awk '/BEGIN CERT/{f=1; b=""; next} /END CERT/{f=0; print b; next} f{b=b $0}' "$chain" \
+      | while read -r b64; do echo "$b64" | base64 -d | wc -c; done | awk '{s+=$1} END{print s+0}')
+
+    for server in "${CERT_SERVERS[@]}"; do
+      echo "🔑 $server: $id (łańcuch ${chain_bytes} B DER)"
+      if ! deploy "$server" "$id"; then
+        echo "  ⚠️  $server nie przyjął certyfikatu $id — pomijam"
+        continue
+      fi
+      samples=$(mktemp)
+      cpu_before=$(server_cpu_ticks "$server")
+      measure "$server" "$id" >"$samples" 2>/dev/null || true
+      cpu_after=$(server_cpu_ticks "$server")
+
+      port=$NGINX_PORT
+      [[ "$server" == "lighttpd" ]] && port=$LIGHTTPD_PORT
+      [[ "$server" == "wolfssl" ]] && port=$WOLF_PORT
+      out="$TEST_DIR/certmatrix_${port}_${id}_s${SAMPLES}.json"
+      jq -Rn --arg server "$server" --arg port "$port" --arg key "$key" --arg depth "$depth" \
+        --arg chain_bytes "$chain_bytes" --arg n "$SAMPLES" \
+        --arg cpu0 "$cpu_before" --arg cpu1 "$cpu_after" '
+        def pct(p): sort | if length == 0 then null else .[((length - 1) * p | floor)] end;
+        def num: if . == "-" then null else tonumber end;
+        [inputs | split(" ") | select(length == 4)
+          | {t: ((.[0] | tonumber) / 1e9), rd: (.[1] | num), wr: (.[2] | num), ok: (.[3] == "1")}] as $rows
+        | ($rows | map(select(.ok))) as $ok
+        | ($ok | map(.t)) as $t
+        | ($cpu0 | split(" ")) as $a | ($cpu1 | split(" ")) as $b
+        | {
+            port: ($port | tonumber),
+            server: $server,
+            cert_key: $key,
+            chain_depth: ($depth | tonumber),
+            chain_bytes: ($chain_bytes | tonumber),
+            samples: ($n | tonumber),
+            successful_measurements: ($ok | length),
+            failed_measurements: (($rows | length) - ($ok | length)),
+            mean_ms: (if ($t | length) > 0 then ($t | add / length * 1000) else null end),
+            p50_ms: ($t | pct(0.5) | if . then . * 1000 else null end),
+            p95_ms: ($t | pct(0.95) | if . then . * 1000 else null end),
+            raw_measurements: $t,
+            server_cpu_ms_per_handshake: (
+              if ($a | length) == 2 and ($b | length) == 2 and ($ok | length) > 0 and ($b[1] | tonumber) > 0
+              then (($b[0] | tonumber) - ($a[0] | tonumber)) * 1000 / ($b[1] | tonumber) / ($ok | length)
+              else null end),
+            handshake_bytes_read: ($ok | map(.rd) | map(select(. != null)) | pct(0.5)),
+            handshake_bytes_written: ($ok | map(.wr) | map(select(. != null)) | pct(0.5)),
+            measurement_method: (if $server == "wolfssl" then "wolfssl_cli_loop" else "openssl_s_client_loop" end)
+          }' <"$samples" >"$out"
+      rm -f "$samples"
+      jq -r '"  📊 p50 \(.p50_ms // "–") ms, CPU serwera \(.server_cpu_ms_per_handshake // "–") ms/hs, bajty serwera \(.handshake_bytes_read // "–") (\(.successful_measurements)/\(.samples) ok)"' "$out"
+    done
+  done
+done
+
+python3 "$ROOT_DIR/cert_matrix.py" analyze "$TEST_DIR" || true
+echo "✅ Certificate matrix finished"
+echo "📁 Results saved in: $TEST_DIR/"
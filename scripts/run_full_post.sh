@@ -13,35 +13,14 @@ fi
 if [[ $# -eq 1 ]]; then
   PORTS=("$1")
 else
-  PORTS=(4431 4432 8443)
+  PORTS=(${PORTS:-4431 4432 8443})
 fi
 
 COUNT=${COUNT:-3}
 EARLY_DATA_MB=${EARLY_DATA_MB:-8}
-OUTDIR="$ROOT_DIR/results"; mkdir -p "$OUTDIR"
+OUTDIR="${RESULTS_DIR:-$ROOT_DIR/results}"; mkdir -p "$OUTDIR"
 
-# Determine NetEm profile from current network conditions
-get_netem_profile() {
-  # Check if NetEm is active and determine profile
-  if command -v dnctl >/dev/null 2>&1; then
-    local pipe_info=$(dnctl list 2>/dev/null | grep "pipe 1" || echo "")
-    if [[ -n "$pipe_info" ]]; then
-      if echo "$pipe_info" | grep -q "delay 50ms.*plr 0.005"; then
-        echo "delay_50ms_loss_0.5"  # P2
-      elif echo "$pipe_info" | grep -q "delay 50ms.*plr 0"; then
-        echo "delay_50ms"           # P1
-      elif echo "$pipe_info" | grep -q "delay 100ms.*plr 0"; then
-        echo "delay_100ms"          # P3
-      else
-        echo "custom"
-      fi
-    else
-      echo "baseline"               # P0 (no NetEm)
-    fi
-  else
-    echo "baseline"
-  fi
-}
+source "$ROOT_DIR/scripts/common.sh"
 
 # Create organized folder structure
 NETEM_PROFILE=$(get_netem_profile)
@@ -0,0 +1,115 @@
+#!/usr/bin/env bash
+# HTTP/2 multipleksowany upload (h2load w tls-perf-nginx) vs HTTP/1.1 przy tej samej
+# łącznej współbieżności S:
+#   h2: S strumieni na H2_CONNS połączeniach (-c C -m S/C, S podzielne przez C), okna -w/-W
+#   h1: h2load --h1 -c S (S połączeń keep-alive; Connection: close mierzy run_bulk.sh)
+# Domyślnie profile P0 i P2 (strata 0.5% — efekty head-of-line), na końcu h2.py analyze.
+#   H2_STREAMS=32 H2_CONNS=4 REQUESTS=256 PAYLOAD_SIZE_MB=1 ./scripts/run_h2.sh
+#   H2_WINDOW_BITS=20 H2_BODY_PREREAD=1m PROFILES="P2" ./scripts/run_h2.sh 4431 8443
+set -euo pipefail
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+HOST=localhost
+
+# http2 on mają tylko serwery nginx
+if [[ $# -ge 1 ]]; then
+  PORTS=("$@")
+else
+  PORTS=(${PORTS:-4431 4432 8443})
+fi
+PROFILES=(${PROFILES:-P0 P2})
+H2_PROTOCOLS=(${H2_PROTOCOLS:-h2 h1})
+H2_STREAMS=${H2_STREAMS:-32}              # S — łączna współbieżność (strumienie / połączenia h1)
+H2_CONNS=${H2_CONNS:-4}                   # C — połączenia h2
+H2_WINDOW_BITS=${H2_WINDOW_BITS:-30}      # h2load -w: okno strumienia klienta 2^N-1 (odpowiedzi)
+H2_CONN_WINDOW_BITS=${H2_CONN_WINDOW_BITS:-30}  # h2load -W: okno połączenia klienta
+H2_BODY_PREREAD=${H2_BODY_PREREAD:-}      # nginx http2_body_preread_size (okno uploadu), np. 1m
+REQUESTS=${REQUESTS:-256}
+PAYLOAD_SIZE_MB=${PAYLOAD_SIZE_MB:-1}
+OUTDIR="${RESULTS_DIR:-$ROOT_DIR/results}"
+
+AES_TAG=${FORCE_AES_TAG:-$([[ "${OPENSSL_ia32cap:-}" == "~0x200000200000000" ]] && echo "aes_off" || echo "aes_on")}
+# h2load -m jest na połączenie — przy S niepodzielnym przez C łącznie C·m > S
+if (( H2_CONNS < 1 || H2_STREAMS % H2_CONNS != 0 )); then
+  echo "❌ H2_STREAMS (${H2_STREAMS}) musi być wielokrotnością H2_CONNS (${H2_CONNS})"
+  exit 1
+fi
+PER_CONN=$(( H2_STREAMS / H2_CONNS ))
+BYTES=$(awk -v mb="$PAYLOAD_SIZE_MB" 'BEGIN{printf "%d", mb * 1048576}')
+
+profile_label() {
+  case $1 in
+    P0) echo baseline ;;
+    P1) echo delay_50ms ;;
+    P2) echo delay_50ms_loss_0.5 ;;
+    P3) echo delay_100ms ;;
+    *)  echo "$1" ;;
+  esac
+}
+
+# Okno uploadu h2 ustala serwer (http2_body_preread_size) — konfiguracja na czas runu
+PREREAD_CONF="$ROOT_DIR/docker/nginx-oqs/conf.d/zz-h2-window.conf"
+cleanup() {
+  "$ROOT_DIR/scripts/netem_profiles.sh" clear >/dev/null 2>&1 || true
+  if [[ -f "$PREREAD_CONF" ]]; then
+    rm -f "$PREREAD_CONF"
+    docker exec tls-perf-nginx nginx -s reload >/dev/null 2>&1 || true
+  fi
+}
+trap cleanup EXIT
+if [[ -n "$H2_BODY_PREREAD" ]]; then
+  echo "http2_body_preread_size $H2_BODY_PREREAD;" > "$PREREAD_CONF"
+  docker exec tls-perf-nginx nginx -t >/dev/null 2>&1 || { echo "❌ nginx -t: zła wartość H2_BODY_PREREAD"; exit 1; }
+  docker exec tls-perf-nginx nginx -s reload >/dev/null
+  sleep 0.5
+fi
+
+docker exec tls-perf-nginx sh -c "command -v h2load >/dev/null" ||
+  { echo "❌ brak h2load w tls-perf-nginx — przebuduj obraz: docker compose build nginx-tls"; exit 1; }
+docker exec tls-perf-nginx sh -c "head -c $BYTES /dev/zero > /tmp/h2_body.bin"
+
+echo "==== HTTP/2 vs HTTP/1.1 upload (${PAYLOAD_SIZE_MB}MB, S=${H2_STREAMS}, h2: C=${H2_CONNS} × m=${PER_CONN}) ===="
+echo "🌐 Profile: ${PROFILES[*]}, 🔐 AES: $AES_TAG, porty: ${PORTS[*]}"
+
+for profile in "${PROFILES[@]}"; do
+  echo "==> Applying NetEm profile: $profile"
+  "$ROOT_DIR/scripts/netem_profiles.sh" "$profile" >/dev/null || true
+  label=$(profile_label "$profile")
+  TEST_DIR="$OUTDIR/h2/${label}_${AES_TAG}_r${REQUESTS}_p${PAYLOAD_SIZE_MB}_c${H2_STREAMS}_conn${H2_CONNS}"
+  mkdir -p "$TEST_DIR"
+
+  for port in "${PORTS[@]}"; do
+    args=(-n "$REQUESTS" -d /tmp/h2_body.bin -H "Content-Type: application/octet-stream")
+    case $port in
+      8443) args+=(--groups X25519MLKEM768) ;;
+    esac
+    for proto in "${H2_PROTOCOLS[@]}"; do
+      if [[ $proto == h2 ]]; then
+        conns=$H2_CONNS
+        pargs=(-c "$H2_CONNS" -m "$PER_CONN" -w "$H2_WINDOW_BITS" -W "$H2_CONN_WINDOW_BITS" --alpn-list=h2)
+      else
+        conns=$H2_STREAMS
+        pargs=(--h1 -c "$H2_STREAMS" -m 1)
+      fi
+      echo "-- port=${port} ${proto}: ${conns} połączeń, S=${H2_STREAMS} --"
+      log="/tmp/h2load_${port}_${proto}.log"
+      stdout_file=$(mktemp)
+      log_file=$(mktemp)
+      docker exec -e OPENSSL_ia32cap="${OPENSSL_ia32cap:-~0}" tls-perf-nginx \
+        h2load "${args[@]}" "${pargs[@]}" --log-file="$log" "https://${HOST}:${port}/upload" \
+        >"$stdout_file" 2>&1 || true
+      docker exec tls-perf-nginx sh -c "cat $log 2>/dev/null; rm -f $log" >"$log_file" || true
+      python3 "$ROOT_DIR/h2.py" cell --stdout "$stdout_file" --log "$log_file" \
+        --port "$port" --protocol "$proto" --connections "$H2_CONNS" --streams "$H2_STREAMS" \
+        --requests "$REQUESTS" --payload "$PAYLOAD_SIZE_MB" \
+        --window-bits "$H2_WINDOW_BITS" --connection-window-bits "$H2_CONN_WINDOW_BITS" \
+        --server-preread "$H2_BODY_PREREAD" --profile "$profile" --aes "${AES_TAG#aes_}" \
+        --out "$TEST_DIR/h2_${port}_${proto}_r${REQUESTS}_p${PAYLOAD_SIZE_MB}_c${H2_STREAMS}.json" ||
+        echo "  ⚠️  brak wyniku h2load (port $port, $proto)"
+      rm -f "$stdout_file" "$log_file"
+    done
+  done
+done
+
+docker exec tls-perf-nginx rm -f /tmp/h2_body.bin >/dev/null 2>&1 || true
+python3 "$ROOT_DIR/h2.py" analyze --results "$OUTDIR" || true
+echo "✅ HTTP/2: $OUTDIR/h2/"
@@ -13,34 +13,13 @@ fi
 if [[ $# -eq 1 ]]; then
   PORTS=("$1")
 else
-  PORTS=(4431 4432 8443 4434 4435 11112)
+  PORTS=(${PORTS:-4431 4432 8443 4434 4435 11112})
 fi
 
 SAMPLES=${SAMPLES:-10}
-OUTDIR="$ROOT_DIR/results"; mkdir -p "$OUTDIR"
+OUTDIR="${RESULTS_DIR:-$ROOT_DIR/results}"; mkdir -p "$OUTDIR"
 
-# Determine NetEm profile from current network conditions
-get_netem_profile() {
-  # Check if NetEm is active and determine profile
-  if command -v dnctl >/dev/null 2>&1; then
-    local pipe_info=$(dnctl list 2>/dev/null | grep "pipe 1" || echo "")
-    if [[ -n "$pipe_info" ]]; then
-      if echo "$pipe_info" | grep -q "delay 50ms.*plr 0.005"; then
-        echo "delay_50ms_loss_0.5"  # P2
-      elif echo "$pipe_info" | grep -q "delay 50ms.*plr 0"; then
-        echo "delay_50ms"           # P1
-      elif echo "$pipe_info" | grep -q "delay 100ms.*plr 0"; then
-        echo "delay_100ms"          # P3
-      else
-        echo "custom"
-      fi
-    else
-      echo "baseline"               # P0 (no NetEm)
-    fi
-  else
-    echo "baseline"
-  fi
-}
+source "$ROOT_DIR/scripts/common.sh"
 
 # Create organized folder structure
 NETEM_PROFILE=$(get_netem_profile)
@@ -168,10 +147,19 @@ for PORT in "${PORTS[@]}"; do
     continue
   fi
 
+  # Kalibracja narzutu harnessu przed komórką (CALIBRATE=0 wyłącza)
+  calibration=null
+  if [[ "${CALIBRATE:-1}" == "1" ]]; then
+    calibration=$("$ROOT_DIR/scripts/calibrate_harness.sh" "$PORT" 2>/dev/null || echo null)
+    [[ -n "$calibration" ]] || calibration=null
+    jq -r 'if . then "  🧪 Narzut harnessu: \(.harness_overhead_s * 1e6 | round / 1000) ms (p50 pustego klienta), rozdzielczość zegara \(.timer_resolution_s) s" else "  ⚠️  Kalibracja harnessu nieudana" end' <<<"$calibration"
+  fi
+
   echo "  Performing $SAMPLES handshake measurements..."
   total=0
   failed=0
   measurements=()
+  cpu_before=$(server_cpu_ticks "$PORT")
 
   for i in $(seq "$SAMPLES"); do
     if result=$(measure "$PORT" 2>/dev/null); then
@@ -181,11 +169,11 @@ for PORT in "${PORTS[@]}"; do
         printf "    Sample %2d: %.6fs\n" $i $result
       else
         echo "    Sample $i: Failed (empty result)"
-        ((failed++))
+        failed=$((failed + 1))
       fi
     else
       echo "    Sample $i: Failed (command error)  "
-      ((failed++))
+      failed=$((failed + 1))
     fi
   done
 
@@ -196,6 +184,13 @@ for PORT in "${PORTS[@]}"; do
   fi
 
   successful=$((SAMPLES - failed))
+  # CPU serwera na handshake (ms): Δ(utime+stime) procesów serwera / udane handshake'i
+  cpu_after=$(server_cpu_ticks "$PORT")
+  server_cpu_ms=null
+  if [[ -n "$cpu_before" && -n "$cpu_after" ]]; then
+    server_cpu_ms=$(awk -v a="$cpu_before" -v b="$cpu_after" -v n="$successful" \
+      'BEGIN{ split(a,x," "); split(b,y," "); if (y[2] > 0 && n > 0) printf "%.4f", (y[1]-x[1]) * 1000 / y[2] / n; else print "null" }')
+  fi
   mean_s=$(echo "scale=6; $total / $successful" | bc -l)
   mean_ms=$(echo "scale=3; $mean_s * 1000" | bc -l)
 
@@ -225,6 +220,8 @@ for PORT in "${PORTS[@]}"; do
     --arg mean_s "$mean_s" \
     --arg successful "$successful" \
     --arg total "$SAMPLES" \
+    --argjson server_cpu_ms "$server_cpu_ms" \
+    --argjson calibration "$calibration" \
     --argjson measurements "$(printf '%s\n' "${measurements[@]}" | jq -R . | jq -s 'map(tonumber)')" \
     '{
        port: ($port|tonumber),
@@ -236,6 +233,9 @@ for PORT in "${PORTS[@]}"; do
        failed_measurements: (($total|tonumber) - ($successful|tonumber)),
        measurement_method: "openssl_in_nginx_container",
        raw_measurements: $measurements,
+       server_cpu_ms_per_handshake: $server_cpu_ms,
+       calibration: $calibration,
+       harness_overhead_ms: (if $calibration then ($calibration.harness_overhead_s * 1e6 | round / 1000) else null end),
        algorithm: (
          if ($port|tonumber) == 4431 then "X25519_AES-GCM"
          elif ($port|tonumber) == 4432 then "X25519_ChaCha20"  
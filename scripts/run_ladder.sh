@@ -0,0 +1,52 @@
+#!/usr/bin/env bash
+set -euo pipefail
+# Drabina concurrency dla bulk (geometryczna, domyślnie 1…256) + kolano nasycenia
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+if [[ $# -ge 1 ]]; then
+  PORTS=("$@")
+else
+  PORTS=(${PORTS:-4431 4432 8443 4434 4435 11112})
+fi
+
+LADDER_MIN=${LADDER_MIN:-1}
+LADDER_MAX=${LADDER_MAX:-256}
+LADDER_FACTOR=${LADDER_FACTOR:-2}
+PAYLOAD_SIZE_MB=${PAYLOAD_SIZE_MB:-1}
+# Żądań na szczebel: co najmniej LADDER_ROUNDS pełnych partii i LADDER_MIN_REQUESTS
+LADDER_ROUNDS=${LADDER_ROUNDS:-4}
+LADDER_MIN_REQUESTS=${LADDER_MIN_REQUESTS:-32}
+
+# Jawna lista (LADDER="1 2 4 8 ...") ma pierwszeństwo przed min/max/factor
+if [[ -n "${LADDER:-}" ]]; then
+  STEPS=(${LADDER})
+else
+  STEPS=($(awk -v lo="$LADDER_MIN" -v hi="$LADDER_MAX" -v f="$LADDER_FACTOR" \
+    'BEGIN{ c=lo; last=0; while (c <= hi) { v=int(c+0.5); if (v>last) { printf "%d ", v; last=v }; c*=f } }'))
+fi
+
+source "$ROOT_DIR/scripts/common.sh"
+
+NETEM_PROFILE=$(get_netem_profile)
+AES=$([[ "${OPENSSL_ia32cap:-}" == "~0x200000200000000" ]] && echo "off" || echo "on")
+
+echo "==== Drabina concurrency (bulk ${PAYLOAD_SIZE_MB}MB) ===="
+echo "🪜 Szczeble: ${STEPS[*]}"
+echo "🌐 NetEm profile: $NETEM_PROFILE, 🔐 AES: $AES, porty: ${PORTS[*]}"
+
+for c in "${STEPS[@]}"; do
+  requests=$(( c * LADDER_ROUNDS ))
+  (( requests < LADDER_MIN_REQUESTS )) && requests=$LADDER_MIN_REQUESTS
+  # Jedno wywołanie na szczebel: run_bulk.sh z CLEAN=1 czyści wspólny katalog
+  # bulk/<profil>_<aes>_r_p_c, więc osobne wywołania per port zostawiłyby tylko ostatni
+  echo "-- porty=${PORTS[*]}, concurrency=${c}, requests=${requests} --"
+  PORTS="${PORTS[*]}" REQUESTS="$requests" CONCURRENCY="$c" PAYLOAD_SIZE_MB="$PAYLOAD_SIZE_MB" \
+    "$ROOT_DIR/scripts/run_bulk.sh" >/dev/null ||
+    echo "  ⚠️  run_bulk.sh nie powiódł się (c=$c)"
+done
+
+python3 "$ROOT_DIR/scaling.py" knee --results "${RESULTS_DIR:-$ROOT_DIR/results}" \
+  --figures "$ROOT_DIR/figures" --ports "${PORTS[@]}" \
+  --payload "$PAYLOAD_SIZE_MB" --aes "$AES" --profile "$NETEM_PROFILE"
+
+echo "✅ Drabina concurrency zakończona"
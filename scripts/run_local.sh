@@ -0,0 +1,51 @@
+#!/usr/bin/env bash
+# Dowolny runner na lokalnych serwerach localtls (Python asyncio + ssl), bez Dockera:
+#   ./scripts/run_local.sh run_handshake.sh
+#   LOCAL_PORTS="4431" SAMPLES=50 ./scripts/run_local.sh run_bulk.sh
+#   LOCALTLS_ARGS="--port 4436,TLS_AES_256_GCM_SHA384,P-256" PORTS="4436" ./scripts/run_local.sh ...
+# Polecenia `docker exec/run` runnerów obsługuje scripts/localdocker/docker (na hoście).
+# Wyniki trafiają do results_local/ (RESULTS_DIR), żeby nie zasłaniały wyników nginx
+# dla tych samych portów — porównanie: generate_charts.py --results results_local.
+set -euo pipefail
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+if [[ $# -lt 1 ]]; then
+  echo "Użycie: $0 <runner.sh> [argumenty runnera]" >&2
+  exit 1
+fi
+RUNNER=$1; shift
+[[ -x "$RUNNER" ]] || RUNNER="$ROOT_DIR/scripts/$RUNNER"
+[[ -x "$RUNNER" ]] || { echo "❌ brak runnera: $RUNNER" >&2; exit 1; }
+
+LOCAL_PORTS=${LOCAL_PORTS:-4431 4432}
+HOST=127.0.0.1
+
+if [[ ! -f "$ROOT_DIR/certs/ecdsa-p256.crt" ]]; then
+  echo "🔑 Brak certyfikatów — uruchamiam gen-certs.sh"
+  OPENSSL_BIN=${OPENSSL_BIN:-$(command -v openssl)} "$ROOT_DIR/scripts/gen-certs.sh" >/dev/null 2>&1
+fi
+
+STATE=$(mktemp -d "${TMPDIR:-/tmp}/localtls.XXXXXX")
+export LOCALTLS_STATE="$STATE"
+export LOCALTLS_PIDFILE="$STATE/localtls.pid"
+export TLS_TARGET=local
+export PATH="$ROOT_DIR/scripts/localdocker:$PATH"
+export RESULTS_DIR=${RESULTS_DIR:-$ROOT_DIR/results_local}
+export PORTS=${PORTS:-$LOCAL_PORTS}
+
+(cd "$ROOT_DIR" && exec python3 -m localtls --ports $LOCAL_PORTS ${LOCALTLS_ARGS:-} \
+  --host "$HOST" --pidfile "$LOCALTLS_PIDFILE") &
+SERVER_PID=$!
+trap 'kill "$SERVER_PID" 2>/dev/null || true; wait "$SERVER_PID" 2>/dev/null || true; rm -rf "$STATE"' EXIT
+
+# Czekaj aż wszystkie porty nasłuchują
+for port in $PORTS; do
+  for _ in $(seq 50); do
+    timeout 1 bash -c "echo >/dev/tcp/$HOST/$port" 2>/dev/null && break
+    kill -0 "$SERVER_PID" 2>/dev/null || { echo "❌ localtls nie wystartował" >&2; exit 1; }
+    sleep 0.1
+  done
+done
+
+echo "🐍 TLS_TARGET=local: $(basename "$RUNNER") na localtls (porty: $PORTS) -> $RESULTS_DIR"
+"$RUNNER" "$@"
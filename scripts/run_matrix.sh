@@ -14,9 +14,20 @@ COUNT_0RTT=${COUNT_0RTT:-10}
 PORTS=(${PORTS:-4431 4432 8443 4434 4435 11112})
 
 TIMESTAMP=$(date +%Y%m%d_%H%M%S)
-RUN_ROOT="$ROOT_DIR/results/run_matrix_${TIMESTAMP}"
+# Runnery piszą do RESULTS_DIR (run_local.sh: results_local/) — run i katalog wyników też
+OUTDIR="${RESULTS_DIR:-$ROOT_DIR/results}"
+RUN_ROOT="$OUTDIR/run_matrix_${TIMESTAMP}"
 mkdir -p "$RUN_ROOT"
 
+# Pre-flight kontroli szumu (PREFLIGHT=1) i odcisk środowiska — patrz fingerprint.py
+PREFLIGHT=${PREFLIGHT:-0}
+if [[ $PREFLIGHT -eq 1 ]]; then
+  python3 "$ROOT_DIR/fingerprint.py" preflight apply --state "$RUN_ROOT/preflight_state.json" || true
+  trap 'python3 "$ROOT_DIR/fingerprint.py" preflight restore --state "$RUN_ROOT/preflight_state.json" || true' EXIT
+fi
+python3 "$ROOT_DIR/fingerprint.py" collect --out "$RUN_ROOT/fingerprint.json" ||
+  echo "⚠️  Nie udało się zebrać fingerprint.json"
+
 copy_result() {
   # $1: src path, $2: dst dir, $3: aes tag (on/off)
   local src="$1" dst_dir="$2" aes="$3"
@@ -26,6 +37,13 @@ copy_result() {
   base=$(basename "$src")
   local name="${base%.json}_${aes}.json"
   cp "$src" "$dst_dir/$name"
+  [[ -f "${src%.json}.raw" ]] && cp "${src%.json}.raw" "$dst_dir/${name%.json}.raw"
+  return 0
+}
+
+find_result() {
+  # Najnowszy plik wyników pasujący do wymiarów (--test/--port/--aes/...)
+  python3 "$ROOT_DIR/results_catalog.py" --root "$OUTDIR" latest "$@" 2>/dev/null || true
 }
 
 apply_aes() {
@@ -37,34 +55,32 @@ apply_aes() {
   fi
 }
 
+source "$ROOT_DIR/scripts/sentinel.sh"
+SENTINEL_DIR="$RUN_ROOT"
+
 # Orchestration
 for aes in on off; do
   apply_aes "$aes"
   AES_DIR="$RUN_ROOT/aes_${aes}"
   mkdir -p "$AES_DIR"
+  # Odcisk per tryb AES (efektywny OPENSSL_ia32cap)
+  python3 "$ROOT_DIR/fingerprint.py" collect --out "$AES_DIR/fingerprint.json" >/dev/null || true
 
   for profile in "${PROFILES[@]}"; do
     echo "==> Applying NetEm profile: $profile"
     "$ROOT_DIR/scripts/netem_profiles.sh" "$profile"
+    # Odczyt na starcie profilu; referencja per profil (handshake zależy od NetEm)
+    sentinel_probe "$profile"
     PROFILE_DIR="$AES_DIR/$profile"
     mkdir -p "$PROFILE_DIR"
 
     echo "==> Handshake (${SAMPLES} samples)"
     SAMPLES="$SAMPLES" "$ROOT_DIR/scripts/run_handshake.sh" >/dev/null || true
+    sentinel_tick "aes_${aes}/$profile/handshake" "$profile"
     # Copy from new organized folder structure
     for p in "${PORTS[@]}"; do
-      # Try to find results in new organized folders first
-      src_file=""
-      aes_tag="aes_${aes}"
-      if [[ -f "$ROOT_DIR/results/handshake/baseline_${aes_tag}_s${SAMPLES}/handshake_${p}_s${SAMPLES}.json" ]]; then
-        src_file="$ROOT_DIR/results/handshake/baseline_${aes_tag}_s${SAMPLES}/handshake_${p}_s${SAMPLES}.json"
-      elif [[ -f "$ROOT_DIR/results/handshake/delay_50ms_${aes_tag}_s${SAMPLES}/handshake_${p}_s${SAMPLES}.json" ]]; then
-        src_file="$ROOT_DIR/results/handshake/delay_50ms_${aes_tag}_s${SAMPLES}/handshake_${p}_s${SAMPLES}.json"
-      elif [[ -f "$ROOT_DIR/results/handshake/delay_50ms_loss_0.5_${aes_tag}_s${SAMPLES}/handshake_${p}_s${SAMPLES}.json" ]]; then
-        src_file="$ROOT_DIR/results/handshake/delay_50ms_loss_0.5_${aes_tag}_s${SAMPLES}/handshake_${p}_s${SAMPLES}.json"
-      elif [[ -f "$ROOT_DIR/results/handshake/delay_100ms_${aes_tag}_s${SAMPLES}/handshake_${p}_s${SAMPLES}.json" ]]; then
-        src_file="$ROOT_DIR/results/handshake/delay_100ms_${aes_tag}_s${SAMPLES}/handshake_${p}_s${SAMPLES}.json"
-      fi
+      # Najnowszy wynik z katalogu (results_catalog.py)
+      src_file=$(find_result --test handshake --port "$p" --aes "$aes" --profile "$profile" --samples "$SAMPLES")
       if [[ -n "$src_file" ]]; then
         copy_result "$src_file" "$PROFILE_DIR/handshake" "$aes"
       fi
@@ -75,19 +91,11 @@ for aes in on off; do
       for conc in "${CONCURRENCIES[@]}"; do
         REQUESTS="$REQUESTS" PAYLOAD_SIZE_MB="$payload" CONCURRENCY="$conc" \
           "$ROOT_DIR/scripts/run_bulk.sh" >/dev/null || true
+        sentinel_tick "aes_${aes}/$profile/bulk/p${payload}_c${conc}" "$profile"
         for p in "${PORTS[@]}"; do
-          # Try to find results in new organized folders first
-          src_file=""
-          aes_tag="aes_${aes}"
-          if [[ -f "$ROOT_DIR/results/bulk/baseline_${aes_tag}_r${REQUESTS}_p${payload}_c${conc}/bulk_${p}_r${REQUESTS}_p${payload}_c${conc}.json" ]]; then
-            src_file="$ROOT_DIR/results/bulk/baseline_${aes_tag}_r${REQUESTS}_p${payload}_c${conc}/bulk_${p}_r${REQUESTS}_p${payload}_c${conc}.json"
-          elif [[ -f "$ROOT_DIR/results/bulk/delay_50ms_${aes_tag}_r${REQUESTS}_p${payload}_c${conc}/bulk_${p}_r${REQUESTS}_p${payload}_c${conc}.json" ]]; then
-            src_file="$ROOT_DIR/results/bulk/delay_50ms_${aes_tag}_r${REQUESTS}_p${payload}_c${conc}/bulk_${p}_r${REQUESTS}_p${payload}_c${conc}.json"
-          elif [[ -f "$ROOT_DIR/results/bulk/delay_50ms_loss_0.5_${aes_tag}_r${REQUESTS}_p${payload}_c${conc}/bulk_${p}_r${REQUESTS}_p${payload}_c${conc}.json" ]]; then
-            src_file="$ROOT_DIR/results/bulk/delay_50ms_loss_0.5_${aes_tag}_r${REQUESTS}_p${payload}_c${conc}/bulk_${p}_r${REQUESTS}_p${payload}_c${conc}.json"
-          elif [[ -f "$ROOT_DIR/results/bulk/delay_100ms_${aes_tag}_r${REQUESTS}_p${payload}_c${conc}/bulk_${p}_r${REQUESTS}_p${payload}_c${conc}.json" ]]; then
-            src_file="$ROOT_DIR/results/bulk/delay_100ms_${aes_tag}_r${REQUESTS}_p${payload}_c${conc}/bulk_${p}_r${REQUESTS}_p${payload}_c${conc}.json"
-          fi
+          # Najnowszy wynik z katalogu (results_catalog.py)
+          src_file=$(find_result --test bulk --port "$p" --aes "$aes" --profile "$profile" \
+            --requests "$REQUESTS" --payload "$payload" --concurrency "$conc")
           if [[ -n "$src_file" ]]; then
             copy_result "$src_file" "$PROFILE_DIR/bulk/p${payload}_c${conc}" "$aes"
           fi
@@ -99,19 +107,11 @@ for aes in on off; do
       echo "==> 0-RTT"
       for op in "${ORTT_PAYLOADS[@]}"; do
         EARLY_DATA_MB="$op" COUNT="$COUNT_0RTT" "$ROOT_DIR/scripts/run_0rtt.sh" >/dev/null || true
+        sentinel_tick "aes_${aes}/$profile/0rtt/ed${op}" "$profile"
         for p in 4431 4432 8443; do
-          # Try to find results in new organized folders first
-          src_file=""
-          aes_tag="aes_${aes}"
-          if [[ -f "$ROOT_DIR/results/0rtt/baseline_${aes_tag}_ed${op}_n${COUNT_0RTT}/simple_${p}_ed${op}_n${COUNT_0RTT}.json" ]]; then
-            src_file="$ROOT_DIR/results/0rtt/baseline_${aes_tag}_ed${op}_n${COUNT_0RTT}/simple_${p}_ed${op}_n${COUNT_0RTT}.json"
-          elif [[ -f "$ROOT_DIR/results/0rtt/delay_50ms_${aes_tag}_ed${op}_n${COUNT_0RTT}/simple_${p}_ed${op}_n${COUNT_0RTT}.json" ]]; then
-            src_file="$ROOT_DIR/results/0rtt/delay_50ms_${aes_tag}_ed${op}_n${COUNT_0RTT}/simple_${p}_ed${op}_n${COUNT_0RTT}.json"
-          elif [[ -f "$ROOT_DIR/results/0rtt/delay_50ms_loss_0.5_${aes_tag}_ed${op}_n${COUNT_0RTT}/simple_${p}_ed${op}_n${COUNT_0RTT}.json" ]]; then
-            src_file="$ROOT_DIR/results/0rtt/delay_50ms_loss_0.5_${aes_tag}_ed${op}_n${COUNT_0RTT}/simple_${p}_ed${op}_n${COUNT_0RTT}.json"
-          elif [[ -f "$ROOT_DIR/results/0rtt/delay_100ms_${aes_tag}_ed${op}_n${COUNT_0RTT}/simple_${p}_ed${op}_n${COUNT_0RTT}.json" ]]; then
-            src_file="$ROOT_DIR/results/0rtt/delay_100ms_${aes_tag}_ed${op}_n${COUNT_0RTT}/simple_${p}_ed${op}_n${COUNT_0RTT}.json"
-          fi
+          # Najnowszy wynik z katalogu (results_catalog.py)
+          src_file=$(find_result --test 0rtt --port "$p" --aes "$aes" --profile "$profile" \
+            --payload "$op" --count "$COUNT_0RTT")
           if [[ -n "$src_file" ]]; then
             copy_result "$src_file" "$PROFILE_DIR/0rtt/ed${op}" "$aes"
           fi
@@ -119,6 +119,7 @@ for aes in on off; do
       done
     fi
 
+    sentinel_probe "$profile"
     echo "-- Snapshot done for $profile / AES $aes"
   done
 
@@ -127,4 +128,8 @@ done
 # Clear NetEm at the end
 "$ROOT_DIR/scripts/netem_profiles.sh" clear || true
 
+if [[ $SENTINEL_EVERY -gt 0 ]]; then
+  python3 "$ROOT_DIR/sentinel.py" annotate "$RUN_ROOT" || true
+fi
+
 echo "✓ Matrix run saved under: $RUN_ROOT" 
\ No newline at end of file
@@ -0,0 +1,100 @@
+#!/usr/bin/env bash
+set -euo pipefail
+# Mikrobenchmarki AEAD: openssl speed -evp (nginx-oqs, AES-NI on/off) + wolfCrypt benchmark
+# MODE=handshake: prymitywy handshake'u (X25519, ML-KEM-768, ECDSA P-256, RSA-2048)
+ROOT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
+
+MODE=${MODE:-all}   # aead | handshake | all
+case $MODE in
+  aead|handshake|all) ;;
+  *) echo "❌ MODE=$MODE (dozwolone: aead, handshake, all)"; exit 1 ;;
+esac
+
+SECONDS_PER_ALG=${SECONDS_PER_ALG:-3}
+ALGS=(${ALGS:-aes-128-gcm aes-256-gcm chacha20-poly1305})
+# Rozmiary bloków wolfCrypt (openssl speed mierzy swój pełny zestaw 16…16384)
+WOLF_BLOCKS=(${WOLF_BLOCKS:-16 64 256 1024 8192 16384})
+AES_MODES=(${AES_MODES:-on off})
+NGINX_CONTAINER=${NGINX_CONTAINER:-tls-perf-nginx}
+# wolf-benchmark jest tylko w obrazie wolfssl-server (ten sam wolfCrypt co serwer 11112);
+# runtime lighttpd-wolfssl nie zawiera benchmarku — wynik służy też dla 4434/4435
+WOLF_CONTAINER=${WOLF_CONTAINER:-wolfssl-server}
+
+TS=$(date +%Y%m%d_%H%M%S)
+OUT_DIR="$ROOT_DIR/results/microbench/$TS"
+mkdir -p "$OUT_DIR"
+
+running() {
+  docker ps --format '{{.Names}}' | grep -qx "$1"
+}
+
+# Taktowanie CPU do przeliczenia bajtów/s na cykle/bajt (openssl nie podaje cykli)
+CPU_MHZ=${CPU_MHZ:-}
+if [[ -z "$CPU_MHZ" ]] && running "$NGINX_CONTAINER"; then
+  CPU_MHZ=$(docker exec "$NGINX_CONTAINER" awk -F: '/cpu MHz/{gsub(/ /,"",$2); print $2; exit}' /proc/cpuinfo 2>/dev/null || true)
+fi
+
+{
+  echo "Microbench: $TS"
+  echo "MODE: $MODE"
+  echo "SECONDS_PER_ALG: $SECONDS_PER_ALG"
+  echo "ALGS: ${ALGS[*]}"
+  echo "WOLF_BLOCKS: ${WOLF_BLOCKS[*]}"
+  echo "CPU_MHZ: ${CPU_MHZ:-?}"
+  echo "Host: $(uname -a)"
+} > "$OUT_DIR/config.txt"
+
+if [[ "$MODE" != "handshake" ]] && running "$NGINX_CONTAINER"; then
+  for aes in "${AES_MODES[@]}"; do
+    # Ta sama maska co run_all.sh AESNI=0 (AES-NI + PCLMULQDQ). "on" to jawne ~0: pusta
+    # wartość zeruje cały wektor (wszystkie rozszerzenia), a bez -e docker exec
+    # dziedziczy maskę z docker-compose
+    mask="~0"
+    [[ "$aes" == "off" ]] && mask="~0x200000200000000"
+    out="$OUT_DIR/openssl_aes_${aes}.txt"
+    : > "$out"
+    for alg in "${ALGS[@]}"; do
+      echo "🔐 openssl speed -evp $alg (AES-NI $aes)"
+      docker exec -e OPENSSL_ia32cap="$mask" "$NGINX_CONTAINER" \
+        openssl speed -mr -elapsed -seconds "$SECONDS_PER_ALG" -evp "$alg" >>"$out" 2>/dev/null \
+        || echo "  ⚠️  openssl speed $alg nie powiódł się"
+    done
+  done
+elif [[ "$MODE" != "handshake" ]]; then
+  echo "⏭️  $NGINX_CONTAINER nie działa — pomijam openssl speed"
+fi
+
+if [[ "$MODE" != "handshake" ]] && running "$WOLF_CONTAINER"; then
+  # wolfSSL nie ma przełącznika AES-NI w czasie działania (decyduje ./configure)
+  for size in "${WOLF_BLOCKS[@]}"; do
+    echo "🐺 wolf-benchmark blok ${size} B"
+    docker exec "$WOLF_CONTAINER" wolf-benchmark -aes-gcm -chacha20-poly1305 "$size" \
+      >"$OUT_DIR/wolfssl_aes_on_b${size}.txt" 2>&1 \
+      || echo "  ⚠️  wolf-benchmark ($size B) nie powiódł się"
+  done
+elif [[ "$MODE" != "handshake" ]]; then
+  echo "⏭️  $WOLF_CONTAINER nie działa — pomijam wolfCrypt benchmark"
+fi
+
+if [[ "$MODE" != "aead" ]]; then
+  # OpenSSL 3.5: ML-KEM-768 natywnie; starsze buildy — przez oqsprovider (mlkem768)
+  if running "$NGINX_CONTAINER"; then
+    out="$OUT_DIR/openssl_handshake_ops.txt"
+    echo "🔑 openssl speed ecdhx25519 ecdsap256 rsa2048 ML-KEM-768"
+    docker exec "$NGINX_CONTAINER" openssl speed -seconds "$SECONDS_PER_ALG" \
+      ecdhx25519 ecdsap256 rsa2048 >"$out" 2>/dev/null \
+      || echo "  ⚠️  openssl speed (ECDH/ECDSA/RSA) nie powiódł się"
+    docker exec "$NGINX_CONTAINER" openssl speed -seconds "$SECONDS_PER_ALG" ML-KEM-768 >>"$out" 2>/dev/null \
+      || docker exec "$NGINX_CONTAINER" openssl speed -seconds "$SECONDS_PER_ALG" \
+           -provider default -provider oqsprovider mlkem768 >>"$out" 2>/dev/null \
+      || echo "  ⚠️  openssl speed ML-KEM-768 nie powiódł się"
+  fi
+  if running "$WOLF_CONTAINER"; then
+    echo "🐺 wolf-benchmark -rsa -ecc -curve25519 -ml-kem"
+    docker exec "$WOLF_CONTAINER" wolf-benchmark -rsa -ecc -curve25519 -ml-kem \
+      >"$OUT_DIR/wolfssl_handshake_ops.txt" 2>&1 \
+      || echo "  ⚠️  wolf-benchmark (asym) nie powiódł się"
+  fi
+fi
+
+python3 "$ROOT_DIR/microbench.py" parse "$OUT_DIR" ${CPU_MHZ:+--cpu-mhz "$CPU_MHZ"}
@@ -10,38 +10,31 @@ fi
 if [[ $# -eq 1 ]]; then
   PORTS=("$1")
 else
-  PORTS=(4431 4432 8443 11112 4434 4435)
+  PORTS=(${PORTS:-4431 4432 8443 11112 4434 4435})
 fi
 
-OUTDIR="$ROOT_DIR/results"; mkdir -p "$OUTDIR"
+OUTDIR="${RESULTS_DIR:-$ROOT_DIR/results}"; mkdir -p "$OUTDIR"
 TTFB_PAYLOAD_KB=${TTFB_PAYLOAD_KB:-16}
+TTFB_SAMPLES=${TTFB_SAMPLES:-20}
+# cold: nowe połączenie (TCP + pełny handshake) na próbkę; warm: jedno połączenie,
+# kolejne żądania keep-alive (bez handshake'u) — pierwszy transfer odrzucany
+TTFB_MODES=(${TTFB_MODES:-cold warm})
+# TTFB_HTTP=2: curl --http2 (ALPN h2); tryb mux — TTFB_STREAMS równoległych strumieni
+# na jednym połączeniu h2 (--parallel), TTFB per strumień przy multipleksowaniu
+TTFB_HTTP=${TTFB_HTTP:-1.1}
+TTFB_STREAMS=${TTFB_STREAMS:-8}
+case $TTFB_HTTP in
+  1.1) HTTP_FLAG=--http1.1; TTFB_KIND=ttfb ;;
+  2)   HTTP_FLAG=--http2;   TTFB_KIND=ttfbh2 ;;
+  *)   echo "❌ TTFB_HTTP musi być 1.1 albo 2" >&2; exit 1 ;;
+esac
 
-# Determine NetEm profile from current network conditions
-get_netem_profile() {
-  # Check if NetEm is active and determine profile
-  if command -v dnctl >/dev/null 2>&1; then
-    local pipe_info=$(dnctl list 2>/dev/null | grep "pipe 1" || echo "")
-    if [[ -n "$pipe_info" ]]; then
-      if echo "$pipe_info" | grep -q "delay 50ms.*plr 0.005"; then
-        echo "delay_50ms_loss_0.5"  # P2
-      elif echo "$pipe_info" | grep -q "delay 50ms.*plr 0"; then
-        echo "delay_50ms"           # P1
-      elif echo "$pipe_info" | grep -q "delay 100ms.*plr 0"; then
-        echo "delay_100ms"          # P3
-      else
-        echo "custom"
-      fi
-    else
-      echo "baseline"               # P0 (no NetEm)
-    fi
-  else
-    echo "baseline"
-  fi
-}
+source "$ROOT_DIR/scripts/common.sh"
 
 # Create organized folder structure
 NETEM_PROFILE=$(get_netem_profile)
-TEST_DIR="$OUTDIR/ttfb/${NETEM_PROFILE}_kb${TTFB_PAYLOAD_KB}"
+# Wyniki h2 osobno (ttfb_h2/, prefiks ttfbh2_), żeby katalog wyników nie mieszał protokołów
+TEST_DIR="$OUTDIR/$([[ $TTFB_KIND == ttfbh2 ]] && echo ttfb_h2 || echo ttfb)/${NETEM_PROFILE}_kb${TTFB_PAYLOAD_KB}"
 
 # Clean and create test directory
 if [[ "${CLEAN:-1}" == "1" ]]; then
@@ -49,7 +42,7 @@ if [[ "${CLEAN:-1}" == "1" ]]; then
 fi
 mkdir -p "$TEST_DIR"
 
-echo "==== TTFB measurement (curl, payload=${TTFB_PAYLOAD_KB}KB, Organized Folder Structure) ===="
+echo "==== TTFB measurement (curl HTTP/${TTFB_HTTP}, payload=${TTFB_PAYLOAD_KB}KB, ${TTFB_SAMPLES} samples, modes: ${TTFB_MODES[*]}) ===="
 echo "📁 Test directory: $TEST_DIR"
 echo "🌐 NetEm profile: $NETEM_PROFILE"
 echo "📦 Payload: ${TTFB_PAYLOAD_KB}KB"
@@ -59,33 +52,118 @@ body_file=$(mktemp)
 head -c $((TTFB_PAYLOAD_KB * 1024)) /dev/zero > "$body_file"
 trap 'rm -f "$body_file"' EXIT
 
-measure_port() {
-  local port=$1
-  local url
+# Fazy per transfer (sekundy od startu transferu): połączenie TCP, koniec handshake'u
+# TLS, wysłanie żądania (pretransfer), pierwszy bajt odpowiedzi, całość; wersja HTTP
+W_FMT='%{http_code} %{num_connects} %{time_connect} %{time_appconnect} %{time_pretransfer} %{time_starttransfer} %{time_total} %{http_version}\n'
 
+curl_port() {
+  # curl_port <port> <liczba URL-i w jednym wywołaniu> [równoległość] — jedna linia W_FMT na transfer
+  local port=$1 n=$2 par=${3:-0} url
+  local args=(--silent --output /dev/null --cacert "$ROOT_DIR/certs/ca.pem" "$HTTP_FLAG" -w "$W_FMT")
+  if [[ $par -gt 0 ]]; then
+    args+=(--parallel --parallel-max "$par")
+  fi
   if [[ "$port" == "11112" ]]; then
     url="https://${HOST}:${port}/"
-    total=$(curl --silent --output /dev/null --cacert "$ROOT_DIR/certs/ca.pem" \
-            --http1.1 -X GET -w '%{time_total}' "$url" || echo "0")
+    args+=(-X GET)
   else
     url="https://${HOST}:${port}/upload"
-    total=$(curl --silent --output /dev/null --cacert "$ROOT_DIR/certs/ca.pem" \
-            -X POST --data-binary "@${body_file}" --http1.1 \
-            -w '%{time_total}' "$url" || echo "0")
+    args+=(-X POST --data-binary "@${body_file}")
   fi
+  local urls=()
+  for ((k = 0; k < n; k++)); do urls+=("$url"); done
+  curl "${args[@]}" "${urls[@]}" 2>/dev/null || true
+}
+
+measure_port() {
+  local port=$1
+  local samples
+  samples=$(mktemp)
+
+  for mode in "${TTFB_MODES[@]}"; do
+    case $mode in
+      cold)
+        for ((i = 0; i < TTFB_SAMPLES; i++)); do
+          curl_port "$port" 1 | sed "s/^/cold /" >>"$samples"
+        done
+        ;;
+      warm)
+        # N+1 transferów po tym samym połączeniu; pierwszy (z handshake'iem) odrzucony
+        curl_port "$port" $((TTFB_SAMPLES + 1)) | tail -n +2 | sed "s/^/warm /" >>"$samples"
+        ;;
+      mux)
+        # TTFB_SAMPLES transferów, po TTFB_STREAMS naraz na jednym połączeniu h2.
+        # Jak w warm: dodatkowy transfer otwiera połączenie i jest odrzucany (num_connects > 0;
+        # --parallel wypisuje w kolejności zakończenia). Strumienie czekające na to połączenie
+        # liczone od wysłania żądania (starttransfer − pretransfer), bez TCP/TLS handshake'u
+        if [[ $TTFB_HTTP != 2 ]]; then
+          echo "  ⏭️  tryb mux wymaga TTFB_HTTP=2"
+          continue
+        fi
+        curl_port "$port" $((TTFB_SAMPLES + 1)) "$TTFB_STREAMS" |
+          awk '$2 > 0 && !opened { opened = 1; next }
+               { $6 = sprintf("%.6f", $6 - $5); print "mux " $0 }' >>"$samples"
+        ;;
+      *)
+        echo "  ⚠️  nieznany tryb TTFB: $mode"
+        ;;
+    esac
+  done
 
-  ttfb="$total"
+  out="$TEST_DIR/${TTFB_KIND}_${port}_kb${TTFB_PAYLOAD_KB}.json"
+  # http_code 000 = transfer nieudany — pomijany
+  jq -Rn --arg port "$port" --arg kb "$TTFB_PAYLOAD_KB" --arg n "$TTFB_SAMPLES" \
+    --arg http "$TTFB_HTTP" --arg streams "$TTFB_STREAMS" '
+    def pct(p): sort | if length == 0 then null else .[((length - 1) * p | floor)] end;
+    def mean: if length == 0 then null else add / length end;
+    [inputs | split(" ") | select(length == 9 and .[1] != "000")
+      | {mode: .[0], conns: (.[2] | tonumber), connect_s: (.[3] | tonumber),
+         tls_done_s: (.[4] | tonumber), request_sent_s: (.[5] | tonumber),
+         ttfb_s: (.[6] | tonumber), total_s: (.[7] | tonumber), version: .[8]}] as $rows
+    | def dist(m): ($rows | map(select(.mode == m))) as $r
+        | if ($r | length) == 0 then null else
+            {n: ($r | length), new_connections: ($r | map(.conns) | add),
+             connect_s: ($r | map(.connect_s)), tls_done_s: ($r | map(.tls_done_s)),
+             request_sent_s: ($r | map(.request_sent_s)), ttfb_s: ($r | map(.ttfb_s)),
+             total_s: ($r | map(.total_s))} end;
+    dist("cold") as $cold | dist("warm") as $warm | dist("mux") as $mux
+    | ($cold // $warm) as $main
+    | {
+        port: ($port | tonumber),
+        payload_kb: ($kb | tonumber),
+        samples: ($n | tonumber),
+        method: "curl_starttransfer",
+        http: $http,
+        http_version: ($rows | map(.version) | group_by(.) | max_by(length) | .[0] // null),
+        ttfb_s: ($main.ttfb_s // [] | pct(0.5)),
+        ttfb_p95_s: ($main.ttfb_s // [] | pct(0.95)),
+        connect_p50_s: ($cold.connect_s // [] | pct(0.5)),
+        tls_done_p50_s: ($cold.tls_done_s // [] | pct(0.5)),
+        request_sent_p50_s: ($main.request_sent_s // [] | pct(0.5)),
+        avg_time: ($main.total_s // [] | mean),
+        ttfb_warm_s: ($warm.ttfb_s // [] | pct(0.5)),
+        ttfb_warm_p95_s: ($warm.ttfb_s // [] | pct(0.95)),
+        warm_new_connections: $warm.new_connections,
+        ttfb_mux_s: ($mux.ttfb_s // [] | pct(0.5)),
+        ttfb_mux_p95_s: ($mux.ttfb_s // [] | pct(0.95)),
+        mux_streams: (if $mux then ($streams | tonumber) else null end),
+        mux_new_connections: $mux.new_connections,
+        cold: $cold,
+        warm: $warm,
+        mux: $mux
+      }' <"$samples" >"$out"
+  rm -f "$samples"
+  cp "$out" "$TEST_DIR/${TTFB_KIND}_${port}.json"
 
-  out="$TEST_DIR/ttfb_${port}_kb${TTFB_PAYLOAD_KB}.json"
-  jq -n --arg port "$port" --arg ttfb "$ttfb" --arg total "$total" \
-    '{port:($port|tonumber), ttfb_s:($ttfb|tonumber), avg_time:($total|tonumber), method:"curl_total_as_ttfb"}' \
-    > "$out"
-  cp "$out" "$TEST_DIR/ttfb_${port}.json"
+  jq -r '"  📊 TTFB p50: cold \(.ttfb_s // "–") s (TLS \(.tls_done_p50_s // "–") s), warm \(.ttfb_warm_s // "–") s" +
+    (if (.warm_new_connections // 0) > 0 then " ⚠️  warm: \(.warm_new_connections) nowych połączeń (brak keep-alive)" else "" end) +
+    (if .ttfb_mux_s then ", mux×\(.mux_streams) \(.ttfb_mux_s) s" else "" end) +
+    (if .http == "2" and .http_version != "2" then " ⚠️  wynegocjowano HTTP/\(.http_version) zamiast h2" else "" end)' "$out"
 }
 
 for PORT in "${PORTS[@]}"; do
   measure_port "$PORT"
-  echo "✓ ${HOST}:${PORT} -> saved $TEST_DIR/ttfb_${PORT}.json"
+  echo "✓ ${HOST}:${PORT} -> saved $TEST_DIR/${TTFB_KIND}_${PORT}.json"
 done
 
 echo "✅ TTFB done"
@@ -0,0 +1,24 @@
+# Sentinel dryfu (sentinel.py) — wspólne hooki run_all.sh i run_matrix.sh (source, potem
+# ustawić SENTINEL_DIR): co SENTINEL_EVERY komórek stały pomiar referencyjny (AES-GCM speed
+# + seria handshake'ów 4431); SENTINEL_PAUSE=1 wstrzymuje run przy dryfie
+SENTINEL_EVERY=${SENTINEL_EVERY:-20}
+SENTINEL_TOL=${SENTINEL_TOL:-10}
+SENTINEL_PAUSE=${SENTINEL_PAUSE:-0}
+CELL=0
+sentinel_probe() {
+  [[ $SENTINEL_EVERY -gt 0 ]] || return 0
+  local wait_args=()
+  if [[ $SENTINEL_PAUSE -eq 1 ]]; then
+    wait_args=(--wait "${SENTINEL_WAIT_S:-30}" --max-wait "${SENTINEL_MAX_WAIT_S:-900}")
+  fi
+  python3 "$ROOT_DIR/sentinel.py" probe "$SENTINEL_DIR" --cell "$CELL" --context "${1:-default}" \
+    --tol "$SENTINEL_TOL" ${wait_args[@]+"${wait_args[@]}"} || true
+}
+sentinel_tick() {
+  # $1: etykieta komórki (cells.tsv), $2: kontekst referencji
+  CELL=$((CELL + 1))
+  printf '%s\t%s\n' "$CELL" "$1" >> "$SENTINEL_DIR/cells.tsv"
+  if [[ $SENTINEL_EVERY -gt 0 && $((CELL % SENTINEL_EVERY)) -eq 0 ]]; then
+    sentinel_probe "${2:-default}"
+  fi
+}
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Sentinel dryfu/termiki dla długich runów (run_all.sh, run_matrix.sh).
+
+Co SENTINEL_EVERY komórek runner wywołuje `probe`: stały pomiar referencyjny
+(`openssl speed -evp aes-128-gcm` w tls-perf-nginx + krótka seria handshake'ów na 4431
+w tym samym kontenerze, zawsze z AES-NI — jawne OPENSSL_ia32cap=~0) oraz odczyt częstotliwości CPU, temperatury i load.
+Odczyty trafiają do <run>/sentinel.jsonl. Referencja = pierwszy odczyt w danym kontekście
+(np. profil NetEm — handshake zależy od opóźnienia sieci). Odchylenie > --tol% = drift;
+z --wait sentinel wstrzymuje run i ponawia pomiar, aż host wróci do normy (lub --max-wait).
+
+`annotate` oznacza komórki z <run>/cells.tsv, które sąsiadują z odczytem drift
+(sentinel_flags.csv; opcjonalnie wiersze `sentinel_flag` w bench.csv), więc analiza
+może je wykluczyć (analyze.py --exclude-drift).
+
+Użycie:
+    python sentinel.py probe results/run_X --cell 40 --context P0 --tol 10 [--wait 30 --max-wait 900]
+    python sentinel.py annotate results/run_X [--bench results/run_X/bench.csv]
+    python sentinel.py show results/run_X
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent
+CONTAINER = "tls-perf-nginx"
+SPEED_CMD = ["/usr/local/bin/openssl", "speed", "-evp", "aes-128-gcm", "-seconds", "1",
+             "-bytes", "16384"]
+DEFAULT_PORT = 4431
+DEFAULT_SAMPLES = 5
+DEFAULT_TOL = 10.0
+# Metryki porównywane z referencją (temperatura/MHz/load tylko zapisywane)
+DRIFT_METRICS = ["aes_gcm_mb_s", "handshake_p50_ms"]
+EXIT_DRIFT = 3
+
+
+# Sentinel zawsze z AES-NI — stała referencja niezależnie od trybu komórki. Jawne ~0:
+# bez -e docker exec dziedziczy maskę ~0x200000200000000 z docker-compose
+EXEC = ["docker", "exec", "-e", "OPENSSL_ia32cap=~0", CONTAINER]
+
+
+def speed_mb_s() -> Optional[float]:
+    try:
+        r = subprocess.run([*EXEC, *SPEED_CMD], capture_output=True, text=True,
+                           timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    m = re.search(r"^AES-128-GCM\s+([\d.]+)k\s*$", r.stdout, re.M | re.I)
+    # openssl speed: tysiące bajtów/s
+    return round(float(m.group(1)) * 1000 / 1e6, 2) if m else None
+
+
+# Seria handshake'ów w jednym `docker exec` (czas w kontenerze, jak run_cert_matrix.sh),
+# z maską sentinela zamiast maski komórki z run_handshake.sh
+HANDSHAKE_LOOP = """
+for i in $(seq {samples}); do
+  t0=$(date +%s%N)
+  /usr/local/bin/openssl s_client -brief {groups}-tls1_3 -CAfile /etc/nginx/certs/ca.pem \\
+    -connect {host}:{port} </dev/null >/dev/null 2>&1 && ok=1 || ok=0
+  t1=$(date +%s%N)
+  echo "$((t1 - t0)) $ok"
+done
+"""
+PORT_GROUPS = {8443: "-provider default -provider oqsprovider -groups X25519MLKEM768 "}
+
+
+def handshake_p50_ms(port: int, samples: int, host: str = "localhost") -> Optional[float]:
+    script = HANDSHAKE_LOOP.format(samples=samples, host=host, port=port,
+                                   groups=PORT_GROUPS.get(port, "-provider default "))
+    try:
+        r = subprocess.run([*EXEC, "sh", "-c", script], capture_output=True,
+                           text=True, timeout=120)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    ns = [int(t) for t, ok in re.findall(r"^(\d+) ([01])$", r.stdout, re.M) if ok == "1"]
+    return round(float(np.median(ns)) / 1e6, 3) if ns else None
+
+
+def host_state() -> Dict:
+    freqs = []
+    for p in glob.glob("/sys/devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq"):
+        try:
+            freqs.append(int(Path(p).read_text()) / 1000)
+        except (OSError, ValueError):
+            pass
+    if not freqs:
+        try:
+            freqs = [float(x) for x in re.findall(r"^cpu MHz\s*:\s*([\d.]+)",
+                                                   Path("/proc/cpuinfo").read_text(), re.M)]
+        except OSError:
+            pass
+    temps = []
+    for p in glob.glob("/sys/class/thermal/thermal_zone*/temp"):
+        try:
+            temps.append(int(Path(p).read_text()) / 1000)
+        except (OSError, ValueError):
+            pass
+    try:
+        load = round(os.getloadavg()[0], 2)
+    except OSError:
+        load = None
+    return {
+        "cpu_mhz": round(float(np.mean(freqs)), 1) if freqs else None,
+        "temp_c": max(temps) if temps else None,
+        "loadavg": load,
+    }
+
+
+def measure(port: int, samples: int) -> Dict:
+    rec = {"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "epoch": round(time.time(), 3)}
+    rec["aes_gcm_mb_s"] = speed_mb_s()
+    rec["handshake_p50_ms"] = handshake_p50_ms(port, samples)
+    rec.update(host_state())
+    return rec
+
+
+def read_log(run_dir: Path) -> List[Dict]:
+    p = Path(run_dir) / "sentinel.jsonl"
+    if not p.exists():
+        return []
+    out = []
+    for line in p.read_text().splitlines():
+        try:
+            out.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return out
+
+
+def reference(log: List[Dict], context: str) -> Optional[Dict]:
+    for rec in log:
+        if rec.get("context") == context and rec.get("status") == "reference":
+            return rec
+    return None
+
+
+def drift(rec: Dict, ref: Dict) -> Dict[str, Optional[float]]:
+    """Odchylenie (%) każdej metryki od referencji"""
+    out = {}
+    for m in DRIFT_METRICS:
+        a, b = ref.get(m), rec.get(m)
+        out[m] = round((b / a - 1) * 100, 2) if a and b is not None else None
+    return out
+
+
+def classify(rec: Dict, ref: Optional[Dict], tol: float) -> str:
+    if all(rec.get(m) is None for m in DRIFT_METRICS):
+        return "error"
+    if ref is None:
+        return "reference"
+    d = [abs(v) for v in rec["drift_percent"].values() if v is not None]
+    return "drift" if d and max(d) > tol else "ok"
+
+
+def probe(run_dir: Path, cell: int, context: str, tol: float, port: int, samples: int,
+          wait: float = 0, max_wait: float = 0) -> str:
+    """Odczyt (z ponowieniami przy --wait); zwraca końcowy status"""
+    run_dir = Path(run_dir)
+    log_path = run_dir / "sentinel.jsonl"
+    ref = reference(read_log(run_dir), context)
+    started = time.time()
+    attempt = 0
+    while True:
+        rec = measure(port, samples)
+        rec.update(cell=cell, context=context, attempt=attempt, tol_percent=tol)
+        rec["drift_percent"] = drift(rec, ref) if ref else {}
+        rec["status"] = classify(rec, ref, tol)
+        with open(log_path, "a") as f:
+            f.write(json.dumps(rec) + "\n")
+        d = ", ".join(f"{k} {v:+.1f}%" for k, v in rec["drift_percent"].items() if v is not None)
+        icon = {"ok": "✅", "reference": "📌", "drift": "⚠️ ", "error": "❌"}[rec["status"]]
+        print(f"{icon} Sentinel [{context}] po komórce {cell}: AES-GCM {rec['aes_gcm_mb_s']} MB/s, "
+              f"handshake p50 {rec['handshake_p50_ms']} ms, {rec['cpu_mhz']} MHz, "
+              f"{rec['temp_c']} °C, load {rec['loadavg']}" + (f" ({d})" if d else ""))
+        if rec["status"] != "drift" or wait <= 0:
+            return rec["status"]
+        if time.time() - started + wait > max_wait:
+            print(f"⚠️  Sentinel: host nie wrócił do normy w {max_wait:.0f} s — kontynuuję, "
+                  "komórki zostaną oznaczone")
+            return rec["status"]
+        print(f"⏸️  Sentinel: drift > {tol}% — pauza {wait:.0f} s")
+        time.sleep(wait)
+        attempt += 1
+
+
+def read_cells(run_dir: Path) -> pd.DataFrame:
+    p = Path(run_dir) / "cells.tsv"
+    if not p.exists():
+        return pd.DataFrame(columns=["cell", "label"])
+    return pd.read_csv(p, sep="\t", names=["cell", "label"], dtype={"label": str})
+
+
+def flag_cells(log: List[Dict], cells: pd.DataFrame) -> pd.DataFrame:
+    """Komórka jest oznaczona, gdy pierwszy odczyt po niej (wejście sentinela) albo
+    końcowy odczyt przed nią (po ewentualnej pauzie) to drift"""
+    by_cell: Dict[int, List[Dict]] = {}
+    for rec in log:
+        by_cell.setdefault(int(rec["cell"]), []).append(rec)
+    points = sorted(by_cell)
+    entry = {c: sorted(r, key=lambda x: x.get("attempt", 0))[0] for c, r in by_cell.items()}
+    exit_ = {c: sorted(r, key=lambda x: x.get("attempt", 0))[-1] for c, r in by_cell.items()}
+
+    def worst(rec):
+        vals = [abs(v) for v in (rec or {}).get("drift_percent", {}).values() if v is not None]
+        return max(vals) if vals else np.nan
+
+    rows = []
+    for cell, label in cells.itertuples(index=False):
+        before = [c for c in points if c < cell]
+        after = [c for c in points if c >= cell]
+        prev = exit_[before[-1]] if before else None
+        nxt = entry[after[0]] if after else None
+        flagged = any(r is not None and r.get("status") == "drift" for r in (prev, nxt))
+        rows.append({
+            "cell": cell,
+            "label": label,
+            "flagged": int(flagged),
+            "drift_before_percent": worst(prev),
+            "drift_after_percent": worst(nxt),
+            "bracketed": prev is not None and nxt is not None,
+        })
+    return pd.DataFrame(rows)
+
+
+def annotate(run_dir: Path, bench: Optional[Path] = None) -> pd.DataFrame:
+    run_dir = Path(run_dir)
+    flags = flag_cells(read_log(run_dir), read_cells(run_dir))
+    flags.to_csv(run_dir / "sentinel_flags.csv", index=False)
+    if bench is not None and Path(bench).exists() and not flags.empty:
+        # Etykieta komórki w run_all.sh = implementation,suite,test,run
+        with open(bench, "a") as f:
+            for r in flags.itertuples():
+                if str(r.label).count(",") == 3:
+                    f.write(f"{r.label},sentinel_flag,{r.flagged},-\n")
+    return flags
+
+
+def drifted_runs(bench_df: pd.DataFrame) -> pd.DataFrame:
+    """(implementation, suite, test, run) oznaczone przez sentinel w bench.csv"""
+    keys = ["implementation", "suite", "test", "run"]
+    f = bench_df[(bench_df.metric == "sentinel_flag") & (bench_df.value == 1)]
+    return f[keys].drop_duplicates()
+
+
+def exclude_drift(bench_df: pd.DataFrame) -> pd.DataFrame:
+    keys = ["implementation", "suite", "test", "run"]
+    bad = drifted_runs(bench_df)
+    if bad.empty:
+        return bench_df
+    m = bench_df.merge(bad.assign(_drift=1), on=keys, how="left")
+    print(f"⚠️  Sentinel: pomijam {len(bad)} komórek oznaczonych jako drift")
+    return m[m._drift.isna()].drop(columns="_drift").reset_index(drop=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Sentinel dryfu/termiki dla długich runów")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("probe", help="pomiar referencyjny -> sentinel.jsonl")
+    p.add_argument("run_dir")
+    p.add_argument("--cell", type=int, default=0, help="liczba komórek wykonanych przed odczytem")
+    p.add_argument("--context", default="default", help="np. profil NetEm (osobna referencja)")
+    p.add_argument("--tol", type=float, default=DEFAULT_TOL, help="próg dryfu w %%")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="handshake'i w serii")
+    p.add_argument("--wait", type=float, default=0, help="pauza (s) między ponowieniami przy drift")
+    p.add_argument("--max-wait", type=float, default=900, help="maks. łączny czas pauzy (s)")
+    a = sub.add_parser("annotate", help="oznacz komórki -> sentinel_flags.csv")
+    a.add_argument("run_dir")
+    a.add_argument("--bench", help="dopisz wiersze sentinel_flag do bench.csv")
+    s = sub.add_parser("show", help="szereg czasowy odczytów")
+    s.add_argument("run_dir")
+    args = ap.parse_args()
+
+    if args.cmd == "probe":
+        status = probe(Path(args.run_dir), args.cell, args.context, args.tol, args.port,
+                       args.samples, args.wait, args.max_wait)
+        sys.exit(EXIT_DRIFT if status == "drift" else 0)
+    if args.cmd == "annotate":
+        flags = annotate(Path(args.run_dir), Path(args.bench) if args.bench else None)
+        n = int(flags.flagged.sum()) if not flags.empty else 0
+        print(f"{'⚠️ ' if n else '✅'} Sentinel: {n}/{len(flags)} komórek oznaczonych "
+              f"-> {Path(args.run_dir) / 'sentinel_flags.csv'}")
+        return
+    log = read_log(Path(args.run_dir))
+    if not log:
+        sys.exit("❌ Brak sentinel.jsonl")
+    df = pd.json_normalize(log)
+    cols = ["ts", "cell", "context", "attempt", "status", *DRIFT_METRICS, "cpu_mhz", "temp_c",
+            "loadavg", *[c for c in df.columns if c.startswith("drift_percent.")]]
+    print(df[[c for c in cols if c in df.columns]].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
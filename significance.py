@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Testy istotności (nieparametryczne) dla par próbek: AES-NI on/off, suite A vs B.
+
+- test permutacyjny różnicy średnich (wektoryzowany; komórki o tych samych
+  rozmiarach prób liczone jedną macierzą permutacji),
+- Mann–Whitney U (scipy, axis=1 — cała partia naraz),
+- estymator przesunięcia Hodgesa–Lehmanna (mediana różnic b_j - a_i),
+- korekta wielokrotnych porównań: Holm (FWER) i Benjamini–Hochberg (FDR).
+
+Użycie:
+    python significance.py results/a.json results/b.json
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.stats import mannwhitneyu
+
+DEFAULT_N_PERM = 10_000
+DEFAULT_SEED = 20250101
+ALPHA = 0.05
+# Maks. elementów macierzy permutacji w jednej porcji (pamięć)
+PERM_CHUNK_ELEMS = 20_000_000
+# Powyżej tylu par (a_i, b_j) HL liczony z losowej podpróby par
+HL_MAX_PAIRS = 4_000_000
+
+
+def _clean(x) -> np.ndarray:
+    x = np.asarray(x, dtype=float)
+    return x[~np.isnan(x)]
+
+
+def permutation_pvalues(
+    A: np.ndarray, B: np.ndarray, n_perm: int = DEFAULT_N_PERM, rng=None
+) -> np.ndarray:
+    """Dwustronne p dla różnicy średnich; A (C, na), B (C, nb) — C komórek naraz"""
+    rng = rng or np.random.default_rng(DEFAULT_SEED)
+    C, na = A.shape
+    nb = B.shape[1]
+    pooled = np.concatenate([A, B], axis=1)  # (C, N)
+    N = na + nb
+    total = pooled.sum(axis=1)
+    obs = np.abs(B.mean(axis=1) - A.mean(axis=1))
+    hits = np.zeros(C)
+    chunk = max(1, PERM_CHUNK_ELEMS // max(1, N * C))
+    done = 0
+    while done < n_perm:
+        m = min(chunk, n_perm - done)
+        # Ta sama permutacja dla wszystkich komórek partii — każde p nadal poprawne
+        perm = np.argsort(rng.random((m, N)), axis=1)[:, :na]  # (m, na)
+        sa = pooled[:, perm].sum(axis=2)  # (C, m)
+        diff = np.abs((total[:, None] - sa) / nb - sa / na)
+        hits += (diff >= obs[:, None] - 1e-12).sum(axis=1)
+        done += m
+    return (hits + 1) / (n_perm + 1)
+
+
+def hodges_lehmann(a: np.ndarray, b: np.ndarray, rng=None) -> float:
+    """Mediana różnic b_j - a_i (przesunięcie lokalizacji b względem a)"""
+    if len(a) == 0 or len(b) == 0:
+        return float("nan")
+    if len(a) * len(b) <= HL_MAX_PAIRS:
+        return float(np.median(b[None, :] - a[:, None]))
+    rng = rng or np.random.default_rng(DEFAULT_SEED)
+    i = rng.integers(0, len(a), HL_MAX_PAIRS)
+    j = rng.integers(0, len(b), HL_MAX_PAIRS)
+    return float(np.median(b[j] - a[i]))
+
+
+def holm(p: Sequence[float]) -> np.ndarray:
+    """Skorygowane p (Holm–Bonferroni); NaN pozostają NaN"""
+    p = np.asarray(p, dtype=float)
+    q = np.full_like(p, np.nan)
+    ok = ~np.isnan(p)
+    m = ok.sum()
+    if m == 0:
+        return q
+    ps = p[ok]
+    order = np.argsort(ps)
+    adj = np.maximum.accumulate((m - np.arange(m)) * ps[order])
+    out = np.empty(m)
+    out[order] = np.minimum(adj, 1.0)
+    q[ok] = out
+    return q
+
+
+def benjamini_hochberg(p: Sequence[float]) -> np.ndarray:
+    """Skorygowane p (Benjamini–Hochberg, FDR); NaN pozostają NaN"""
+    p = np.asarray(p, dtype=float)
+    q = np.full_like(p, np.nan)
+    ok = ~np.isnan(p)
+    m = ok.sum()
+    if m == 0:
+        return q
+    ps = p[ok]
+    order = np.argsort(ps)
+    ranked = ps[order] * m / np.arange(1, m + 1)
+    adj = np.minimum.accumulate(ranked[::-1])[::-1]
+    out = np.empty(m)
+    out[order] = np.minimum(adj, 1.0)
+    q[ok] = out
+    return q
+
+
+def stars(q: float) -> str:
+    """*** q<0.001, ** q<0.01, * q<0.05, n.s. w pozostałych przypadkach"""
+    if q is None or np.isnan(q):
+        return ""
+    if q < 0.001:
+        return "***"
+    if q < 0.01:
+        return "**"
+    if q < 0.05:
+        return "*"
+    return "n.s."
+
+
+def compare_pairs(
+    pairs: List[Tuple[Sequence[float], Sequence[float]]],
+    n_perm: int = DEFAULT_N_PERM,
+    seed: int = DEFAULT_SEED,
+    correction: str = "bh",
+) -> pd.DataFrame:
+    """Dla listy par (a, b): p_perm, p_mw, hl_shift, hl_percent, q (korekta po całej liście)"""
+    rng = np.random.default_rng(seed)
+    pairs = [(_clean(a), _clean(b)) for a, b in pairs]
+    n = len(pairs)
+    res = {
+        "n_a": np.array([len(a) for a, _ in pairs], dtype=int),
+        "n_b": np.array([len(b) for _, b in pairs], dtype=int),
+        "p_perm": np.full(n, np.nan),
+        "p_mannwhitney": np.full(n, np.nan),
+        "hl_shift": np.full(n, np.nan),
+        "hl_percent": np.full(n, np.nan),
+    }
+    # Partie komórek o identycznych rozmiarach prób
+    by_shape: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for i, (a, b) in enumerate(pairs):
+        if len(a) >= 2 and len(b) >= 2:
+            by_shape[(len(a), len(b))].append(i)
+    for (na, nb), idx in by_shape.items():
+        A = np.stack([pairs[i][0] for i in idx])
+        B = np.stack([pairs[i][1] for i in idx])
+        res["p_perm"][idx] = permutation_pvalues(A, B, n_perm, rng)
+        res["p_mannwhitney"][idx] = mannwhitneyu(
+            A, B, alternative="two-sided", axis=1
+        ).pvalue
+    for i, (a, b) in enumerate(pairs):
+        hl = hodges_lehmann(a, b, rng)
+        res["hl_shift"][i] = hl
+        med = np.median(a) if len(a) else np.nan
+        res["hl_percent"][i] = hl / med * 100 if med else np.nan
+    df = pd.DataFrame(res)
+    adjust = holm if correction == "holm" else benjamini_hochberg
+    df["q_value"] = adjust(df["p_perm"])
+    df["q_holm"] = holm(df["p_perm"])
+    df["significance"] = [stars(q) for q in df["q_value"]]
+    return df
+
+
+def samples_from_json(path: Path) -> Optional[np.ndarray]:
+    """Próbki z pliku wyników: raw_measurements (s->ms) lub request_times_s"""
+    try:
+        js = json.loads(Path(path).read_text())
+    except Exception:
+        return None
+    if isinstance(js.get("raw_measurements"), list):
+        return np.asarray(js["raw_measurements"], dtype=float) * 1000
+    if isinstance(js.get("request_times_s"), list):
+        return np.asarray(js["request_times_s"], dtype=float)
+    return None
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Test istotności: dwa pliki wyników JSON")
+    p.add_argument("a", help="plik JSON (grupa referencyjna)")
+    p.add_argument("b", help="plik JSON (grupa porównywana)")
+    p.add_argument("--perm", type=int, default=DEFAULT_N_PERM, help="liczba permutacji")
+    p.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    a, b = samples_from_json(args.a), samples_from_json(args.b)
+    if a is None or b is None:
+        sys.exit("❌ Brak próbek (raw_measurements / request_times_s) w plikach")
+    row = compare_pairs([(a, b)], n_perm=args.perm, seed=args.seed).iloc[0]
+    print(f"n: {row.n_a} vs {row.n_b}")
+    print(f"średnia: {a.mean():.4f} vs {b.mean():.4f} ({(b.mean() - a.mean()) / a.mean() * 100:+.1f}%)")
+    print(f"Hodges–Lehmann: {row.hl_shift:+.4f} ({row.hl_percent:+.1f}%)")
+    print(f"p (permutacyjny): {row.p_perm:.4g}, p (Mann–Whitney): {row.p_mannwhitney:.4g}")
+    print("✅ istotne" if row.p_perm < ALPHA else "➖ brak istotnej różnicy")
+
+
+if __name__ == "__main__":
+    main()
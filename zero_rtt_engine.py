@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Silnik 0-RTT: pula biletów sesji + próby wznowienia z early data.
+
+Przebieg per port:
+  1. prefill — jednym przejściem (równolegle) zbiera pulę biletów (s_client -sess_out);
+     przy włączonym anti-replay OpenSSL każdy bilet nadaje się do jednego 0-RTT
+  2. próby — `--attempts` wznowień z `-early_data` przy `--concurrency` równoległych
+     klientach; każda próba zużywa świeży bilet
+  3. klasyfikacja z wyjścia s_client: "Early data was accepted" / "was rejected" /
+     "was not sent" / błąd zapisu early data (za duże względem max_early_data biletu)
+  4. wyszukiwanie binarne największego rozmiaru early data akceptowanego przez serwer
+     (nginx: max_early_data = 16 KB niezależnie od konfiguracji)
+
+Czas próby to czas ścienny procesu s_client (z narzutem `--exec`, np. docker exec —
+podawany osobno jako exec_overhead_s). Gdy serwer odrzuci early data (albo nie zostały
+wysłane), to samo żądanie idzie ponownie po handshake'u (1-RTT), więc czas obejmuje
+odpowiedź. Próby przerwane po `--timeout` mają status "timeout" i nie wchodzą do czasów.
+
+Użycie:
+    python zero_rtt_engine.py --ports 4431 --early-data-mb 0.01 --attempts 50 \\
+        --concurrency 8 --out results/0rtt/.../simple_4431_ed0.01_n50.json
+    python zero_rtt_engine.py --ports 8443 --exec "docker exec -i tls0rtt-client" \\
+        --local-dir /tmp/x --remote-dir /tmp_sess ...
+"""
+
+import argparse
+import json
+import math
+import re
+import shlex
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_PORTS = [4431, 4432, 8443]
+ATTEMPT_TIMEOUT_S = 30
+# Porty z grupą hybrydową — s_client potrzebuje oqsprovider
+PORT_ARGS = {
+    8443: ["-provider", "default", "-provider", "oqsprovider", "-groups", "X25519MLKEM768"],
+}
+STATUS_RE = re.compile(r"Early data was (accepted|rejected|not sent)")
+RESEND_RE = re.compile(r"Early data was (rejected|not sent)")
+REUSED_RE = re.compile(r"^Reused, TLSv1\.3", re.M)
+MAX_EARLY_RE = re.compile(r"Max Early Data:\s*(\d+)")
+
+
+class Client:
+    """s_client uruchamiany lokalnie albo przez prefiks `--exec` (docker exec)"""
+
+    def __init__(self, host: str, port: int, exec_prefix: str, local_dir: Path,
+                 remote_dir: Optional[str], cafile: str, timeout: float = ATTEMPT_TIMEOUT_S):
+        self.host, self.port = host, port
+        self.timeout = timeout
+        self.prefix = shlex.split(exec_prefix) if exec_prefix else []
+        self.local_dir = Path(local_dir)
+        self.remote_dir = remote_dir or str(self.local_dir)
+        self.cafile = cafile
+
+    def remote(self, name: str) -> str:
+        return f"{self.remote_dir}/{name}"
+
+    def run(self, args: List[str], stdin: bytes = b"", resend: Optional[bytes] = None,
+            kill_tag: Optional[str] = None) -> Dict:
+        """resend: bajty wysyłane na stdin po odrzuceniu early data (stdin zostaje otwarte);
+        kill_tag: wzorzec `pkill -f` dla procesu po stronie `--exec` po przekroczeniu czasu"""
+        cmd = self.prefix + ["openssl"] + args
+        start = time.perf_counter()
+        p = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                             stderr=subprocess.STDOUT)
+        lines: List[str] = []
+
+        def pump():
+            for raw in p.stdout:
+                line = raw.decode(errors="replace")
+                lines.append(line)
+                if resend is not None and RESEND_RE.search(line):
+                    _feed(p, resend, close=True)
+
+        reader = threading.Thread(target=pump, daemon=True)
+        reader.start()
+        _feed(p, stdin, close=resend is None)
+        timed_out = False
+        try:
+            p.wait(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            p.kill()
+            # kill zabija tylko klienta docker exec — openssl w kontenerze żyłby dalej
+            if self.prefix and kill_tag:
+                subprocess.run(self.prefix + ["pkill", "-f", kill_tag],
+                               capture_output=True, timeout=10, check=False)
+            p.wait()
+        elapsed = time.perf_counter() - start
+        reader.join(timeout=5)
+        _feed(p, b"", close=True)
+        return {"elapsed_s": elapsed, "output": "".join(lines), "timeout": timed_out}
+
+    def s_client(self, extra: List[str], stdin: bytes = b"", resend: Optional[bytes] = None,
+                 kill_tag: Optional[str] = None) -> Dict:
+        args = ["s_client", "-tls1_3", *PORT_ARGS.get(self.port, ["-provider", "default"]),
+                "-CAfile", self.cafile, "-connect", f"{self.host}:{self.port}", *extra]
+        return self.run(args, stdin, resend, kill_tag)
+
+    def overhead_s(self, n: int = 5) -> float:
+        """Mediana czasu `openssl version` — narzut uruchomienia (exec/fork)"""
+        return float(np.median([self.run(["version"])["elapsed_s"] for _ in range(n)]))
+
+
+def _feed(p: subprocess.Popen, data: bytes, close: bool):
+    try:
+        if data:
+            p.stdin.write(data)
+            p.stdin.flush()
+        if close:
+            p.stdin.close()
+    except (OSError, ValueError):
+        pass  # proces już zakończony / stdin zamknięte
+
+
+class TicketPool:
+    """Pula jednorazowych biletów sesji (pliki PEM w local_dir)"""
+
+    def __init__(self, client: Client, workers: int):
+        self.client = client
+        self.workers = max(1, workers)
+        self.tickets: List[str] = []
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def _fetch(self) -> Optional[str]:
+        with self._lock:
+            self._seq += 1
+            name = f"sess_{self.client.port}_{self._seq}.pem"
+        # Żądanie HTTP zmusza klienta do odczytu NewSessionTicket przed zamknięciem
+        req = f"GET / HTTP/1.1\r\nHost: {self.client.host}\r\nConnection: close\r\n\r\n"
+        self.client.s_client(["-ign_eof", "-sess_out", self.client.remote(name)], req.encode(),
+                             kill_tag=self.client.remote(name))
+        path = self.client.local_dir / name
+        return name if path.exists() and path.stat().st_size > 0 else None
+
+    def prefill(self, n: int) -> int:
+        with ThreadPoolExecutor(self.workers) as ex:
+            got = [t for t in ex.map(lambda _: self._fetch(), range(n)) if t]
+        self.tickets.extend(got)
+        return len(got)
+
+    def take(self) -> Optional[str]:
+        with self._lock:
+            if self.tickets:
+                return self.tickets.pop()
+        return self._fetch()  # pula wyczerpana — bilet na żądanie
+
+    def max_early_data(self) -> Optional[int]:
+        """max_early_data zapisane w bilecie (limit serwera)"""
+        if not self.tickets:
+            return None
+        res = self.client.run(["sess_id", "-in", self.client.remote(self.tickets[-1]),
+                               "-noout", "-text"])
+        m = MAX_EARLY_RE.search(res["output"])
+        return int(m.group(1)) if m else None
+
+
+def early_data_file(local_dir: Path, host: str, size: int) -> str:
+    """Żądanie POST /upload o łącznym rozmiarze `size` B (nagłówek + ciało)"""
+    name = f"early_{size}.bin"
+    path = Path(local_dir) / name
+    if not path.exists():
+        def head(n: int) -> bytes:
+            return (f"POST /upload HTTP/1.1\r\nHost: {host}\r\n"
+                    f"Content-Length: {n}\r\nConnection: close\r\n\r\n").encode()
+
+        body = max(0, size - len(head(0)))
+        body = max(0, size - len(head(body)))  # liczba cyfr Content-Length zależy od body
+        path.write_bytes(head(body) + b"\0" * body)
+    return name
+
+
+def classify(output: str, timed_out: bool = False) -> Dict:
+    m = STATUS_RE.search(output)
+    if timed_out:
+        status = "timeout"
+    elif m:
+        status = m.group(1).replace(" ", "_")
+    elif "Error writing early data" in output or "too much early data" in output.lower():
+        status = "too_large"
+    else:
+        status = "error"
+    return {"status": status, "resumed": bool(REUSED_RE.search(output))}
+
+
+def attempt(client: Client, pool: TicketPool, ed_name: str) -> Dict:
+    ticket = pool.take()
+    if ticket is None:
+        return {"status": "no_ticket", "resumed": False, "elapsed_s": None}
+    # Po odrzuceniu early data s_client nic nie wysyła (-ign_eof czekałby do timeoutu) —
+    # to samo żądanie idzie wtedy przez stdin jako zwykłe 1-RTT
+    res = client.s_client(["-ign_eof", "-sess_in", client.remote(ticket),
+                           "-early_data", client.remote(ed_name)],
+                          resend=(client.local_dir / ed_name).read_bytes(),
+                          kill_tag=client.remote(ticket))
+    (client.local_dir / ticket).unlink(missing_ok=True)
+    return {**classify(res["output"], res["timeout"]), "elapsed_s": res["elapsed_s"]}
+
+
+def search_max_early(client: Client, pool: TicketPool, lo: int, hi: int,
+                     granularity: int) -> Dict:
+    """Wyszukiwanie binarne największego akceptowanego rozmiaru early data [B]"""
+    probes = []
+
+    def ok(size: int) -> bool:
+        r = attempt(client, pool, early_data_file(client.local_dir, client.host, size))
+        probes.append({"bytes": size, "status": r["status"]})
+        return r["status"] == "accepted"
+
+    if not ok(lo):
+        return {"max_early_data_bytes": 0, "search_probes": probes}
+    if ok(hi):
+        return {"max_early_data_bytes": hi, "search_probes": probes}
+    while hi - lo > granularity:
+        mid = (lo + hi) // 2
+        if ok(mid):
+            lo = mid
+        else:
+            hi = mid
+    return {"max_early_data_bytes": lo, "search_probes": probes}
+
+
+def _pct(x: List[float], q: float) -> Optional[float]:
+    return float(np.percentile(x, q)) if x else None
+
+
+def summarize(results: List[Dict]) -> Dict:
+    counts = {s: sum(r["status"] == s for r in results)
+              for s in ("accepted", "rejected", "not_sent", "too_large", "timeout", "error",
+                        "no_ticket")}
+    acc = [r["elapsed_s"] for r in results if r["status"] == "accepted"]
+    rej = [r["elapsed_s"] for r in results if r["status"] == "rejected"]
+    timed = acc + rej
+    return {
+        "attempts": len(results),
+        **counts,
+        "resumed": sum(r["resumed"] for r in results),
+        "acceptance_ratio": counts["accepted"] / len(results) if results else None,
+        # avg_time: jak dotąd średni czas próby 0-RTT (tylko próby, które doszły do serwera)
+        "avg_time": float(np.mean(timed)) if timed else None,
+        "accepted_p50_s": _pct(acc, 50),
+        "accepted_p95_s": _pct(acc, 95),
+        "rejected_p50_s": _pct(rej, 50),
+        "rejected_p95_s": _pct(rej, 95),
+        "accepted_latency_s": acc,
+        "rejected_latency_s": rej,
+    }
+
+
+def run_port(args, port: int) -> Dict:
+    local_dir = Path(args.local_dir)
+    local_dir.mkdir(parents=True, exist_ok=True)
+    client = Client(args.host, port, args.exec, local_dir, args.remote_dir, args.cafile,
+                    args.timeout)
+    ed_bytes = int(args.early_data_mb * 1048576)
+
+    n_search = 0
+    if not args.no_search:
+        n_search = 2 + math.ceil(math.log2(max(2, (args.search_max - args.search_min)
+                                                / args.search_granularity)))
+    pool = TicketPool(client, args.concurrency)
+    t0 = time.perf_counter()
+    filled = pool.prefill(args.attempts + n_search)
+    prefill_s = time.perf_counter() - t0
+    print(f"  🔑 port {port}: {filled}/{args.attempts + n_search} biletów w {prefill_s:.1f}s")
+    ticket_max = pool.max_early_data()
+
+    ed_name = early_data_file(local_dir, args.host, ed_bytes)
+    with ThreadPoolExecutor(args.concurrency) as ex:
+        results = list(ex.map(lambda _: attempt(client, pool, ed_name), range(args.attempts)))
+
+    out = {
+        "port": port,
+        "method": "openssl_s_client_0rtt_engine",
+        "early_data_bytes": ed_bytes,
+        "concurrency": args.concurrency,
+        "pool_size": filled,
+        "pool_prefill_s": prefill_s,
+        "ticket_max_early_data": ticket_max,
+        "exec_overhead_s": client.overhead_s(),
+        **summarize(results),
+    }
+    if not args.no_search:
+        out.update(search_max_early(client, pool, args.search_min, args.search_max,
+                                    args.search_granularity))
+    for t in pool.tickets:
+        (local_dir / t).unlink(missing_ok=True)
+
+    ratio = out["acceptance_ratio"]
+    print(
+        f"  📊 port {port}: accepted {out['accepted']}/{out['attempts']}"
+        f" ({(ratio or 0) * 100:.0f}%), rejected {out['rejected']},"
+        f" za duże {out['too_large']}, timeout {out['timeout']},"
+        f" błędy {out['error'] + out['no_ticket']};"
+        f" max early data {out.get('max_early_data_bytes', '–')} B"
+        f" (bilet: {ticket_max if ticket_max is not None else '?'} B)"
+    )
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="0-RTT: pula biletów + akceptacja early data")
+    ap.add_argument("--ports", type=int, nargs="+", default=DEFAULT_PORTS)
+    ap.add_argument("--host", default="localhost")
+    ap.add_argument("--early-data-mb", type=float, default=0.01,
+                    help="rozmiar early data w MB (łącznie z nagłówkiem HTTP)")
+    ap.add_argument("--attempts", type=int, default=20, help="liczba prób 0-RTT na port")
+    ap.add_argument("--concurrency", type=int, default=4, help="równoległe próby")
+    ap.add_argument("--exec", default="", help="prefiks polecenia, np. 'docker exec -i NAME'")
+    ap.add_argument("--local-dir", default="/tmp/tls0rtt", help="katalog biletów na hoście")
+    ap.add_argument("--remote-dir", help="ten sam katalog widziany przez --exec")
+    ap.add_argument("--cafile", default="certs/ca.pem", help="CA (ścieżka dla --exec)")
+    ap.add_argument("--timeout", type=float, default=ATTEMPT_TIMEOUT_S,
+                    help="limit czasu jednej próby s_client [s]")
+    ap.add_argument("--no-search", action="store_true", help="bez wyszukiwania max early data")
+    ap.add_argument("--search-min", type=int, default=128)
+    ap.add_argument("--search-max", type=int, default=65536)
+    ap.add_argument("--search-granularity", type=int, default=256)
+    ap.add_argument("--out", help="plik JSON (jeden port) albo katalog (simple_<port>.json)")
+    args = ap.parse_args()
+
+    for port in args.ports:
+        res = run_port(args, port)
+        if not args.out:
+            print(json.dumps(res, indent=2))
+            continue
+        out = Path(args.out)
+        path = out if out.suffix == ".json" and len(args.ports) == 1 else out / f"simple_{port}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(res, indent=2))
+
+
+if __name__ == "__main__":
+    main()